@@ -0,0 +1,74 @@
+"""
+Compare the API authentication classes under polling load.
+
+Each endpoint is requested REQUESTS times with the same access token, once
+authenticated by simplejwt's `JWTAuthentication` (a user query per request)
+and once by `CachedJWTAuthentication` (a cache lookup per request). The
+cache is in process memory here, so the timings leave out the Redis round
+trip that replaces the query in production.
+
+Usage (from `src/`):
+    python -m benchmarks.bench_auth
+"""
+import time
+from unittest.mock import patch
+
+from benchmarks.utils import setup_django, teardown_django
+
+REQUESTS = 500
+
+
+def main() -> None:
+    setup_django()
+    try:
+        from django.contrib.auth.models import User
+        from django.db import connection
+        from django.test import override_settings
+        from django.test.utils import CaptureQueriesContext
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+        from rest_framework.views import APIView
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from scraper.authentication import CachedJWTAuthentication
+        from scraper.persistence import save_quotes
+        from scraper.validation import validate_quotes
+
+        override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}).enable()
+        save_quotes(validate_quotes([
+            {
+                "text": f"Quote {i}",
+                "author": f"Author {i % 10}",
+                "author_url": f"https://quotes.toscrape.com/author/Author-{i % 10}",
+                "tags": [{"name": f"tag-{i % 5}", "url": f"https://quotes.toscrape.com/tag/tag-{i % 5}/"}],
+            }
+            for i in range(100)
+        ])[0])
+        user = User.objects.create_user(username="reader", password="password")
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+
+        print(f"{REQUESTS} requests per endpoint")
+        print(f"{'endpoint':<14} {'authentication':<26} {'queries/request':>16} {'ms/request':>11}")
+        for name in ("author-stats", "quote-changes", "scraped-quotes"):
+            url = reverse(name)
+            for auth_class in (JWTAuthentication, CachedJWTAuthentication):
+                with patch.object(APIView, "get_authenticators", lambda self: [auth_class()]):
+                    # Warm both caches, then measure.
+                    client.get(url)
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        for _ in range(REQUESTS):
+                            client.get(url)
+                        elapsed = time.perf_counter() - start
+                print(
+                    f"{name:<14} {auth_class.__name__:<26} {len(queries) / REQUESTS:>16.2f} "
+                    f"{elapsed / REQUESTS * 1000:>11.2f}"
+                )
+    finally:
+        teardown_django()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Compare the memory held by a synthetic 100k-quote crawl.
+
+Old representation: one dict per quote and per tag, with the author and tag
+URLs rebuilt by f-strings for every occurrence (what `QuoteParser` used to do).
+New representation: slotted `QuoteItem`s sharing interned `TagRef`s and URLs
+through the parser's URL-join cache.
+
+Both are also measured after `validate_quotes`, with the scraped items and
+the validated ones held together, as a crawl holds them until they are
+persisted. Validation normalizes QuoteItems in place; dict items are turned
+into QuoteItems.
+
+Usage (from `src/`):
+    python -m benchmarks.bench_items
+"""
+import random
+import tracemalloc
+from types import SimpleNamespace
+
+from scraper.parsers.quote_parser import QuoteParser
+
+QUOTES = 100_000
+AUTHORS = 2_000
+TAGS = 500
+BASE_URL = "https://quotes.toscrape.com"
+
+
+def synthetic_crawl():
+    """
+    Yield the raw values a parser extracts from each quote element.
+    """
+    rng = random.Random(42)
+    for i in range(QUOTES):
+        author = f"Author {rng.randrange(AUTHORS)}"
+        tags = [f"tag-{rng.randrange(TAGS)}" for _ in range(rng.randint(1, 4))]
+        # Every element yields freshly built strings, as BeautifulSoup does.
+        yield (
+            f"Quote number {i}: " + "lorem ipsum " * 6,
+            author,
+            f"/author/{author.replace(' ', '-')}",
+            [(tag, f"/tag/{tag}/page/1/") for tag in tags],
+        )
+
+
+def old_items():
+    return [
+        {
+            "text": text,
+            "author": author,
+            "author_url": f"{BASE_URL}{author_href}",
+            "tags": [{"name": name, "url": f"{BASE_URL}{href}"} for name, href in tags],
+            "goodreads_link": None,
+        }
+        for text, author, author_href, tags in synthetic_crawl()
+    ]
+
+
+def new_items():
+    from scraper.items import QuoteItem
+
+    parser = QuoteParser(SimpleNamespace(base_url=BASE_URL))
+    return [
+        QuoteItem(
+            text=text,
+            author=author,
+            author_url=parser.join_url(author_href),
+            tags=tuple(parser.tag_ref(name, href) for name, href in tags),
+        )
+        for text, author, author_href, tags in synthetic_crawl()
+    ]
+
+
+def validated(build):
+    def build_and_validate():
+        from scraper.validation import validate_quotes
+
+        items = build()
+        return items, validate_quotes(items)[0]
+    return build_and_validate
+
+
+def measure(build) -> float:
+    """
+    Return the memory (MiB) still allocated by the items `build` returns.
+    """
+    tracemalloc.start()
+    items = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return current / 1024 / 1024
+
+
+def main() -> None:
+    old = measure(old_items)
+    new = measure(new_items)
+    old_validated = measure(validated(old_items))
+    new_validated = measure(validated(new_items))
+    print(f"{QUOTES} quotes")
+    print(f"{'':16} {'scraped':>10} {'validated':>10}")
+    print(f"{'dict items':16} {old:>6.1f} MiB {old_validated:>6.1f} MiB")
+    print(f"{'slotted items':16} {new:>6.1f} MiB {new_validated:>6.1f} MiB")
+    print(f"saving:          {old - new:>6.1f} MiB ({(1 - new / old) * 100:.0f}%), "
+          f"{old_validated - new_validated:.1f} MiB after validation ({(1 - new_validated / old_validated) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Measure the per-item logging overhead of the scraping hot path.
+
+- per-item line: the former `logger.info(f"Saving quote: ...")`, formatted
+  eagerly and written by a handler, once per quote.
+- event, filtered: `EventLogger.debug` at the default INFO level, the way
+  per-item events are logged now (a level check, no formatting).
+- event, sampled: `EventLogger.info` of an event sampled at 1%.
+
+Then `save_quotes` is timed on ITEMS new quotes with the scraper loggers at
+INFO (per-item events filtered out) and at DEBUG (every per-item event
+written), which is the cost the per-run summaries removed.
+
+Records are written to an in-memory stream, so the timings leave out the
+disk and the log pipeline.
+
+Usage (from `src/`):
+    python -m benchmarks.bench_logging
+"""
+import io
+import logging
+
+from benchmarks.utils import best_of, setup_django, teardown_django
+
+ITEMS = 20_000
+QUOTES = 2_000
+
+
+def main() -> None:
+    setup_django()
+    try:
+        from django.test import override_settings
+
+        from data.models import Quote
+        from scraper.logs import EventLogger
+        from scraper.persistence import save_quotes
+        from scraper.validation import validate_quotes
+
+        override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}).enable()
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        scraper_logger = logging.getLogger("scraper")
+        scraper_logger.addHandler(handler)
+        scraper_logger.propagate = False
+        scraper_logger.setLevel(logging.INFO)
+
+        logger = logging.getLogger("scraper.bench")
+        log = EventLogger("scraper.bench")
+        text, author = "“The world as we have created it is a process of our thinking.”", "Albert Einstein"
+
+        def per_item_line():
+            for _ in range(ITEMS):
+                logger.info(f"Saving quote: {text} by {author}")
+
+        def filtered_event():
+            for _ in range(ITEMS):
+                log.debug("quote.inserted", "Saving quote: %(text)s by %(author)s", text=text, author=author)
+
+        def sampled_event():
+            for _ in range(ITEMS):
+                log.info("bench.sampled", "Saving quote: %(text)s by %(author)s", text=text, author=author)
+
+        print(f"{ITEMS} per-item log calls, best of 5")
+        with override_settings(SCRAPE_LOG_SAMPLE_RATES={"bench.sampled": 0.01}):
+            for name, func in (
+                ("per-item line", per_item_line),
+                ("event, filtered", filtered_event),
+                ("event, sampled 1%", sampled_event),
+            ):
+                ms = best_of(func)
+                print(f"{name:<22} {ms:10.1f} ms {ms * 1000 / ITEMS:8.2f} µs/item")
+
+        quotes, _ = validate_quotes([
+            {
+                "text": f"Quote {i}",
+                "author": f"Author {i % 100}",
+                "author_url": f"https://quotes.toscrape.com/author/Author-{i % 100}",
+                "tags": [{"name": f"tag-{i % 20}", "url": f"https://quotes.toscrape.com/tag/tag-{i % 20}/"}],
+            }
+            for i in range(QUOTES)
+        ])
+
+        print(f"\nsave_quotes of {QUOTES} new quotes, best of 5")
+        for level in (logging.DEBUG, logging.INFO):
+            scraper_logger.setLevel(level)
+
+            def save():
+                Quote.objects.all().delete()
+                save_quotes(quotes)
+
+            stream.seek(0)
+            stream.truncate()
+            ms = best_of(save)
+            lines = stream.getvalue().count("\n") // 5
+            print(f"{logging.getLevelName(level):<22} {ms:10.1f} ms {lines:8d} lines/run")
+    finally:
+        teardown_django()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Measure quote search latency and query count on a large corpus.
+
+Each search runs through `search_quotes` (full-text index, composite
+indexes, facets counted in the database) and, for comparison, through the
+substring scan the index replaces.
+
+Usage (from `src/`):
+    python -m benchmarks.bench_search [quote count, default 1000000]
+"""
+import random
+import sys
+
+from benchmarks.utils import best_of, setup_django, teardown_django
+
+COUNT = 1_000_000
+AUTHORS = 5_000
+TAGS = 500
+WORDS = [f"word{i}" for i in range(20_000)]
+# Every quote also gets one of these, so they match about a fifth of the corpus.
+COMMON_WORDS = ["life", "love", "truth", "friendship", "books"]
+BATCH_SIZE = 20_000
+
+SEARCHES = {
+    "text": {"query": "love"},
+    "rare text": {"query": "word12345"},
+    "text + author": {"query": "life", "author": "Author 42"},
+    "text + tag": {"query": "truth", "tags": ["tag-7"]},
+    "author + 2 tags": {"author": "Author 42", "tags": ["tag-1", "tag-2"]},
+    "facets only": {},
+}
+
+
+def seed(count: int) -> None:
+    """
+    Replace the corpus with `count` quotes of 12 words, linked to 1-4 tags.
+    """
+    from data.models import Quote, Tag
+
+    rng = random.Random(42)
+    Quote.objects.all().delete()
+    Tag.objects.all().delete()
+    tag_ids = [
+        tag.id for tag in Tag.objects.bulk_create(
+            Tag(name=f"tag-{i}", url=f"https://quotes.toscrape.com/tag/tag-{i}/") for i in range(TAGS)
+        )
+    ]
+    for start in range(0, count, BATCH_SIZE):
+        quotes = []
+        for i in range(start, min(start + BATCH_SIZE, count)):
+            author = f"Author {rng.randrange(AUTHORS)}"
+            words = rng.choices(WORDS, k=11) + [rng.choice(COMMON_WORDS)]
+            text = f"Quote {i}: " + " ".join(words)
+            quotes.append(Quote(
+                text=text,
+                author=author,
+                author_url=f"https://quotes.toscrape.com/author/{author.replace(' ', '-')}",
+                fingerprint=Quote.make_fingerprint(author, text),
+            ))
+        quotes = Quote.objects.bulk_create(quotes)
+        Quote.tags.through.objects.bulk_create(
+            Quote.tags.through(quote_id=quote.id, tag_id=tag_id)
+            for quote in quotes
+            for tag_id in rng.sample(tag_ids, rng.randint(1, 4))
+        )
+
+
+def scan(query="", author=None, tags=()):
+    """
+    The same search without the full-text index: a substring scan.
+    """
+    from django.db.models import Count
+
+    from data.models import Quote
+    from data.search import filter_quotes
+    from data.serializers import serialize_quotes
+
+    queryset = filter_quotes(author, tags)
+    if query:
+        queryset = queryset.filter(text__icontains=query)
+    serialize_quotes(queryset.order_by("id")[:20])
+    queryset.count()
+    list(queryset.values("author").annotate(count=Count("id")).order_by("-count")[:20])
+    list(
+        Quote.tags.through.objects.filter(quote_id__in=queryset.values("id"))
+        .values("tag__name").annotate(count=Count("quote_id")).order_by("-count")[:20]
+    )
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else COUNT
+    setup_django()
+    try:
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from data.search import search_quotes
+
+        seed(count)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        print(f"{count} quotes")
+        print(f"{'search':<18} {'matches':>9} {'queries':>8} {'indexed (ms)':>13} {'scan (ms)':>10}")
+        for label, search in SEARCHES.items():
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as queries:
+                matches = search_quotes(**search)["count"]
+            indexed = best_of(lambda: search_quotes(**search), repeat=3)
+            scanned = best_of(lambda: scan(**search), repeat=1)
+            print(f"{label:<18} {matches:>9} {len(queries):>8} {indexed:>13.1f} {scanned:>10.1f}")
+    finally:
+        teardown_django()
+
+
+if __name__ == "__main__":
+    main()
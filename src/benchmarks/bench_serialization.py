@@ -0,0 +1,75 @@
+"""
+Compare the quote list serialization paths.
+
+Old path: `QuoteSerializer(many=True)` + DRF's JSONRenderer.
+New path: `serialize_quotes` + `ORJSONRenderer`.
+
+Usage (from `src/`):
+    python -m benchmarks.bench_serialization
+"""
+import random
+
+from benchmarks.utils import best_of, setup_django, teardown_django
+
+SIZES = (1_000, 10_000)
+TAG_COUNT = 100
+
+
+def seed(count: int) -> None:
+    """
+    Replace the corpus with `count` quotes, each linked to 1-4 random tags.
+    """
+    from data.models import Quote, Tag
+
+    Quote.objects.all().delete()
+    Tag.objects.all().delete()
+    tags = Tag.objects.bulk_create(
+        Tag(name=f"tag-{i}", url=f"https://quotes.toscrape.com/tag/tag-{i}/")
+        for i in range(TAG_COUNT)
+    )
+    quotes = Quote.objects.bulk_create(
+        Quote(
+            text=f"Quote number {i} " * 8,
+            author=f"Author {i % 500}",
+            author_url=f"https://quotes.toscrape.com/author/Author-{i % 500}",
+            # bulk_create skips save(), which fills the fingerprint.
+            fingerprint=Quote.make_fingerprint(f"Author {i % 500}", f"Quote number {i} " * 8),
+        )
+        for i in range(count)
+    )
+    links = [
+        Quote.tags.through(quote_id=quote.id, tag_id=tag.id)
+        for quote in quotes
+        for tag in random.sample(tags, random.randint(1, 4))
+    ]
+    Quote.tags.through.objects.bulk_create(links, batch_size=5_000)
+
+
+def main() -> None:
+    setup_django()
+    try:
+        from rest_framework.renderers import JSONRenderer
+
+        from data.models import Quote
+        from data.serializers import QuoteSerializer, serialize_quotes
+        from scraper.renderers import ORJSONRenderer
+
+        def old_path():
+            queryset = Quote.objects.prefetch_related("tags")
+            return JSONRenderer().render(QuoteSerializer(queryset, many=True).data)
+
+        def new_path():
+            return ORJSONRenderer().render(serialize_quotes(Quote.objects.all()))
+
+        print(f"{'quotes':>8} {'old (ms)':>12} {'new (ms)':>12} {'speed-up':>10}")
+        for size in SIZES:
+            seed(size)
+            old = best_of(old_path, repeat=3)
+            new = best_of(new_path, repeat=3)
+            print(f"{size:>8} {old:>12.1f} {new:>12.1f} {old / new:>9.1f}x")
+    finally:
+        teardown_django()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Measure the cold start of the Django processes and the first crawls of a worker.
+
+Cold start: the median wall time of fresh interpreters running
+`django.setup()`, `manage.py check` and a worker boot (setup plus the task
+modules Celery imports before forking its pool), followed by the slowest
+`scraper` and `data` imports of the worker boot (`python -X importtime`).
+
+First tasks: fresh processes boot like a worker, then crawl the local portal
+(see `benchmarks.local_portal`) twice with the same account, as the first two
+tasks of a pool process:
+
+- default: no warm-up, no session cache.
+- warm-up: `scraper.warmup.warm_up` runs first (as `worker_process_init` does
+  with `SCRAPE_WORKER_WARMUP`) and `SCRAPE_SESSION_CACHE_SIZE` is set.
+
+Usage (from `src/`):
+    python -m benchmarks.bench_startup
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPEAT = 5
+TOP_IMPORTS = 10
+
+SETUP = (
+    "import os; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'scraping_project.settings'); "
+    "import django; django.setup()"
+)
+WORKER_BOOT = f"{SETUP}; import scraping_project.celery, scraper.tasks"
+
+COLD_STARTS = {
+    "django.setup()": [sys.executable, "-c", SETUP],
+    "manage.py check": [sys.executable, "manage.py", "check"],
+    "worker boot": [sys.executable, "-c", WORKER_BOOT],
+}
+
+
+def median_run_ms(command) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, capture_output=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def slowest_imports():
+    """
+    Return the (cumulative µs, module) of the slowest project imports of a worker boot.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", WORKER_BOOT], check=True, capture_output=True, text=True
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = (part.strip() for part in line[len("import time:"):].split("|"))
+        if module.split(".")[0] in ("scraper", "data"):
+            imports.append((int(cumulative), module))
+    return sorted(imports, reverse=True)[:TOP_IMPORTS]
+
+
+def child(mode: str):
+    """
+    Boot like a worker, then time two crawls of the local portal.
+    """
+    start = time.perf_counter()
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "scraping_project.settings")
+    import django
+
+    django.setup()
+    from django.test import override_settings
+
+    import scraper.tasks  # noqa: F401
+    import scraping_project.celery  # noqa: F401
+
+    override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+        SCRAPER_PORTAL_MODULES=["benchmarks.local_portal"],
+        SCRAPE_SESSION_CACHE_SIZE=8 if mode == "warm-up" else 0,
+    ).enable()
+    timings = {"boot": (time.perf_counter() - start) * 1000}
+
+    if mode == "warm-up":
+        from scraper.warmup import warm_up
+
+        start = time.perf_counter()
+        warm_up()
+        timings["warm-up"] = (time.perf_counter() - start) * 1000
+
+    from scraper.jobs.crawl import CrawlJob
+    from scraper.portals.registry import get_portal
+
+    for task in ("first task", "second task"):
+        start = time.perf_counter()
+        items = CrawlJob(get_portal("local"), "username", "password").scrape()
+        timings[task] = (time.perf_counter() - start) * 1000
+        assert items, "The crawl scraped nothing."
+    print(json.dumps(timings))
+
+
+def first_tasks(mode: str, portal_url: str):
+    runs = []
+    for _ in range(REPEAT):
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child", mode],
+            check=True, capture_output=True, text=True,
+            env={**os.environ, "BENCH_PORTAL_URL": portal_url},
+        )
+        runs.append(json.loads(result.stdout.splitlines()[-1]))
+    return {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+
+
+def main():
+    # Registers the local portal on import: only children get its URL.
+    from benchmarks.local_portal import LocalPortalServer
+
+    print(f"Cold start, median of {REPEAT} processes")
+    for name, command in COLD_STARTS.items():
+        print(f"{name:<20} {median_run_ms(command):8.1f} ms")
+
+    print("\nSlowest scraper/data imports of a worker boot (cumulative)")
+    for cumulative, module in slowest_imports():
+        print(f"{module:<45} {cumulative / 1000:8.1f} ms")
+
+    print(f"\nFirst tasks of a worker process, median of {REPEAT} processes")
+    with LocalPortalServer() as server:
+        for mode in ("default", "warm-up"):
+            timings = first_tasks(mode, server.url)
+            print(f"{mode:<10} " + "  ".join(f"{name} {ms:7.1f} ms" for name, ms in timings.items()))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,97 @@
+"""
+Compare page fetch + parse paths on a large synthetic quotes page.
+
+Old path: `response.text` (charset detection, the header has no charset) and
+BeautifulSoup on the whole string.
+New path: `LxmlQuoteParser.iter_response`, which streams the body in chunks
+into an incremental parser and yields quotes as soon as they are complete.
+
+Reports the time to the first item, the total time and the peak traced
+memory of each path.
+
+Usage (from `src/`):
+    python -m benchmarks.bench_streaming
+"""
+import io
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from bs4 import BeautifulSoup
+from requests import Response
+
+from scraper.parsers.lxml_quote_parser import LxmlQuoteParser
+from scraper.parsers.quote_parser import QuoteParser
+
+QUOTES_PER_PAGE = 5_000
+BASE_URL = "https://quotes.toscrape.com"
+
+QUOTE_HTML = """
+<div class="quote" itemscope itemtype="http://schema.org/CreativeWork">
+    <span class="text" itemprop="text">“Quote number {i}, with a café and some more words.”</span>
+    <span>by <small class="author" itemprop="author">Author {author}</small>
+    <a href="/author/Author-{author}">(about)</a></span>
+    <div class="tags">Tags:
+        <a class="tag" href="/tag/tag-{tag}/page/1/">tag-{tag}</a>
+        <a class="tag" href="/tag/tag-{other}/page/1/">tag-{other}</a>
+    </div>
+</div>
+"""
+
+
+def build_page() -> bytes:
+    quotes = "".join(
+        QUOTE_HTML.format(i=i, author=i % 200, tag=i % 50, other=(i * 7) % 50)
+        for i in range(QUOTES_PER_PAGE)
+    )
+    html = f"<html><body>{quotes}<li class='next'><a href='/page/2/'>Next</a></li></body></html>"
+    return html.encode("utf-8")
+
+
+def make_response(body: bytes) -> Response:
+    response = Response()
+    response.status_code = 200
+    response.url = f"{BASE_URL}/page/1/"
+    response.headers["Content-Type"] = "text/html"
+    response.raw = io.BytesIO(body)
+    return response
+
+
+def old_path(body: bytes):
+    parser = QuoteParser(SimpleNamespace(base_url=BASE_URL))
+    soup = BeautifulSoup(make_response(body).text, "html.parser")
+    for element in soup.find_all("div", class_="quote"):
+        yield parser.parse_item(element)
+
+
+def new_path(body: bytes):
+    parser = LxmlQuoteParser(SimpleNamespace(base_url=BASE_URL))
+    yield from parser.iter_response(make_response(body))
+
+
+def measure(path, body: bytes):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_item_at = None
+    count = 0
+    for _ in path(body):
+        if first_item_at is None:
+            first_item_at = time.perf_counter()
+        count += 1
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, (first_item_at - start) * 1000, total * 1000, peak / 1024 / 1024
+
+
+def main() -> None:
+    body = build_page()
+    print(f"page: {len(body) / 1024 / 1024:.1f} MiB, {QUOTES_PER_PAGE} quotes")
+    print(f"{'path':<22} {'items':>6} {'first item':>12} {'total':>10} {'peak mem':>10}")
+    for name, path in (("response.text + bs4", old_path), ("streaming lxml", new_path)):
+        count, first, total, peak = measure(path, body)
+        print(f"{name:<22} {count:>6} {first:>9.1f} ms {total:>7.1f} ms {peak:>6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
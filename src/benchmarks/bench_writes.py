@@ -0,0 +1,175 @@
+"""
+Compare concurrent scrape writes to one SQLite database.
+
+N producers each write BATCHES runs of BATCH_SIZE new quotes while a reader
+keeps querying the quotes, as the API does:
+
+- direct:        producers are processes writing their own runs, with the
+                 default rollback journal.
+- direct + WAL:  the same with the pragmas of the single-writer mode.
+- single writer: producers hand their runs to one `BatchWriter` (the
+                 writer worker running its tasks on threads), with WAL.
+
+Usage (from `src/`):
+    python -m benchmarks.bench_writes [producers, default 8]
+"""
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.utils import setup_django, teardown_django
+
+BATCHES = 20
+BATCH_SIZE = 100
+
+ROLLBACK_JOURNAL = {"journal_mode": "DELETE"}
+WAL = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -64 * 1024,
+    "temp_store": "MEMORY",
+}
+
+
+def batch(producer: int, number: int):
+    from scraper.validation import validate_quotes
+
+    items, _ = validate_quotes([
+        {
+            "text": f"Quote {i} of batch {number} of producer {producer}",
+            "author": f"Author {i % 50}",
+            "author_url": f"https://quotes.toscrape.com/author/Author-{i % 50}",
+            "tags": [{"name": f"tag-{i % 20}", "url": f"https://quotes.toscrape.com/tag/tag-{i % 20}/"}],
+        }
+        for i in range(BATCH_SIZE)
+    ])
+    return items
+
+
+def write_directly(producer: int):
+    """
+    Write the runs of one producer from its own process; returns the failed runs.
+    """
+    from django.db import OperationalError
+
+    from scraper.portals.quotes import QUOTES_PORTAL
+    from scraper.writer import persist_run
+
+    failures = 0
+    for number in range(BATCHES):
+        try:
+            persist_run(QUOTES_PORTAL, batch(producer, number))
+        except OperationalError:
+            failures += 1
+    return failures
+
+
+def write_through_writer(producers: int) -> int:
+    """
+    Hand the runs of every producer to one writer thread; returns the failed runs.
+    """
+    from django.db import OperationalError
+
+    from scraper.portals.quotes import QUOTES_PORTAL
+    from scraper.writer import BatchWriter, persist_run
+
+    writer = BatchWriter()
+    failures = []
+
+    def produce(producer):
+        for number in range(BATCHES):
+            try:
+                writer.run(persist_run, QUOTES_PORTAL, batch(producer, number))
+            except OperationalError:
+                failures.append(producer)
+
+    threads = [threading.Thread(target=produce, args=(producer,)) for producer in range(producers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"{'':<16} writer grouped {writer.jobs} runs into {writer.transactions} transactions")
+    return len(failures)
+
+
+def read(stop, latencies):
+    """
+    Query the corpus like the API does until `stop` is set.
+    """
+    from data.models import Quote
+    from data.search import search_quotes
+
+    timings = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        Quote.objects.count()
+        search_quotes(tags=["tag-3"], limit=20)
+        timings.append((time.perf_counter() - start) * 1000)
+    latencies.put(timings)
+
+
+def measure(label: str, pragmas, producers: int, single_writer: bool):
+    from django.conf import settings
+    from django.db import connection, connections
+
+    from data.models import Quote, ScrapeRun, Tag
+
+    Quote.objects.all().delete()
+    Tag.objects.all().delete()
+    ScrapeRun.objects.all().delete()
+    settings.SQLITE_PRAGMAS = pragmas
+    # Children open their own connections, which get the pragmas.
+    connections.close_all()
+
+    stop = multiprocessing.Event()
+    latencies = multiprocessing.Queue()
+    reader = multiprocessing.Process(target=read, args=(stop, latencies))
+    reader.start()
+    start = time.perf_counter()
+    if single_writer:
+        failures = write_through_writer(producers)
+    else:
+        with multiprocessing.Pool(producers) as pool:
+            failures = sum(pool.map(write_directly, range(producers)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    timings = latencies.get()
+    reader.join()
+
+    saved = Quote.objects.count()
+    connection.close()
+    p99 = statistics.quantiles(timings, n=100)[98] if len(timings) > 1 else float("nan")
+    print(
+        f"{label:<16} {saved / elapsed:>10.0f} {failures:>12} {len(timings):>8} "
+        f"{statistics.median(timings) if timings else float('nan'):>9.1f} {p99:>9.1f}"
+    )
+
+
+def main() -> None:
+    producers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(database_name=os.path.join(directory, "bench_writes.sqlite3"))
+        from django.test import override_settings
+
+        # Statistics invalidation must not need a Redis server, and the
+        # per-quote log lines would dominate the timings.
+        override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}).enable()
+        logging.disable(logging.INFO)
+        try:
+            print(f"{producers} producers x {BATCHES} runs x {BATCH_SIZE} quotes")
+            print(f"{'mode':<16} {'quotes/s':>10} {'failed runs':>12} {'reads':>8} {'read p50':>9} {'read p99':>9}")
+            measure("direct", ROLLBACK_JOURNAL, producers, single_writer=False)
+            measure("direct + WAL", WAL, producers, single_writer=False)
+            measure("single writer", WAL, producers, single_writer=True)
+        finally:
+            teardown_django()
+
+
+if __name__ == "__main__":
+    main()
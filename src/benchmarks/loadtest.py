@@ -0,0 +1,473 @@
+"""
+Load-test the API endpoints and keep the results for comparison.
+
+Seeds a corpus of quotes, tags and finished scrape tasks in a throwaway
+database, mints an access token per user and sends concurrent requests to:
+
+- quotes:  GET /api/quotes/ (`ScrapedQuotesListView`)
+- status:  GET /api/scrape/<task_id>/ (`ScrapeStatusView`), finished tasks
+- trigger: POST /api/scrape/ (`ScrapeQuotesView`), each with new parameters
+           so no trigger is deduplicated; the Celery task is not enqueued
+
+through one of the targets:
+
+- wsgi: the WSGI application called in-process from `--concurrency` threads
+- asgi: the ASGI application called in-process from as many coroutines
+- http: the WSGI application behind a threaded HTTP server on localhost,
+        requested over sockets from `--concurrency` threads
+
+Every scenario reports its throughput, p50/p95/p99 latencies, errors and the
+database queries it ran per request. Results are appended to `--results`
+(one JSON object per run, tagged with the git revision) and compared with
+the previous run of the same target, concurrency and corpus.
+
+The cache is in process memory, as the harness must not need Redis.
+
+Usage (from `src/`):
+    python -m benchmarks.loadtest [--quotes 1000000] [--tags 5000]
+        [--target wsgi|asgi|http] [--concurrency 16] [--requests 1000]
+        [--scenario quotes --scenario status ...]
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from unittest.mock import patch
+
+from benchmarks.utils import setup_django, teardown_django
+
+RESULTS = os.path.join(os.path.dirname(__file__), "results", "loadtest.jsonl")
+BATCH_SIZE = 20_000
+TASKS = 1_000
+
+# method, path, query string, body
+Request = Tuple[str, str, str, bytes]
+
+
+class QueryCounter:
+    """
+    Counts the queries run on every database connection of the process.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self, sender, connection, **kwargs):
+        # Connections are reopened by every request, on the same wrapper.
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+def seed(quotes: int, tags: int, users: int) -> Tuple[List[str], List[str]]:
+    """
+    Seed `quotes` quotes linked to 1-4 of `tags` tags, finished tasks and users.
+
+    Returns:
+        A tuple containing the access tokens of the users and the task ids.
+    """
+    from django.contrib.auth.models import User
+    from django_celery_results.models import TaskResult
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from data.models import Quote, Tag
+    from scraper.stats import rebuild
+
+    rng = random.Random(42)
+    tag_ids = [
+        tag.id for tag in Tag.objects.bulk_create(
+            Tag(name=f"tag-{i}", url=f"https://quotes.toscrape.com/tag/tag-{i}/") for i in range(tags)
+        )
+    ]
+    for start in range(0, quotes, BATCH_SIZE):
+        batch = []
+        for i in range(start, min(start + BATCH_SIZE, quotes)):
+            author = f"Author {i % 5_000}"
+            text = f"Quote number {i}: " + " ".join(f"word{rng.randrange(20_000)}" for _ in range(12))
+            batch.append(Quote(
+                text=text,
+                author=author,
+                author_url=f"https://quotes.toscrape.com/author/{author.replace(' ', '-')}",
+                fingerprint=Quote.make_fingerprint(author, text),
+            ))
+        batch = Quote.objects.bulk_create(batch)
+        Quote.tags.through.objects.bulk_create(
+            [
+                Quote.tags.through(quote_id=quote.id, tag_id=tag_id)
+                for quote in batch
+                for tag_id in rng.sample(tag_ids, rng.randint(1, 4))
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    rebuild()
+
+    task_ids = [f"loadtest-{i}" for i in range(TASKS)]
+    TaskResult.objects.bulk_create(
+        TaskResult(task_id=task_id, status="SUCCESS", result=json.dumps("Scraped 100 quotes successfully."))
+        for task_id in task_ids
+    )
+    tokens = []
+    for i in range(users):
+        user = User.objects.create(username=f"loadtest-{i}")
+        tokens.append(str(AccessToken.for_user(user)))
+    return tokens, task_ids
+
+
+def scenarios(task_ids: List[str]) -> Dict[str, Callable[[int], Request]]:
+    """
+    Build the request of each scenario from its sequence number.
+    """
+    return {
+        "quotes": lambda i: ("GET", "/api/quotes/", "", b""),
+        "status": lambda i: ("GET", f"/api/scrape/{task_ids[i % len(task_ids)]}/", "", b""),
+        "trigger": lambda i: (
+            "POST",
+            "/api/scrape/",
+            "",
+            json.dumps({"username": "user", "password": "password", "request": i}).encode(),
+        ),
+    }
+
+
+def wsgi_driver(concurrency: int):
+    """
+    Call the WSGI application in-process from `concurrency` threads.
+    """
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+
+    def send(request: Request, token: str) -> int:
+        method, path, query, body = request
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "HTTP_AUTHORIZATION": f"Bearer {token}",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": io.StringIO(),
+            "wsgi.url_scheme": "http",
+            "wsgi.version": (1, 0),
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        statuses = []
+        response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        return int(statuses[0].split()[0])
+
+    return lambda requests: run_threads(send, requests, concurrency)
+
+
+def http_driver(concurrency: int):
+    """
+    Serve the WSGI application on localhost and request it from `concurrency` threads.
+    """
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import (WSGIRequestHandler, WSGIServer,
+                                       make_server)
+
+    import requests
+    from django.core.wsgi import get_wsgi_application
+
+    class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+        request_queue_size = 128
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    server = make_server("127.0.0.1", 0, get_wsgi_application(), ThreadingWSGIServer, QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    sessions = threading.local()
+
+    def send(request: Request, token: str) -> int:
+        method, path, query, body = request
+        if not hasattr(sessions, "session"):
+            sessions.session = requests.Session()
+        response = sessions.session.request(
+            method,
+            f"{base_url}{path}{'?' + query if query else ''}",
+            data=body or None,
+            headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+        )
+        return response.status_code
+
+    return lambda requests: run_threads(send, requests, concurrency)
+
+
+def asgi_driver(concurrency: int):
+    """
+    Call the ASGI application in-process from `concurrency` coroutines.
+    """
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+
+    async def send(request: Request, token: str) -> int:
+        method, path, query, body = request
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [
+                (b"authorization", f"Bearer {token}".encode()),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("localhost", 80),
+        }
+        done = asyncio.Event()
+        received = False
+        statuses = []
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # The handler listens for a disconnect until the response is sent.
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def reply(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                done.set()
+
+        await application(scope, receive, reply)
+        return statuses[0]
+
+    def drive(requests: List[Tuple[Request, str]]) -> List[Tuple[int, float]]:
+        async def main():
+            pending = iter(requests)
+            results = []
+
+            async def worker():
+                for request, token in pending:
+                    start = time.perf_counter()
+                    status = await send(request, token)
+                    results.append((status, time.perf_counter() - start))
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return results
+
+        return asyncio.run(main())
+
+    return drive
+
+
+def run_threads(
+    send: Callable[[Request, str], int], requests: List[Tuple[Request, str]], concurrency: int
+) -> List[Tuple[int, float]]:
+    """
+    Send the requests from `concurrency` threads.
+
+    Returns:
+        The status and duration of every request.
+    """
+    from django.db import connections
+
+    pending = iter(requests)
+    lock = threading.Lock()
+    results = []
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    item = next(pending, None)
+                if item is None:
+                    return
+                start = time.perf_counter()
+                status = send(*item)
+                with lock:
+                    results.append((status, time.perf_counter() - start))
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        for future in [executor.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return results
+
+
+DRIVERS = {"wsgi": wsgi_driver, "asgi": asgi_driver, "http": http_driver}
+
+
+def percentile(timings: List[float], percent: int) -> float:
+    if len(timings) < 2:
+        return timings[0] if timings else float("nan")
+    return statistics.quantiles(timings, n=100)[percent - 1]
+
+
+def measure(drive, counter: QueryCounter, build: Callable[[int], Request], tokens: List[str], count: int):
+    """
+    Send `count` requests of a scenario and summarize them.
+    """
+    requests = [(build(i), tokens[i % len(tokens)]) for i in range(count)]
+    # Warm up the connections and caches the way a running server has them.
+    drive(requests[:len(tokens)])
+    queries = counter.count
+    start = time.perf_counter()
+    results = drive(requests)
+    elapsed = time.perf_counter() - start
+    timings = [duration * 1000 for _, duration in results]
+    return {
+        "requests": len(results),
+        "errors": sum(1 for status, _ in results if status >= 400),
+        "rps": round(len(results) / elapsed, 1),
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "p99_ms": round(percentile(timings, 99), 2),
+        "queries_per_request": round((counter.count - queries) / len(results), 2),
+    }
+
+
+def revision() -> Optional[str]:
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True)
+        return f"{sha}-dirty" if dirty.stdout.strip() else sha
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_run(path: str, run: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Return the last stored run with the same target, concurrency and corpus.
+    """
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path) as file:
+        for line in file:
+            stored = json.loads(line)
+            if all(stored.get(key) == run[key] for key in ("target", "concurrency", "corpus")):
+                previous = stored
+    return previous
+
+
+def report(run: Dict[str, Any], previous: Optional[Dict[str, Any]]):
+    print(
+        f"{'scenario':<10} {'requests':>9} {'errors':>7} {'rps':>9} {'p50 ms':>9} "
+        f"{'p95 ms':>9} {'p99 ms':>9} {'queries':>8}"
+    )
+    for name, result in run["scenarios"].items():
+        print(
+            f"{name:<10} {result['requests']:>9} {result['errors']:>7} {result['rps']:>9.1f} "
+            f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+            f"{result['queries_per_request']:>8.2f}"
+        )
+    if not previous:
+        return
+    print(f"compared with {previous['revision']} ({previous['timestamp']}):")
+    for name, result in run["scenarios"].items():
+        before = previous["scenarios"].get(name)
+        if before:
+            print(
+                f"{name:<10} rps {(result['rps'] / before['rps'] - 1) * 100:+.1f}%, "
+                f"p99 {(result['p99_ms'] / before['p99_ms'] - 1) * 100:+.1f}%, "
+                f"queries {result['queries_per_request'] - before['queries_per_request']:+.2f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quotes", type=int, default=10_000)
+    parser.add_argument("--tags", type=int, default=500)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--target", choices=DRIVERS, default="wsgi")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario.")
+    parser.add_argument("--scenario", action="append", choices=["quotes", "status", "trigger"])
+    parser.add_argument("--results", default=RESULTS)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Threads of the harness and of the server share the database file.
+        setup_django(database_name=os.path.join(directory, "loadtest.sqlite3"))
+        try:
+            from django.db.backends.signals import connection_created
+            from django.test import override_settings
+
+            from scraping_project import celery_app
+
+            override_settings(
+                CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+                ALLOWED_HOSTS=["localhost", "127.0.0.1"],
+            ).enable()
+            logging.disable(logging.INFO)
+            start = time.perf_counter()
+            tokens, task_ids = seed(options.quotes, options.tags, options.users)
+            print(
+                f"seeded {options.quotes} quotes, {options.tags} tags, {TASKS} tasks and "
+                f"{options.users} users in {time.perf_counter() - start:.1f}s"
+            )
+
+            counter = QueryCounter()
+            connection_created.connect(counter.install)
+            drive = DRIVERS[options.target](options.concurrency)
+            builders = scenarios(task_ids)
+            run = {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "revision": revision(),
+                "target": options.target,
+                "concurrency": options.concurrency,
+                "corpus": {"quotes": options.quotes, "tags": options.tags},
+                "scenarios": {},
+            }
+            with patch.object(celery_app, "send_task"):
+                for name in options.scenario or list(builders):
+                    run["scenarios"][name] = measure(drive, counter, builders[name], tokens, options.requests)
+        finally:
+            teardown_django()
+
+    print(f"{options.target}, {options.concurrency} concurrent clients")
+    report(run, previous_run(options.results, run))
+    os.makedirs(os.path.dirname(os.path.abspath(options.results)), exist_ok=True)
+    with open(options.results, "a") as file:
+        file.write(json.dumps(run) + "\n")
+    print(f"results appended to {options.results}")
+
+
+if __name__ == "__main__":
+    main()
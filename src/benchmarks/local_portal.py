@@ -0,0 +1,109 @@
+"""
+A quotes portal served from localhost, for benchmarks that crawl.
+
+`LocalPortalServer` answers the login form and PAGES numbered quote pages
+like quotes.toscrape.com, and sleeps HANDSHAKE_DELAY seconds on every new
+connection, standing in for the TCP and TLS handshakes of a remote portal.
+
+Listed in `SCRAPER_PORTAL_MODULES` with `BENCH_PORTAL_URL` set to the URL of
+the server, this module registers it as the "local" portal.
+"""
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAGES = 3
+QUOTES_PER_PAGE = 10
+HANDSHAKE_DELAY = 0.1
+
+LOGIN_PAGE = (
+    '<html><body><form method="post"><input type="hidden" name="csrf_token" value="token">'
+    "</form></body></html>"
+)
+QUOTE_HTML = (
+    '<div class="quote"><span class="text">Quote {number}</span>'
+    '<span>by <small class="author">Author {author}</small> <a href="/author/Author-{author}">(about)</a></span>'
+    '<div class="tags"><a class="tag" href="/tag/tag-{tag}/page/1/">tag-{tag}</a></div></div>'
+)
+
+
+def quotes_page(page: int) -> str:
+    quotes = "".join(
+        QUOTE_HTML.format(number=number, author=number % 5, tag=number % 3)
+        for number in range((page - 1) * QUOTES_PER_PAGE, page * QUOTES_PER_PAGE)
+    )
+    next_link = f'<li class="next"><a href="/page/{page + 1}/">Next</a></li>' if page < PAGES else ""
+    return f'<html><body><a href="/logout">Logout</a>{quotes}{next_link}</body></html>'
+
+
+class PortalHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately.
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        time.sleep(HANDSHAKE_DELAY)
+        super().setup()
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_html(self, html: str):
+        body = html.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/login":
+            self.send_html(LOGIN_PAGE)
+        elif self.path.startswith("/page/"):
+            page = int(self.path.strip("/").split("/")[1])
+            self.send_html(quotes_page(page) if page <= PAGES else "<html></html>")
+        else:
+            self.send_html('<html><body><a href="/logout">Logout</a></body></html>')
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_html('<html><body><a href="/logout">Logout</a></body></html>')
+
+
+class LocalPortalServer:
+    """The local portal, served on a background thread."""
+
+    def __init__(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), PortalHandler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self) -> "LocalPortalServer":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+PORTAL_URL = os.environ.get("BENCH_PORTAL_URL")
+
+if PORTAL_URL:
+    from scraper.auth.quote_scraper_auth import QuoteScraperAuth
+    from scraper.parsers.lxml_quote_parser import LxmlQuoteParser
+    from scraper.parsers.quote_parser import QuoteParser
+    from scraper.persistence import save_quotes
+    from scraper.portals.registry import PortalDefinition, register_portal
+    from scraper.validation import validate_quotes
+
+    LOCAL_PORTAL = register_portal(PortalDefinition(
+        name="local",
+        base_url=PORTAL_URL,
+        auth_class=QuoteScraperAuth,
+        parser_classes={"bs4": QuoteParser, "lxml": LxmlQuoteParser},
+        start_urls=(f"{PORTAL_URL}/page/1/",),
+        validate=validate_quotes,
+        save=save_quotes,
+    ))
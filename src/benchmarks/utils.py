@@ -0,0 +1,75 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+_original_db_name = None
+
+
+def setup_django(database_name: Optional[str] = None) -> None:
+    """
+    Configure Django and create a throwaway test database for a benchmark run.
+
+    Benchmarks never touch the configured database: the test runner machinery
+    creates (and `teardown_django` destroys) a separate one.
+
+    Args:
+        database_name: File of the test database, for benchmarks sharing it
+            between processes (SQLite test databases are in memory otherwise).
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "scraping_project.settings")
+
+    import django
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    global _original_db_name
+
+    django.setup()
+    setup_test_environment()
+    _original_db_name = settings.DATABASES["default"]["NAME"]
+    if database_name:
+        settings.DATABASES["default"]["TEST"]["NAME"] = database_name
+    connection.creation.create_test_db(verbosity=0)
+
+
+def teardown_django() -> None:
+    """
+    Destroy the test database created by `setup_django`.
+    """
+    from django.db import connection
+
+    connection.creation.destroy_test_db(_original_db_name, verbosity=0)
+
+
+@contextmanager
+def timer(label: str) -> Iterator[None]:
+    """
+    Print the wall time spent inside the block.
+
+    Args:
+        label: Name printed next to the measurement.
+    """
+    start = time.perf_counter()
+    yield
+    print(f"{label:<40} {(time.perf_counter() - start) * 1000:10.1f} ms")
+
+
+def best_of(func: Callable[[], object], repeat: int = 5) -> float:
+    """
+    Run `func` several times and return the best wall time in milliseconds.
+
+    Args:
+        func: The callable to measure.
+        repeat: Number of runs.
+
+    Returns:
+        The fastest run in milliseconds.
+    """
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class DataConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
-    name = "data"
\ No newline at end of file
+    name = "data"
+
+    def ready(self):
+        from data.sqlite import configure_sqlite
+
+        connection_created.connect(configure_sqlite, dispatch_uid="data.configure_sqlite")
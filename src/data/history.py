@@ -0,0 +1,234 @@
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db.models import Exists, OuterRef, Q, QuerySet
+from django.utils import timezone
+
+from .models import QuoteRecord, QuoteVersion, ScrapeRun
+
+# Rows per bulk statement, below SQLite's limit on query parameters.
+BATCH_SIZE = 500
+
+# The state of a quote: author URL, Goodreads URL and tag names.
+State = Tuple[str, Optional[str], Iterable[str]]
+
+VERSION_FIELDS = {
+    "fingerprint": "record__fingerprint",
+    "text": "record__text",
+    "author": "record__author",
+    "author_url": "author_url",
+    "goodreads_url": "goodreads_url",
+    "tags": "tags",
+    "since_run": "run_id",
+}
+
+
+def _batches(values: List[Any]) -> Iterator[List[Any]]:
+    for start in range(0, len(values), BATCH_SIZE):
+        yield values[start:start + BATCH_SIZE]
+
+
+def state_hash(author_url: str, goodreads_url: Optional[str], tags: Iterable[str]) -> str:
+    """
+    Digest of the state of a quote, telling whether it changed between runs.
+    """
+    state = "\n".join([author_url, goodreads_url or "", *sorted(tags)])
+    return hashlib.sha1(state.encode()).hexdigest()
+
+
+def _record_ids(fingerprints: List[str]) -> Dict[str, int]:
+    records = {}
+    for batch in _batches(fingerprints):
+        records.update(QuoteRecord.objects.filter(fingerprint__in=batch).values_list("fingerprint", "id"))
+    return records
+
+
+def _current_versions(record_ids: List[int]) -> Dict[int, QuoteVersion]:
+    current = {}
+    for batch in _batches(record_ids):
+        versions = QuoteVersion.objects.filter(record_id__in=batch, until_run__isnull=True).defer("tags")
+        current.update((version.record_id, version) for version in versions)
+    return current
+
+
+def _write_versions(run: ScrapeRun, versions: List[QuoteVersion]) -> int:
+    # The current versions of the quotes end where the new ones start.
+    for record_ids in _batches([version.record_id for version in versions]):
+        QuoteVersion.objects.filter(record_id__in=record_ids, until_run__isnull=True).update(until_run=run)
+    QuoteVersion.objects.bulk_create(versions, batch_size=BATCH_SIZE)
+    return len(versions)
+
+
+def record_versions(run: ScrapeRun, quotes: Dict[str, Tuple[str, str, State]]) -> int:
+    """
+    Record the state of the quotes seen by a run.
+
+    A version is written for the quotes whose state differs from their
+    current version, or that have none yet (new or removed before). A run
+    saving its quotes in several batches may see a quote twice: its own
+    version is then updated to the last state, so no version ends where it
+    starts.
+
+    Args:
+        run: The run that scraped the quotes.
+        quotes: (text, author, state) of the quotes, by fingerprint.
+
+    Returns:
+        The number of versions written.
+    """
+    records = _record_ids(list(quotes))
+    new_records = [
+        QuoteRecord(fingerprint=fingerprint, text=text, author=author)
+        for fingerprint, (text, author, _) in quotes.items()
+        if fingerprint not in records
+    ]
+    if new_records:
+        QuoteRecord.objects.bulk_create(new_records, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        records.update(_record_ids([record.fingerprint for record in new_records]))
+
+    current = _current_versions(list(records.values()))
+    versions = []
+    restated = []
+    for fingerprint, (_, _, (author_url, goodreads_url, tags)) in quotes.items():
+        tags = sorted(tags)
+        digest = state_hash(author_url, goodreads_url, tags)
+        previous = current.get(records[fingerprint])
+        if previous is not None and previous.state_hash == digest and not previous.removed:
+            continue
+        if previous is not None and previous.run_id == run.pk and not previous.removed:
+            previous.author_url = author_url
+            previous.goodreads_url = goodreads_url
+            previous.tags = "\n".join(tags)
+            previous.state_hash = digest
+            restated.append(previous)
+            continue
+        versions.append(QuoteVersion(
+            record_id=records[fingerprint],
+            run=run,
+            author_url=author_url,
+            goodreads_url=goodreads_url,
+            tags="\n".join(tags),
+            state_hash=digest,
+        ))
+    QuoteVersion.objects.bulk_update(
+        restated, ["author_url", "goodreads_url", "tags", "state_hash"], batch_size=BATCH_SIZE
+    )
+    return _write_versions(run, versions) + len(restated)
+
+
+def record_removals(run: ScrapeRun, fingerprints: List[str]) -> int:
+    """
+    Record the removal of quotes by a run, as versions marked removed.
+
+    Returns:
+        The number of versions written.
+    """
+    records = _record_ids(fingerprints)
+    versions = [
+        QuoteVersion(
+            record_id=version.record_id,
+            run=run,
+            author_url=version.author_url,
+            goodreads_url=version.goodreads_url,
+            tags=version.tags,
+            removed=True,
+            state_hash=version.state_hash,
+        )
+        for batch in _batches(list(records.values()))
+        for version in QuoteVersion.objects.filter(record_id__in=batch, until_run__isnull=True, removed=False)
+    ]
+    return _write_versions(run, versions)
+
+
+def versions_as_of(run_id: int) -> QuerySet:
+    """
+    The versions making up the corpus as of run `run_id`: those recorded by
+    the run or earlier and not replaced by then, except removals, in the
+    order the quotes were first scraped.
+    """
+    return QuoteVersion.objects.filter(run_id__lte=run_id, removed=False).filter(
+        Q(until_run__isnull=True) | Q(until_run_id__gt=run_id)
+    ).order_by("record_id")
+
+
+def serialize_versions(queryset: QuerySet) -> List[Dict[str, Any]]:
+    """
+    Serialize versions as quotes, with their tag names and the run their state is from.
+    """
+    rows = queryset.values_list(*VERSION_FIELDS.values())
+    quotes = []
+    for row in rows:
+        quote = dict(zip(VERSION_FIELDS, row))
+        quote["tags"] = quote["tags"].split("\n") if quote["tags"] else []
+        quotes.append(quote)
+    return quotes
+
+
+def _prunable_runs(before: datetime) -> List[Tuple[int, datetime]]:
+    # The latest finished run always keeps its history: it is the current corpus.
+    runs = ScrapeRun.objects.filter(finished_at__isnull=False).order_by("id")
+    latest = runs.values_list("id", flat=True).last()
+    return list(
+        runs.filter(history_pruned=False, finished_at__lt=before)
+        .exclude(id=latest)
+        .values_list("id", "finished_at")
+    )
+
+
+def _prune(run_ids: List[int]) -> Dict[str, int]:
+    """
+    Mark the history of runs pruned, then delete the versions no longer
+    needed: those replaced before any run whose history is kept, the
+    removals they leave behind, and the quotes left without versions.
+
+    Abandoned runs (see `ScrapeRun.abandoned_before`) never tell a complete
+    corpus, so their history is pruned too.
+    """
+    for batch in _batches(run_ids):
+        ScrapeRun.objects.filter(id__in=batch).update(history_pruned=True)
+    abandoned = ScrapeRun.objects.filter(
+        history_pruned=False, finished_at__isnull=True, started_at__lt=ScrapeRun.abandoned_before()
+    ).update(history_pruned=True)
+
+    kept_runs = ScrapeRun.objects.filter(
+        history_pruned=False, id__gte=OuterRef("run_id"), id__lt=OuterRef("until_run_id")
+    )
+    stale = QuoteVersion.objects.filter(until_run__isnull=False).filter(~Exists(kept_runs))
+    deleted = 0
+    for version_ids in _batches(list(stale.values_list("id", flat=True))):
+        deleted += QuoteVersion.objects.filter(id__in=version_ids).delete()[0]
+    # A removal left without the versions it ended tells nothing anymore.
+    removals = QuoteVersion.objects.filter(removed=True).filter(
+        ~Exists(QuoteVersion.objects.filter(record=OuterRef("record"), removed=False))
+    )
+    deleted += removals.delete()[0]
+    orphans = QuoteRecord.objects.filter(~Exists(QuoteVersion.objects.filter(record=OuterRef("pk"))))
+    records, _ = orphans.delete()
+    return {"runs_pruned": len(run_ids) + abandoned, "versions_deleted": deleted, "records_deleted": records}
+
+
+def prune_history(retain_days: int, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Retention: drop the history of the runs finished more than `retain_days` ago.
+
+    The corpus as of those runs can't be queried anymore.
+    """
+    before = (now or timezone.now()) - timedelta(days=retain_days)
+    return _prune([run_id for run_id, _ in _prunable_runs(before)])
+
+
+def compact_history(full_days: int, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Compaction: keep the history of the runs finished more than `full_days`
+    ago only at the last run of each day.
+
+    The versions that lived and died between two of those runs are deleted.
+    """
+    before = (now or timezone.now()) - timedelta(days=full_days)
+    runs = _prunable_runs(before)
+    last_of_day = {}
+    for run_id, finished_at in runs:
+        last_of_day[finished_at.date()] = run_id
+    checkpoints = set(last_of_day.values())
+    return _prune([run_id for run_id, _ in runs if run_id not in checkpoints])
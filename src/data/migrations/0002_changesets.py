@@ -0,0 +1,114 @@
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fingerprint_quotes(apps, schema_editor):
+    """
+    Fingerprint the existing quotes and drop the duplicates earlier runs inserted.
+
+    The oldest copy of each quote is kept.
+    """
+    Quote = apps.get_model("data", "Quote")
+    seen = set()
+    duplicates = []
+    for quote in Quote.objects.order_by("id").only("id", "author", "text").iterator():
+        fingerprint = hashlib.sha1(f"{quote.author}\n{quote.text}".encode()).hexdigest()
+        if fingerprint in seen:
+            duplicates.append(quote.id)
+            continue
+        seen.add(fingerprint)
+        Quote.objects.filter(id=quote.id).update(fingerprint=fingerprint)
+    for start in range(0, len(duplicates), 500):
+        Quote.objects.filter(id__in=duplicates[start:start + 500]).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScrapeRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task_id", models.CharField(blank=True, max_length=255, null=True)),
+                ("portal", models.CharField(max_length=100)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("full_crawl", models.BooleanField(default=False)),
+                ("inserted", models.PositiveIntegerField(default=0)),
+                ("updated", models.PositiveIntegerField(default=0)),
+                ("removed", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="quote",
+            name="fingerprint",
+            field=models.CharField(default="", editable=False, max_length=40),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="quote",
+            name="last_seen_run",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="data.scraperun",
+            ),
+        ),
+        migrations.RunPython(fingerprint_quotes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="quote",
+            name="fingerprint",
+            field=models.CharField(editable=False, max_length=40, unique=True),
+        ),
+        migrations.CreateModel(
+            name="QuoteChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quote_id", models.BigIntegerField()),
+                ("fingerprint", models.CharField(max_length=40)),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("I", "inserted"), ("U", "updated"), ("D", "removed")],
+                        max_length=1,
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="changes",
+                        to="data.scraperun",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["run", "quote_id"], name="data_quotec_run_id_103ea8_idx")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+from django.db import migrations, models
+
+SQLITE_FORWARD = [
+    # External content table: the index stores no copy of the quotes.
+    """
+    CREATE VIRTUAL TABLE data_quote_fts USING fts5(
+        text, author, content='data_quote', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER data_quote_fts_insert AFTER INSERT ON data_quote BEGIN
+        INSERT INTO data_quote_fts(rowid, text, author) VALUES (new.id, new.text, new.author);
+    END
+    """,
+    """
+    CREATE TRIGGER data_quote_fts_delete AFTER DELETE ON data_quote BEGIN
+        INSERT INTO data_quote_fts(data_quote_fts, rowid, text, author)
+        VALUES ('delete', old.id, old.text, old.author);
+    END
+    """,
+    """
+    CREATE TRIGGER data_quote_fts_update AFTER UPDATE OF text, author ON data_quote BEGIN
+        INSERT INTO data_quote_fts(data_quote_fts, rowid, text, author)
+        VALUES ('delete', old.id, old.text, old.author);
+        INSERT INTO data_quote_fts(rowid, text, author) VALUES (new.id, new.text, new.author);
+    END
+    """,
+    "INSERT INTO data_quote_fts(data_quote_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER data_quote_fts_update",
+    "DROP TRIGGER data_quote_fts_delete",
+    "DROP TRIGGER data_quote_fts_insert",
+    "DROP TABLE data_quote_fts",
+]
+
+# Must match the expression `data.search` filters on for the index to be used.
+POSTGRESQL_FORWARD = [
+    """
+    CREATE INDEX data_quote_search_idx ON data_quote USING GIN (
+        to_tsvector('english'::regconfig, text || ' ' || author)
+    )
+    """,
+]
+
+POSTGRESQL_REVERSE = ["DROP INDEX data_quote_search_idx"]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0002_changesets"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="quote",
+            index=models.Index(fields=["author", "id"], name="data_quote_author_3d0c1c_idx"),
+        ),
+        # Tag filters and tag facet counts go from the tag to its quotes; the
+        # unique (quote_id, tag_id) index only serves the other direction.
+        migrations.RunSQL(
+            "CREATE INDEX data_quote_tags_tag_quote_idx ON data_quote_tags (tag_id, quote_id)",
+            "DROP INDEX data_quote_tags_tag_quote_idx",
+        ),
+        migrations.RunPython(
+            run_for_vendor({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRESQL_FORWARD}),
+            run_for_vendor({"sqlite": SQLITE_REVERSE, "postgresql": POSTGRESQL_REVERSE}),
+        ),
+    ]
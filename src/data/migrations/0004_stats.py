@@ -0,0 +1,96 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def compute_stats(apps, schema_editor):
+    """
+    Compute the statistics of the existing corpus; runs maintain them from then on.
+    """
+    Quote = apps.get_model("data", "Quote")
+    AuthorStat = apps.get_model("data", "AuthorStat")
+    TagStat = apps.get_model("data", "TagStat")
+    QuoteTags = Quote.tags.through
+    AuthorStat.objects.bulk_create(
+        AuthorStat(author=row["author"], quotes=row["quotes"])
+        for row in Quote.objects.values("author").annotate(quotes=Count("*")).order_by()
+    )
+    TagStat.objects.bulk_create(
+        TagStat(tag_id=row["tag_id"], quotes=row["quotes"])
+        for row in QuoteTags.objects.values("tag_id").annotate(quotes=Count("*")).order_by()
+    )
+    schema_editor.execute(
+        "INSERT INTO data_tagpairstat (tag_id, other_tag_id, quotes) "
+        "SELECT a.tag_id, b.tag_id, COUNT(*) FROM data_quote_tags a "
+        "INNER JOIN data_quote_tags b ON a.quote_id = b.quote_id AND a.tag_id < b.tag_id "
+        "GROUP BY a.tag_id, b.tag_id"
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0003_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuthorStat",
+            fields=[
+                ("author", models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ("quotes", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="TagStat",
+            fields=[
+                (
+                    "tag",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stat",
+                        serialize=False,
+                        to="data.tag",
+                    ),
+                ),
+                ("quotes", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="TagPairStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quotes", models.IntegerField(default=0)),
+                (
+                    "other_tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="data.tag",
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="data.tag",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("tag", "other_tag"), name="data_tagpairstat_unique_pair")
+                ],
+            },
+        ),
+        migrations.RunPython(compute_stats, migrations.RunPython.noop),
+    ]
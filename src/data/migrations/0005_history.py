@@ -0,0 +1,138 @@
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seed_history(apps, schema_editor):
+    """
+    Record the current corpus as the versions of the latest run.
+
+    The corpus as of the earlier runs is unknown, so their history is marked
+    pruned; it is complete from the latest run on.
+    """
+    Quote = apps.get_model("data", "Quote")
+    QuoteRecord = apps.get_model("data", "QuoteRecord")
+    QuoteVersion = apps.get_model("data", "QuoteVersion")
+    ScrapeRun = apps.get_model("data", "ScrapeRun")
+    latest = ScrapeRun.objects.order_by("-id").first()
+    if latest is None:
+        return
+    ScrapeRun.objects.exclude(id=latest.id).update(history_pruned=True)
+
+    tags = {}
+    for quote_id, name in Quote.tags.through.objects.values_list("quote_id", "tag__name").iterator():
+        tags.setdefault(quote_id, []).append(name)
+    quotes = list(Quote.objects.values_list("id", "fingerprint", "text", "author", "author_url", "goodreads_url"))
+    for start in range(0, len(quotes), 500):
+        batch = quotes[start:start + 500]
+        QuoteRecord.objects.bulk_create(
+            QuoteRecord(fingerprint=fingerprint, text=text, author=author)
+            for _, fingerprint, text, author, _, _ in batch
+        )
+        records = dict(
+            QuoteRecord.objects.filter(fingerprint__in=[row[1] for row in batch]).values_list("fingerprint", "id")
+        )
+        versions = []
+        for quote_id, fingerprint, _, _, author_url, goodreads_url in batch:
+            names = sorted(tags.get(quote_id, ()))
+            # Must match `data.history.state_hash`.
+            state = "\n".join([author_url, goodreads_url or "", *names])
+            versions.append(QuoteVersion(
+                record_id=records[fingerprint],
+                run_id=latest.id,
+                author_url=author_url,
+                goodreads_url=goodreads_url,
+                tags="\n".join(names),
+                state_hash=hashlib.sha1(state.encode()).hexdigest(),
+            ))
+        QuoteVersion.objects.bulk_create(versions)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0004_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QuoteRecord",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fingerprint", models.CharField(max_length=40, unique=True)),
+                ("text", models.TextField()),
+                ("author", models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="scraperun",
+            name="history_pruned",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name="QuoteVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("author_url", models.URLField()),
+                ("goodreads_url", models.URLField(blank=True, null=True)),
+                ("tags", models.TextField(blank=True)),
+                ("removed", models.BooleanField(default=False)),
+                ("state_hash", models.CharField(max_length=40)),
+                (
+                    "record",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="versions",
+                        to="data.quoterecord",
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="data.scraperun",
+                    ),
+                ),
+                (
+                    "until_run",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="data.scraperun",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["record", "until_run"],
+                        name="data_quotev_record__4207ba_idx",
+                    ),
+                    models.Index(
+                        fields=["until_run", "run"],
+                        name="data_quotev_until_r_f4a65d_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(seed_history, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,9 @@
+import hashlib
+from datetime import datetime, timedelta
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class Tag(models.Model):
@@ -25,6 +30,8 @@ class Quote(models.Model):
         author_url (str): URL to the author's profile.
         goodreads_url (str): URL to the author's Goodreads profile (optional).
         tags (list): A list of tags associated with the quote.
+        fingerprint (str): Identity of the quote across runs (see `make_fingerprint`).
+        last_seen_run (ScrapeRun): The last run that scraped the quote.
     """
 
     text = models.TextField()
@@ -32,6 +39,209 @@ class Quote(models.Model):
     author_url = models.URLField()
     goodreads_url = models.URLField(null=True, blank=True)
     tags = models.ManyToManyField(Tag, related_name="quotes")
+    fingerprint = models.CharField(max_length=40, unique=True, editable=False)
+    last_seen_run = models.ForeignKey(
+        "ScrapeRun", null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+
+    class Meta:
+        # Author filters and author facet counts read the index only. The
+        # full-text index and the tag/quote index of the tags table are
+        # created by migration 0003 (see `data.search`).
+        indexes = [models.Index(fields=["author", "id"])]
 
     def __str__(self):
         return f'"{self.text}" by {self.author}'
+
+    @staticmethod
+    def make_fingerprint(author: str, text: str) -> str:
+        """
+        A quote is identified by its author and text; the other fields may change.
+        """
+        return hashlib.sha1(f"{author}\n{text}".encode()).hexdigest()
+
+    def save(self, *args, **kwargs):
+        if not self.fingerprint:
+            self.fingerprint = self.make_fingerprint(self.author, self.text)
+        super().save(*args, **kwargs)
+
+
+class ScrapeRun(models.Model):
+    """
+    A scrape run and the size of its changeset.
+    Attributes:
+        task_id (str): The Celery task id of the run, if any.
+        portal (str): The portal that was crawled.
+        started_at (datetime): When the run started persisting quotes.
+        finished_at (datetime): When its changeset was complete (null while running).
+        full_crawl (bool): Whether every page was crawled, so that quotes not
+            seen were recorded as removed.
+        inserted, updated, removed (int): Number of changes of each kind.
+        history_pruned (bool): Whether the quote history no longer tells the
+            corpus as of this run (see `data.history`).
+    """
+
+    task_id = models.CharField(max_length=255, null=True, blank=True)
+    portal = models.CharField(max_length=100)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    full_crawl = models.BooleanField(default=False)
+    inserted = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    removed = models.PositiveIntegerField(default=0)
+    history_pruned = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"Run {self.pk} of {self.portal}"
+
+    @staticmethod
+    def abandoned_before() -> datetime:
+        """
+        Runs still unfinished that started before this time are abandoned:
+        their writer died, so they will never finish.
+        """
+        return timezone.now() - timedelta(seconds=settings.SCRAPE_RUN_ABANDONED_AFTER)
+
+
+class QuoteChange(models.Model):
+    """
+    One entry of a run's changeset.
+
+    Only the identity of the quote is stored: consumers read the current
+    state of inserted and updated quotes. Removed quotes are deleted from the
+    corpus, so their entries are the tombstones.
+    Attributes:
+        run (ScrapeRun): The run that recorded the change.
+        quote_id (int): Primary key of the quote (kept after it is deleted).
+        fingerprint (str): Fingerprint of the quote.
+        kind (str): INSERTED, UPDATED or REMOVED.
+    """
+
+    INSERTED = "I"
+    UPDATED = "U"
+    REMOVED = "D"
+    KINDS = [(INSERTED, "inserted"), (UPDATED, "updated"), (REMOVED, "removed")]
+
+    run = models.ForeignKey(ScrapeRun, on_delete=models.CASCADE, related_name="changes")
+    quote_id = models.BigIntegerField()
+    fingerprint = models.CharField(max_length=40)
+    kind = models.CharField(max_length=1, choices=KINDS)
+
+    class Meta:
+        indexes = [models.Index(fields=["run", "quote_id"])]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.quote_id} in run {self.run_id}"
+
+
+class QuoteRecord(models.Model):
+    """
+    The identity of a quote in the history, kept after the quote is removed.
+
+    The author and text make the fingerprint, so they never change and are
+    stored once per quote rather than in every version.
+    Attributes:
+        fingerprint (str): Fingerprint of the quote (see `Quote.make_fingerprint`).
+        text (str): The text of the quote.
+        author (str): The author of the quote.
+    """
+
+    fingerprint = models.CharField(max_length=40, unique=True)
+    text = models.TextField()
+    author = models.CharField(max_length=255)
+
+    def __str__(self):
+        return f'"{self.text}" by {self.author}'
+
+
+class QuoteVersion(models.Model):
+    """
+    A state of a quote, from the run that recorded it until the run that
+    recorded the next one (`until_run`, null for the current version).
+
+    A version is only written when the state changed, as told by its
+    `state_hash`; removing a quote writes a version marked `removed`. The
+    history lives apart from `Quote`, which only holds the current corpus.
+    Attributes:
+        record (QuoteRecord): The quote.
+        run (ScrapeRun): The run that recorded the state.
+        until_run (ScrapeRun): The run that recorded the next state, if any.
+        author_url (str): URL to the author's profile.
+        goodreads_url (str): URL to the author's Goodreads profile (optional).
+        tags (str): The sorted tag names, one per line.
+        removed (bool): Whether the quote was removed from the portal.
+        state_hash (str): Digest of the state (see `data.history.state_hash`).
+    """
+
+    record = models.ForeignKey(QuoteRecord, on_delete=models.CASCADE, related_name="versions")
+    run = models.ForeignKey(ScrapeRun, on_delete=models.CASCADE, related_name="+")
+    until_run = models.ForeignKey(ScrapeRun, null=True, blank=True, on_delete=models.CASCADE, related_name="+")
+    author_url = models.URLField()
+    goodreads_url = models.URLField(null=True, blank=True)
+    tags = models.TextField(blank=True)
+    removed = models.BooleanField(default=False)
+    state_hash = models.CharField(max_length=40)
+
+    class Meta:
+        # The current version of a quote, and the versions alive at a run.
+        indexes = [
+            models.Index(fields=["record", "until_run"]),
+            models.Index(fields=["until_run", "run"]),
+        ]
+
+    def __str__(self):
+        return f"Quote {self.record_id} as of run {self.run_id}"
+
+
+class AuthorStat(models.Model):
+    """
+    Number of quotes of an author, maintained by the persistence stage.
+    Attributes:
+        author (str): The author.
+        quotes (int): Number of quotes by the author.
+    """
+
+    author = models.CharField(max_length=255, primary_key=True)
+    quotes = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.author}: {self.quotes}"
+
+
+class TagStat(models.Model):
+    """
+    Number of quotes carrying a tag, maintained by the persistence stage.
+    Attributes:
+        tag (Tag): The tag.
+        quotes (int): Number of quotes carrying the tag.
+    """
+
+    tag = models.OneToOneField(Tag, primary_key=True, on_delete=models.CASCADE, related_name="stat")
+    quotes = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.tag_id}: {self.quotes}"
+
+
+class TagPairStat(models.Model):
+    """
+    Number of quotes carrying both tags of a pair (tag co-occurrence).
+
+    Each pair is stored once, with `tag_id < other_tag_id`.
+    Attributes:
+        tag (Tag): The tag with the lower primary key.
+        other_tag (Tag): The tag with the higher primary key.
+        quotes (int): Number of quotes carrying both tags.
+    """
+
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="+")
+    other_tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="+")
+    quotes = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tag", "other_tag"], name="data_tagpairstat_unique_pair"),
+        ]
+
+    def __str__(self):
+        return f"{self.tag_id} & {self.other_tag_id}: {self.quotes}"
@@ -0,0 +1,182 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVectorField)
+from django.db import connections
+from django.db.models import Count, F, Func, Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from .models import Quote
+from .serializers import serialize_quotes
+
+
+def document() -> Func:
+    """
+    The search document of a quote on Postgres.
+
+    Must stay the expression the GIN index of migration 0003 is built on,
+    or Postgres will not use the index.
+    """
+    return Func(
+        F("text"),
+        F("author"),
+        template="to_tsvector('english'::regconfig, %(expressions)s)",
+        arg_joiner=" || ' ' || ",
+        output_field=SearchVectorField(),
+    )
+
+
+def search_query(query: str) -> SearchQuery:
+    """Parse a user query the way web search boxes do (quotes, OR, -word)."""
+    return SearchQuery(query, config="english", search_type="websearch")
+
+
+def fts5_query(query: str) -> str:
+    """
+    Quote every word of a user query so FTS5 matches all of them literally.
+
+    FTS5 has its own query syntax (AND, NEAR, column filters...); quoting
+    keeps user input from being parsed as it or failing to parse.
+    """
+    return " ".join('"{}"'.format(word.replace('"', '""')) for word in query.split())
+
+
+def filter_quotes(author: Optional[str] = None, tags: Sequence[str] = ()) -> QuerySet:
+    """
+    Quotes by `author` (exact match) carrying every tag of `tags`.
+
+    Each tag is a subquery on the (tag_id, quote_id) index of the tags table.
+    """
+    queryset = Quote.objects.all()
+    if author:
+        queryset = queryset.filter(author=author)
+    for name in tags:
+        tagged = Quote.tags.through.objects.filter(tag__name=name).values("quote_id")
+        queryset = queryset.filter(id__in=tagged)
+    return queryset
+
+
+def fts5_ids(queryset: QuerySet, query: str) -> Tuple[str, List[Any]]:
+    """
+    SQL selecting the ids of `queryset` the SQLite FTS5 table matches with `query`.
+    """
+    sql = "SELECT rowid FROM data_quote_fts WHERE data_quote_fts MATCH %s"
+    params: List[Any] = [fts5_query(query)]
+    if queryset.query.where:
+        # Checking each match against the (usually few) filtered ids is much
+        # cheaper than materializing every match of a common word. The unary
+        # + keeps SQLite from handing the id list to FTS5 as a rowid
+        # constraint, which probes the index once per listed id.
+        ids_sql, ids_params = queryset.values("id").query.sql_with_params()
+        sql += f" AND +rowid IN ({ids_sql})"
+        params.extend(ids_params)
+    return sql, params
+
+
+def match_text(queryset: QuerySet, query: str) -> QuerySet:
+    """
+    Narrow `queryset` to the quotes whose text or author match `query`.
+
+    SQLite goes through the FTS5 table and Postgres through the GIN index of
+    migration 0003; other backends fall back to a substring scan.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == "sqlite":
+        return queryset.filter(id__in=RawSQL(*fts5_ids(queryset, query)))
+    if vendor == "postgresql":
+        return queryset.alias(document=document()).filter(document=search_query(query))
+    return queryset.filter(Q(text__icontains=query) | Q(author__icontains=query))
+
+
+def ranked_ids(queryset: QuerySet, query: str, limit: int, offset: int) -> List[int]:
+    """
+    Return one page of the ids of `queryset` matching `query`, best match first.
+
+    Args:
+        queryset: The quotes left by the facet filters (not yet matched).
+        query: The text query.
+        limit: Page size.
+        offset: Number of results to skip.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == "sqlite":
+        # Django cannot join the virtual table, so the page is read from it directly.
+        sql, params = fts5_ids(queryset, query)
+        with connection.cursor() as cursor:
+            cursor.execute(f"{sql} ORDER BY bm25(data_quote_fts), rowid LIMIT %s OFFSET %s", [*params, limit, offset])
+            return [row[0] for row in cursor.fetchall()]
+
+    matched = match_text(queryset, query)
+    if connection.vendor == "postgresql":
+        rank = SearchRank(F("document"), search_query(query))
+        matched = matched.alias(rank=rank).order_by("-rank", "id")
+    else:
+        matched = matched.order_by("id")
+    return list(matched.values_list("id", flat=True)[offset:offset + limit])
+
+
+def facet_counts(queryset: QuerySet, limit: int) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Count the matching quotes per author and per tag, in the database.
+
+    Returns:
+        The `limit` most frequent authors and tags with their counts.
+    """
+    authors = (
+        queryset.order_by()
+        .values("author")
+        .annotate(count=Count("id"))
+        .order_by("-count", "author")[:limit]
+    )
+    tags = (
+        Quote.tags.through.objects.filter(quote_id__in=queryset.values("id"))
+        .values(name=F("tag__name"))
+        .annotate(count=Count("quote_id"))
+        .order_by("-count", "name")[:limit]
+    )
+    return {"authors": list(authors), "tags": list(tags)}
+
+
+def search_quotes(
+    query: str = "",
+    author: Optional[str] = None,
+    tags: Sequence[str] = (),
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> Dict[str, Any]:
+    """
+    Full-text search over the quotes, with author and tag facets.
+
+    The number of queries does not depend on the corpus or page size: one
+    count, one page of ids, three to serialize the page and one per facet.
+
+    Args:
+        query: Words the quote text or author must contain (all of them).
+        author: Only quotes by this author.
+        tags: Only quotes carrying all these tags.
+        limit: Page size, `SEARCH_PAGE_SIZE` by default.
+        offset: Number of results to skip.
+
+    Returns:
+        The total count, the page of serialized quotes (best match first when
+        searching text, oldest first otherwise) and the facet counts.
+    """
+    limit = settings.SEARCH_PAGE_SIZE if limit is None else limit
+    filtered = filter_quotes(author, tags)
+    query = query.strip()
+    if query:
+        matched = match_text(filtered, query)
+        ids = ranked_ids(filtered, query, limit, offset)
+    else:
+        matched = filtered
+        ids = list(filtered.order_by("id").values_list("id", flat=True)[offset:offset + limit])
+
+    position = {quote_id: index for index, quote_id in enumerate(ids)}
+    results = serialize_quotes(Quote.objects.filter(id__in=ids)) if ids else []
+    results.sort(key=lambda quote: position[quote["id"]])
+    return {
+        "count": matched.count(),
+        "results": results,
+        "facets": facet_counts(matched, settings.SEARCH_FACET_LIMIT),
+    }
@@ -1,7 +1,13 @@
+from typing import Any, Dict, List
+
+from django.db.models import QuerySet
 from rest_framework import serializers
 
 from .models import Quote, Tag
 
+QUOTE_FIELDS = ["id", "text", "author", "author_url", "goodreads_url"]
+TAG_FIELDS = ["id", "name", "url"]
+
 
 class TagSerializer(serializers.ModelSerializer):
     """
@@ -10,7 +16,7 @@ class TagSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Tag
-        fields = ["id", "name", "url"]
+        fields = TAG_FIELDS
 
 
 class QuoteSerializer(serializers.ModelSerializer):
@@ -21,4 +27,42 @@ class QuoteSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Quote
-        fields = ["id", "text", "author", "author_url", "goodreads_url", "tags"]
+        fields = QUOTE_FIELDS + ["tags"]
+
+
+def serialize_quotes(queryset: QuerySet) -> List[Dict[str, Any]]:
+    """
+    Read-only fast path producing the same payload as `QuoteSerializer(many=True)`.
+
+    Quotes, quote/tag links and tags are fetched as plain `values()` rows in
+    three queries and stitched together in Python, skipping the per-field
+    ModelSerializer machinery. Each tag dict is built once and shared by every
+    quote that references it.
+
+    Args:
+        queryset: The quotes to serialize.
+
+    Returns:
+        A list of quote dictionaries with their nested tags.
+    """
+    quotes = list(queryset.values(*QUOTE_FIELDS))
+    if not quotes:
+        return quotes
+
+    # Filter links and tags through subqueries instead of large IN lists so
+    # the number of bound parameters does not grow with the result size.
+    quote_ids = queryset.values("id")
+    links = Quote.tags.through.objects.filter(quote_id__in=quote_ids)
+    link_rows = list(links.order_by("id").values_list("quote_id", "tag_id"))
+    tags = {
+        tag["id"]: tag
+        for tag in Tag.objects.filter(id__in=links.values("tag_id")).values(*TAG_FIELDS)
+    }
+
+    tags_by_quote: Dict[int, List[Dict[str, Any]]] = {}
+    for quote_id, tag_id in link_rows:
+        tags_by_quote.setdefault(quote_id, []).append(tags[tag_id])
+
+    for quote in quotes:
+        quote["tags"] = tags_by_quote.get(quote["id"], [])
+    return quotes
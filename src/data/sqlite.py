@@ -0,0 +1,16 @@
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Apply `SQLITE_PRAGMAS` to every new SQLite connection (connection_created hook).
+
+    With `journal_mode=WAL`, readers never block on the writer and the
+    writer never blocks on readers; `busy_timeout` makes competing writers
+    wait for the lock instead of failing with "database is locked".
+    """
+    if connection.vendor != "sqlite" or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
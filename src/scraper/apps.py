@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
 
 
 class ScraperConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'scraper'
+
+    def ready(self):
+        # Only light modules are imported here. Portals are registered on
+        # first use (see `get_portal`), so processes that never crawl don't
+        # load the parsers and the HTTP stack.
+        from scraper.user_cache import forget_user
+
+        # Cached API users are dropped in every process that changes users.
+        user_model = get_user_model()
+        post_save.connect(forget_user, sender=user_model, dispatch_uid="scraper.forget_saved_user")
+        post_delete.connect(forget_user, sender=user_model, dispatch_uid="scraper.forget_deleted_user")
+
+        # Connects the Celery signals propagating traces through task headers.
+        import scraper.tracing  # noqa: F401
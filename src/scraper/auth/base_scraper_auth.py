@@ -1,7 +1,7 @@
 import logging
 from abc import ABC, abstractmethod
 
-from requests import Session
+from requests import Response, Session
 
 logger = logging.getLogger(__name__)
 
@@ -36,3 +36,18 @@ class BaseScraperAuth(ABC):
             bool: True if authenticated, False otherwise.
         """
         pass
+
+    def is_logged_out(self, response: Response) -> bool:
+        """
+        Check if a page response shows the session was logged out.
+
+        Only the status, headers and URL may be inspected: the body of the
+        response is streamed and not read yet.
+
+        Args:
+            response: The response of a page request.
+
+        Returns:
+            bool: True if the session must log in again, False otherwise.
+        """
+        return response.status_code in (401, 403)
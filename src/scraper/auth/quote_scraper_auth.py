@@ -1,7 +1,6 @@
 import logging
 
-from bs4 import BeautifulSoup
-from requests import Session
+from requests import Response, Session
 
 from scraper.auth.base_scraper_auth import BaseScraperAuth
 from scraper.utils import retry_with_backoff
@@ -32,6 +31,9 @@ class QuoteScraperAuth(BaseScraperAuth):
         Returns:
             bool: True if login was successful, False otherwise.
         """
+        # Imported on first login: the API only needs the portal URL.
+        from bs4 import BeautifulSoup
+
         def perform_login(username: str, password: str):
             # Fetch the login page to get the CSRF token
             response = self.session.get(self.login_url)
@@ -80,3 +82,15 @@ class QuoteScraperAuth(BaseScraperAuth):
         except Exception as e:
             logger.error(f"Error checking authentication: {e}")
             return False
+
+    def is_logged_out(self, response: Response) -> bool:
+        """
+        Check if a page response shows the session was logged out.
+
+        Args:
+            response: The response of a page request.
+
+        Returns:
+            bool: True if the portal redirected the request to the login page.
+        """
+        return super().is_logged_out(response) or response.url.startswith(self.login_url)
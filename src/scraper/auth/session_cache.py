@@ -0,0 +1,106 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from scraper.auth.base_scraper_auth import BaseScraperAuth
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, str, str]
+
+
+class CachedSession:
+    """A logged-in session kept between crawls, with its pool bookkeeping."""
+
+    def __init__(self, auth: BaseScraperAuth, requests: int, checked_at: float):
+        self.auth = auth
+        self.requests = requests
+        self.checked_at = checked_at
+
+
+class SessionCache:
+    """
+    Keeps the sessions of finished crawls for the next crawls of the process.
+
+    Logged-in sessions are kept per portal and account, up to
+    `SCRAPE_SESSION_CACHE_SIZE` of them (least recently returned first out),
+    so a crawl with the same account skips the login and reuses the open
+    connections. Connected sessions (opened by the worker warm-up, not logged
+    in) are kept per portal and handed to the first sessions a crawl creates.
+    """
+
+    def __init__(self):
+        self._logged_in: "OrderedDict[SessionKey, List[CachedSession]]" = OrderedDict()
+        self._connected: Dict[str, List[BaseScraperAuth]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(base_url: str, username: str, password: str) -> SessionKey:
+        # The password is part of the key so a changed password logs in again.
+        return base_url, username, hashlib.sha256(password.encode()).hexdigest()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(sessions) for sessions in self._logged_in.values())
+
+    def take(self, key: SessionKey) -> Optional[CachedSession]:
+        """
+        Take a logged-in session of an account out of the cache.
+        """
+        with self._lock:
+            sessions = self._logged_in.get(key)
+            if not sessions:
+                return None
+            session = sessions.pop()
+            if not sessions:
+                del self._logged_in[key]
+            return session
+
+    def put(self, key: SessionKey, session: CachedSession):
+        """
+        Keep a logged-in session, evicting the oldest beyond the cache size.
+        """
+        max_size = settings.SCRAPE_SESSION_CACHE_SIZE
+        if max_size <= 0:
+            return
+        with self._lock:
+            self._logged_in.setdefault(key, []).append(session)
+            self._logged_in.move_to_end(key)
+            size = sum(len(sessions) for sessions in self._logged_in.values())
+            while size > max_size:
+                oldest_key, sessions = next(iter(self._logged_in.items()))
+                evicted = sessions.pop(0)
+                if not sessions:
+                    del self._logged_in[oldest_key]
+                evicted.auth.session.close()
+                size -= 1
+
+    def take_connected(self, base_url: str) -> Optional[BaseScraperAuth]:
+        """
+        Take a connected, not logged-in session of a portal.
+        """
+        with self._lock:
+            sessions = self._connected.get(base_url)
+            return sessions.pop() if sessions else None
+
+    def put_connected(self, base_url: str, auth: BaseScraperAuth):
+        with self._lock:
+            self._connected.setdefault(base_url, []).append(auth)
+
+    def clear(self):
+        with self._lock:
+            for sessions in self._logged_in.values():
+                for session in sessions:
+                    session.auth.session.close()
+            for connected in self._connected.values():
+                for auth in connected:
+                    auth.session.close()
+            self._logged_in.clear()
+            self._connected.clear()
+
+
+session_cache = SessionCache()
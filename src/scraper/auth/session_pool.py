@@ -0,0 +1,256 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from requests import RequestException, Response
+
+from scraper.auth.base_scraper_auth import BaseScraperAuth
+from scraper.auth.session_cache import CachedSession, SessionCache
+from scraper.proxies import ProxyPool
+from scraper.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class NoHealthySessionError(Exception):
+    """Raised when no session of the pool can be logged in."""
+
+
+class PooledSession:
+    """An authenticated session of the pool and its bookkeeping."""
+
+    def __init__(self, auth: BaseScraperAuth, username: str, password: str):
+        self.auth = auth
+        self.username = username
+        self.password = password
+        self.healthy = False
+        self.in_flight = 0
+        # Requests sent since the last login.
+        self.requests = 0
+        self.next_request_at = 0.0
+        self.checked_at = 0.0
+        # The proxy the session's cookies are bound to, if any.
+        self.proxy: Optional[str] = None
+
+    def __repr__(self) -> str:
+        return f"PooledSession({self.username!r}, healthy={self.healthy}, requests={self.requests})"
+
+
+class SessionPool:
+    """
+    Spreads the page requests of a crawl over several logged-in sessions.
+
+    The pool logs in every account (`sessions_per_account` times, for portals
+    that allow concurrent sessions) and sends each request through the
+    least-loaded healthy session: the one with the fewest requests in flight,
+    then the one allowed to send soonest. Each session sends at most
+    `requests_per_second` requests, so the crawl gets the sum of the
+    per-account limits.
+
+    Sessions are health-checked every `SCRAPE_SESSION_CHECK_INTERVAL` seconds
+    and re-authenticated when the check or a response shows they were logged
+    out; the request is then sent again, so callers never see the logout. A
+    session is rotated (logged in again on a fresh connection) after
+    `SCRAPE_SESSION_MAX_REQUESTS` requests.
+
+    With a proxy pool, every login picks the best available proxy and the
+    session sticks to it until the proxy is quarantined; the session then
+    logs in again through another one.
+
+    With a session cache (and no proxies), the pool starts from the sessions
+    earlier crawls left logged in for the same accounts of `base_url`, and
+    hands its healthy sessions back to the cache when it is closed.
+    """
+
+    def __init__(
+        self,
+        auth_factory: Callable[[], BaseScraperAuth],
+        credentials: Sequence[Tuple[str, str]],
+        sessions_per_account: int = 1,
+        requests_per_second: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        proxies: Optional[ProxyPool] = None,
+        session_cache: Optional[SessionCache] = None,
+        base_url: Optional[str] = None,
+    ):
+        self.auth_factory = auth_factory
+        self.proxies = proxies
+        # Cached cookies are bound to the proxy they were obtained through.
+        self.session_cache = session_cache if base_url and not proxies else None
+        self.base_url = base_url
+        self.sessions: List[PooledSession] = [
+            self._new_session(username, password)
+            for username, password in credentials
+            for _ in range(sessions_per_account)
+        ]
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def _new_session(self, username: str, password: str) -> PooledSession:
+        cached = None
+        if self.session_cache is not None:
+            cached = self.session_cache.take(SessionCache.key(self.base_url, username, password))
+        if cached is None:
+            return PooledSession(self.auth_factory(), username, password)
+
+        session = PooledSession(cached.auth, username, password)
+        session.healthy = True
+        session.requests = cached.requests
+        # Still checked on schedule: the portal may have expired it meanwhile.
+        session.checked_at = cached.checked_at
+        return session
+
+    @property
+    def healthy_sessions(self) -> List[PooledSession]:
+        return [session for session in self.sessions if session.healthy]
+
+    def _route(self, session: PooledSession):
+        session.proxy = self.proxies.bind(session.proxy)
+        session.auth.session.proxies = {"http": session.proxy, "https": session.proxy}
+
+    def _login(self, session: PooledSession) -> bool:
+        with span("auth.login", username=session.username) as login_span:
+            try:
+                if self.proxies:
+                    self._route(session)
+                session.healthy = bool(session.auth.login(session.username, session.password))
+            except Exception as e:
+                logger.error(f"Login of {session.username} failed: {e}")
+                login_span.record_error(e)
+                session.healthy = False
+            login_span.set_attribute("healthy", session.healthy)
+        session.requests = 0
+        session.checked_at = self._clock()
+        return session.healthy
+
+    def _rotate(self, session: PooledSession):
+        logger.info(f"Rotating session of {session.username} after {session.requests} requests.")
+        session.auth = self.auth_factory()
+        self._login(session)
+
+    def login(self) -> int:
+        """
+        Log in every session of the pool not taken logged in from the cache.
+
+        Returns:
+            The number of healthy sessions.
+        """
+        for session in self.sessions:
+            if not session.healthy:
+                self._login(session)
+        healthy = len(self.healthy_sessions)
+        logger.info(f"{healthy} of {len(self.sessions)} sessions logged in.")
+        return healthy
+
+    def close(self):
+        """
+        Release the proxies the sessions are bound to, or hand the healthy
+        sessions back to the session cache.
+        """
+        for session in self.sessions:
+            if self.proxies:
+                self.proxies.unbind(session.proxy)
+            session.proxy = None
+            if self.session_cache is not None and session.healthy:
+                self.session_cache.put(
+                    SessionCache.key(self.base_url, session.username, session.password),
+                    CachedSession(session.auth, session.requests, session.checked_at),
+                )
+
+    def _check(self, session: PooledSession):
+        """
+        Re-authenticate `session` if its periodic health check fails.
+        """
+        now = self._clock()
+        if now - session.checked_at < settings.SCRAPE_SESSION_CHECK_INTERVAL:
+            return
+        session.checked_at = now
+        if not session.auth.is_authenticated():
+            logger.warning(f"Session of {session.username} was logged out; logging in again.")
+            self._login(session)
+
+    @contextmanager
+    def acquire(self) -> Iterator[PooledSession]:
+        """
+        Take the least-loaded healthy session, waiting for its rate limit.
+
+        Raises:
+            NoHealthySessionError: If no session is healthy, even after
+                logging the failed ones in again.
+        """
+        with self._lock:
+            candidates = self.healthy_sessions
+            if not candidates:
+                for session in self.sessions:
+                    self._login(session)
+                candidates = self.healthy_sessions
+            if not candidates:
+                raise NoHealthySessionError("No session of the pool could log in.")
+
+            session = min(candidates, key=lambda s: (s.in_flight, s.next_request_at, s.requests))
+            now = self._clock()
+            wait = max(0.0, session.next_request_at - now)
+            session.next_request_at = max(now, session.next_request_at) + self.min_interval
+            session.in_flight += 1
+
+        try:
+            if wait:
+                self._sleep(wait)
+            yield session
+        finally:
+            with self._lock:
+                session.in_flight -= 1
+
+    def get(self, url: str, **kwargs) -> Response:
+        """
+        Send a GET request through the pool.
+
+        A request that comes back logged out is sent again once, after the
+        session logged in again.
+
+        Args:
+            url: The URL to fetch.
+            **kwargs: Passed on to `requests.Session.get`.
+
+        Returns:
+            The response.
+        """
+        for attempt in range(2):
+            with self.acquire() as session:
+                self._check(session)
+                if session.requests >= settings.SCRAPE_SESSION_MAX_REQUESTS:
+                    self._rotate(session)
+                elif self.proxies and not self.proxies.is_available(session.proxy):
+                    logger.warning(f"Proxy of {session.username} was quarantined; logging in again.")
+                    self._login(session)
+
+                response = self._send(session, url, **kwargs)
+                session.requests += 1
+                if attempt or not session.auth.is_logged_out(response):
+                    return response
+
+                response.close()
+                logger.warning(f"Session of {session.username} was logged out on {url}.")
+                self._login(session)
+
+    def _send(self, session: PooledSession, url: str, **kwargs) -> Response:
+        """
+        Send a GET request through `session`, scoring its proxy.
+        """
+        if not self.proxies:
+            return session.auth.session.get(url, **kwargs)
+
+        start = self._clock()
+        try:
+            response = session.auth.session.get(url, **kwargs)
+        except RequestException:
+            self.proxies.record(session.proxy, self._clock() - start, ok=False)
+            raise
+        self.proxies.record(session.proxy, self._clock() - start, ok=not ProxyPool.is_failure(response))
+        return response
@@ -0,0 +1,76 @@
+import logging
+from typing import Any, Dict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from scraper.user_cache import user_key
+
+logger = logging.getLogger(__name__)
+
+# The password hash never leaves the database; tokens checked for revocation
+# are compared with its md5 digest instead.
+EXCLUDED_FIELDS = ("password",)
+
+
+def _dump(user) -> Dict[str, Any]:
+    fields = {
+        field.attname: getattr(user, field.attname)
+        for field in user._meta.concrete_fields
+        if field.attname not in EXCLUDED_FIELDS
+    }
+    if api_settings.CHECK_REVOKE_TOKEN:
+        fields["password_digest"] = get_md5_hash_password(user.password)
+    return fields
+
+
+def _load(user_model, fields: Dict[str, Any]):
+    fields = dict(fields)
+    password_digest = fields.pop("password_digest", None)
+    # Loaded like a database row; the password is a deferred field.
+    user = user_model.from_db(DEFAULT_DB_ALIAS, list(fields), list(fields.values()))
+    user.password_digest = password_digest
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    `JWTAuthentication` resolving the user of a token through the cache.
+
+    The user row is cached for `API_USER_CACHE_TIMEOUT` seconds after the
+    first request, so the following requests of a client (and the permission
+    checks reading `request.user`) run no authentication query. Saving or
+    deleting a user drops its entry, so deactivations and password changes
+    apply to the next request; the timeout bounds how long changes made
+    without signals (`QuerySet.update`) go unnoticed.
+    """
+
+    def get_user(self, validated_token: Token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        fields = cache.get(user_key(user_id))
+        if fields is None:
+            # The parent class checks the row it loads.
+            user = super().get_user(validated_token)
+            cache.set(user_key(user_id), _dump(user), timeout=settings.API_USER_CACHE_TIMEOUT)
+            return user
+
+        user = _load(self.user_model, fields)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != user.password_digest:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
@@ -0,0 +1,165 @@
+import logging
+import os
+import resource
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Custom Celery states of a task stopped by its budget or by a cancellation.
+BUDGET_STATE = "BUDGET_EXCEEDED"
+CANCELLED_STATE = "CANCELLED"
+
+# Limits of a job, by API parameter name and setting.
+LIMITS = {
+    "max_pages": "SCRAPE_JOB_MAX_PAGES",
+    "max_seconds": "SCRAPE_JOB_MAX_SECONDS",
+    "max_bytes": "SCRAPE_JOB_MAX_BYTES",
+}
+
+CANCEL_PREFIX = "scraper:cancel"
+
+
+class CrawlStoppedError(Exception):
+    """Raised when a crawl stops before its last page: budget exhausted or cancelled."""
+
+    def __init__(self, reason: str, state: str, items: Optional[List[Any]] = None):
+        super().__init__(reason)
+        self.state = state
+        # Items scraped before the crawl stopped.
+        self.items = items or []
+        # Metrics of the run the items were saved in, once saved.
+        self.metrics: Dict[str, Any] = {}
+
+
+def current_rss() -> int:
+    """
+    Return the resident memory of the process in bytes.
+
+    Falls back to the peak resident memory where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Kilobytes on Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def request_cancel(task_id: str):
+    """
+    Ask the crawl of a task to stop at its next page.
+    """
+    cache.set(f"{CANCEL_PREFIX}:{task_id}", True, timeout=settings.SCRAPE_PROGRESS_TTL)
+
+
+def is_cancelled(task_id: str) -> bool:
+    return bool(cache.get(f"{CANCEL_PREFIX}:{task_id}"))
+
+
+class JobBudget:
+    """
+    Limits a crawl job to a number of pages, seconds, downloaded bytes and memory.
+
+    The crawl job checks the budget before every page and stops once it is
+    exhausted or the task was cancelled (`request_cancel`); the pages scraped
+    until then are kept. Memory is the growth of the process' resident memory
+    since the job started, so a leaking parser stops its crawl rather than
+    the worker. A None limit is no limit.
+    """
+
+    def __init__(
+        self,
+        task_id: Optional[str] = None,
+        max_pages: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        max_memory: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.task_id = task_id
+        self.max_pages = max_pages
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.max_memory = max_memory
+        self.bytes = 0
+        self.stop_reason: Optional[str] = None
+        self.state: Optional[str] = None
+        self._clock = clock
+        self.started_at = clock()
+        self._cancel_checked_at = self.started_at
+        self.rss_at_start = current_rss() if max_memory else 0
+
+    @classmethod
+    def for_task(cls, task_id: Optional[str], limits: Optional[Dict[str, int]] = None) -> "JobBudget":
+        """
+        Build the budget of a task from the settings, lowered by `limits`.
+
+        Args:
+            task_id: The crawl task, polled for cancellation if given.
+            limits: Limits requested for the job, by `LIMITS` name. They
+                can't raise the limits of the settings.
+        """
+        values = {}
+        for name, setting in LIMITS.items():
+            default = getattr(settings, setting)
+            requested = (limits or {}).get(name)
+            values[name] = requested if default is None else min(requested or default, default)
+        return cls(task_id, max_memory=settings.SCRAPE_JOB_MAX_MEMORY, **values)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.stop_reason is not None
+
+    def record_bytes(self, size: int):
+        self.bytes += size
+
+    def stop(self, reason: str, state: str = BUDGET_STATE):
+        if not self.exhausted:
+            logger.warning(f"Stopping the crawl: {reason}")
+            self.stop_reason = reason
+            self.state = state
+
+    def _cancelled(self, now: float) -> bool:
+        # The flag is polled at most every SCRAPE_CANCEL_CHECK_INTERVAL seconds.
+        if not self.task_id or now - self._cancel_checked_at < settings.SCRAPE_CANCEL_CHECK_INTERVAL:
+            return False
+        self._cancel_checked_at = now
+        return is_cancelled(self.task_id)
+
+    def check(self, pages: int) -> bool:
+        """
+        Check the budget before a page is fetched.
+
+        Args:
+            pages: Pages the job scraped so far.
+
+        Returns:
+            bool: True if the job may fetch another page, False otherwise.
+        """
+        if self.exhausted:
+            return False
+        now = self._clock()
+        if self._cancelled(now):
+            self.stop("Cancelled", CANCELLED_STATE)
+        elif self.max_pages is not None and pages >= self.max_pages:
+            self.stop(f"Page budget of {self.max_pages} pages reached")
+        elif self.max_seconds is not None and now - self.started_at >= self.max_seconds:
+            self.stop(f"Time budget of {self.max_seconds} seconds reached")
+        elif self.max_bytes is not None and self.bytes >= self.max_bytes:
+            self.stop(f"Download budget of {self.max_bytes} bytes reached")
+        elif self.max_memory is not None and current_rss() - self.rss_at_start >= self.max_memory:
+            self.stop(f"Memory budget of {self.max_memory} bytes reached")
+        return not self.exhausted
+
+    def error(self, items: List[Any]) -> CrawlStoppedError:
+        return CrawlStoppedError(self.stop_reason, self.state, items)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "seconds": round(self._clock() - self.started_at, 1),
+            "bytes": self.bytes,
+        }
@@ -0,0 +1,119 @@
+import logging
+from typing import Any, Dict, List
+
+from django.conf import settings
+
+from data.models import Quote, QuoteChange, ScrapeRun
+from data.serializers import serialize_quotes
+from scraper.writer import close_abandoned_runs
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = {
+    QuoteChange.INSERTED: "insert",
+    QuoteChange.UPDATED: "update",
+    QuoteChange.REMOVED: "delete",
+}
+
+
+def publish_changes(run: ScrapeRun):
+    """
+    Append the changeset of a finished run to the `SCRAPE_CHANGES_STREAM` Redis stream.
+
+    Each change is one entry (run, op, id, fingerprint), followed by a
+    `run_finished` entry with the counts. Publishing is best effort: the
+    changes endpoint stays the source of truth.
+    """
+    if not settings.SCRAPE_CHANGES_STREAM:
+        return
+    # Imported on first publish: most processes never open the stream.
+    import redis
+
+    stream = settings.SCRAPE_CHANGES_STREAM
+    maxlen = settings.SCRAPE_CHANGES_STREAM_MAXLEN
+    try:
+        client = redis.Redis.from_url(settings.SCRAPE_CHANGES_REDIS_URL)
+        pipe = client.pipeline(transaction=False)
+        for quote_id, fingerprint, kind in run.changes.order_by("id").values_list(
+            "quote_id", "fingerprint", "kind"
+        ).iterator():
+            pipe.xadd(
+                stream,
+                {"run": run.pk, "op": OPERATIONS[kind], "id": quote_id, "fingerprint": fingerprint},
+                maxlen=maxlen,
+                approximate=True,
+            )
+        pipe.xadd(
+            stream,
+            {"run": run.pk, "op": "run_finished", "inserted": run.inserted,
+             "updated": run.updated, "removed": run.removed},
+            maxlen=maxlen,
+            approximate=True,
+        )
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.error(f"Error publishing the changes of run {run.pk}: {e}")
+
+
+def changes_since(since: int) -> Dict[str, Any]:
+    """
+    Collapse the changesets of the runs finished after run `since`.
+
+    Runs are served in creation order and only up to the first run still
+    being written, which may finish after later runs: a consumer passing
+    `until` as its next `since` never skips it. Abandoned runs (see
+    `ScrapeRun.abandoned_before`) are first finished as partial crawls, so
+    they don't hold the feed back and their changes are served.
+
+    A quote changed by several runs appears once, with its net change: a
+    quote inserted then updated is an insert, a quote inserted then removed
+    is left out. Inserted and updated quotes carry their current state,
+    removed ones only their id and fingerprint.
+
+    Args:
+        since: The last run the consumer processed (0 for everything).
+
+    Returns:
+        The run the consumer is up to date with and the net changes.
+    """
+    close_abandoned_runs()
+    finished = ScrapeRun.objects.filter(pk__gt=since, finished_at__isnull=False)
+    pending = (
+        ScrapeRun.objects.filter(pk__gt=since, finished_at__isnull=True)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+        .first()
+    )
+    if pending is not None:
+        finished = finished.filter(pk__lt=pending)
+    runs = list(finished.order_by("pk").values_list("pk", flat=True))
+    # (first kind, last kind, fingerprint) per quote.
+    net: Dict[int, List[str]] = {}
+    entries = QuoteChange.objects.filter(run_id__in=runs).order_by("run_id", "id")
+    for quote_id, fingerprint, kind in entries.values_list("quote_id", "fingerprint", "kind").iterator():
+        if quote_id in net:
+            net[quote_id][1] = kind
+        else:
+            net[quote_id] = [kind, kind, fingerprint]
+
+    inserted, updated, removed = [], [], []
+    for quote_id, (first, last, fingerprint) in net.items():
+        if last == QuoteChange.REMOVED:
+            if first != QuoteChange.INSERTED:
+                removed.append({"id": quote_id, "fingerprint": fingerprint})
+        elif first == QuoteChange.INSERTED:
+            inserted.append(quote_id)
+        else:
+            updated.append(quote_id)
+
+    def current(ids: List[int]) -> List[Dict[str, Any]]:
+        return serialize_quotes(Quote.objects.filter(id__in=ids)) if ids else []
+
+    return {
+        "since": since,
+        "until": runs[-1] if runs else since,
+        "runs": runs,
+        "inserted": current(inserted),
+        "updated": current(updated),
+        "removed": removed,
+    }
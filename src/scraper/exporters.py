@@ -0,0 +1,69 @@
+import json
+import logging
+from typing import Callable, Dict, List
+
+from scraper.items import QuoteItem
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - pyarrow is only needed for Parquet files
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+
+def export_ndjson(path: str, items: List[QuoteItem]) -> int:
+    """
+    Write validated items to a newline-delimited JSON file, replacing it.
+
+    Each QuoteItem is turned into a row only while it is written.
+
+    Returns:
+        The number of items written.
+    """
+    with open(path, "wb") as file:
+        for item in items:
+            row = item.as_dict()
+            file.write(orjson.dumps(row) if orjson else json.dumps(row, ensure_ascii=False).encode())
+            file.write(b"\n")
+    return len(items)
+
+
+def export_parquet(path: str, items: List[QuoteItem]) -> int:
+    """
+    Write validated items to a Parquet file, replacing it.
+
+    Returns:
+        The number of items written.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed.
+    """
+    if pyarrow is None:
+        raise RuntimeError("Writing Parquet files requires pyarrow.")
+    # Columns are read from the QuoteItems, sharing their strings, rather
+    # than from a dictionary per row.
+    columns = {
+        field: [getattr(item, field) for item in items]
+        for field in ("text", "author", "author_url", "goodreads_url")
+    }
+    # One row per distinct (shared) tag.
+    tag_rows = {}
+    columns["tags"] = [
+        [tag_rows[tag] if tag in tag_rows else tag_rows.setdefault(tag, tag.as_dict()) for tag in item.tags]
+        for item in items
+    ]
+    pyarrow.parquet.write_table(pyarrow.Table.from_pydict(columns), path)
+    return len(items)
+
+
+EXPORTERS: Dict[str, Callable[[str, List[QuoteItem]], int]] = {
+    "ndjson": export_ndjson,
+    "parquet": export_parquet,
+}
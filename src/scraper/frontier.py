@@ -0,0 +1,278 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Frontier(ABC):
+    """
+    The URLs of a crawl that are left to fetch, shared by its workers.
+
+    URLs are pulled in priority order (lower values first, FIFO within a
+    priority) and every URL is only ever queued once. A pulled URL is leased
+    to the worker for a limited time: it must be acked once processed, or it
+    is handed out again after the lease expires, so the URLs taken by a
+    crashed worker are not lost.
+    """
+
+    @abstractmethod
+    def push(self, urls: Iterable[str], priority: int = 0) -> int:
+        """
+        Queue the URLs that were never seen before.
+
+        Args:
+            urls: The URLs to queue.
+            priority: The priority of the URLs; lower values are pulled first.
+
+        Returns:
+            The number of URLs queued.
+        """
+        pass
+
+    @abstractmethod
+    def pull(self, batch_size: int, lease: float) -> List[str]:
+        """
+        Lease up to `batch_size` URLs, re-issuing the URLs whose lease expired.
+
+        Args:
+            batch_size: Maximum number of URLs to return.
+            lease: Seconds after which unacked URLs are handed out again.
+
+        Returns:
+            The leased URLs, highest priority first.
+        """
+        pass
+
+    @abstractmethod
+    def ack(self, urls: Iterable[str]):
+        """
+        Mark leased URLs as processed.
+        """
+        pass
+
+    @abstractmethod
+    def release(self, urls: Iterable[str]):
+        """
+        Give leased URLs back to the queue before their lease expires.
+        """
+        pass
+
+    @abstractmethod
+    def counts(self) -> Tuple[int, int]:
+        """
+        Returns:
+            A tuple containing the number of queued and of leased URLs.
+        """
+        pass
+
+    def is_done(self) -> bool:
+        """
+        Returns:
+            bool: True once no URL is queued or leased.
+        """
+        return self.counts() == (0, 0)
+
+
+class InMemoryFrontier(Frontier):
+    """
+    Frontier kept in process memory, for tests and single-node crawls.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._order = itertools.count()
+        self._queue: List[Tuple[int, int, str]] = []
+        self._seen: Set[str] = set()
+        self._priorities: Dict[str, int] = {}
+        # URL -> lease deadline.
+        self._leases: Dict[str, float] = {}
+
+    def _enqueue(self, url: str):
+        heapq.heappush(self._queue, (self._priorities[url], next(self._order), url))
+
+    def _requeue_expired(self, now: float):
+        expired = [url for url, deadline in self._leases.items() if deadline <= now]
+        for url in expired:
+            del self._leases[url]
+            self._enqueue(url)
+        if expired:
+            logger.warning(f"Re-issuing {len(expired)} URLs whose lease expired.")
+
+    def push(self, urls: Iterable[str], priority: int = 0) -> int:
+        queued = 0
+        with self._lock:
+            for url in urls:
+                if url in self._seen:
+                    continue
+                self._seen.add(url)
+                self._priorities[url] = priority
+                self._enqueue(url)
+                queued += 1
+        return queued
+
+    def pull(self, batch_size: int, lease: float) -> List[str]:
+        with self._lock:
+            now = self._clock()
+            self._requeue_expired(now)
+            batch = []
+            while self._queue and len(batch) < batch_size:
+                _, _, url = heapq.heappop(self._queue)
+                self._leases[url] = now + lease
+                batch.append(url)
+            return batch
+
+    def ack(self, urls: Iterable[str]):
+        with self._lock:
+            for url in urls:
+                if self._leases.pop(url, None) is not None:
+                    del self._priorities[url]
+
+    def release(self, urls: Iterable[str]):
+        with self._lock:
+            for url in urls:
+                if self._leases.pop(url, None) is not None:
+                    self._enqueue(url)
+
+    def counts(self) -> Tuple[int, int]:
+        with self._lock:
+            return len(self._queue), len(self._leases)
+
+
+# Queue scores are priority * 1e12 + a per-crawl sequence number, so URLs
+# come out by priority then in arrival order.
+
+# KEYS: queue, seen, priorities, sequence, leases. ARGV: ttl, priority, urls...
+_PUSH_SCRIPT = """
+local queued = 0
+for i = 3, #ARGV do
+    if redis.call('SADD', KEYS[2], ARGV[i]) == 1 then
+        local seq = redis.call('INCR', KEYS[4])
+        redis.call('HSET', KEYS[3], ARGV[i], ARGV[2])
+        redis.call('ZADD', KEYS[1], tonumber(ARGV[2]) * 1e12 + seq, ARGV[i])
+        queued = queued + 1
+    end
+end
+for _, key in ipairs(KEYS) do
+    redis.call('EXPIRE', key, ARGV[1])
+end
+return queued
+"""
+
+# KEYS: queue, leases, priorities, sequence. ARGV: now, lease, batch size.
+_PULL_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, url in ipairs(expired) do
+    local priority = tonumber(redis.call('HGET', KEYS[3], url) or 0)
+    redis.call('ZREM', KEYS[2], url)
+    redis.call('ZADD', KEYS[1], priority * 1e12 + redis.call('INCR', KEYS[4]), url)
+end
+local batch = redis.call('ZRANGE', KEYS[1], 0, tonumber(ARGV[3]) - 1)
+local deadline = tonumber(ARGV[1]) + tonumber(ARGV[2])
+for _, url in ipairs(batch) do
+    redis.call('ZREM', KEYS[1], url)
+    redis.call('ZADD', KEYS[2], deadline, url)
+end
+return {batch, #expired}
+"""
+
+# KEYS: queue, leases, priorities, sequence. ARGV: urls...
+_RELEASE_SCRIPT = """
+local released = 0
+for _, url in ipairs(ARGV) do
+    if redis.call('ZREM', KEYS[2], url) == 1 then
+        local priority = tonumber(redis.call('HGET', KEYS[3], url) or 0)
+        redis.call('ZADD', KEYS[1], priority * 1e12 + redis.call('INCR', KEYS[4]), url)
+        released = released + 1
+    end
+end
+return released
+"""
+
+
+class RedisFrontier(Frontier):
+    """
+    Frontier shared by the workers of a crawl through Redis.
+
+    The queue is a sorted set scored by priority then arrival, the seen-set a
+    set and the leases a sorted set scored by deadline. Every operation is a
+    single Lua script, so a batch costs one round trip and concurrent workers
+    never take the same URL. Expired leases are moved back to the queue by
+    the next pull. The keys expire `SCRAPE_FRONTIER_TTL` seconds after the
+    last push. Leases use the workers' wall clocks, which are assumed to be
+    roughly in sync.
+    """
+
+    KEY_PREFIX = "scraper:frontier"
+
+    def __init__(self, crawl_id: str, client=None):
+        if client is None:
+            client = redis.Redis.from_url(settings.SCRAPE_FRONTIER_REDIS_URL)
+        self.client = client
+        prefix = f"{self.KEY_PREFIX}:{crawl_id}"
+        self.queue_key = f"{prefix}:queue"
+        self.seen_key = f"{prefix}:seen"
+        self.leases_key = f"{prefix}:leases"
+        self.priorities_key = f"{prefix}:priorities"
+        self.sequence_key = f"{prefix}:sequence"
+        self._push = client.register_script(_PUSH_SCRIPT)
+        self._pull = client.register_script(_PULL_SCRIPT)
+        self._release = client.register_script(_RELEASE_SCRIPT)
+
+    def push(self, urls: Iterable[str], priority: int = 0) -> int:
+        urls = list(urls)
+        if not urls:
+            return 0
+        return self._push(
+            keys=[self.queue_key, self.seen_key, self.priorities_key, self.sequence_key, self.leases_key],
+            args=[settings.SCRAPE_FRONTIER_TTL, priority, *urls],
+        )
+
+    def pull(self, batch_size: int, lease: float) -> List[str]:
+        batch, expired = self._pull(
+            keys=[self.queue_key, self.leases_key, self.priorities_key, self.sequence_key],
+            args=[time.time(), lease, batch_size],
+        )
+        if expired:
+            logger.warning(f"Re-issuing {expired} URLs whose lease expired.")
+        return [url.decode() for url in batch]
+
+    def ack(self, urls: Iterable[str]):
+        urls = list(urls)
+        if urls:
+            pipe = self.client.pipeline()
+            pipe.zrem(self.leases_key, *urls)
+            pipe.hdel(self.priorities_key, *urls)
+            pipe.execute()
+
+    def release(self, urls: Iterable[str]):
+        urls = list(urls)
+        if urls:
+            self._release(
+                keys=[self.queue_key, self.leases_key, self.priorities_key, self.sequence_key],
+                args=urls,
+            )
+
+    def counts(self) -> Tuple[int, int]:
+        pipe = self.client.pipeline()
+        pipe.zcard(self.queue_key)
+        pipe.zcard(self.leases_key)
+        queued, leased = pipe.execute()
+        return queued, leased
+
+
+def make_frontier(crawl_id: str) -> Frontier:
+    """
+    Build the frontier of a crawl with the backend set in `SCRAPE_FRONTIER_BACKEND`.
+    """
+    if settings.SCRAPE_FRONTIER_BACKEND == "redis":
+        return RedisFrontier(crawl_id)
+    return InMemoryFrontier()
@@ -0,0 +1,83 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+from django.conf import settings
+
+
+class IdentityCache:
+    """
+    Bounded, thread-safe LRU mapping of natural keys to primary keys.
+
+    One instance lives per worker process and survives across tasks, so
+    identities resolved in a run are reused by the next ones. Prefork workers
+    keep a separate copy in every child, which is why the size is bounded.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, keys: Iterable[Hashable]) -> Tuple[Dict[Hashable, int], List[Hashable]]:
+        """
+        Look up several keys at once.
+
+        Args:
+            keys: The natural keys to resolve.
+
+        Returns:
+            A tuple containing the cached `{key: pk}` entries and the keys
+            that were not cached.
+        """
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                pk = self._entries.get(key)
+                if pk is None:
+                    missing.append(key)
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = pk
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def set_many(self, entries: Dict[Hashable, int]):
+        """
+        Store several identities, evicting the least recently used ones.
+        """
+        with self._lock:
+            for key, pk in entries.items():
+                self._entries[key] = pk
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[Hashable]):
+        """
+        Forget the given keys, e.g. after the rows were deleted.
+        """
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def hit_rate(self) -> float:
+        """
+        Return the share of lookups answered from the cache, between 0 and 1.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+# Process-wide cache of tag name -> Tag.pk.
+tag_ids = IdentityCache(maxsize=settings.SCRAPE_IDENTITY_CACHE_SIZE)
@@ -0,0 +1,93 @@
+import sys
+from typing import Any, Dict, Optional, Tuple
+
+
+class TagRef:
+    """
+    A tag referenced by a scraped quote.
+
+    Parsers hand out one shared, interned instance per distinct tag, so a
+    crawl holds each tag name and URL in memory once, however many quotes
+    reference it.
+    Attributes:
+        name (str): The name of the tag.
+        url (str): URL to the tag's page.
+    """
+
+    __slots__ = ("name", "url")
+
+    def __init__(self, name: str, url: str):
+        self.name = sys.intern(name)
+        self.url = sys.intern(url)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, TagRef):
+            return NotImplemented
+        return self.name == other.name and self.url == other.url
+
+    def __hash__(self) -> int:
+        return hash((self.name, self.url))
+
+    def __repr__(self) -> str:
+        return f"TagRef(name={self.name!r}, url={self.url!r})"
+
+    def as_dict(self) -> Dict[str, str]:
+        return {"name": self.name, "url": self.url}
+
+
+class QuoteItem:
+    """
+    Compact representation of a scraped quote.
+
+    Uses `__slots__` instead of a per-item dict and keeps its tags as a tuple
+    of shared `TagRef` objects. Validation, persistence and export read its
+    attributes directly; item access (`item["author"]`) is kept for callers
+    written against the former dict items.
+    Attributes:
+        text (str): The text of the quote.
+        author (str): The author of the quote.
+        author_url (str): URL to the author's profile.
+        goodreads_url (str): URL to the author's Goodreads profile (optional).
+        tags (tuple): The tags associated with the quote.
+    """
+
+    __slots__ = ("text", "author", "author_url", "goodreads_url", "tags")
+
+    def __init__(
+        self,
+        text: str,
+        author: str,
+        author_url: str,
+        goodreads_url: Optional[str] = None,
+        tags: Tuple[TagRef, ...] = (),
+    ):
+        self.text = text
+        self.author = sys.intern(author)
+        self.author_url = author_url
+        self.goodreads_url = goodreads_url
+        self.tags = tags
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, QuoteItem):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"QuoteItem(text={self.text!r}, author={self.author!r})"
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return the item as a plain dictionary, e.g. for JSON export.
+        """
+        return {
+            "text": self.text,
+            "author": self.author,
+            "author_url": self.author_url,
+            "goodreads_url": self.goodreads_url,
+            "tags": [tag.as_dict() for tag in self.tags],
+        }
@@ -0,0 +1,232 @@
+import logging
+import time
+import uuid
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+from scraper.auth.session_cache import session_cache
+from scraper.auth.session_pool import SessionPool
+from scraper.budget import JobBudget
+from scraper.frontier import Frontier, make_frontier
+from scraper.logs import EventLogger
+from scraper.monitoring import StructureDriftError, YieldMonitor
+from scraper.portals.registry import PortalDefinition
+from scraper.progress import ProgressReporter
+from scraper.proxies import proxy_pool
+from scraper.scheduler import RateLimiter
+from scraper.tracing import span
+
+logger = logging.getLogger(__name__)
+log = EventLogger(__name__)
+
+
+class CrawlJob:
+    """Crawls a portal described by a `PortalDefinition`."""
+
+    def __init__(
+        self,
+        portal: PortalDefinition,
+        username: str,
+        password: str,
+        progress: Optional[ProgressReporter] = None,
+        parser_backend: Optional[str] = None,
+        frontier: Optional[Frontier] = None,
+        accounts: Sequence[Tuple[str, str]] = (),
+        start_urls: Optional[Sequence[str]] = None,
+        follow_links: bool = True,
+        budget: Optional[JobBudget] = None,
+    ):
+        self.portal = portal
+        # Crawls of a page range start from its pages and stay within them.
+        self.start_urls = tuple(start_urls or portal.start_urls)
+        self.follow_links = follow_links
+        # Workers given the same frontier cooperate on one crawl.
+        self.owns_frontier = frontier is None
+        self.frontier = frontier or make_frontier(f"{portal.name}:{uuid.uuid4().hex}")
+        self.pages_scraped = 0
+        # Pages are fetched through the sessions of every account, starting
+        # from the connections the worker warm-up opened, if any.
+        self.sessions = SessionPool(
+            lambda: session_cache.take_connected(portal.base_url) or portal.auth_class(portal.base_url),
+            [(username, password), *accounts],
+            sessions_per_account=portal.sessions_per_account,
+            requests_per_second=portal.session_requests_per_second,
+            proxies=proxy_pool if proxy_pool else None,
+            session_cache=session_cache,
+            base_url=portal.base_url,
+        )
+        self.auth = self.sessions.sessions[0].auth
+        if parser_backend is None and settings.SCRAPE_PARSER_BACKEND in portal.parser_classes:
+            parser_backend = settings.SCRAPE_PARSER_BACKEND
+        self.parser = portal.parser_class(parser_backend)(self.auth)
+        self.monitor = YieldMonitor(portal.base_url)
+        self.parser.monitor = self.monitor
+        self.parser.sessions = self.sessions
+        self.budget = budget
+        self.parser.budget = budget
+        if portal.requests_per_second:
+            self.parser.rate_limiter = RateLimiter(portal.name, portal.requests_per_second)
+        self.username = username
+        self.password = password
+        self.progress = progress
+        # Called after every page, e.g. to renew the scheduler slot lease.
+        self.heartbeat: Optional[Callable[[], None]] = None
+        # Per-page outcomes are logged as one event at the end of the crawl.
+        self.summary = log.summary(
+            "crawl.finished", "Scraped %(items)s items from %(pages)s pages of %(portal)s", portal=portal.name
+        )
+
+    def _attempt_login(self) -> bool:
+        """
+        Attempt to log in every session of the pool.
+
+        Returns:
+            bool: True if at least one session logged in, False otherwise.
+        """
+        if not self.sessions.login():
+            logger.error("Login failed. Cannot proceed with scraping.")
+            return False
+        logger.info("Login successful.")
+        return True
+
+    def _may_continue(self) -> bool:
+        """
+        Whether the breaker is closed and the budget allows another page.
+        """
+        if self.monitor.is_open:
+            return False
+        return self.budget is None or self.budget.check(self.pages_scraped)
+
+    def _scrape_page(self, page_url: str) -> Tuple[List[Any], str]:
+        """
+        Scrape a single page and return the items and the next page URL.
+
+        Args:
+            page_url (str): The URL of the page to scrape.
+
+        Returns:
+            Tuple[List[Any], str]: A tuple containing the list of items and the next page URL.
+        """
+        start = time.monotonic()
+        try:
+            with span("page.scrape", url=page_url) as page_span:
+                items, next_page_url = self.parser.parse_page(page_url)
+                page_span.set_attribute("items", len(items))
+        except Exception as e:
+            self.summary.add("failed_pages", example=page_url)
+            log.error("page.failed", "Error scraping page %(url)s: %(error)s", url=page_url, error=e)
+            return [], None
+        if not items:
+            self.summary.add("empty_pages", example=page_url)
+        log.info(
+            "page.scraped", "Scraped %(items)s items from %(url)s",
+            url=page_url, items=len(items), seconds=round(time.monotonic() - start, 3),
+        )
+        return items, next_page_url
+
+    def _scrape_batch(self, batch: List[str]) -> List[Any]:
+        """
+        Scrape a batch of leased pages, queueing their next pages.
+
+        Returns:
+            List[Any]: The items scraped from the batch.
+        """
+        batch_items = []
+        for index, page_url in enumerate(batch):
+            # Stop following pages once the extraction yield collapsed or
+            # the budget is exhausted.
+            if not self._may_continue() or not self.monitor.check_host(page_url):
+                self.frontier.release(batch[index:])
+                break
+
+            items, next_page_url = self._scrape_page(page_url)
+            self.pages_scraped += 1
+            batch_items.extend(items)
+            if next_page_url and self.follow_links:
+                self.frontier.push([next_page_url])
+            self.frontier.ack([page_url])
+            if self.progress:
+                self.progress.page_done(len(items))
+            if self.heartbeat:
+                self.heartbeat()
+        return batch_items
+
+    def _scrape_all_pages(self) -> List[Any]:
+        """
+        Scrape every start URL of the job, following the next page links.
+
+        Pages are leased from the frontier in batches until it is exhausted;
+        while other workers still hold leases on the same crawl, this one
+        waits for the pages they may queue.
+
+        Returns:
+            List[Any]: A list of all items scraped by this worker.
+        """
+        all_items = []
+        self.frontier.push(self.start_urls)
+
+        while self._may_continue():
+            batch = self.frontier.pull(
+                settings.SCRAPE_FRONTIER_BATCH_SIZE, settings.SCRAPE_FRONTIER_LEASE
+            )
+            if batch:
+                all_items.extend(self._scrape_batch(batch))
+            elif self.frontier.is_done():
+                break
+            else:
+                time.sleep(settings.SCRAPE_FRONTIER_POLL_INTERVAL)
+
+        return all_items
+
+    @property
+    def complete(self) -> bool:
+        """
+        Whether this job alone crawled every page of the portal successfully.
+        """
+        return (
+            self.owns_frontier
+            and self.follow_links
+            and self.start_urls == tuple(self.portal.start_urls)
+            and not self.monitor.is_open
+            and not (self.budget and self.budget.exhausted)
+            and self.monitor.pages == self.pages_scraped
+        )
+
+    def scrape(self) -> List[Any]:
+        """
+        Main method to scrape all items from the portal.
+
+        Raises:
+            StructureDriftError: If the circuit breaker stopped the crawl early.
+                The items scraped until then are attached to the error.
+            CrawlStoppedError: If the budget was exhausted or the task
+                cancelled, with the items scraped until then.
+        """
+        if not self._attempt_login():
+            return []
+
+        logger.info(f"Starting the scraping process of {self.portal.name}...")
+        try:
+            all_items = self._scrape_all_pages()
+        finally:
+            self.sessions.close()
+        self.summary.emit(
+            items=len(all_items),
+            pages=self.pages_scraped,
+            stopped=self.monitor.trip_reason or (self.budget.stop_reason if self.budget else None),
+        )
+        if self.sessions.proxies:
+            proxy_metrics = self.sessions.proxies.metrics()
+            logger.info(f"Proxy metrics: {proxy_metrics}")
+            if self.progress:
+                self.progress.metrics["proxies"] = proxy_metrics
+        if self.monitor.is_open:
+            logger.error(
+                f"Scraping stopped early after {self.monitor.pages} pages: {self.monitor.trip_reason}"
+            )
+            raise StructureDriftError(self.monitor.trip_reason, all_items)
+        if self.budget and self.budget.exhausted:
+            logger.warning(f"Scraping stopped after {self.pages_scraped} pages: {self.budget.stop_reason}")
+            raise self.budget.error(all_items)
+        return all_items
@@ -0,0 +1,97 @@
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.db import connections
+
+from scraper.frontier import InMemoryFrontier
+from scraper.jobs.crawl import CrawlJob
+from scraper.monitoring import StructureDriftError
+from scraper.portals.registry import PortalDefinition
+from scraper.progress import ProgressReporter
+
+logger = logging.getLogger(__name__)
+
+
+class ParallelCrawlJob:
+    """
+    Crawls a portal with several `CrawlJob`s running on threads of one process.
+
+    The jobs share an in-memory frontier, so they split the pages of the crawl
+    between them like the workers of a distributed crawl do. Each job logs in
+    its own sessions.
+    """
+
+    def __init__(
+        self,
+        portal: PortalDefinition,
+        username: str,
+        password: str,
+        concurrency: int = 1,
+        progress: Optional[ProgressReporter] = None,
+        parser_backend: Optional[str] = None,
+        accounts: Sequence[Tuple[str, str]] = (),
+        start_urls: Optional[Sequence[str]] = None,
+        follow_links: bool = True,
+    ):
+        self.portal = portal
+        self.frontier = InMemoryFrontier()
+        self.jobs = [
+            CrawlJob(
+                portal, username, password, progress=progress, parser_backend=parser_backend,
+                frontier=self.frontier, accounts=accounts, start_urls=start_urls, follow_links=follow_links,
+            )
+            for _ in range(concurrency)
+        ]
+
+    @property
+    def pages_scraped(self) -> int:
+        return sum(job.pages_scraped for job in self.jobs)
+
+    @property
+    def complete(self) -> bool:
+        """
+        Whether the jobs crawled every page of the portal successfully.
+        """
+        job = self.jobs[0]
+        return (
+            job.follow_links
+            and job.start_urls == tuple(self.portal.start_urls)
+            and self.frontier.is_done()
+            and all(not job.monitor.is_open and job.monitor.pages == job.pages_scraped for job in self.jobs)
+        )
+
+    def _scrape(self, job: CrawlJob) -> List[Any]:
+        try:
+            return job.scrape()
+        finally:
+            # Connections opened on the thread would outlive it.
+            connections.close_all()
+
+    def scrape(self) -> List[Any]:
+        """
+        Run every job and return the items they scraped.
+
+        Raises:
+            StructureDriftError: If the circuit breaker stopped a job early.
+                The items scraped by every job are attached to the error.
+        """
+        with ThreadPoolExecutor(len(self.jobs), thread_name_prefix=f"crawl-{self.portal.name}") as executor:
+            # Every thread runs in a copy of the caller's context, so its
+            # spans are children of the task's span.
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._scrape, job) for job in self.jobs
+            ]
+
+        all_items = []
+        drift = None
+        for future in futures:
+            try:
+                all_items.extend(future.result())
+            except StructureDriftError as e:
+                drift = drift or e
+                all_items.extend(e.items)
+        if drift:
+            raise StructureDriftError(str(drift), all_items)
+        return all_items
@@ -0,0 +1,90 @@
+import threading
+from functools import lru_cache
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+# Deletes KEYS[1] only while it holds ARGV[1], in one step on the server.
+_COMPARE_AND_DELETE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Makes the check and the delete one step on the local cache, between threads.
+_local_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _client(url: str):
+    # Imported on first use, like the other Redis clients of the scraper.
+    import redis
+
+    return redis.Redis.from_url(url, decode_responses=True)
+
+
+def _local_cache():
+    """
+    Return the default cache when no lease Redis is configured (tests,
+    development), which must be process-local for leases to be atomic.
+    """
+    cache = caches[DEFAULT_CACHE_ALIAS]
+    if not isinstance(cache, LocMemCache):
+        raise ImproperlyConfigured(
+            "Leases need SCRAPE_LOCK_REDIS_URL unless the default cache is LocMemCache, "
+            f"got {type(cache).__name__}."
+        )
+    return cache
+
+
+def acquire(key: str, value: str, timeout: float) -> bool:
+    """
+    Take the lease `key` for `timeout` seconds, unless it is held.
+
+    Args:
+        key: The lease key.
+        value: The token of the holder, checked when it is released.
+        timeout: Seconds after which the lease expires on its own.
+
+    Returns:
+        bool: True if the lease was taken.
+    """
+    if settings.SCRAPE_LOCK_REDIS_URL:
+        return bool(_client(settings.SCRAPE_LOCK_REDIS_URL).set(key, value, nx=True, px=int(timeout * 1000)))
+    with _local_lock:
+        return _local_cache().add(key, value, timeout=timeout)
+
+
+def holder(key: str) -> Optional[str]:
+    """
+    Return the token holding the lease `key`, if any.
+    """
+    if settings.SCRAPE_LOCK_REDIS_URL:
+        return _client(settings.SCRAPE_LOCK_REDIS_URL).get(key)
+    return _local_cache().get(key)
+
+
+def compare_and_delete(key: str, value: str) -> bool:
+    """
+    Release the lease `key` if it is still held by `value`.
+
+    A holder whose lease expired and was taken by another process must not
+    release the new one. On `SCRAPE_LOCK_REDIS_URL` the check and the delete
+    are one atomic script; without it, leases live in the process-local
+    LocMemCache and both steps run under a lock.
+
+    Returns:
+        bool: True if the lease was released.
+    """
+    if settings.SCRAPE_LOCK_REDIS_URL:
+        client = _client(settings.SCRAPE_LOCK_REDIS_URL)
+        return bool(client.eval(_COMPARE_AND_DELETE_SCRIPT, 1, key, value))
+    cache = _local_cache()
+    with _local_lock:
+        if cache.get(key) != value:
+            return False
+        return cache.delete(key)
@@ -0,0 +1,145 @@
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List
+
+from django.conf import settings
+
+
+class EventLogger:
+    """
+    Structured log events of the scraper, sampled and rate-limited per event.
+
+    Every record carries an event name and its fields (as `record.event` and
+    `record.fields`, rendered by `JSONFormatter`). The message is a %-style
+    template over the fields, formatted only when a handler emits the record,
+    so filtered-out events cost a level check and a counter increment.
+
+    `SCRAPE_LOG_SAMPLE_RATES` keeps every n-th record of an event (a rate of
+    0.1 keeps one in ten), and `SCRAPE_LOG_RATE_LIMITS` caps the records of
+    an event per second; the next record emitted reports how many were
+    dropped.
+    """
+
+    def __init__(self, name: str):
+        self.logger = logging.getLogger(name)
+        self._counters: Dict[str, "itertools.count[int]"] = defaultdict(itertools.count)
+        # Per rate-limited event: [window start, records in the window, dropped records].
+        self._windows: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def _sampled(self, event: str) -> bool:
+        rate = settings.SCRAPE_LOG_SAMPLE_RATES.get(event, 1)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        return next(self._counters[event]) % round(1 / rate) == 0
+
+    def _admitted(self, event: str, fields: Dict[str, Any]) -> bool:
+        limit = settings.SCRAPE_LOG_RATE_LIMITS.get(event)
+        if limit is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault(event, [now, 0, 0])
+            if now - window[0] >= 1:
+                window[0], window[1] = now, 0
+            if window[1] >= limit:
+                window[2] += 1
+                return False
+            window[1] += 1
+            if window[2]:
+                fields["dropped"], window[2] = window[2], 0
+        return True
+
+    def log(self, level: int, event: str, message: str, **fields: Any):
+        """
+        Log `event` at `level` if the level is enabled, the record is sampled
+        in and the event is under its rate limit.
+
+        Args:
+            level: The logging level.
+            event: The dotted event name, e.g. "page.scraped".
+            message: A %-style template over the fields, e.g. "Scraped %(url)s".
+            **fields: The structured fields of the event.
+        """
+        self._log(level, event, message, fields)
+
+    def _log(self, level: int, event: str, message: str, fields: Dict[str, Any], stacklevel: int = 3):
+        if not self.logger.isEnabledFor(level) or not self._sampled(event):
+            return
+        if not self._admitted(event, fields):
+            return
+        args = (fields,) if fields else ()
+        # The record points at the caller of the EventLogger method.
+        self.logger.log(level, message, *args, extra={"event": event, "fields": fields}, stacklevel=stacklevel)
+
+    def debug(self, event: str, message: str, **fields: Any):
+        self._log(logging.DEBUG, event, message, fields)
+
+    def info(self, event: str, message: str, **fields: Any):
+        self._log(logging.INFO, event, message, fields)
+
+    def warning(self, event: str, message: str, **fields: Any):
+        self._log(logging.WARNING, event, message, fields)
+
+    def error(self, event: str, message: str, **fields: Any):
+        self._log(logging.ERROR, event, message, fields)
+
+    def summary(self, event: str, message: str, **fields: Any) -> "Summary":
+        return Summary(self, event, message, fields)
+
+
+class Summary:
+    """
+    Aggregates the per-item outcomes of a page or a run into one event.
+
+    Counters are incremented per item; a few example values are kept per key
+    (`SUMMARY_EXAMPLES`), e.g. the first errors. `emit` logs everything as a
+    single record.
+    """
+
+    SUMMARY_EXAMPLES = 3
+
+    def __init__(self, log: EventLogger, event: str, message: str, fields: Dict[str, Any]):
+        self.log = log
+        self.event = event
+        self.message = message
+        self.fields = fields
+        self.counts: Counter = Counter()
+        self.examples: Dict[str, List[Any]] = defaultdict(list)
+        self.started_at = time.monotonic()
+
+    def add(self, key: str, count: int = 1, example: Any = None):
+        self.counts[key] += count
+        if example is not None and len(self.examples[key]) < self.SUMMARY_EXAMPLES:
+            self.examples[key].append(example)
+
+    def emit(self, level: int = logging.INFO, **fields: Any):
+        fields = {**self.fields, **self.counts, **fields}
+        if self.examples:
+            fields["examples"] = dict(self.examples)
+        fields["seconds"] = round(time.monotonic() - self.started_at, 3)
+        self.log._log(level, self.event, self.message, fields)
+
+
+class JSONFormatter(logging.Formatter):
+    """Renders records as JSON lines, with the event name and fields of scraper events."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": getattr(record, "event", None),
+            "message": record.getMessage(),
+        }
+        payload.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from data.history import compact_history, prune_history
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply the retention and compaction of the quote history, like the "
+        "periodic prune_history_task and compact_history_task."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retain-days", type=int, default=settings.SCRAPE_HISTORY_RETAIN_DAYS,
+            help="Drop the history of the runs older than this many days.",
+        )
+        parser.add_argument(
+            "--full-days", type=int, default=settings.SCRAPE_HISTORY_FULL_DAYS,
+            help="Keep one run per day of history for the runs older than this many days.",
+        )
+
+    def handle(self, *args, **options):
+        pruned = prune_history(options["retain_days"])
+        compacted = compact_history(options["full_days"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {pruned['runs_pruned']} runs and compacted {compacted['runs_pruned']} runs: "
+            f"{pruned['versions_deleted'] + compacted['versions_deleted']} versions and "
+            f"{pruned['records_deleted'] + compacted['records_deleted']} quotes deleted."
+        ))
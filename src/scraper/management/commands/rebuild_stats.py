@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from data.models import AuthorStat, TagPairStat, TagStat
+from scraper.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the tag, author and tag co-occurrence statistics from the "
+        "corpus, e.g. after quotes were changed outside the scrape pipeline."
+    )
+
+    def handle(self, *args, **options):
+        rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt statistics: {AuthorStat.objects.count()} authors, "
+            f"{TagStat.objects.count()} tags, {TagPairStat.objects.count()} tag pairs."
+        ))
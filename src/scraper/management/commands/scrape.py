@@ -0,0 +1,187 @@
+import getpass
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from scraper import exporters
+from scraper.jobs.parallel import ParallelCrawlJob
+from scraper.monitoring import DRIFT_STATE, StructureDriftError
+from scraper.portals.registry import PortalDefinition, get_portal
+from scraper.progress import ProgressReporter
+from scraper.tasks.crawl import _crawl_and_save
+from scraper.writer import persist_run
+
+
+class ConsoleProgress(ProgressReporter):
+    """
+    Prints the throughput of an in-process crawl instead of publishing it to
+    the cache, at most once every `SCRAPE_PROGRESS_INTERVAL` seconds.
+    """
+
+    def __init__(self, stdout):
+        super().__init__("scrape-command")
+        self.stdout = stdout
+        # The jobs of the crawl report from their own threads.
+        self._lock = threading.Lock()
+
+    def page_done(self, items: int):
+        with self._lock:
+            super().page_done(items)
+
+    def persisted(self, items: int):
+        with self._lock:
+            super().persisted(items)
+
+    def publish(self, state: str = "PROGRESS", force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_published_at < settings.SCRAPE_PROGRESS_INTERVAL:
+            return
+        self._last_published_at = now
+        elapsed = max(now - self.started_at, 1e-6)
+        self.stdout.write(
+            f"[{elapsed:7.1f}s] {self.pages_done} pages ({self.pages_done / elapsed:.1f}/s), "
+            f"{self.items_scraped} items ({self.items_scraped / elapsed:.1f}/s), "
+            f"{self.items_persisted} persisted" + ("" if state == "PROGRESS" else f" - {state}")
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Crawl a portal in this process, without Celery, and write the items "
+        "to the database or to an NDJSON or Parquet file. Runs the same "
+        "crawl, validation and persistence code as the scrape tasks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--portal", default="quotes", help="The portal to crawl.")
+        parser.add_argument("--username", required=True, help="The portal username.")
+        parser.add_argument(
+            "--password",
+            help="The portal password. Read from the SCRAPE_PASSWORD environment variable or prompted "
+            "for by default, as arguments show in the process list and the shell history.",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=4,
+            help="Crawl jobs splitting the pages between them, each with its own sessions.",
+        )
+        parser.add_argument("--start-page", type=int, help="First page to crawl.")
+        parser.add_argument(
+            "--end-page", type=int,
+            help="Last page to crawl. Without it, the crawl follows the next page links.",
+        )
+        parser.add_argument("--parser", help="The parser backend, e.g. bs4 or lxml.")
+        parser.add_argument(
+            "--incremental", action="store_true",
+            help="Only keep the items that are not stored yet, and never remove stored ones.",
+        )
+        parser.add_argument("--output", choices=["db", *exporters.EXPORTERS], default="db")
+        parser.add_argument("--output-path", help="The file written by the ndjson and parquet outputs.")
+
+    def handle(self, *args, **options):
+        try:
+            definition = get_portal(options["portal"])
+        except KeyError as e:
+            raise CommandError(e.args[0])
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+        if options["parser"] and options["parser"] not in definition.parser_classes:
+            raise CommandError(
+                f"Unknown parser {options['parser']!r}, choose from {', '.join(definition.parser_classes)}."
+            )
+        if options["incremental"] and definition.select_new is None:
+            raise CommandError(f"Portal {definition.name!r} does not support incremental crawls.")
+        if options["output"] != "db":
+            if not options["output_path"]:
+                raise CommandError(f"--output {options['output']} requires --output-path.")
+            if options["output"] == "parquet" and exporters.pyarrow is None:
+                raise CommandError("--output parquet requires pyarrow.")
+        start_urls = self._start_urls(definition, options["start_page"], options["end_page"])
+        password = self._password(options["password"])
+
+        progress = ConsoleProgress(self.stdout)
+        job = ParallelCrawlJob(
+            definition,
+            options["username"],
+            password,
+            concurrency=options["concurrency"],
+            progress=progress,
+            parser_backend=options["parser"],
+            start_urls=start_urls,
+            follow_links=options["end_page"] is None,
+        )
+
+        def persist(definition, items, task_id=None, full_crawl=False, progress=None):
+            return self._persist(definition, items, full_crawl, progress, options)
+
+        try:
+            result = _crawl_and_save(job, definition, progress, persist=persist)
+        except StructureDriftError as e:
+            progress.finish(DRIFT_STATE)
+            self._summary(progress)
+            raise CommandError(f"Scraping stopped early: {e}")
+        progress.finish("SUCCESS")
+        self._summary(progress)
+        self.stdout.write(self.style.SUCCESS(result))
+
+    def _password(self, password: Optional[str]) -> str:
+        """
+        Return the portal password: `--password`, SCRAPE_PASSWORD, or a prompt.
+        """
+        password = password or os.environ.get("SCRAPE_PASSWORD")
+        if password:
+            return password
+        if not sys.stdin.isatty():
+            raise CommandError("Set SCRAPE_PASSWORD or run in a terminal to be prompted for the password.")
+        return getpass.getpass("Portal password: ")
+
+    def _start_urls(
+        self, definition: PortalDefinition, start_page: Optional[int], end_page: Optional[int]
+    ) -> Optional[List[str]]:
+        """
+        Return the pages a page range starts from, or None for the portal's.
+        """
+        if start_page is None and end_page is None:
+            return None
+        if definition.page_url is None:
+            raise CommandError(f"Portal {definition.name!r} does not support page ranges.")
+        start_page = start_page or 1
+        if start_page < 1 or (end_page is not None and end_page < start_page):
+            raise CommandError("Invalid page range.")
+        if end_page is None:
+            return [definition.page_url(start_page)]
+        return [definition.page_url(number) for number in range(start_page, end_page + 1)]
+
+    def _persist(
+        self,
+        definition: PortalDefinition,
+        items: List[Any],
+        full_crawl: bool,
+        progress: Optional[ProgressReporter],
+        options: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        if options["incremental"]:
+            scraped = len(items)
+            items = definition.select_new(items)
+            full_crawl = False
+            self.stdout.write(f"{scraped - len(items)} items are already stored, {len(items)} are new.")
+        if options["output"] == "db":
+            return persist_run(definition, items, full_crawl=full_crawl, progress=progress)
+
+        written = exporters.EXPORTERS[options["output"]](options["output_path"], items)
+        if progress:
+            progress.persisted(written)
+        return {"items_written": written, "output_path": options["output_path"]}
+
+    def _summary(self, progress: ConsoleProgress):
+        elapsed = time.monotonic() - progress.started_at
+        self.stdout.write(
+            f"Crawled {progress.pages_done} pages and {progress.items_scraped} items in {elapsed:.1f}s "
+            f"({progress.items_scraped / elapsed:.1f} items/s)."
+        )
+        for name, value in progress.metrics.items():
+            self.stdout.write(f"  {name}: {value}")
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+from data.models import ScrapeRun
+from scraper.routers import awaited_run, replica_health, replica_reads
+
+# Requests that don't write, whose reads may go to the replica.
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class LargeResponseGZipMiddleware(GZipMiddleware):
+    """
+    GZip middleware limited to large, non-streaming responses.
+
+    Small payloads are not worth the CPU, and streaming responses (such as the
+    server-sent events progress stream) must reach the client as soon as each
+    chunk is written instead of sitting in the compressor's buffer.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming:
+            return response
+        if len(response.content) < settings.GZIP_MIN_RESPONSE_SIZE:
+            return response
+        return super().process_response(request, response)
+
+
+def replicated(alias: str, run_id: int) -> bool:
+    """
+    Whether the replica `alias` has the finished run `run_id`.
+    """
+    return ScrapeRun.objects.using(alias).filter(pk=run_id, finished_at__isnull=False).exists()
+
+
+class ReplicaReadsMiddleware:
+    """
+    Routes the reads of safe API requests to the read replica.
+
+    Only requests under `DATABASE_REPLICA_PATH_PREFIX` are routed, so the
+    admin, sessions and authentication keep reading from the primary.
+    Reads go to the primary instead while the replica is unavailable, and
+    for clients that waited for a run the replica doesn't have yet (see
+    `scraper.routers.awaited_run`), so they see the results of their scrape
+    without pinning the other clients to the primary.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        alias = settings.DATABASE_REPLICA_ALIAS
+        if (
+            not alias
+            or request.method not in SAFE_METHODS
+            or not request.path.startswith(settings.DATABASE_REPLICA_PATH_PREFIX)
+            or not replica_health.available(alias)
+        ):
+            return self.get_response(request)
+        run_id = awaited_run(request)
+        if run_id is not None and not replicated(alias, run_id):
+            return self.get_response(request)
+        with replica_reads(alias):
+            return self.get_response(request)
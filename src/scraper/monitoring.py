@@ -0,0 +1,179 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Item fields whose fill rate is tracked per page.
+TRACKED_FIELDS = ("text", "author", "author_url", "tags", "goodreads_url")
+
+# Custom Celery state of a task stopped by the circuit breaker.
+DRIFT_STATE = "DRIFT"
+
+
+class StructureDriftError(Exception):
+    """Raised when the circuit breaker stops a crawl."""
+
+    def __init__(self, reason: str, items: Optional[List[Any]] = None):
+        super().__init__(reason)
+        # Items scraped before the breaker opened.
+        self.items = items or []
+
+
+def page_yield(found: int, items: Iterable[Any]) -> Dict[str, Any]:
+    """
+    Summarize the extraction yield of a page.
+
+    Args:
+        found: Number of item elements found on the page.
+        items: The parsed items, with a falsy value for each invalid element.
+
+    Returns:
+        A dictionary with the found and valid counts and, per tracked field,
+        the share of found elements for which the field was extracted.
+    """
+    valid = [item for item in items if item]
+    fill_rates = {
+        field: (sum(1 for item in valid if getattr(item, field, None)) / found if found else 0.0)
+        for field in TRACKED_FIELDS
+    }
+    return {"found": found, "valid": len(valid), "fill_rates": fill_rates}
+
+
+class YieldMonitor:
+    """
+    Tracks the extraction yield of a crawl and trips a circuit breaker on drift.
+
+    Every page is compared with a rolling baseline kept per portal in the
+    shared cache (an exponentially weighted average of valid items per page
+    and of the field fill rates). A page whose yield falls below
+    `SCRAPE_DRIFT_MIN_YIELD_RATIO` of the baseline counts as collapsed, and
+    `SCRAPE_DRIFT_TRIP_PAGES` collapsed pages in a row open the breaker.
+    Until the baseline has enough samples, only pages without any valid item
+    count as collapsed.
+
+    Fetch failures are counted per host in the cache, so crawls running on
+    other workers against the same host stop too once the host failed
+    `SCRAPE_HOST_FAILURE_THRESHOLD` times in a row.
+    """
+
+    BASELINE_PREFIX = "scraper:yield-baseline"
+    HOST_FAILURES_PREFIX = "scraper:host-failures"
+
+    def __init__(self, portal: str):
+        self.portal = portal
+        self.pages = 0
+        self.collapsed_pages = 0
+        self.trip_reason: Optional[str] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.trip_reason is not None
+
+    def baseline(self) -> Optional[Dict[str, Any]]:
+        return cache.get(f"{self.BASELINE_PREFIX}:{self.portal}")
+
+    def _update_baseline(self, baseline: Optional[Dict[str, Any]], page: Dict[str, Any]):
+        alpha = settings.SCRAPE_DRIFT_BASELINE_ALPHA
+        if baseline is None:
+            baseline = {"samples": 0, "valid": page["valid"], "fill_rates": dict(page["fill_rates"])}
+        else:
+            baseline["valid"] += alpha * (page["valid"] - baseline["valid"])
+            for field, rate in page["fill_rates"].items():
+                previous = baseline["fill_rates"].get(field, rate)
+                baseline["fill_rates"][field] = previous + alpha * (rate - previous)
+        baseline["samples"] += 1
+        cache.set(f"{self.BASELINE_PREFIX}:{self.portal}", baseline, timeout=None)
+
+    def _collapse_reason(self, baseline: Optional[Dict[str, Any]], page: Dict[str, Any]) -> Optional[str]:
+        if page["valid"] == 0:
+            return f"no valid items out of {page['found']} found"
+        if not baseline or baseline["samples"] < settings.SCRAPE_DRIFT_BASELINE_MIN_PAGES:
+            return None
+
+        ratio = settings.SCRAPE_DRIFT_MIN_YIELD_RATIO
+        if page["valid"] < baseline["valid"] * ratio:
+            return f"{page['valid']} valid items, baseline is {baseline['valid']:.1f}"
+        field_ratios = settings.SCRAPE_DRIFT_FIELD_MIN_RATIOS
+        for field, rate in page["fill_rates"].items():
+            field_ratio = field_ratios.get(field, ratio)
+            if field_ratio is None:
+                # Optional field: legitimately sparse on some pages.
+                continue
+            expected = baseline["fill_rates"].get(field, 0.0)
+            if rate < expected * field_ratio:
+                return f"{field} fill rate {rate:.2f}, baseline is {expected:.2f}"
+        return None
+
+    def record_page(self, page_url: str, found: int, items: Iterable[Any]) -> Dict[str, Any]:
+        """
+        Record the yield of a parsed page and trip the breaker on drift.
+
+        Args:
+            page_url: URL of the page.
+            found: Number of item elements found on the page.
+            items: The parsed items, with a falsy value for each invalid element.
+
+        Returns:
+            The yield summary of the page.
+        """
+        page = page_yield(found, items)
+        self.pages += 1
+        self.record_fetch_success(page_url)
+
+        baseline = self.baseline()
+        reason = self._collapse_reason(baseline, page)
+        if reason is None:
+            self.collapsed_pages = 0
+            # Only healthy pages feed the baseline, so drift can't become normal.
+            self._update_baseline(baseline, page)
+            return page
+
+        self.collapsed_pages += 1
+        logger.warning(f"Yield collapsed on {page_url}: {reason}")
+        if self.collapsed_pages >= settings.SCRAPE_DRIFT_TRIP_PAGES:
+            self.trip(f"Structure drift on {self.portal}: {reason}")
+        return page
+
+    @classmethod
+    def _host_key(cls, url: str) -> str:
+        return f"{cls.HOST_FAILURES_PREFIX}:{urlsplit(url).netloc}"
+
+    def record_fetch_failure(self, url: str):
+        """
+        Count a failed fetch against the host of `url`.
+        """
+        key = self._host_key(url)
+        while True:
+            cache.add(key, 0, timeout=settings.SCRAPE_HOST_FAILURE_COOLDOWN)
+            try:
+                failures = cache.incr(key)
+                break
+            except ValueError:
+                # The count expired between add and incr: start a new one.
+                continue
+        if failures >= settings.SCRAPE_HOST_FAILURE_THRESHOLD:
+            self.trip(f"{failures} consecutive fetch failures against {urlsplit(url).netloc}")
+
+    def record_fetch_success(self, url: str):
+        cache.delete(self._host_key(url))
+
+    def check_host(self, url: str) -> bool:
+        """
+        Trip the breaker if the host of `url` is failing for every crawl.
+
+        Returns:
+            bool: True if the crawl may fetch `url`, False otherwise.
+        """
+        failures = cache.get(self._host_key(url), 0)
+        if failures >= settings.SCRAPE_HOST_FAILURE_THRESHOLD:
+            self.trip(f"{failures} consecutive fetch failures against {urlsplit(url).netloc}")
+        return not self.is_open
+
+    def trip(self, reason: str):
+        if not self.is_open:
+            logger.error(f"Circuit breaker opened: {reason}")
+            self.trip_reason = reason
@@ -1,50 +1,198 @@
 import logging
+import sys
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
 
 from bs4 import BeautifulSoup
+from requests import Response
 
 from scraper.auth.base_scraper_auth import BaseScraperAuth
+from scraper.items import TagRef
+from scraper.parsers.streaming import detect_charset, iter_body
+from scraper.tracing import span
 from scraper.utils import retry_with_backoff
 
+if TYPE_CHECKING:
+    from scraper.auth.session_pool import SessionPool
+    from scraper.budget import JobBudget
+    from scraper.monitoring import YieldMonitor
+    from scraper.scheduler import RateLimiter
+
 logger = logging.getLogger(__name__)
 
+# A minimal page parsed by `BaseParser.warm_up`.
+WARM_UP_PAGE = b'<html><body><div class="quote"><span class="text">Warm up</span></div></body></html>'
+
 
 class BaseParser(ABC):
     """Abstract base class for all scrapers."""
 
+    # Upper bound of the per-parser URL join and tag caches. Links to authors
+    # and tags repeat across a crawl; anything beyond this is joined on the fly.
+    MAX_CACHED_URLS = 50_000
+
+    # Pages are read in chunks of STREAM_CHUNK_SIZE bytes and rejected once
+    # they grow past MAX_PAGE_BYTES.
+    MAX_PAGE_BYTES = 5 * 1024 * 1024
+    STREAM_CHUNK_SIZE = 16 * 1024
+
     def __init__(self, auth: BaseScraperAuth):
         self.auth = auth
+        self._joined_urls: Dict[str, str] = {}
+        self._tag_refs: Dict[Tuple[str, str], TagRef] = {}
+        # Set by the crawl job to track the extraction yield of every page.
+        self.monitor: Optional["YieldMonitor"] = None
+        # Set by the crawl job when the portal has a request rate limit.
+        self.rate_limiter: Optional["RateLimiter"] = None
+        # Set by the crawl job to spread the requests over several sessions.
+        self.sessions: Optional["SessionPool"] = None
+        # Set by the crawl job to count the downloaded bytes against its budget.
+        self.budget: Optional["JobBudget"] = None
+
+    @classmethod
+    def warm_up(cls):
+        """
+        Do the one-off work of the first parse (tree builder lookup, parser
+        setup) before the first page is fetched.
+        """
+        BeautifulSoup(WARM_UP_PAGE, "html.parser")
 
-    def fetch_page(self, url: str) -> BeautifulSoup:
+    def join_url(self, href: str) -> str:
         """
-        Fetch the content of a page with retry logic.
+        Join a site-relative link with the portal base URL.
+
+        Results are interned and cached, so repeated links (authors, tags)
+        share a single string for the whole crawl.
+
+        Args:
+            href: The site-relative link.
+
+        Returns:
+            The absolute URL.
+        """
+        url = self._joined_urls.get(href)
+        if url is None:
+            url = sys.intern(f"{self.auth.base_url}{href}")
+            if len(self._joined_urls) < self.MAX_CACHED_URLS:
+                self._joined_urls[href] = url
+        return url
+
+    def tag_ref(self, name: str, href: str) -> TagRef:
+        """
+        Return the shared `TagRef` for a tag name and link.
+
+        Args:
+            name: The name of the tag.
+            href: The site-relative link of the tag page.
+
+        Returns:
+            The TagRef instance shared by all items referencing the tag.
+        """
+        key = (name, href)
+        tag = self._tag_refs.get(key)
+        if tag is None:
+            tag = TagRef(name, self.join_url(href))
+            if len(self._tag_refs) < self.MAX_CACHED_URLS:
+                self._tag_refs[key] = tag
+        return tag
+
+    def open_page(self, url: str) -> Response:
+        """
+        Request a page in streaming mode, without reading its body yet.
 
         Args:
             url: The URL of the page to fetch.
 
         Returns:
-            BeautifulSoup object containing the page content.
+            The streamed response.
         """
-        def perform_fetch(url: str):
+        if self.rate_limiter:
+            self.rate_limiter.wait()
+
+        if self.sessions:
+            # The pool health-checks its sessions and logs them in again itself.
+            response = self.sessions.get(url, stream=True)
+        else:
             # Check if the session is authenticated
             if not self.auth.is_authenticated():
                 raise Exception("Session is not authenticated. Please log in first.")
+            response = self.auth.session.get(url, stream=True)
+        response.raise_for_status()
+        return response
+
+    def iter_page_chunks(self, response: Response) -> Tuple[str, Iterator[bytes]]:
+        """
+        Determine the charset of a streamed page and iterate over its body.
 
+        The charset comes from the Content-Type header or a <meta> declaration
+        in the first chunk, falling back to UTF-8, so `requests` never runs its
+        statistical charset detection.
+
+        Args:
+            response: The streamed response.
+
+        Returns:
+            A tuple containing the charset and an iterator over the body chunks.
+        """
+        chunks = iter_body(response, self.MAX_PAGE_BYTES, self.STREAM_CHUNK_SIZE)
+        first_chunk = next(chunks, b"")
+        charset = detect_charset(response.headers.get("Content-Type"), first_chunk)
+
+        def body() -> Iterator[bytes]:
+            yield first_chunk
+            yield from chunks
+
+        def counted_body() -> Iterator[bytes]:
+            for chunk in body():
+                self.budget.record_bytes(len(chunk))
+                yield chunk
+
+        if self.budget:
+            return charset, counted_body()
+
+        return charset, body()
+
+    def fetch_page(self, url: str) -> BeautifulSoup:
+        """
+        Fetch the content of a page with retry logic.
+
+        Args:
+            url: The URL of the page to fetch.
+
+        Returns:
+            BeautifulSoup object containing the page content.
+        """
+        def perform_fetch(url: str):
             # Fetch the page content
-            response = self.auth.session.get(url)
-            response.raise_for_status()
-            return BeautifulSoup(response.text, "html.parser")
+            charset, chunks = self.iter_page_chunks(self.open_page(url))
+            return BeautifulSoup(b"".join(chunks), "html.parser", from_encoding=charset)
+
+        with span("page.fetch", url=url):
+            return retry_with_backoff(
+                perform_fetch,
+                max_retries=3,
+                action_name="Fetch Page",
+                url=url
+            )
+
+    def iter_page(self, page_url: str) -> Iterator[Any]:
+        """
+        Yield the items of a page as they are parsed.
+
+        Parsers able to parse incrementally yield items while the page is
+        still downloading; this default implementation falls back to
+        `parse_page`. The next page URL is the generator's return value:
+        `next_page_url = yield from parser.iter_page(url)`.
 
-        return retry_with_backoff(
-            perform_fetch,
-            max_retries=3,
-            action_name="Fetch Page",
-            url=url
-        )
+        Args:
+            page_url: URL of the page to parse.
+        """
+        items, next_page_url = self.parse_page(page_url)
+        yield from items
+        return next_page_url
 
     @abstractmethod
-    def parse_page(self, page_url: str) -> Tuple[List[Dict[str, Any]], str]:
+    def parse_page(self, page_url: str) -> Tuple[List[Any], str]:
         """
         Parse all items from a given page.
 
@@ -57,14 +205,14 @@ class BaseParser(ABC):
         pass
 
     @abstractmethod
-    def parse_item(self, item_element: BeautifulSoup) -> Dict[str, Any]:
+    def parse_item(self, item_element: BeautifulSoup) -> Any:
         """
-        Parse a single item element into a structured dictionary.
+        Parse a single item element into a structured item.
 
         Args:
             item_element: BeautifulSoup element containing item data.
 
         Returns:
-            A dictionary containing structured item data.
+            The structured item, or a falsy value if the element is invalid.
         """
         pass
\ No newline at end of file
@@ -0,0 +1,207 @@
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from lxml import etree
+from requests import Response
+from requests.exceptions import RequestException
+
+from scraper.items import QuoteItem, TagRef
+from scraper.logs import EventLogger
+from scraper.parsers.base_parser import WARM_UP_PAGE
+from scraper.parsers.quote_parser import QuoteParser
+from scraper.tracing import span
+from scraper.utils import handle_request_exception, retry_with_backoff
+
+log = EventLogger(__name__)
+
+
+def _has_class(name: str) -> str:
+    """
+    Build an XPath predicate matching elements carrying the CSS class `name`.
+    """
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Compiled once: evaluating a precompiled XPath is much cheaper than parsing
+# the expression for every quote.
+_TEXT = etree.XPath(f".//span[{_has_class('text')}]")
+_AUTHOR = etree.XPath(f".//small[{_has_class('author')}]")
+_FOLLOWING_LINK = etree.XPath("following::a[1]")
+_TAGS = etree.XPath(f".//a[{_has_class('tag')}]")
+_FIRST_LINK = etree.XPath(".//a[@href][1]")
+_NEXT_LINK = etree.XPath(".//a[@href]")
+
+
+def _text(element: etree._Element) -> str:
+    """
+    Equivalent of BeautifulSoup's `get_text(strip=True)`.
+    """
+    return "".join(part.strip() for part in element.itertext())
+
+
+class LxmlQuoteParser(QuoteParser):
+    """
+    Streaming quote parser built on lxml.
+
+    The page body is fed to an incremental lxml parser chunk by chunk as it
+    arrives from the socket, and each quote is parsed (then dropped from the
+    tree) as soon as its closing tag is seen. Peak memory per in-flight page
+    stays bounded and the first items are available before the download
+    finishes. Field extraction mirrors `QuoteParser` on lxml elements.
+    """
+
+    @classmethod
+    def warm_up(cls):
+        parser = etree.HTMLPullParser(events=("end",), tag=("div", "li"))
+        parser.feed(WARM_UP_PAGE)
+        parser.close()
+
+    def get_quote_text(self, quote_element: etree._Element) -> str:
+        elements = _TEXT(quote_element)
+        return _text(elements[0]) if elements else ""
+
+    def get_quote_author(self, quote_element: etree._Element) -> str:
+        elements = _AUTHOR(quote_element)
+        return _text(elements[0]) if elements else ""
+
+    def get_author_url(self, quote_element: etree._Element) -> str:
+        author_link = _FOLLOWING_LINK(_AUTHOR(quote_element)[0])
+        return self.join_url(author_link[0].get("href")) if author_link else ""
+
+    def get_quote_tags(self, quote_element: etree._Element) -> Tuple[TagRef, ...]:
+        return tuple(
+            self.tag_ref(_text(tag), tag.get("href")) for tag in _TAGS(quote_element)
+        )
+
+    def get_goodreads_link(self, quote_element: etree._Element) -> Optional[str]:
+        author_link = _FIRST_LINK(quote_element)
+        if not author_link or "goodreads.com" not in author_link[0].get("href"):
+            return None
+
+        return author_link[0].get("href")
+
+    def iter_response(self, response: Response) -> Iterator[QuoteItem]:
+        """
+        Incrementally parse a streamed response, yielding quotes as they complete.
+
+        Args:
+            response: The streamed response of a quotes page.
+
+        Returns:
+            The next page URL (as the generator's return value).
+        """
+        charset, chunks = self.iter_page_chunks(response)
+        parser = etree.HTMLPullParser(events=("end",), tag=("div", "li"), encoding=charset)
+
+        def closed_elements() -> Iterator[etree._Element]:
+            for chunk in chunks:
+                parser.feed(chunk)
+                for _, element in parser.read_events():
+                    yield element
+            # The parser holds back the last elements until it is closed.
+            parser.close()
+            for _, element in parser.read_events():
+                yield element
+
+        next_page_url = None
+        parsed = []
+        for element in closed_elements():
+            classes = (element.get("class") or "").split()
+            if element.tag == "div" and "quote" in classes:
+                item = self.parse_item(element)
+                parsed.append(item)
+                # Drop the parsed quotes to keep the in-memory tree small.
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+                if item:
+                    yield item
+            elif element.tag == "li" and "next" in classes:
+                links = _NEXT_LINK(element)
+                if links:
+                    next_page_url = f"{self.auth.base_url}{links[0].get('href')}"
+
+        if self.monitor:
+            self.monitor.record_page(response.url, len(parsed), parsed)
+        return next_page_url
+
+    def iter_page(self, page_url: str) -> Iterator[QuoteItem]:
+        """
+        Yield the quotes of a page while it is being downloaded.
+
+        The fetch and the streamed parse are retried together: when the
+        connection breaks while the body streams, the page is fetched again
+        and the quotes already yielded are skipped. Once the retries are
+        exhausted the error is raised, so the page counts as failed instead
+        of ending the crawl like a last page.
+
+        Args:
+            page_url: URL of the page to parse.
+
+        Returns:
+            The next page URL (as the generator's return value).
+        """
+        yielded = 0
+        retry_count = 0
+        while True:
+            try:
+                # The span ends before the first yield: the items are parsed in
+                # the context of the caller's span.
+                with span("page.fetch", url=page_url):
+                    response = retry_with_backoff(
+                        self.open_page,
+                        max_retries=3,
+                        action_name="Fetch Page",
+                        url=page_url
+                    )
+            except Exception:
+                if self.monitor:
+                    self.monitor.record_fetch_failure(page_url)
+                raise
+
+            items = self.iter_response(response)
+            skip = yielded
+            try:
+                while True:
+                    item = next(items)
+                    if skip:
+                        skip -= 1
+                        continue
+                    yielded += 1
+                    yield item
+            except StopIteration as stop:
+                return stop.value
+            except RequestException as e:
+                log.error(
+                    "retry.failed", "%(action)s attempt %(attempt)s failed: %(error)s",
+                    action="Stream Page", attempt=retry_count + 1, error=e,
+                )
+                delay = handle_request_exception(e, retry_count)
+                if delay is None:
+                    if self.monitor:
+                        self.monitor.record_fetch_failure(page_url)
+                    raise
+                retry_count += 1
+                time.sleep(delay)
+
+    def parse_page(self, page_url: str) -> Tuple[List[QuoteItem], str]:
+        """
+        Parse all quotes from a given page.
+
+        Args:
+            page_url: URL of the page to parse
+
+        Returns:
+            List of parsed quote items and the next page to parse
+
+        Raises:
+            Exception: If the page could not be fetched or streamed, so the
+                crawl counts it as failed.
+        """
+        quotes = []
+        try:
+            pages = self.iter_page(page_url)
+            while True:
+                quotes.append(next(pages))
+        except StopIteration as stop:
+            return quotes, stop.value
@@ -1,47 +1,21 @@
-import logging
-from typing import Any, Dict, List, Tuple
+from typing import List, Optional, Tuple
 
 from bs4 import BeautifulSoup
 
 from scraper.auth.quote_scraper_auth import QuoteScraperAuth
+from scraper.items import QuoteItem, TagRef
+from scraper.logs import EventLogger
 from scraper.parsers.base_parser import BaseParser
-from scraper.utils import retry_with_backoff
+from scraper.tracing import span
 
-logger = logging.getLogger(__name__)
+log = EventLogger(__name__)
 
 
 class QuoteParser(BaseParser):
     """Handles parsing of quote data from the website."""
 
     def __init__(self, auth: QuoteScraperAuth):
-        self.auth = auth
-
-    def fetch_page(self, url: str) -> BeautifulSoup:
-        """
-        Fetch the content of a page with retry logic.
-
-        Args:
-            url: The URL of the page to fetch.
-
-        Returns:
-            BeautifulSoup object containing the page content.
-        """
-        def perform_fetch(url: str):
-            # Check if the session is authenticated
-            if not self.auth.is_authenticated():
-                raise Exception("Session is not authenticated. Please log in first.")
-
-            # Fetch the page content
-            response = self.auth.session.get(url)
-            response.raise_for_status()
-            return BeautifulSoup(response.text, "html.parser")
-
-        return retry_with_backoff(
-            perform_fetch,
-            max_retries=3,
-            action_name="Fetch Page",
-            url=url
-        )
+        super().__init__(auth)
 
     def get_quote_text(self, quote_element: BeautifulSoup) -> str:
         """
@@ -80,9 +54,9 @@ class QuoteParser(BaseParser):
             The URL of the author.
         """
         author_link = quote_element.find("small", class_="author").find_next("a")
-        return f"{self.auth.base_url}{author_link['href']}" if author_link else ""
+        return self.join_url(author_link["href"]) if author_link else ""
 
-    def get_quote_tags(self, quote_element: BeautifulSoup) -> List[Dict[str, str]]:
+    def get_quote_tags(self, quote_element: BeautifulSoup) -> Tuple[TagRef, ...]:
         """
         Extract the tags associated with the quote.
 
@@ -90,16 +64,12 @@ class QuoteParser(BaseParser):
             quote_element: BeautifulSoup element containing quote data.
 
         Returns:
-            A list of dictionaries, each containing the tag name and its URL.
+            A tuple of shared TagRef objects, each holding the tag name and its URL.
         """
         tag_elements = quote_element.find_all("a", class_="tag")
-        return [
-            {
-                "name": tag.get_text(strip=True),
-                "url": f"{self.auth.base_url}{tag['href']}"
-            }
-            for tag in tag_elements
-        ]
+        return tuple(
+            self.tag_ref(tag.get_text(strip=True), tag["href"]) for tag in tag_elements
+        )
 
     def get_goodreads_link(self, quote_element: BeautifulSoup) -> str:
         """
@@ -117,15 +87,15 @@ class QuoteParser(BaseParser):
 
         return author_link["href"]
 
-    def parse_item(self, quote_element: BeautifulSoup) -> Dict[str, Any]:
+    def parse_item(self, quote_element: BeautifulSoup) -> Optional[QuoteItem]:
         """
-        Parse a single quote element into a structured dictionary.
+        Parse a single quote element into a structured item.
 
         Args:
             quote_element: BeautifulSoup element containing quote data
 
         Returns:
-            Dict containing structured quote data
+            QuoteItem containing structured quote data, or None if invalid
         """
         try:
             text = self.get_quote_text(quote_element)
@@ -138,20 +108,20 @@ class QuoteParser(BaseParser):
             if not text or not author or not author_url:
                 raise ValueError("Missing required fields in quote element")
 
-            return {
-                "text": text,
-                "author": author,
-                "author_url": author_url,
-                "tags": tags,
-                "goodreads_link": goodreads_link,
-            }
+            return QuoteItem(
+                text=text,
+                author=author,
+                author_url=author_url,
+                goodreads_url=goodreads_link,
+                tags=tags,
+            )
         except Exception as e:
-            # In a real-world application, we would want to have better error
-            # handling when the structure of the target website changes
-            logger.error(f"Error parsing quote element: {e}")
-            return {}
+            # A change in the structure of the target website shows up as a
+            # yield collapse in the crawl's YieldMonitor.
+            log.error("item.parse_failed", "Error parsing quote element: %(error)s", error=e)
+            return None
 
-    def parse_page(self, page_url: str) -> Tuple[List[Dict[str, Any]], str]:
+    def parse_page(self, page_url: str) -> Tuple[List[QuoteItem], str]:
         """
         Parse all quotes from a given page.
 
@@ -159,19 +129,29 @@ class QuoteParser(BaseParser):
             page_url: URL of the page to parse
 
         Returns:
-            List of parsed quote dictionaries and the next page to parse
+            List of parsed quote items and the next page to parse
         """
         try:
             # Fetch the page content using the helper method
             soup = self.fetch_page(page_url)
+        except Exception as e:
+            log.error("page.fetch_failed", "Error fetching page %(url)s: %(error)s", url=page_url, error=e)
+            if self.monitor:
+                self.monitor.record_fetch_failure(page_url)
+            return [], None
 
+        try:
             # Find all quote elements
-            quote_elements = soup.find_all("div", class_="quote")
-            quotes = [
-                self.parse_item(quote_element) for quote_element in quote_elements
-            ]
-
-            # Filter out empty dictionaries (invalid quotes)
+            with span("page.parse", url=page_url) as parse_span:
+                quote_elements = soup.find_all("div", class_="quote")
+                quotes = [
+                    self.parse_item(quote_element) for quote_element in quote_elements
+                ]
+                parse_span.set_attribute("elements", len(quote_elements))
+            if self.monitor:
+                self.monitor.record_page(page_url, len(quote_elements), quotes)
+
+            # Filter out invalid quotes
             valid_quotes = [quote for quote in quotes if quote]
 
             # Find the "Next" button and extract its URL
@@ -186,5 +166,5 @@ class QuoteParser(BaseParser):
             return valid_quotes, next_page_url
         except Exception as e:
             # Log the error and return an empty list
-            logger.error(f"Error parsing page {page_url}: {e}")
+            log.error("page.parse_failed", "Error parsing page %(url)s: %(error)s", url=page_url, error=e)
             return [], None
@@ -0,0 +1,86 @@
+import codecs
+import logging
+import re
+from typing import Iterator, Optional
+
+from requests import Response
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHARSET = "utf-8"
+
+# Only the start of a document is searched for a <meta charset> declaration,
+# as browsers do.
+META_SNIFF_BYTES = 1024
+
+_HEADER_CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.I)
+_META_CHARSET_RE = re.compile(rb"<meta[^>]+charset=[\"']?([\w.:-]+)", re.I)
+
+
+class PageTooLargeError(Exception):
+    """Raised when a page body exceeds the configured maximum size."""
+
+
+def _known_charset(name: Optional[str]) -> Optional[str]:
+    """
+    Return the canonical codec name for `name`, or None if Python doesn't know it.
+    """
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def detect_charset(content_type: Optional[str], head: bytes) -> str:
+    """
+    Pick the charset of a page without statistical detection.
+
+    The charset declared in the Content-Type header wins, then a <meta>
+    declaration at the start of the body; otherwise UTF-8 is assumed (decoding
+    then replaces invalid bytes instead of guessing with charset-normalizer).
+
+    Args:
+        content_type: The Content-Type response header.
+        head: The first bytes of the body.
+
+    Returns:
+        The name of the codec to decode the page with.
+    """
+    header_match = _HEADER_CHARSET_RE.search(content_type or "")
+    charset = _known_charset(header_match.group(1)) if header_match else None
+    if charset:
+        return charset
+
+    meta_match = _META_CHARSET_RE.search(head[:META_SNIFF_BYTES])
+    charset = _known_charset(meta_match.group(1).decode("ascii")) if meta_match else None
+    return charset or DEFAULT_CHARSET
+
+
+def iter_body(response: Response, max_bytes: int, chunk_size: int) -> Iterator[bytes]:
+    """
+    Yield the body of a streamed response chunk by chunk.
+
+    Args:
+        response: A response obtained with `stream=True`.
+        max_bytes: Maximum size of the body.
+        chunk_size: Size of the chunks read from the socket.
+
+    Raises:
+        PageTooLargeError: As soon as the body grows past `max_bytes`.
+    """
+    content_length = response.headers.get("Content-Length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        response.close()
+        raise PageTooLargeError(f"{response.url} is {content_length} bytes, limit is {max_bytes}")
+
+    received = 0
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            received += len(chunk)
+            if received > max_bytes:
+                raise PageTooLargeError(f"{response.url} exceeds the limit of {max_bytes} bytes")
+            yield chunk
+    finally:
+        response.close()
@@ -0,0 +1,303 @@
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from data.history import record_removals, record_versions
+from data.models import Quote, QuoteChange, ScrapeRun, Tag
+from scraper.changes import publish_changes
+from scraper.identity_cache import tag_ids
+from scraper.items import QuoteItem, TagRef
+from scraper.logs import EventLogger
+from scraper.progress import ProgressReporter
+from scraper.stats import StatsDelta
+from scraper.tracing import span, start_span
+
+logger = logging.getLogger(__name__)
+log = EventLogger(__name__)
+
+# Rows per bulk statement, below SQLite's limit on query parameters.
+BATCH_SIZE = 500
+
+
+def _batches(values: List[Any]) -> Iterator[List[Any]]:
+    for start in range(0, len(values), BATCH_SIZE):
+        yield values[start:start + BATCH_SIZE]
+
+
+def resolve_tag_ids(tags: Iterable[TagRef], metrics: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Resolve tag names to primary keys, creating the missing tags.
+
+    Names are looked up in the process-wide identity cache first; the rest are
+    fetched with a single bulk query. Tags that do not exist yet are inserted
+    with `ignore_conflicts`, so a concurrent worker inserting the same tag
+    (unique constraint race) is not an error: the rows are simply re-read.
+    Identities are only cached once the surrounding transaction commits, so a
+    rollback can't leave primary keys of rows that never existed in the cache.
+
+    Args:
+        tags: The tags referenced by a batch of quotes.
+        metrics: Run metrics, updated with the cache hits and misses.
+
+    Returns:
+        A mapping of tag name to Tag primary key.
+    """
+    urls = {tag.name: tag.url for tag in tags}
+    resolved, missing = tag_ids.get_many(urls)
+    metrics["tag_cache_hits"] += len(resolved)
+    metrics["tag_cache_misses"] += len(missing)
+
+    if missing:
+        found = dict(Tag.objects.filter(name__in=missing).values_list("name", "id"))
+        new_names = [name for name in missing if name not in found]
+        if new_names:
+            logger.info(f"Saving {len(new_names)} new tags")
+            Tag.objects.bulk_create(
+                [Tag(name=name, url=urls[name]) for name in new_names], ignore_conflicts=True
+            )
+            found.update(Tag.objects.filter(name__in=new_names).values_list("name", "id"))
+        transaction.on_commit(lambda: tag_ids.set_many(found))
+        resolved.update(found)
+
+    return resolved
+
+
+def save_quotes(
+    quotes: List[QuoteItem],
+    progress: Optional[ProgressReporter] = None,
+    run: Optional[ScrapeRun] = None,
+) -> Dict[str, Any]:
+    """
+    Persist a batch of validated quotes and their tags.
+
+    Quotes are matched with the stored ones by fingerprint (author and text):
+    new quotes are inserted, quotes whose links or tags changed are updated
+    and unchanged quotes are left alone. With a run, every change is recorded
+    in its changeset, every changed state in the quote history (see
+    `data.history`) and every stored quote of the batch is marked as seen by
+    the run, including those that failed to save. The
+    author and tag statistics are updated with the changes of the batch.
+
+    Args:
+        quotes: The validated quotes to save.
+        progress: Reporter notified of the persisted items, if any.
+        run: The run the quotes were scraped by, if any.
+
+    Returns:
+        The run metrics of the batch.
+    """
+    metrics = {
+        "quotes_saved": 0,
+        "quotes_inserted": 0,
+        "quotes_updated": 0,
+        "quotes_unchanged": 0,
+        "quotes_failed": 0,
+        "versions_recorded": 0,
+        "tag_cache_hits": 0,
+        "tag_cache_misses": 0,
+    }
+    unique_quotes = {}
+    for quote_data in quotes:
+        unique_quotes.setdefault(Quote.make_fingerprint(quote_data.author, quote_data.text), quote_data)
+    with span("db.resolve_tags"):
+        tag_pks = resolve_tag_ids((tag for quote in quotes for tag in quote.tags), metrics)
+
+    existing = {}
+    for fingerprints in _batches(list(unique_quotes)):
+        with span("db.select_quotes", rows=len(fingerprints)):
+            rows = Quote.objects.filter(fingerprint__in=fingerprints).values(
+                "id", "fingerprint", "author_url", "goodreads_url"
+            )
+            existing.update((row["fingerprint"], row) for row in rows)
+    existing_tags = defaultdict(set)
+    for quote_ids in _batches([row["id"] for row in existing.values()]):
+        with span("db.select_tag_links", rows=len(quote_ids)):
+            links = Quote.tags.through.objects.filter(quote_id__in=quote_ids)
+            for quote_id, tag_id in links.values_list("quote_id", "tag_id"):
+                existing_tags[quote_id].add(tag_id)
+
+    changes = []
+    new_links = []
+    # Stored quotes of the batch, marked as seen by the run below.
+    seen_ids = []
+    # (text, author, state) of the saved quotes, for the history of the run.
+    seen = {}
+    stats = StatsDelta()
+    # Failures are handled per quote, so the loop always reaches `end`. The
+    # writes of each quote run in a savepoint: a database error rolls back
+    # that quote alone and leaves the surrounding transaction (e.g. the
+    # batch writer's) usable, as PostgreSQL aborts it otherwise.
+    write_span = start_span("db.write_quotes", rows=len(unique_quotes))
+    for fingerprint, quote_data in unique_quotes.items():
+        try:
+            tags = {tag_pks[tag.name] for tag in quote_data.tags}
+            row = existing.get(fingerprint)
+            if row is None:
+                log.debug("quote.inserted", "Saving quote: %(text)s by %(author)s",
+                          text=quote_data.text, author=quote_data.author)
+                with transaction.atomic():
+                    quote = Quote.objects.create(
+                        text=quote_data.text,
+                        author=quote_data.author,
+                        author_url=quote_data.author_url,
+                        goodreads_url=quote_data.goodreads_url,
+                        fingerprint=fingerprint,
+                        last_seen_run=run,
+                    )
+                # Tag links of new quotes are inserted in bulk below.
+                new_links.extend(Quote.tags.through(quote_id=quote.id, tag_id=tag_id) for tag_id in tags)
+                changes.append(QuoteChange(run=run, quote_id=quote.id, fingerprint=fingerprint, kind=QuoteChange.INSERTED))
+                stats.add(quote_data.author, tags)
+                metrics["quotes_inserted"] += 1
+            elif (row["author_url"], row["goodreads_url"], existing_tags[row["id"]]) != (
+                quote_data.author_url, quote_data.goodreads_url, tags
+            ):
+                log.debug("quote.updated", "Updating quote: %(text)s by %(author)s",
+                          text=quote_data.text, author=quote_data.author)
+                with transaction.atomic():
+                    Quote.objects.filter(id=row["id"]).update(
+                        author_url=quote_data.author_url,
+                        goodreads_url=quote_data.goodreads_url,
+                    )
+                    Quote(id=row["id"]).tags.set(tags)
+                stats.retag(existing_tags[row["id"]], tags)
+                changes.append(QuoteChange(run=run, quote_id=row["id"], fingerprint=fingerprint, kind=QuoteChange.UPDATED))
+                metrics["quotes_updated"] += 1
+            else:
+                metrics["quotes_unchanged"] += 1
+            if row is not None:
+                seen_ids.append(row["id"])
+
+            seen[fingerprint] = (
+                quote_data.text,
+                quote_data.author,
+                (quote_data.author_url, quote_data.goodreads_url, [tag.name for tag in quote_data.tags]),
+            )
+            if progress:
+                progress.persisted(1)
+
+        # In real-world applications, we could handle this errors with a more complex
+        # retry logic or error handling mechanism just for quotes that we couldn't save.
+        # For now, we will just log the error and continue with the next quote.
+        except Exception as e:
+            metrics["quotes_failed"] += 1
+            # The quote is still on the portal: a full crawl must not remove it.
+            if fingerprint in existing:
+                seen_ids.append(existing[fingerprint]["id"])
+            log.error("quote.save_failed", "Error saving quote: %(quote)s. Error: %(error)s", quote=quote_data, error=e)
+    write_span.set_attribute("failed", metrics["quotes_failed"])
+    write_span.end()
+
+    with span("db.insert_tag_links", rows=len(new_links)):
+        Quote.tags.through.objects.bulk_create(new_links, batch_size=BATCH_SIZE)
+    with span("db.apply_stats"):
+        stats.apply()
+    metrics["quotes_saved"] = metrics["quotes_inserted"] + metrics["quotes_updated"]
+    if run is not None:
+        for quote_ids in _batches(seen_ids):
+            with span("db.mark_seen", rows=len(quote_ids)):
+                # Never lower the mark of a run created later, whose finish
+                # would otherwise remove the quotes it saw.
+                Quote.objects.filter(id__in=quote_ids).filter(not_seen_since(run)).update(last_seen_run=run)
+        with span("db.insert_changes", rows=len(changes)):
+            QuoteChange.objects.bulk_create(changes, batch_size=BATCH_SIZE)
+        with span("db.record_versions", rows=len(seen)):
+            metrics["versions_recorded"] = record_versions(run, seen)
+
+    lookups = metrics["tag_cache_hits"] + metrics["tag_cache_misses"]
+    metrics["tag_cache_hit_rate"] = round(metrics["tag_cache_hits"] / lookups, 3) if lookups else 0.0
+    return metrics
+
+
+def not_seen_since(run: ScrapeRun) -> Q:
+    """
+    Filter the quotes no run created since `run` (included) has seen.
+
+    Runs are created in order, so runs overlapping `run` and created after it
+    keep the quotes they saw.
+    """
+    return Q(last_seen_run__isnull=True) | Q(last_seen_run__lt=run.pk)
+
+
+def finish_run(run: ScrapeRun, full_crawl: bool) -> ScrapeRun:
+    """
+    Complete the changeset of a run.
+
+    After a full crawl, the quotes not seen since the run was created are
+    deleted from the corpus and recorded as removed (tombstones), in the
+    changeset and the quote history. A partial crawl can't tell a removed
+    quote from a page it missed, so it removes nothing.
+
+    Args:
+        run: The run whose quotes were saved.
+        full_crawl: Whether every page of the portal was crawled.
+
+    Returns:
+        The finished run.
+    """
+    with transaction.atomic():
+        if full_crawl:
+            missing = Quote.objects.filter(not_seen_since(run))
+            removed = list(missing.values_list("id", "fingerprint", "author"))
+            if removed:
+                logger.info(f"Removing {len(removed)} quotes not seen by run {run.pk}")
+                QuoteChange.objects.bulk_create(
+                    [
+                        QuoteChange(run=run, quote_id=quote_id, fingerprint=fingerprint, kind=QuoteChange.REMOVED)
+                        for quote_id, fingerprint, _ in removed
+                    ],
+                    batch_size=BATCH_SIZE,
+                )
+                removed_tags = defaultdict(list)
+                for quote_ids in _batches([quote_id for quote_id, _, _ in removed]):
+                    links = Quote.tags.through.objects.filter(quote_id__in=quote_ids)
+                    for quote_id, tag_id in links.values_list("quote_id", "tag_id"):
+                        removed_tags[quote_id].append(tag_id)
+                stats = StatsDelta()
+                for quote_id, _, author in removed:
+                    stats.add(author, removed_tags[quote_id], sign=-1)
+                missing.delete()
+                stats.apply()
+                record_removals(run, [fingerprint for _, fingerprint, _ in removed])
+
+        counts = dict(run.changes.values_list("kind").annotate(count=Count("id")))
+        run.inserted = counts.get(QuoteChange.INSERTED, 0)
+        run.updated = counts.get(QuoteChange.UPDATED, 0)
+        run.removed = counts.get(QuoteChange.REMOVED, 0)
+        run.full_crawl = full_crawl
+        run.finished_at = timezone.now()
+        run.save()
+
+    transaction.on_commit(lambda: publish_changes(run))
+    return run
+
+
+def select_new_quotes(quotes: List[QuoteItem]) -> List[QuoteItem]:
+    """
+    Drop the quotes whose fingerprint is already stored.
+
+    Args:
+        quotes: The validated quotes of a crawl.
+
+    Returns:
+        The quotes missing from the corpus, in their original order.
+    """
+    fingerprints = [Quote.make_fingerprint(quote.author, quote.text) for quote in quotes]
+    known = set()
+    for batch in _batches(list(set(fingerprints))):
+        known.update(Quote.objects.filter(fingerprint__in=batch).values_list("fingerprint", flat=True))
+    return [quote for quote, fingerprint in zip(quotes, fingerprints) if fingerprint not in known]
+
+
+@receiver(post_delete, sender=Tag)
+def forget_deleted_tag(sender, instance, **kwargs):
+    """
+    Keep the identity cache from handing out primary keys of deleted tags.
+    """
+    tag_ids.invalidate([instance.name])
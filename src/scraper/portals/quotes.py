@@ -0,0 +1,23 @@
+from scraper.auth.quote_scraper_auth import QuoteScraperAuth
+from scraper.parsers.lxml_quote_parser import LxmlQuoteParser
+from scraper.parsers.quote_parser import QuoteParser
+from scraper.persistence import finish_run, save_quotes, select_new_quotes
+from scraper.portals.registry import PortalDefinition, register_portal
+from scraper.validation import validate_quotes
+
+QUOTES_PORTAL = register_portal(PortalDefinition(
+    name="quotes",
+    base_url=QuoteScraperAuth.PORTAL_URL,
+    auth_class=QuoteScraperAuth,
+    # "bs4" parses complete pages with BeautifulSoup, "lxml" parses pages
+    # incrementally while they are downloaded.
+    parser_classes={"bs4": QuoteParser, "lxml": LxmlQuoteParser},
+    start_urls=(f"{QuoteScraperAuth.PORTAL_URL}/page/1/",),
+    validate=validate_quotes,
+    save=save_quotes,
+    finish_run=finish_run,
+    page_url=lambda number: f"{QuoteScraperAuth.PORTAL_URL}/page/{number}/",
+    select_new=select_new_quotes,
+    requests_per_second=5,
+    max_concurrency=2,
+))
@@ -0,0 +1,150 @@
+import logging
+from dataclasses import dataclass
+from importlib import import_module
+from typing import (TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple,
+                    Type)
+
+from django.conf import settings
+
+if TYPE_CHECKING:
+    from scraper.auth.base_scraper_auth import BaseScraperAuth
+    from scraper.parsers.base_parser import BaseParser
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PortalDefinition:
+    """
+    Everything the generic crawl job needs to know about a portal.
+
+    Attributes:
+        name: Unique name of the portal, used by the tasks and the scheduler.
+        base_url: Root URL of the portal, passed to the auth class.
+        auth_class: Authenticates the crawl session.
+        parser_classes: Parser backends by name; the first one is the default.
+        start_urls: Pages the crawl starts from. Each is followed through its
+            next page links.
+        validate: Validates a batch of scraped items, returning the valid
+            items and the errors by index.
+        save: Persists the valid items of a run, returning the run metrics.
+        finish_run: Completes the changeset of a run once its items are saved,
+            given whether the crawl was full. None if the portal keeps no
+            changesets.
+        page_url: Builds the URL of a numbered page, for crawls of a page
+            range. None if the pages of the portal are not numbered.
+        select_new: Drops the items that are already stored, for incremental
+            crawls. None if the portal can't tell.
+        requests_per_second: Page requests allowed per second across all
+            workers, or None for no limit.
+        max_concurrency: Crawls of the portal allowed to run at the same time.
+        sessions_per_account: Sessions a crawl logs in per account, where the
+            portal allows concurrent sessions.
+        session_requests_per_second: Page requests allowed per second and
+            session, or None for no limit.
+    """
+
+    name: str
+    base_url: str
+    auth_class: Type["BaseScraperAuth"]
+    parser_classes: Dict[str, Type["BaseParser"]]
+    start_urls: Tuple[str, ...]
+    validate: Callable[[List[Any]], Tuple[List[Any], Dict[int, Any]]]
+    save: Callable[..., Dict[str, Any]]
+    finish_run: Optional[Callable[..., Any]] = None
+    page_url: Optional[Callable[[int], str]] = None
+    select_new: Optional[Callable[[List[Any]], List[Any]]] = None
+    requests_per_second: Optional[float] = None
+    max_concurrency: int = 1
+    sessions_per_account: int = 1
+    session_requests_per_second: Optional[float] = None
+
+    def parser_class(self, backend: Optional[str] = None) -> Type["BaseParser"]:
+        """
+        Return the parser class of `backend`, or the default one.
+
+        Raises:
+            KeyError: If the portal has no such backend.
+        """
+        if backend is None:
+            return next(iter(self.parser_classes.values()))
+        return self.parser_classes[backend]
+
+
+class PortalRegistry:
+    """Maps portal names to their definitions."""
+
+    def __init__(self):
+        self._portals: Dict[str, PortalDefinition] = {}
+
+    def register(self, definition: PortalDefinition) -> PortalDefinition:
+        """
+        Register a portal definition.
+
+        Raises:
+            ValueError: If another definition is registered under the same name.
+        """
+        registered = self._portals.get(definition.name)
+        if registered is not None and registered is not definition:
+            raise ValueError(f"Portal {definition.name!r} is already registered.")
+        self._portals[definition.name] = definition
+        return definition
+
+    def unregister(self, name: str):
+        self._portals.pop(name, None)
+
+    def get(self, name: str) -> PortalDefinition:
+        """
+        Return the definition registered under `name`.
+
+        Raises:
+            KeyError: If no portal is registered under `name`.
+        """
+        try:
+            return self._portals[name]
+        except KeyError:
+            raise KeyError(f"Unknown portal {name!r}.") from None
+
+    def names(self) -> List[str]:
+        return list(self._portals)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._portals
+
+
+portals = PortalRegistry()
+
+
+def register_portal(definition: PortalDefinition) -> PortalDefinition:
+    return portals.register(definition)
+
+
+def get_portal(name: str) -> PortalDefinition:
+    """
+    Return the portal registered under `name`, loading the portal modules first.
+
+    Raises:
+        KeyError: If no portal is registered under `name`.
+    """
+    load_portals()
+    return portals.get(name)
+
+
+_loaded = False
+
+
+def load_portals():
+    """
+    Import the modules listed in `SCRAPER_PORTAL_MODULES`, once per process.
+
+    Each module registers its portals when imported. Portals are loaded on
+    first use rather than at startup, as their parsers and HTTP clients are
+    slow to import.
+    """
+    global _loaded
+    if _loaded:
+        return
+    for module in settings.SCRAPER_PORTAL_MODULES:
+        import_module(module)
+    _loaded = True
+    logger.debug(f"Registered portals: {portals.names()}")
@@ -0,0 +1,281 @@
+import asyncio
+import json
+import logging
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def _client(url: str):
+    # Imported on first use: most processes never publish or subscribe.
+    import redis
+
+    return redis.Redis.from_url(url)
+
+
+class ProgressReporter:
+    """
+    Publishes incremental progress of a scrape task to the shared cache.
+
+    Each snapshot carries a monotonically increasing `version`, so readers
+    (the long-poll status endpoint and the server-sent events stream) only
+    push something to clients when it changed. Writes are throttled to one
+    every `SCRAPE_PROGRESS_INTERVAL` seconds; the final snapshot is always
+    written, with the result of the task.
+
+    Snapshots are also published on a Redis channel per task
+    (`SCRAPE_PROGRESS_REDIS_URL`), which readers subscribe to instead of
+    polling the cache. Without it (tests, development), readers poll every
+    `SCRAPE_PROGRESS_POLL_INTERVAL` seconds.
+    """
+
+    KEY_PREFIX = "scraper:progress"
+
+    def __init__(self, task_id: str, total_pages: Optional[int] = None):
+        self.task_id = task_id
+        self.total_pages = total_pages
+        self.pages_done = 0
+        self.items_scraped = 0
+        self.items_persisted = 0
+        self.metrics: Dict[str, Any] = {}
+        self.result: Any = None
+        self.version = 0
+        self.started_at = time.monotonic()
+        self._last_published_at = 0.0
+
+    @classmethod
+    def key(cls, task_id: str) -> str:
+        return f"{cls.KEY_PREFIX}:{task_id}"
+
+    @classmethod
+    def channel(cls, task_id: str) -> str:
+        return f"{cls.KEY_PREFIX}:{task_id}:updates"
+
+    @classmethod
+    def get(cls, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the latest progress snapshot of a task, if any.
+        """
+        return cache.get(cls.key(task_id))
+
+    @classmethod
+    def resume(cls, task_id: str) -> "ProgressReporter":
+        """
+        Continue reporting the progress of a task from its latest snapshot.
+
+        Used by the writer worker to finish a crawl handed to it, so readers
+        keep seeing increasing versions and the counters of the crawl.
+        """
+        progress = cls(task_id)
+        snapshot = cls.get(task_id)
+        if snapshot:
+            progress.total_pages = snapshot["total_pages"]
+            progress.pages_done = snapshot["pages_done"]
+            progress.items_scraped = snapshot["items_scraped"]
+            progress.items_persisted = snapshot["items_persisted"]
+            progress.metrics = dict(snapshot["metrics"])
+            progress.version = snapshot["version"]
+            progress.started_at -= snapshot["elapsed"]
+        return progress
+
+    @classmethod
+    def wait(cls, task_id: str, since: int, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Block until a snapshot newer than `since` is published or `timeout` elapses.
+
+        The caller sleeps on its subscription to the task channel, woken by
+        the next publish.
+
+        Args:
+            task_id: The ID of the Celery task.
+            since: The last snapshot version the client has seen.
+            timeout: Maximum number of seconds to wait.
+
+        Returns:
+            The latest snapshot (which may be unchanged on timeout).
+        """
+        deadline = time.monotonic() + timeout
+        pubsub = None
+        if settings.SCRAPE_PROGRESS_REDIS_URL:
+            pubsub = _client(settings.SCRAPE_PROGRESS_REDIS_URL).pubsub(ignore_subscribe_messages=True)
+            # Subscribed before reading the cache, so no publish is missed in between.
+            pubsub.subscribe(cls.channel(task_id))
+        try:
+            snapshot = cls.get(task_id)
+            while not (snapshot and (snapshot["version"] > since or snapshot["finished"])):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if pubsub is None:
+                    time.sleep(min(remaining, settings.SCRAPE_PROGRESS_POLL_INTERVAL))
+                    snapshot = cls.get(task_id)
+                    continue
+                message = pubsub.get_message(timeout=remaining)
+                if message:
+                    snapshot = json.loads(message["data"])
+            return snapshot
+        finally:
+            if pubsub is not None:
+                pubsub.close()
+
+    @classmethod
+    def stream(
+        cls, task_id: str, since: int, timeout: float, keepalive: float
+    ) -> Iterator[Optional[Dict[str, Any]]]:
+        """
+        Blocking counterpart of `updates`, for requests served over WSGI.
+
+        Waits in the calling thread (see `wait`), so each open stream holds
+        a worker thread.
+
+        Yields:
+            Each new snapshot, the final one last, or None to keep the client alive.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            snapshot = cls.wait(task_id, since, min(keepalive, remaining))
+            if snapshot and snapshot["version"] > since:
+                since = snapshot["version"]
+                yield snapshot
+            elif not (snapshot and snapshot["finished"]):
+                yield None
+            if snapshot and snapshot["finished"]:
+                return
+
+    @classmethod
+    async def updates(
+        cls, task_id: str, since: int, timeout: float, keepalive: float
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield the snapshots newer than `since` as they are published.
+
+        Runs on the event loop, holding no thread while it waits: the
+        subscription uses the asyncio Redis client.
+
+        Args:
+            task_id: The ID of the Celery task.
+            since: The last snapshot version the client has seen.
+            timeout: Stop after this many seconds.
+            keepalive: Yield None after this many seconds without a snapshot.
+
+        Yields:
+            Each new snapshot, the final one last, or None to keep the client alive.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        client = pubsub = None
+        if settings.SCRAPE_PROGRESS_REDIS_URL:
+            import redis.asyncio
+
+            client = redis.asyncio.Redis.from_url(settings.SCRAPE_PROGRESS_REDIS_URL)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            await pubsub.subscribe(cls.channel(task_id))
+        try:
+            snapshot = await cache.aget(cls.key(task_id))
+            last_sent = loop.time()
+            while True:
+                if snapshot and snapshot["version"] > since:
+                    since = snapshot["version"]
+                    last_sent = loop.time()
+                    yield snapshot
+                if snapshot and snapshot["finished"]:
+                    return
+                now = loop.time()
+                if now >= deadline:
+                    return
+                if now - last_sent >= keepalive:
+                    last_sent = now
+                    yield None
+                wait = min(deadline, last_sent + keepalive) - now
+                if pubsub is None:
+                    await asyncio.sleep(min(wait, settings.SCRAPE_PROGRESS_POLL_INTERVAL))
+                    snapshot = await cache.aget(cls.key(task_id))
+                    continue
+                message = await pubsub.get_message(timeout=wait)
+                if message:
+                    snapshot = json.loads(message["data"])
+        finally:
+            if pubsub is not None:
+                await pubsub.reset()
+                await client.close()
+
+    def page_done(self, items: int):
+        """
+        Record a scraped page and the number of items found on it.
+        """
+        self.pages_done += 1
+        self.items_scraped += items
+        self.publish()
+
+    def persisted(self, items: int):
+        """
+        Record items written to the database.
+        """
+        self.items_persisted += items
+        self.publish()
+
+    def snapshot(self, state: str = "PROGRESS") -> Dict[str, Any]:
+        """
+        Build the progress payload sent to clients.
+        """
+        elapsed = time.monotonic() - self.started_at
+        eta = None
+        if self.total_pages and self.pages_done:
+            remaining = max(self.total_pages - self.pages_done, 0)
+            eta = round(elapsed / self.pages_done * remaining, 1)
+        return {
+            "version": self.version,
+            "state": state,
+            "finished": state != "PROGRESS",
+            "pages_done": self.pages_done,
+            "total_pages": self.total_pages,
+            "items_scraped": self.items_scraped,
+            "items_persisted": self.items_persisted,
+            "elapsed": round(elapsed, 1),
+            "eta": eta,
+            "metrics": self.metrics,
+            "result": self.result,
+        }
+
+    def publish(self, state: str = "PROGRESS", force: bool = False):
+        """
+        Write a snapshot to the cache, unless the last write is too recent.
+
+        Args:
+            state: The task state to report.
+            force: Write even if the throttle interval has not elapsed.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_published_at < settings.SCRAPE_PROGRESS_INTERVAL:
+            return
+        self._last_published_at = now
+        self.version += 1
+        snapshot = self.snapshot(state)
+        try:
+            cache.set(self.key(self.task_id), snapshot, timeout=settings.SCRAPE_PROGRESS_TTL)
+            if settings.SCRAPE_PROGRESS_REDIS_URL:
+                _client(settings.SCRAPE_PROGRESS_REDIS_URL).publish(self.channel(self.task_id), json.dumps(snapshot))
+        except Exception as e:
+            # Progress is best effort: never fail a crawl because of it.
+            logger.warning(f"Could not publish progress for task {self.task_id}: {e}")
+
+    def finish(self, state: str, result: Any = None):
+        """
+        Publish the final snapshot of the task.
+
+        Args:
+            state: The final state of the task.
+            result: The task result, stop metadata or error message, served
+                by the status endpoint without a result backend lookup.
+        """
+        self.result = result
+        self.publish(state=state, force=True)
@@ -0,0 +1,158 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from django.conf import settings
+from requests import Response
+
+logger = logging.getLogger(__name__)
+
+# Statuses proxies typically get when their IP is blocked or overloaded.
+BLOCKED_STATUSES = (403, 407, 429)
+
+
+class NoProxyAvailableError(Exception):
+    """Raised when every proxy of the pool is quarantined."""
+
+
+class ProxyStats:
+    """Health of a proxy, as seen by this worker."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        # Exponentially weighted averages; new proxies start optimistic.
+        self.success_rate = 1.0
+        self.latency: Optional[float] = None
+        self.quarantined_until = 0.0
+        self.quarantines = 0
+        # Sessions currently routed through the proxy.
+        self.bound = 0
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "proxy": self.url,
+            "requests": self.requests,
+            "failures": self.failures,
+            "success_rate": round(self.success_rate, 3),
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "quarantines": self.quarantines,
+            "sessions": self.bound,
+        }
+
+
+class ProxyPool:
+    """
+    Routes requests through the healthiest proxies.
+
+    Every proxy is scored by its success rate divided by its latency (both
+    exponentially weighted averages) and by the number of sessions already
+    bound to it, so sessions spread over the good proxies. A logged-in session
+    is bound to one proxy (its cookies belong to that exit IP) and keeps it
+    until the proxy is quarantined. A proxy failing
+    `SCRAPE_PROXY_QUARANTINE_FAILURES` requests in a row is quarantined for
+    `SCRAPE_PROXY_QUARANTINE_SECONDS`, then tried again.
+    """
+
+    def __init__(self, proxies: Sequence[str], clock: Callable[[], float] = time.monotonic):
+        self.stats: Dict[str, ProxyStats] = {url: ProxyStats(url) for url in proxies}
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.stats)
+
+    def is_available(self, proxy: str) -> bool:
+        return self.stats[proxy].quarantined_until <= self._clock()
+
+    def _score(self, stats: ProxyStats) -> float:
+        latency = stats.latency if stats.latency is not None else settings.SCRAPE_PROXY_DEFAULT_LATENCY
+        return stats.success_rate / max(latency, 0.001) / (1 + stats.bound)
+
+    def choose(self) -> str:
+        """
+        Return the best available proxy.
+
+        Raises:
+            NoProxyAvailableError: If every proxy is quarantined.
+        """
+        with self._lock:
+            now = self._clock()
+            available = [stats for stats in self.stats.values() if stats.quarantined_until <= now]
+            if not available:
+                raise NoProxyAvailableError("Every proxy of the pool is quarantined.")
+            return max(available, key=self._score).url
+
+    def bind(self, previous: Optional[str] = None) -> str:
+        """
+        Pick the proxy a session sticks to, releasing its previous one.
+
+        Args:
+            previous: The proxy the session was bound to, if any.
+
+        Returns:
+            The proxy to route the session through.
+        """
+        self.unbind(previous)
+        proxy = self.choose()
+        with self._lock:
+            self.stats[proxy].bound += 1
+        return proxy
+
+    def unbind(self, proxy: Optional[str]):
+        if proxy is not None:
+            with self._lock:
+                self.stats[proxy].bound = max(0, self.stats[proxy].bound - 1)
+
+    @staticmethod
+    def is_failure(response: Optional[Response]) -> bool:
+        """
+        Check if a response (None for a connection error) counts against the proxy.
+        """
+        return response is None or response.status_code in BLOCKED_STATUSES or response.status_code >= 500
+
+    def record(self, proxy: str, latency: float, ok: bool):
+        """
+        Update the health of `proxy` after a request.
+
+        Args:
+            proxy: The proxy the request went through.
+            latency: Seconds until the response headers arrived.
+            ok: Whether the request succeeded.
+        """
+        alpha = settings.SCRAPE_PROXY_EWMA_ALPHA
+        with self._lock:
+            stats = self.stats[proxy]
+            stats.requests += 1
+            stats.success_rate += alpha * ((1.0 if ok else 0.0) - stats.success_rate)
+            if ok:
+                stats.consecutive_failures = 0
+                stats.latency = latency if stats.latency is None else stats.latency + alpha * (latency - stats.latency)
+                return
+
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures >= settings.SCRAPE_PROXY_QUARANTINE_FAILURES:
+                stats.quarantined_until = self._clock() + settings.SCRAPE_PROXY_QUARANTINE_SECONDS
+                stats.quarantines += 1
+                stats.consecutive_failures = 0
+                logger.warning(
+                    f"Proxy {proxy} quarantined for {settings.SCRAPE_PROXY_QUARANTINE_SECONDS}s "
+                    f"(success rate {stats.success_rate:.2f})."
+                )
+
+    def metrics(self) -> List[Dict[str, object]]:
+        """
+        Returns:
+            The health of every proxy, best first.
+        """
+        with self._lock:
+            ranked = sorted(self.stats.values(), key=self._score, reverse=True)
+            return [stats.as_dict() for stats in ranked]
+
+
+# Shared by the crawls of a worker process, so proxy health outlives a crawl.
+proxy_pool = ProxyPool(settings.SCRAPE_PROXIES)
@@ -0,0 +1,65 @@
+import logging
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson.
+
+    Falls back to DRF's JSONRenderer when orjson is not installed or when the
+    request asks for indented output, so responses stay byte-compatible with
+    what clients already parse.
+    """
+
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render `data` into JSON bytes.
+
+        Args:
+            data: The data to render.
+            accepted_media_type: The negotiated media type.
+            renderer_context: Extra context passed by the view.
+
+        Returns:
+            bytes: The JSON encoded payload.
+        """
+        if data is None:
+            return b""
+
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # DRF's encoder still handles the types orjson does not know about
+        # (Decimal, lazy translation strings, querysets...).
+        return orjson.dumps(
+            data, default=self._encoder.default, option=orjson.OPT_NON_STR_KEYS
+        )
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets views that stream server-sent events accept `text/event-stream`.
+
+    The events themselves are written by the view's streaming response; this
+    renderer only renders error payloads (e.g. authentication failures).
+    """
+
+    media_type = "text/event-stream"
+    format = "event-stream"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return b"event: error\ndata: " + ORJSONRenderer().render(data) + b"\n\n"
@@ -0,0 +1,117 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+# Where clients pass the run they waited for, read from the primary until
+# the replica has it (see `ReplicaReadsMiddleware`).
+RUN_HEADER = "X-Scrape-Run"
+RUN_COOKIE = "scrape_run"
+
+# The alias reads are routed to, while `replica_reads` is active.
+_read_alias: ContextVar[Optional[str]] = ContextVar("scraper_read_alias", default=None)
+
+
+class ReadReplicaRouter:
+    """
+    Routes reads to the read replica inside `replica_reads`, everything else
+    to the primary.
+
+    Reads default to the primary, so the crawl and persistence code always
+    sees its own writes; only the API opts in (see `ReplicaReadsMiddleware`).
+    Migrations only run on the primary.
+    """
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints) -> str:
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        # The replica holds the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, model_name: str = None, **hints) -> Optional[bool]:
+        if db != DEFAULT_DB_ALIAS and db == settings.DATABASE_REPLICA_ALIAS:
+            return False
+        return None
+
+
+@contextmanager
+def replica_reads(alias: Optional[str] = None) -> Iterator[None]:
+    """
+    Route the reads of the enclosed block to the replica.
+
+    Args:
+        alias: The database alias to read from, `DATABASE_REPLICA_ALIAS` by default.
+    """
+    token = _read_alias.set(alias or settings.DATABASE_REPLICA_ALIAS)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def pin_primary(response, run_id: int):
+    """
+    Send the API reads of the client receiving `response` to the primary
+    until the replica has run `run_id`, for at most
+    `DATABASE_REPLICA_STICKY_SECONDS`.
+    """
+    response.set_cookie(RUN_COOKIE, str(run_id), max_age=settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def awaited_run(request) -> Optional[int]:
+    """
+    Return the run the client waited for, from `RUN_HEADER` or `RUN_COOKIE`.
+    """
+    value = request.headers.get(RUN_HEADER) or request.COOKIES.get(RUN_COOKIE)
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+class ReplicaHealth:
+    """
+    Whether the replicas of this process answer, checked at most every
+    `DATABASE_REPLICA_HEALTH_CHECK_INTERVAL` seconds per alias.
+
+    An unreachable replica is skipped (reads fall back to the primary) until
+    a later check finds it back.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        # Per alias: (checked at, healthy).
+        self._checks: Dict[str, tuple] = {}
+
+    def available(self, alias: str) -> bool:
+        now = self._clock()
+        checked_at, healthy = self._checks.get(alias, (None, True))
+        if checked_at is not None and now - checked_at < settings.DATABASE_REPLICA_HEALTH_CHECK_INTERVAL:
+            return healthy
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            available = True
+        except DatabaseError as e:
+            if healthy:
+                logger.warning(f"Replica {alias} is unavailable, reading from the primary: {e}")
+            available = False
+        else:
+            if not healthy:
+                logger.info(f"Replica {alias} is available again.")
+        self._checks[alias] = (now, available)
+        return available
+
+
+replica_health = ReplicaHealth()
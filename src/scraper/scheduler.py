@@ -0,0 +1,214 @@
+import logging
+import time
+import uuid
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from scraper.locks import acquire, compare_and_delete
+from scraper.portals.registry import (PortalDefinition, PortalRegistry,
+                                      load_portals, portals)
+
+logger = logging.getLogger(__name__)
+
+
+class PortalScheduler:
+    """
+    Shares the crawl workers between portals.
+
+    Every running crawl holds a slot lease for its portal in the shared cache.
+    A crawl may start while its portal runs fewer than `max_concurrency`
+    crawls and, when other portals are waiting for a worker, fewer than its
+    fair share of `SCRAPE_WORKER_SLOTS` (the slots divided evenly between the
+    portals with running or waiting crawls). A portal alone on the workers
+    may use them all up to its cap, so no slot stays idle, but as soon as
+    another portal asks for one the big portal stops starting new crawls
+    until it is back under its share.
+
+    Leases expire after `SCRAPE_PORTAL_SLOT_LEASE` seconds, so a crashed
+    worker can't hold a slot forever; running crawls renew theirs as they go
+    (`heartbeat`).
+    """
+
+    SLOTS_PREFIX = "scraper:portal-slots"
+    DEMAND_PREFIX = "scraper:portal-demand"
+    LOCK_KEY = "scraper:portal-scheduler-lock"
+    LOCK_TIMEOUT = 5
+
+    def __init__(self, registry: Optional[PortalRegistry] = None, total_slots: Optional[int] = None):
+        if registry is None:
+            # Fair shares are computed over every configured portal.
+            load_portals()
+            registry = portals
+        self.registry = registry
+        self.total_slots = total_slots or settings.SCRAPE_WORKER_SLOTS
+
+    @classmethod
+    def slots_key(cls, portal: str) -> str:
+        return f"{cls.SLOTS_PREFIX}:{portal}"
+
+    @classmethod
+    def demand_key(cls, portal: str) -> str:
+        return f"{cls.DEMAND_PREFIX}:{portal}"
+
+    def _lock(self) -> str:
+        """
+        Take the scheduler lock and return its token.
+
+        Slot bookkeeping is a read-modify-write on shared keys. A holder that
+        died with the lock frees it when it expires after LOCK_TIMEOUT.
+        """
+        token = uuid.uuid4().hex
+        while not acquire(self.LOCK_KEY, token, timeout=self.LOCK_TIMEOUT):
+            time.sleep(0.01)
+        return token
+
+    def _unlock(self, token: str):
+        # A holder that outlived its lock must not release the next holder's.
+        if not compare_and_delete(self.LOCK_KEY, token):
+            logger.warning("Scheduler lock expired before it was released.")
+
+    def _leases(self, portal: str, now: float) -> Dict[str, float]:
+        leases = cache.get(self.slots_key(portal)) or {}
+        return {task_id: expires for task_id, expires in leases.items() if expires > now}
+
+    def running(self, portal: str) -> int:
+        return len(self._leases(portal, time.time()))
+
+    def fair_share(self, portal: str) -> int:
+        """
+        Return the number of slots `portal` may hold while others are waiting.
+        """
+        now = time.time()
+        keys = {}
+        for name in set(self.registry.names()) | {portal}:
+            keys[self.slots_key(name)] = name
+            keys[self.demand_key(name)] = name
+        values = cache.get_many(list(keys))
+        active = {portal}
+        for key, value in values.items():
+            if key.startswith(self.DEMAND_PREFIX) or any(expires > now for expires in value.values()):
+                active.add(keys[key])
+        return max(1, self.total_slots // len(active))
+
+    def _others_waiting(self, portal: str) -> bool:
+        others = [self.demand_key(name) for name in self.registry.names() if name != portal]
+        return bool(others and cache.get_many(others))
+
+    def acquire(self, definition: PortalDefinition, task_id: str) -> bool:
+        """
+        Take a slot for a crawl of `definition`, if the caps allow it.
+
+        Args:
+            definition: The portal to crawl.
+            task_id: The crawl task id, holding the lease.
+
+        Returns:
+            bool: True if the crawl may start now, False if it must wait.
+        """
+        token = self._lock()
+        try:
+            now = time.time()
+            leases = self._leases(definition.name, now)
+            if task_id not in leases:
+                allowed = len(leases) < definition.max_concurrency
+                if allowed and self._others_waiting(definition.name):
+                    allowed = len(leases) < self.fair_share(definition.name)
+                if not allowed:
+                    # Let running crawls of other portals know a worker is wanted.
+                    cache.set(
+                        self.demand_key(definition.name), 1,
+                        timeout=settings.SCRAPE_SCHEDULER_RETRY_DELAY * 3
+                    )
+                    logger.info(
+                        f"Crawl {task_id} of {definition.name} deferred: {len(leases)} running."
+                    )
+                    return False
+
+            leases[task_id] = now + settings.SCRAPE_PORTAL_SLOT_LEASE
+            cache.set(self.slots_key(definition.name), leases, timeout=settings.SCRAPE_PORTAL_SLOT_LEASE)
+            cache.delete(self.demand_key(definition.name))
+            return True
+        finally:
+            self._unlock(token)
+
+    def renew(self, definition: PortalDefinition, task_id: str):
+        """
+        Extend the slot lease of a running crawl by `SCRAPE_PORTAL_SLOT_LEASE`.
+        """
+        token = self._lock()
+        try:
+            now = time.time()
+            leases = self._leases(definition.name, now)
+            if task_id not in leases:
+                # The crawl still runs, so it keeps counting against the caps.
+                logger.warning(f"Slot lease of crawl {task_id} of {definition.name} expired while running.")
+            leases[task_id] = now + settings.SCRAPE_PORTAL_SLOT_LEASE
+            cache.set(self.slots_key(definition.name), leases, timeout=settings.SCRAPE_PORTAL_SLOT_LEASE)
+        finally:
+            self._unlock(token)
+
+    def heartbeat(self, definition: PortalDefinition, task_id: str) -> Callable[[], None]:
+        """
+        Return a callable for the crawl loop that keeps the slot lease alive.
+
+        It may be called after every page: the lease is only renewed once a
+        third of it has passed.
+        """
+        interval = settings.SCRAPE_PORTAL_SLOT_LEASE / 3
+        renewed_at = time.monotonic()
+
+        def beat():
+            nonlocal renewed_at
+            if time.monotonic() - renewed_at >= interval:
+                self.renew(definition, task_id)
+                renewed_at = time.monotonic()
+
+        return beat
+
+    def release(self, definition: PortalDefinition, task_id: str):
+        """
+        Release the slot held by a finished crawl.
+        """
+        token = self._lock()
+        try:
+            leases = self._leases(definition.name, time.time())
+            if leases.pop(task_id, None) is not None:
+                cache.set(self.slots_key(definition.name), leases, timeout=settings.SCRAPE_PORTAL_SLOT_LEASE)
+        finally:
+            self._unlock(token)
+
+
+class RateLimiter:
+    """
+    Limits the page requests sent to a portal across all workers.
+
+    Requests are counted in fixed windows in the shared cache; once a window
+    is used up, callers sleep until the next one starts.
+    """
+
+    KEY_PREFIX = "scraper:rate"
+
+    def __init__(self, portal: str, requests_per_second: float):
+        self.portal = portal
+        # Below one request per second, a window lasts long enough to hold one.
+        self.window = max(1.0, 1.0 / requests_per_second)
+        self.allowance = max(1, round(requests_per_second * self.window))
+
+    def wait(self):
+        """
+        Block until a request to the portal is allowed.
+        """
+        while True:
+            now = time.time()
+            window = int(now // self.window)
+            key = f"{self.KEY_PREFIX}:{self.portal}:{window}"
+            cache.add(key, 0, timeout=int(self.window) + 1)
+            try:
+                if cache.incr(key) <= self.allowance:
+                    return
+            except ValueError:
+                # The window expired between add and incr: count in a new one.
+                continue
+            time.sleep((window + 1) * self.window - now)
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from scraper.locks import acquire, compare_and_delete, holder
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    De-duplicates concurrent scrape triggers for the same crawl.
+
+    A crawl is identified by its portal, account and parameters. The first
+    trigger takes a lease on that key (an atomic `SET NX` with expiry, see
+    `scraper.locks`) and enqueues the task; later triggers get the task id of the
+    in-flight run back instead of enqueuing a new one. The lease expires on
+    its own, so a crashed worker can't block a crawl forever.
+
+    A crawl that completes is remembered with its completion time for
+    `SCRAPE_SINGLEFLIGHT_RECENT_TTL` seconds; each trigger decides with its
+    own `min_interval` whether that crawl is recent enough to reuse.
+    """
+
+    KEY_PREFIX = "scraper:singleflight"
+
+    def __init__(self, portal: str, username: str, parameters: Optional[Dict[str, Any]] = None):
+        payload = json.dumps([portal, username, parameters or {}], sort_keys=True)
+        self.key = hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def inflight_key(key: str) -> str:
+        return f"{SingleFlight.KEY_PREFIX}:inflight:{key}"
+
+    @staticmethod
+    def recent_key(key: str) -> str:
+        return f"{SingleFlight.KEY_PREFIX}:recent:{key}"
+
+    def run(
+        self, enqueue: Callable[[str], Any], min_interval: int = 0
+    ) -> Tuple[str, bool]:
+        """
+        Enqueue the crawl unless an identical one is in flight or finished recently.
+
+        Args:
+            enqueue: Called with a fresh task id when a new crawl must start.
+            min_interval: Reuse a crawl that completed less than this many
+                seconds ago instead of starting a new one.
+
+        Returns:
+            A tuple containing the task id and whether it was deduplicated.
+        """
+        if min_interval:
+            recent = cache.get(self.recent_key(self.key))
+            if recent:
+                recent_task_id, completed_at = recent
+                age = time.time() - completed_at
+                if age < min_interval:
+                    logger.info(f"Reusing crawl {recent_task_id} completed {age:.0f}s ago.")
+                    return recent_task_id, True
+
+        task_id = str(uuid.uuid4())
+        inflight_key = self.inflight_key(self.key)
+        while not acquire(inflight_key, task_id, timeout=settings.SCRAPE_SINGLEFLIGHT_LEASE):
+            inflight_task_id = holder(inflight_key)
+            if inflight_task_id:
+                logger.info(f"Crawl {inflight_task_id} is already in flight.")
+                return inflight_task_id, True
+            # The lease expired between both calls. Race for it again with an
+            # atomic add, so only one trigger becomes the leader.
+
+        try:
+            enqueue(task_id)
+        except Exception:
+            compare_and_delete(inflight_key, task_id)
+            raise
+        return task_id, False
+
+    @classmethod
+    def release(cls, key: str, task_id: str, completed: bool = False):
+        """
+        Release the lease held by a finished crawl.
+
+        Args:
+            key: The single-flight key the crawl was started with.
+            task_id: The id of the finished task.
+            completed: Whether the crawl completed, so later triggers may reuse it.
+        """
+        compare_and_delete(cls.inflight_key(key), task_id)
+        if completed:
+            cache.set(
+                cls.recent_key(key), (task_id, time.time()), timeout=settings.SCRAPE_SINGLEFLIGHT_RECENT_TTL
+            )
@@ -0,0 +1,171 @@
+import itertools
+import logging
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count
+
+from data.models import AuthorStat, Quote, Tag, TagPairStat, TagStat
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the statistics change, so cached responses go stale at once.
+VERSION_KEY = "stats:version"
+
+
+class StatsDelta:
+    """
+    Changes to the quote statistics made by a batch of saved or removed quotes.
+
+    Counts are accumulated in memory and applied at once by `apply`, so a
+    run only touches the rows of the authors, tags and tag pairs it changed.
+    """
+
+    def __init__(self):
+        self.authors: Counter = Counter()
+        self.tags: Counter = Counter()
+        self.pairs: Counter = Counter()
+
+    def __bool__(self) -> bool:
+        return any(any(counts.values()) for counts in (self.authors, self.tags, self.pairs))
+
+    def add(self, author: str, tag_ids: Iterable[int], sign: int = 1):
+        """
+        Count a quote in (sign=1) or out (sign=-1) of the statistics.
+        """
+        self.authors[author] += sign
+        if sign > 0:
+            self.retag((), tag_ids)
+        else:
+            self.retag(tag_ids, ())
+
+    def retag(self, old_tag_ids: Iterable[int], new_tag_ids: Iterable[int]):
+        """
+        Count a quote whose tags changed from `old_tag_ids` to `new_tag_ids`.
+        """
+        for tag_ids, sign in ((sorted(set(old_tag_ids)), -1), (sorted(set(new_tag_ids)), 1)):
+            for tag_id in tag_ids:
+                self.tags[tag_id] += sign
+            for pair in itertools.combinations(tag_ids, 2):
+                self.pairs[pair] += sign
+
+    def apply(self):
+        """
+        Add the changes to the statistics tables and drop the rows left at zero.
+
+        Each table is updated with one upsert per changed row, so concurrent
+        runs add their deltas without overwriting each other.
+        """
+        if not self:
+            return
+        tables = (
+            (AuthorStat, ["author"], {(author,): delta for author, delta in self.authors.items()}),
+            (TagStat, ["tag_id"], {(tag_id,): delta for tag_id, delta in self.tags.items()}),
+            (TagPairStat, ["tag_id", "other_tag_id"], dict(self.pairs)),
+        )
+        with transaction.atomic():
+            for model, key_columns, deltas in tables:
+                _upsert(model, key_columns, [(key, delta) for key, delta in deltas.items() if delta])
+                # Only decremented rows can have dropped to zero.
+                if any(delta < 0 for delta in deltas.values()):
+                    model.objects.filter(quotes__lte=0).delete()
+            transaction.on_commit(invalidate)
+
+
+def _upsert(model, key_columns: List[str], rows: List[Tuple[Tuple[Any, ...], int]]):
+    """
+    Add `delta` to the `quotes` count of each `(key, delta)` row, inserting missing rows.
+    """
+    if not rows:
+        return
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = ", ".join(connection.ops.quote_name(column) for column in key_columns)
+    placeholders = ", ".join(["%s"] * (len(key_columns) + 1))
+    sql = (
+        f"INSERT INTO {table} ({columns}, quotes) VALUES ({placeholders}) "
+        f"ON CONFLICT ({columns}) DO UPDATE SET quotes = {table}.quotes + excluded.quotes"
+    )
+    # Sorted keys make concurrent runs lock the rows in the same order.
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(*key, delta) for key, delta in sorted(rows)])
+
+
+def rebuild():
+    """
+    Recompute every statistic from the corpus, replacing the maintained ones.
+    """
+    quote_tags = connection.ops.quote_name(Quote.tags.through._meta.db_table)
+    with transaction.atomic():
+        for model in (AuthorStat, TagStat, TagPairStat):
+            model.objects.all().delete()
+        AuthorStat.objects.bulk_create(
+            AuthorStat(author=row["author"], quotes=row["quotes"])
+            for row in Quote.objects.values("author").annotate(quotes=Count("*")).order_by()
+        )
+        TagStat.objects.bulk_create(
+            TagStat(tag_id=row["tag_id"], quotes=row["quotes"])
+            for row in Quote.tags.through.objects.values("tag_id").annotate(quotes=Count("*")).order_by()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {connection.ops.quote_name(TagPairStat._meta.db_table)} (tag_id, other_tag_id, quotes) "
+                f"SELECT a.tag_id, b.tag_id, COUNT(*) FROM {quote_tags} a "
+                f"INNER JOIN {quote_tags} b ON a.quote_id = b.quote_id AND a.tag_id < b.tag_id "
+                f"GROUP BY a.tag_id, b.tag_id"
+            )
+        transaction.on_commit(invalidate)
+    logger.info("Rebuilt the quote statistics from the corpus.")
+
+
+def invalidate():
+    cache.add(VERSION_KEY, 0, timeout=None)
+    cache.incr(VERSION_KEY)
+
+
+def cached(name: str, compute: Callable[[], Any]) -> Any:
+    """
+    Return the cached value of statistic `name`, computing it when stale.
+    """
+    key = f"stats:{cache.get(VERSION_KEY, 0)}:{name}"
+    return cache.get_or_set(key, compute, timeout=settings.STATS_CACHE_TIMEOUT)
+
+
+def tag_counts(limit: int) -> List[Dict[str, Any]]:
+    """
+    Returns:
+        The `limit` tags with the most quotes, with their quote counts.
+    """
+    def compute():
+        rows = TagStat.objects.order_by("-quotes", "tag__name").values("tag__name", "quotes")[:limit]
+        return [{"name": row["tag__name"], "quotes": row["quotes"]} for row in rows]
+    return cached(f"tags:{limit}", compute)
+
+
+def author_counts(limit: int) -> List[Dict[str, Any]]:
+    """
+    Returns:
+        The `limit` authors with the most quotes, with their quote counts.
+    """
+    def compute():
+        return list(AuthorStat.objects.order_by("-quotes", "author").values("author", "quotes")[:limit])
+    return cached(f"authors:{limit}", compute)
+
+
+def co_occurrence(tag: Tag, limit: int) -> List[Dict[str, Any]]:
+    """
+    Returns:
+        The `limit` tags most often found on the same quotes as `tag`, with
+        the number of quotes they share.
+    """
+    def compute():
+        pairs = TagPairStat.objects.filter(tag=tag).values_list("other_tag_id", "quotes").union(
+            TagPairStat.objects.filter(other_tag=tag).values_list("tag_id", "quotes"), all=True
+        )
+        counts = dict(pairs)
+        names = dict(Tag.objects.filter(id__in=counts).values_list("id", "name"))
+        rows = sorted(((names[tag_id], quotes) for tag_id, quotes in counts.items()), key=lambda row: (-row[1], row[0]))
+        return [{"name": name, "quotes": quotes} for name, quotes in rows[:limit]]
+    return cached(f"co-occurrence:{tag.pk}:{limit}", compute)
@@ -0,0 +1,9 @@
+# Imported here so that Celery's autodiscovery registers every task.
+from scraper.tasks.crawl import crawl_portal_task
+from scraper.tasks.history import compact_history_task, prune_history_task
+from scraper.tasks.persist import persist_run_task
+from scraper.tasks.scrape_quotes import scrape_quotes_task
+
+__all__ = (
+    'compact_history_task', 'crawl_portal_task', 'persist_run_task', 'prune_history_task', 'scrape_quotes_task',
+)
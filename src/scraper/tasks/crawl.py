@@ -0,0 +1,259 @@
+import logging
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from celery import shared_task
+from celery.exceptions import Ignore
+from django.conf import settings
+
+from scraper.budget import (CANCELLED_STATE, CrawlStoppedError, JobBudget,
+                            current_rss, is_cancelled)
+from scraper.frontier import make_frontier
+from scraper.jobs.crawl import CrawlJob
+from scraper.logs import EventLogger
+from scraper.monitoring import DRIFT_STATE, StructureDriftError
+from scraper.portals.registry import PortalDefinition, get_portal
+from scraper.progress import ProgressReporter
+from scraper.scheduler import PortalScheduler
+from scraper.singleflight import SingleFlight
+from scraper.tasks.persist import finish_crawl, persist_run_task
+from scraper.writer import persist_run
+
+logger = logging.getLogger(__name__)
+log = EventLogger(__name__)
+
+
+@shared_task(bind=True)
+def crawl_portal_task(
+    self,
+    portal: str,
+    username: str,
+    password: str,
+    flight_key: str = None,
+    crawl_id: str = None,
+    accounts: List[List[str]] = None,
+    budget: Dict[str, int] = None,
+):
+    """
+    Celery task to crawl a registered portal and save the scraped items.
+
+    Args:
+        portal: The name of the portal in the registry.
+        username: The portal username.
+        password: The portal password.
+        flight_key: The single-flight key the task was enqueued under, if any.
+        crawl_id: Tasks given the same crawl id share one frontier, so they
+            split the pages of a single crawl between them.
+        accounts: More [username, password] pairs whose sessions share the
+            page requests of the crawl.
+        budget: Limits of the job (`max_pages`, `max_seconds`, `max_bytes`),
+            lowering those of the settings.
+    """
+    definition = get_portal(portal)
+    frontier = make_frontier(crawl_id) if crawl_id else None
+    return run_crawl(
+        self,
+        definition,
+        lambda progress, job_budget: CrawlJob(
+            definition, username, password, progress=progress, frontier=frontier,
+            accounts=[tuple(account) for account in accounts or ()], budget=job_budget,
+        ),
+        flight_key,
+        budget,
+    )
+
+
+def run_crawl(
+    task,
+    definition: PortalDefinition,
+    make_job: Callable[[Optional[ProgressReporter], JobBudget], Any],
+    flight_key: str = None,
+    budget: Optional[Dict[str, int]] = None,
+) -> str:
+    """
+    Run a crawl task: take a scheduler slot, crawl, persist and report.
+
+    When the portal has no free slot, the task is retried later instead of
+    holding a worker. A task cancelled before it started ends without
+    crawling.
+
+    Args:
+        task: The bound Celery task.
+        definition: The portal to crawl.
+        make_job: Builds the crawl job for the progress reporter and budget.
+        flight_key: The single-flight key the task was enqueued under, if any.
+        budget: Limits of the job, lowering those of the settings.
+    """
+    task_id = task.request.id
+    if task_id and is_cancelled(task_id):
+        if flight_key:
+            SingleFlight.release(flight_key, task_id)
+        return _stopped(task, CANCELLED_STATE, {"reason": "Cancelled before it started", "quotes_scraped": 0})
+
+    scheduler = PortalScheduler()
+    # Tasks called directly (not through a worker) are not scheduled.
+    scheduled = bool(task_id and not task.request.called_directly)
+    if scheduled and not scheduler.acquire(definition, task_id):
+        raise task.retry(countdown=settings.SCRAPE_SCHEDULER_RETRY_DELAY, max_retries=None)
+
+    progress = ProgressReporter(task_id) if task_id else None
+    rss_at_start = current_rss()
+    state = "FAILURE"
+    # What the final progress snapshot reports: result, stop metadata or error.
+    outcome: Any = None
+    # In the single-writer mode, the write of the run, handed to the writer
+    # worker once the outcome of the crawl is known.
+    handoff: List[tuple] = []
+    try:
+        job = make_job(progress, JobBudget.for_task(task_id, budget))
+        if scheduled:
+            # Crawls outlasting SCRAPE_PORTAL_SLOT_LEASE keep their slot.
+            job.heartbeat = scheduler.heartbeat(definition, task_id)
+        outcome = _crawl_and_save(job, definition, progress, task_id, persist=partial(_persist, handoff=handoff))
+        state = "SUCCESS"
+        return outcome
+    except StructureDriftError as e:
+        # The items scraped before the breaker opened are saved; the task
+        # ends in the custom DRIFT state instead of SUCCESS.
+        state = DRIFT_STATE
+        outcome = {"reason": str(e), "quotes_scraped": len(e.items)}
+        return _stopped(task, DRIFT_STATE, outcome)
+    except CrawlStoppedError as e:
+        # Likewise for a crawl stopped by its budget or a cancellation.
+        state = e.state
+        outcome = {"reason": str(e), "quotes_scraped": len(e.items), **e.metrics}
+        return _stopped(task, e.state, outcome)
+    except Exception as e:
+        outcome = str(e)
+        raise
+    finally:
+        if task_id:
+            scheduler.release(definition, task_id)
+        # The pool process is replaced once its memory passes
+        # CELERY_WORKER_MAX_MEMORY_PER_CHILD, so a task leaking parse trees
+        # costs one process, not the worker.
+        retained = current_rss() - rss_at_start
+        if retained > settings.SCRAPE_TASK_RETAINED_MEMORY_WARNING:
+            logger.warning(f"Task {task_id} retained {retained // 1024} KiB of memory.")
+        if progress:
+            progress.metrics["memory_retained"] = retained
+        if handoff:
+            _hand_off(handoff[0], progress, state, outcome, flight_key)
+        else:
+            finish_crawl(progress, task_id, state, outcome, flight_key)
+
+
+def _hand_off(
+    write: tuple, progress: Optional[ProgressReporter], state: str, outcome: Any, flight_key: Optional[str]
+):
+    """
+    Send the run of a crawl to the writer worker, which finishes the crawl.
+
+    The crawl task doesn't wait for the write, as a task blocking on another
+    task can deadlock the workers. The writer reports the persisted items,
+    the run metrics and the final state under the crawl task id, and
+    releases the single-flight lease once the run is committed.
+    """
+    task_id = write[2]
+    if progress:
+        # The writer resumes from the latest snapshot.
+        progress.publish(force=True)
+    try:
+        persist_run_task.apply_async(
+            write, {"state": state, "outcome": outcome, "flight_key": flight_key}, ignore_result=True
+        )
+    except Exception as e:
+        log.error("run.handoff_failed", "Could not hand run of task %(task_id)s to the writer: %(error)s",
+                  task_id=task_id, error=e)
+        finish_crawl(progress, task_id, "FAILURE", str(e), flight_key)
+
+
+def _stopped(task, state: str, meta: Dict[str, Any]) -> str:
+    """
+    End a task stopped before the end of its crawl in the custom `state`.
+    """
+    if task.request.called_directly:
+        return f"Scraping stopped early: {meta['reason']}"
+    task.update_state(state=state, meta=meta)
+    raise Ignore()
+
+
+def _persist(
+    definition: PortalDefinition,
+    items: List[Any],
+    task_id: Optional[str] = None,
+    full_crawl: bool = False,
+    progress: Optional[ProgressReporter] = None,
+    handoff: Optional[List[tuple]] = None,
+) -> Dict[str, Any]:
+    """
+    Persist the valid items of a crawl as a new run, with `SCRAPE_WRITE_MODE`.
+
+    In the single-writer mode the run is written by the writer worker: it is
+    appended to `handoff`, for `run_crawl` to send once the outcome of the
+    crawl is known (see `_hand_off`), or sent right away without one.
+    """
+    if settings.SCRAPE_WRITE_MODE != "single-writer":
+        return persist_run(definition, items, task_id, full_crawl, progress)
+    write = (definition.name, [item.as_dict() for item in items], task_id, full_crawl)
+    if handoff is None:
+        persist_run_task.apply_async(write, ignore_result=True)
+    else:
+        handoff.append(write)
+    return {"quotes_queued": len(items)}
+
+
+def _crawl_and_save(
+    job: Any,
+    definition: PortalDefinition,
+    progress: Optional[ProgressReporter] = None,
+    task_id: Optional[str] = None,
+    persist: Callable[..., Dict[str, Any]] = _persist,
+) -> str:
+    """
+    Crawl the portal and persist the valid items.
+
+    Args:
+        job: The crawl job.
+        definition: The crawled portal.
+        progress: Reporter of the crawl progress, if any.
+        task_id: The crawl task, if any.
+        persist: Persists the valid items like `persist_run`, returning the
+            run metrics. Defaults to a new run written with `SCRAPE_WRITE_MODE`.
+    """
+    # Set when the crawl stopped early: breaker, budget or cancellation.
+    drift = None
+    try:
+        items = job.scrape()
+    except (StructureDriftError, CrawlStoppedError) as e:
+        drift, items = e, e.items
+
+    if not items:
+        if drift:
+            raise drift
+        logger.warning("No quotes were scraped.")
+        return "No quotes found to scrape."
+
+    # Validate the whole batch at once. The scraped items come from our own
+    # pipeline, so the DRF serializers are kept for the public API only.
+    valid_items, errors = definition.validate(items)
+    if errors:
+        validation = log.summary("run.validated", "%(invalid)s of %(items)s items failed validation",
+                                 portal=definition.name, items=len(items))
+        for index, item_errors in errors.items():
+            validation.add("invalid", example={"item": str(items[index]), "errors": item_errors})
+        validation.emit(logging.WARNING)
+
+    # Invalid items are still on the portal, so they must not be removed.
+    full_crawl = drift is None and not errors and job.complete is True
+    metrics = persist(definition, valid_items, task_id, full_crawl, progress)
+    metrics.update(quotes_scraped=len(items), validation_errors=len(errors))
+    log.info("run.saved", "Run metrics: %(metrics)s", portal=definition.name, task_id=task_id, metrics=metrics)
+    if progress:
+        progress.metrics.update(metrics)
+
+    if drift:
+        if isinstance(drift, CrawlStoppedError):
+            drift.metrics = metrics
+        raise drift
+    return f"Scraped {len(items)} quotes successfully."
@@ -0,0 +1,31 @@
+import logging
+from typing import Dict
+
+from celery import shared_task
+from django.conf import settings
+
+from data.history import compact_history, prune_history
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def prune_history_task() -> Dict[str, int]:
+    """
+    Celery task dropping the quote history of the runs older than
+    `SCRAPE_HISTORY_RETAIN_DAYS`.
+    """
+    result = prune_history(settings.SCRAPE_HISTORY_RETAIN_DAYS)
+    logger.info(f"Pruned the quote history: {result}")
+    return result
+
+
+@shared_task
+def compact_history_task() -> Dict[str, int]:
+    """
+    Celery task keeping the quote history of the runs older than
+    `SCRAPE_HISTORY_FULL_DAYS` at one run per day.
+    """
+    result = compact_history(settings.SCRAPE_HISTORY_FULL_DAYS)
+    logger.info(f"Compacted the quote history: {result}")
+    return result
@@ -0,0 +1,80 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from celery import shared_task
+
+from scraper.logs import EventLogger
+from scraper.portals.registry import get_portal
+from scraper.progress import ProgressReporter
+from scraper.singleflight import SingleFlight
+from scraper.writer import persist_run, writer
+
+logger = logging.getLogger(__name__)
+log = EventLogger(__name__)
+
+
+@shared_task
+def persist_run_task(
+    portal: str,
+    items: List[Dict[str, Any]],
+    task_id: str = None,
+    full_crawl: bool = False,
+    state: str = "SUCCESS",
+    outcome: Any = None,
+    flight_key: str = None,
+) -> Dict[str, Any]:
+    """
+    Celery task writing the items of a crawl through the process' single writer.
+
+    Routed to `SCRAPE_WRITER_QUEUE` in the single-writer mode, whose worker
+    runs the thread pool so concurrent tasks share one writer thread. Crawl
+    tasks don't wait for it: it finishes the crawl instead, publishing the
+    persisted items, the run metrics and the final state under the crawl
+    task id, and releasing the single-flight lease once the run committed.
+
+    Args:
+        portal: The name of the crawled portal.
+        items: The validated items, as JSON.
+        task_id: The crawl task.
+        full_crawl: Whether every page of the portal was crawled.
+        state: The state the crawl ended in, reported once the run is written.
+        outcome: The crawl result or stop metadata, completed with the run metrics.
+        flight_key: The single-flight key of the crawl, if any.
+
+    Returns:
+        The run metrics.
+    """
+    definition = get_portal(portal)
+    valid_items, errors = definition.validate(items)
+    if errors:
+        logger.error(f"{len(errors)} items of crawl {task_id} no longer validate.")
+    progress = ProgressReporter.resume(task_id) if task_id else None
+    try:
+        # Returns once the transaction holding the run committed.
+        metrics = writer.run(persist_run, definition, valid_items, task_id, full_crawl, progress)
+    except Exception as e:
+        finish_crawl(progress, task_id, "FAILURE", str(e), flight_key)
+        raise
+    log.info("run.written", "Run metrics: %(metrics)s", portal=portal, task_id=task_id, metrics=metrics)
+    if progress:
+        progress.metrics.update(metrics)
+    if isinstance(outcome, dict):
+        outcome.update(metrics)
+    finish_crawl(progress, task_id, state, outcome, flight_key)
+    return metrics
+
+
+def finish_crawl(
+    progress: Optional[ProgressReporter], task_id: Optional[str], state: str, outcome: Any, flight_key: Optional[str]
+):
+    """
+    Publish the final progress of a crawl and release its single-flight lease.
+
+    Only a crawl that completed (and whose run is committed) may be reused
+    by later triggers.
+    """
+    if progress:
+        progress.finish(state, outcome)
+    if flight_key:
+        SingleFlight.release(flight_key, task_id, completed=state == "SUCCESS")
+
@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from scraper.authentication import user_key
+
+
+class CachedJWTAuthenticationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="reader", password="password")
+        self.client = APIClient()
+
+    def get(self, token=None):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token or AccessToken.for_user(self.user)}")
+        return self.client.get(reverse("author-stats"))
+
+    def test_user_is_resolved_from_the_cache(self):
+        self.assertEqual(self.get().status_code, 200)
+
+        # The statistics are cached as well: the request runs no query.
+        with self.assertNumQueries(0):
+            response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_cached_user_has_no_password(self):
+        self.get()
+
+        self.assertNotIn("password", cache.get(user_key(self.user.pk)))
+
+    def test_deactivated_user_is_rejected(self):
+        token = AccessToken.for_user(self.user)
+        self.get(token)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.get(token).status_code, 401)
+
+    def test_deleted_user_is_rejected(self):
+        token = AccessToken.for_user(self.user)
+        self.get(token)
+
+        self.user.delete()
+
+        self.assertEqual(self.get(token).status_code, 401)
+
+    def test_password_change_drops_the_cached_user(self):
+        self.get()
+
+        self.user.set_password("new password")
+        self.user.save()
+
+        self.assertIsNone(cache.get(user_key(self.user.pk)))
+
+    @patch.object(api_settings, "CHECK_REVOKE_TOKEN", True)
+    def test_revoked_tokens_are_rejected(self):
+        token = AccessToken.for_user(self.user)
+        self.get(token)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(token).status_code, 200)
+
+        self.user.set_password("new password")
+        self.user.save()
+
+        self.assertEqual(self.get(token).status_code, 401)
+        self.assertEqual(self.get().status_code, 200)
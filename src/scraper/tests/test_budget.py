@@ -0,0 +1,123 @@
+from unittest.mock import MagicMock, patch
+
+from celery.exceptions import Ignore
+from celery.result import AsyncResult
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from data.models import Quote
+from scraper.budget import (BUDGET_STATE, CANCELLED_STATE, CrawlStoppedError,
+                            JobBudget, request_cancel)
+from scraper.items import QuoteItem
+from scraper.jobs.crawl import CrawlJob
+from scraper.portals.quotes import QUOTES_PORTAL
+from scraper.tasks.crawl import run_crawl
+from scraper.tasks.scrape_quotes import scrape_quotes_task
+from scraper.tests.test_portals import make_portal
+
+
+def make_items(count):
+    return [
+        QuoteItem(text=f"Quote {i}", author="Author", author_url="https://quotes.toscrape.com/author/A", tags=())
+        for i in range(count)
+    ]
+
+
+@override_settings(SCRAPE_CANCEL_CHECK_INTERVAL=0)
+class JobBudgetTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 0.0
+
+    def make_budget(self, **kwargs):
+        return JobBudget(clock=lambda: self.now, **kwargs)
+
+    def test_page_budget(self):
+        budget = self.make_budget(max_pages=2)
+
+        self.assertTrue(budget.check(1))
+        self.assertFalse(budget.check(2))
+        self.assertEqual(budget.state, BUDGET_STATE)
+        self.assertIn("2 pages", budget.stop_reason)
+
+    def test_time_and_download_budgets(self):
+        budget = self.make_budget(max_seconds=10)
+        self.now = 10
+        self.assertFalse(budget.check(0))
+
+        budget = self.make_budget(max_bytes=100)
+        budget.record_bytes(99)
+        self.assertTrue(budget.check(0))
+        budget.record_bytes(1)
+        self.assertFalse(budget.check(0))
+
+    @override_settings(SCRAPE_JOB_MAX_PAGES=10, SCRAPE_JOB_MAX_BYTES=None)
+    def test_requested_limits_only_lower_the_settings(self):
+        self.assertEqual(JobBudget.for_task(None, {"max_pages": 50}).max_pages, 10)
+        self.assertEqual(JobBudget.for_task(None, {"max_pages": 5}).max_pages, 5)
+        self.assertEqual(JobBudget.for_task(None, {"max_bytes": 100}).max_bytes, 100)
+        self.assertIsNone(JobBudget.for_task(None).max_bytes)
+
+    def test_cancellation(self):
+        budget = self.make_budget(task_id="task-1")
+        self.now = 1
+        self.assertTrue(budget.check(0))
+
+        request_cancel("task-1")
+        self.now = 2
+
+        self.assertFalse(budget.check(0))
+        self.assertEqual(budget.state, CANCELLED_STATE)
+
+    def test_crawl_stops_with_the_pages_scraped(self):
+        job = CrawlJob(make_portal("books"), "username", "password", budget=JobBudget(max_pages=3))
+        job.parser.parse_page.side_effect = lambda url: (make_items(1), f"{url}next/")
+
+        with self.assertRaises(CrawlStoppedError) as stopped:
+            job.scrape()
+
+        self.assertEqual(len(stopped.exception.items), 3)
+        self.assertEqual(job.pages_scraped, 3)
+        self.assertFalse(job.complete)
+
+
+@override_settings(SCRAPE_CANCEL_CHECK_INTERVAL=0)
+class StoppedTaskTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch("scraper.tasks.scrape_quotes.QuoteScraperJob")
+    def test_partial_results_are_saved(self, mock_scraper_job):
+        mock_scraper_job.return_value.scrape.side_effect = CrawlStoppedError(
+            "Cancelled", CANCELLED_STATE, make_items(2)
+        )
+
+        result = scrape_quotes_task("username", "password", budget={"max_pages": 1})
+
+        self.assertEqual(result, "Scraping stopped early: Cancelled")
+        self.assertEqual(Quote.objects.count(), 2)
+        self.assertEqual(mock_scraper_job.call_args.kwargs["budget"].max_pages, 1)
+
+    def test_state_reports_the_saved_quotes(self):
+        task = MagicMock()
+        task.request.id = "task-1"
+        task.request.called_directly = False
+        make_job = MagicMock()
+        make_job.return_value.scrape.side_effect = CrawlStoppedError("Page budget", BUDGET_STATE, make_items(2))
+
+        with self.assertRaises(Ignore):
+            run_crawl(task, QUOTES_PORTAL, make_job)
+
+        state, meta = task.update_state.call_args.kwargs.values()
+        self.assertEqual(state, BUDGET_STATE)
+        self.assertEqual(meta["quotes_scraped"], 2)
+        self.assertEqual(meta["quotes_inserted"], 2)
+
+    @patch("scraper.tasks.scrape_quotes.QuoteScraperJob")
+    def test_task_cancelled_before_it_started(self, mock_scraper_job):
+        request_cancel("task-1")
+
+        scrape_quotes_task.apply(args=("username", "password"), task_id="task-1")
+
+        self.assertEqual(AsyncResult("task-1").state, CANCELLED_STATE)
+        mock_scraper_job.assert_not_called()
@@ -0,0 +1,216 @@
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from data.models import Quote, QuoteChange, ScrapeRun
+from scraper.changes import changes_since, publish_changes
+from scraper.identity_cache import tag_ids
+from scraper.persistence import finish_run, save_quotes
+from scraper.portals.quotes import QUOTES_PORTAL
+from scraper.tasks.crawl import _crawl_and_save
+from scraper.validation import validate_quotes
+
+
+def scraped(*texts, author="John Lennon", tags=("life",)):
+    quotes, _ = validate_quotes([
+        {
+            "text": text,
+            "author": author,
+            "author_url": f"https://quotes.toscrape.com/author/{author.replace(' ', '-')}",
+            "tags": [{"name": tag, "url": f"https://quotes.toscrape.com/tag/{tag}/"} for tag in tags],
+        }
+        for text in texts
+    ])
+    return quotes
+
+
+class ChangesetTestCase(TestCase):
+    def setUp(self):
+        tag_ids.clear()
+
+    def tearDown(self):
+        tag_ids.clear()
+
+    def crawl(self, quotes, full_crawl=True):
+        run = ScrapeRun.objects.create(portal="quotes")
+        with self.captureOnCommitCallbacks(execute=True):
+            save_quotes(quotes, run=run)
+            finish_run(run, full_crawl)
+        run.refresh_from_db()
+        return run
+
+    def test_runs_record_inserts_updates_and_removals(self):
+        first = self.crawl(scraped("One", "Two", "Three"))
+        second = self.crawl(scraped("One", "Two", tags=("life", "love")))
+
+        self.assertEqual((first.inserted, first.updated, first.removed), (3, 0, 0))
+        self.assertEqual((second.inserted, second.updated, second.removed), (0, 2, 1))
+        self.assertEqual(Quote.objects.count(), 2)
+        self.assertEqual(Quote.objects.filter(tags__name="love").count(), 2)
+        removed = second.changes.get(kind=QuoteChange.REMOVED)
+        self.assertEqual(removed.fingerprint, Quote.make_fingerprint("John Lennon", "Three"))
+
+    def test_unchanged_quotes_record_nothing(self):
+        self.crawl(scraped("One", "Two"))
+        run = self.crawl(scraped("One", "Two"))
+
+        self.assertEqual(run.changes.count(), 0)
+        self.assertEqual(Quote.objects.filter(last_seen_run=run).count(), 2)
+
+    def test_partial_crawls_remove_nothing(self):
+        self.crawl(scraped("One", "Two"))
+        run = self.crawl(scraped("One"), full_crawl=False)
+
+        self.assertEqual(run.removed, 0)
+        self.assertEqual(Quote.objects.count(), 2)
+
+    def test_quotes_failing_to_save_are_not_removed(self):
+        self.crawl(scraped("One", "Two"))
+        two = Quote.objects.get(text="Two")
+        quotes = scraped("One") + scraped("Two", tags=("love",))
+
+        # Tag "love" can't be resolved, so saving "Two" fails.
+        with patch("scraper.persistence.resolve_tag_ids", return_value={"life": two.tags.get().pk}):
+            run = self.crawl(quotes)
+
+        self.assertEqual(run.removed, 0)
+        self.assertEqual(Quote.objects.get(text="Two").last_seen_run, run)
+
+    def test_overlapping_full_crawls_keep_each_others_quotes(self):
+        self.crawl(scraped("One", "Two"))
+        earlier = ScrapeRun.objects.create(portal="quotes")
+        later = ScrapeRun.objects.create(portal="quotes")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            save_quotes(scraped("One", "Two"), run=later)
+            # The earlier run saves last and missed "Two".
+            save_quotes(scraped("One"), run=earlier)
+            finish_run(earlier, full_crawl=True)
+            finish_run(later, full_crawl=True)
+
+        self.assertEqual(Quote.objects.count(), 2)
+        self.assertEqual(set(Quote.objects.values_list("last_seen_run", flat=True)), {later.pk})
+
+    def test_changes_since_collapse_to_the_net_change(self):
+        first = self.crawl(scraped("One", "Two"))
+        self.crawl(scraped("One", "Two", "Three"))
+        self.crawl(scraped("One", "Three", tags=("love",)))
+        self.crawl(scraped("One", "Three", "Four", tags=("love",)), full_crawl=False)
+        self.crawl(scraped("Three", tags=("love",)))
+
+        changes = changes_since(first.pk)
+
+        self.assertEqual(len(changes["runs"]), 4)
+        self.assertEqual(changes["until"], changes["runs"][-1])
+        # "Three" was inserted then updated, "Four" inserted then removed.
+        self.assertEqual([quote["text"] for quote in changes["inserted"]], ["Three"])
+        self.assertEqual(changes["inserted"][0]["tags"][0]["name"], "love")
+        self.assertEqual(changes["updated"], [])
+        self.assertCountEqual(
+            [change["fingerprint"] for change in changes["removed"]],
+            [Quote.make_fingerprint("John Lennon", text) for text in ("One", "Two")],
+        )
+
+    def test_unfinished_runs_are_not_served(self):
+        ScrapeRun.objects.create(portal="quotes")
+
+        self.assertEqual(changes_since(0)["runs"], [])
+
+    def test_runs_after_an_unfinished_one_are_held_back(self):
+        first = self.crawl(scraped("One"))
+        slow = ScrapeRun.objects.create(portal="quotes")
+        self.crawl(scraped("Two"))
+
+        changes = changes_since(0)
+        self.assertEqual((changes["runs"], changes["until"]), ([first.pk], first.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            save_quotes(scraped("Three"), run=slow)
+            finish_run(slow, full_crawl=False)
+        changes = changes_since(first.pk)
+        self.assertEqual(len(changes["runs"]), 2)
+        self.assertEqual({quote["text"] for quote in changes["inserted"]}, {"Two", "Three"})
+
+    def test_abandoned_runs_are_closed(self):
+        self.crawl(scraped("One", "Two"))
+        abandoned = ScrapeRun.objects.create(portal="quotes")
+        with self.captureOnCommitCallbacks(execute=True):
+            save_quotes(scraped("Three"), run=abandoned)
+        ScrapeRun.objects.filter(pk=abandoned.pk).update(started_at=ScrapeRun.abandoned_before() - timedelta(seconds=1))
+        run = self.crawl(scraped("One", "Two", "Three", "Four"))
+
+        changes = changes_since(abandoned.pk - 1)
+
+        self.assertEqual(changes["runs"], [abandoned.pk, run.pk])
+        self.assertEqual({quote["text"] for quote in changes["inserted"]}, {"Three", "Four"})
+        abandoned.refresh_from_db()
+        # Finished as a partial crawl: its changes are counted, nothing is removed.
+        self.assertIsNotNone(abandoned.finished_at)
+        self.assertFalse(abandoned.full_crawl)
+        self.assertEqual((abandoned.inserted, abandoned.removed), (1, 0))
+
+    def test_only_complete_crawls_are_full(self):
+        job = MagicMock()
+        job.scrape.return_value = [quote.as_dict() for quote in scraped("One")]
+        job.complete = False
+        self.crawl(scraped("One", "Two"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            _crawl_and_save(job, QUOTES_PORTAL, task_id="task-1")
+
+        run = ScrapeRun.objects.get(task_id="task-1")
+        self.assertFalse(run.full_crawl)
+        self.assertEqual(Quote.objects.count(), 2)
+
+    def test_crawls_with_invalid_items_are_not_full(self):
+        job = MagicMock()
+        job.scrape.return_value = [quote.as_dict() for quote in scraped("One")] + [{"text": "Two"}]
+        job.complete = True
+        self.crawl(scraped("One", "Two"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            _crawl_and_save(job, QUOTES_PORTAL, task_id="task-1")
+
+        self.assertFalse(ScrapeRun.objects.get(task_id="task-1").full_crawl)
+        self.assertEqual(Quote.objects.count(), 2)
+
+    @patch("redis.Redis")
+    def test_stream_is_opt_in(self, redis_client):
+        run = self.crawl(scraped("One"))
+
+        publish_changes(run)
+        redis_client.from_url.assert_not_called()
+
+        with override_settings(SCRAPE_CHANGES_STREAM="quote-changes"):
+            publish_changes(run)
+        pipe = redis_client.from_url.return_value.pipeline.return_value
+        self.assertEqual(pipe.xadd.call_count, 2)
+        self.assertEqual(pipe.xadd.call_args_list[0].args[1]["op"], "insert")
+        self.assertEqual(pipe.xadd.call_args_list[1].args[1]["op"], "run_finished")
+
+
+class ChangesViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="reader", password="password"))
+
+    def test_changes_since_a_run(self):
+        run = ScrapeRun.objects.create(portal="quotes")
+        with self.captureOnCommitCallbacks(execute=True):
+            save_quotes(scraped("One"), run=run)
+            finish_run(run, full_crawl=True)
+
+        response = self.client.get(reverse("quote-changes"), {"since": 0})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["until"], run.pk)
+        self.assertEqual(response.json()["inserted"][0]["text"], "One")
+
+    def test_invalid_since(self):
+        response = self.client.get(reverse("quote-changes"), {"since": "-1"})
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,109 @@
+import os
+import uuid
+from unittest import skipUnless
+
+import redis
+from django.test import SimpleTestCase
+
+from scraper.frontier import InMemoryFrontier, RedisFrontier
+
+
+def redis_available() -> bool:
+    try:
+        return redis.Redis.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379")).ping()
+    except redis.RedisError:
+        return False
+
+
+class FrontierContract:
+    """Behaviour shared by every frontier implementation."""
+
+    def make_frontier(self):
+        raise NotImplementedError
+
+    def expire_leases(self, frontier):
+        raise NotImplementedError
+
+    def test_pulls_by_priority_then_arrival(self):
+        frontier = self.make_frontier()
+        frontier.push(["/low-1", "/low-2"], priority=5)
+        frontier.push(["/high"], priority=0)
+
+        self.assertEqual(frontier.pull(10, lease=60), ["/high", "/low-1", "/low-2"])
+
+    def test_seen_urls_are_not_queued_again(self):
+        frontier = self.make_frontier()
+
+        self.assertEqual(frontier.push(["/a", "/b"]), 2)
+        frontier.ack(frontier.pull(10, lease=60))
+
+        self.assertEqual(frontier.push(["/a", "/c", "/c"]), 1)
+        self.assertEqual(frontier.pull(10, lease=60), ["/c"])
+
+    def test_batches_are_exclusive(self):
+        frontier = self.make_frontier()
+        frontier.push([f"/{i}" for i in range(5)])
+
+        first = frontier.pull(3, lease=60)
+        second = frontier.pull(3, lease=60)
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse(set(first) & set(second))
+        self.assertEqual(frontier.counts(), (0, 5))
+
+    def test_expired_leases_are_reissued(self):
+        frontier = self.make_frontier()
+        frontier.push(["/a", "/b"])
+        leased = frontier.pull(10, lease=60)
+        frontier.ack(["/a"])
+
+        self.expire_leases(frontier)
+
+        self.assertEqual(frontier.pull(10, lease=60), ["/b"])
+        self.assertEqual(leased, ["/a", "/b"])
+
+    def test_released_urls_are_queued_again(self):
+        frontier = self.make_frontier()
+        frontier.push(["/a", "/b"])
+        frontier.pull(10, lease=60)
+
+        frontier.release(["/b"])
+        frontier.ack(["/a"])
+
+        self.assertFalse(frontier.is_done())
+        frontier.ack(frontier.pull(10, lease=60))
+        self.assertTrue(frontier.is_done())
+
+
+class InMemoryFrontierTestCase(FrontierContract, SimpleTestCase):
+    def make_frontier(self):
+        self.now = 0.0
+        return InMemoryFrontier(clock=lambda: self.now)
+
+    def expire_leases(self, frontier):
+        self.now += 61
+
+
+@skipUnless(redis_available(), "Redis is not available")
+class RedisFrontierTestCase(FrontierContract, SimpleTestCase):
+    def setUp(self):
+        self.client = redis.Redis.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379"))
+        self.frontiers = []
+
+    def tearDown(self):
+        for frontier in self.frontiers:
+            self.client.delete(
+                frontier.queue_key, frontier.seen_key, frontier.leases_key,
+                frontier.priorities_key, frontier.sequence_key,
+            )
+
+    def make_frontier(self):
+        frontier = RedisFrontier(f"test:{uuid.uuid4().hex}", client=self.client)
+        self.frontiers.append(frontier)
+        return frontier
+
+    def expire_leases(self, frontier):
+        leases = self.client.zrange(frontier.leases_key, 0, -1)
+        if leases:
+            self.client.zadd(frontier.leases_key, {url: 0 for url in leases})
@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from data.history import (compact_history, prune_history, serialize_versions,
+                          versions_as_of)
+from data.models import QuoteRecord, QuoteVersion, ScrapeRun
+from scraper.identity_cache import tag_ids
+from scraper.persistence import finish_run, save_quotes
+from scraper.tests.test_changes import scraped
+
+NOW = datetime(2026, 6, 30, 12, tzinfo=timezone.utc)
+
+
+class HistoryTestCase(TestCase):
+    def setUp(self):
+        tag_ids.clear()
+
+    def tearDown(self):
+        tag_ids.clear()
+
+    def crawl(self, quotes, finished_at=None, full_crawl=True):
+        run = ScrapeRun.objects.create(portal="quotes")
+        with self.captureOnCommitCallbacks(execute=True):
+            save_quotes(quotes, run=run)
+            finish_run(run, full_crawl)
+        if finished_at:
+            ScrapeRun.objects.filter(pk=run.pk).update(finished_at=finished_at)
+        return run
+
+    def corpus(self, run):
+        return {quote["text"]: quote["tags"] for quote in serialize_versions(versions_as_of(run.pk))}
+
+    def test_only_changed_states_are_stored(self):
+        self.crawl(scraped("One", "Two"))
+        self.crawl(scraped("One", "Two"))
+        self.crawl(scraped("One", "Two", tags=("life", "love")))
+
+        self.assertEqual(QuoteRecord.objects.count(), 2)
+        self.assertEqual(QuoteVersion.objects.count(), 4)
+        self.assertEqual(QuoteVersion.objects.filter(until_run__isnull=True).count(), 2)
+
+    def test_quotes_saved_twice_by_a_run_keep_one_version(self):
+        run = ScrapeRun.objects.create(portal="quotes")
+        with self.captureOnCommitCallbacks(execute=True):
+            save_quotes(scraped("One"), run=run)
+            save_quotes(scraped("One", tags=("love",)), run=run)
+            finish_run(run, full_crawl=True)
+
+        version = QuoteVersion.objects.get()
+        self.assertEqual((version.run_id, version.until_run_id, version.tags), (run.pk, None, "love"))
+
+    def test_corpus_as_of_a_run(self):
+        first = self.crawl(scraped("One", "Two"))
+        second = self.crawl(scraped("One", tags=("life", "love")))
+        third = self.crawl(scraped("One", "Two", tags=("love",)))
+
+        self.assertEqual(self.corpus(first), {"One": ["life"], "Two": ["life"]})
+        self.assertEqual(self.corpus(second), {"One": ["life", "love"]})
+        self.assertEqual(self.corpus(third), {"One": ["love"], "Two": ["love"]})
+        (quote,) = [quote for quote in serialize_versions(versions_as_of(second.pk))]
+        self.assertEqual(quote["author"], "John Lennon")
+        self.assertEqual(quote["since_run"], second.pk)
+
+    def test_partial_crawls_remove_nothing(self):
+        first = self.crawl(scraped("One", "Two"))
+        second = self.crawl(scraped("One"), full_crawl=False)
+
+        self.assertEqual(self.corpus(second), self.corpus(first))
+
+    def test_compaction_keeps_the_last_run_of_each_day(self):
+        day = NOW - timedelta(days=60)
+        morning = self.crawl(scraped("One"), finished_at=day)
+        noon = self.crawl(scraped("One", tags=("love",)), finished_at=day + timedelta(hours=4))
+        evening = self.crawl(scraped("One", tags=("life", "love")), finished_at=day + timedelta(hours=8))
+        latest = self.crawl(scraped("One", tags=("life", "love")), finished_at=NOW)
+
+        result = compact_history(full_days=30, now=NOW)
+
+        self.assertEqual(result, {"runs_pruned": 2, "versions_deleted": 2, "records_deleted": 0})
+        self.assertEqual(
+            set(ScrapeRun.objects.filter(history_pruned=True).values_list("pk", flat=True)), {morning.pk, noon.pk}
+        )
+        self.assertEqual(self.corpus(evening), {"One": ["life", "love"]})
+        self.assertEqual(self.corpus(latest), {"One": ["life", "love"]})
+
+    def test_retention_drops_old_runs_and_removed_quotes(self):
+        self.crawl(scraped("One", "Two"), finished_at=NOW - timedelta(days=400))
+        latest = self.crawl(scraped("One"), finished_at=NOW - timedelta(days=500))
+
+        result = prune_history(retain_days=365, now=NOW)
+
+        # The latest run keeps its history, however old.
+        self.assertEqual(result, {"runs_pruned": 1, "versions_deleted": 2, "records_deleted": 1})
+        self.assertEqual(QuoteRecord.objects.get().text, "One")
+        self.assertEqual(self.corpus(latest), {"One": ["life"]})
+
+    def test_abandoned_runs_are_pruned(self):
+        first = self.crawl(scraped("One"))
+        abandoned = ScrapeRun.objects.create(portal="quotes")
+        with self.captureOnCommitCallbacks(execute=True):
+            save_quotes(scraped("One", tags=("love",)), run=abandoned)
+        ScrapeRun.objects.filter(pk=abandoned.pk).update(started_at=ScrapeRun.abandoned_before() - timedelta(seconds=1))
+        latest = self.crawl(scraped("One", tags=("life", "love")))
+
+        result = compact_history(full_days=30, now=NOW)
+
+        self.assertEqual(result, {"runs_pruned": 1, "versions_deleted": 1, "records_deleted": 0})
+        self.assertTrue(ScrapeRun.objects.get(pk=abandoned.pk).history_pruned)
+        self.assertEqual(self.corpus(first), {"One": ["life"]})
+        self.assertEqual(self.corpus(latest), {"One": ["life", "love"]})
+
+    def test_command(self):
+        self.crawl(scraped("One"), finished_at=NOW - timedelta(days=400))
+        self.crawl(scraped("One", tags=("love",)))
+        stdout = StringIO()
+
+        call_command("compact_history", stdout=stdout)
+
+        self.assertIn("Pruned 1 runs and compacted 0 runs: 1 versions and 0 quotes deleted.", stdout.getvalue())
+
+
+class QuoteHistoryViewTestCase(TestCase):
+    def setUp(self):
+        tag_ids.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username="reader", password="password"))
+        self.runs = []
+        for texts in (("One", "Two"), ("One",)):
+            run = ScrapeRun.objects.create(portal="quotes")
+            with self.captureOnCommitCallbacks(execute=True):
+                save_quotes(scraped(*texts), run=run)
+                finish_run(run, full_crawl=True)
+            self.runs.append(run)
+
+    def tearDown(self):
+        tag_ids.clear()
+
+    def test_corpus_as_of_a_run(self):
+        response = self.client.get(reverse("quote-history"), {"run": self.runs[0].pk, "limit": 1, "offset": 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 2)
+        self.assertEqual([quote["text"] for quote in response.json()["quotes"]], ["Two"])
+
+    def test_pruned_run(self):
+        ScrapeRun.objects.filter(pk=self.runs[0].pk).update(history_pruned=True)
+
+        response = self.client.get(reverse("quote-history"), {"run": self.runs[0].pk})
+
+        self.assertEqual(response.status_code, 410)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(reverse("quote-history")).status_code, 400)
+        self.assertEqual(self.client.get(reverse("quote-history"), {"run": 1, "limit": 0}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("quote-history"), {"run": 999}).status_code, 404)
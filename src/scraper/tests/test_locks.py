@@ -0,0 +1,37 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from scraper.locks import acquire, compare_and_delete, holder
+
+
+class LocalLeaseTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_lease_is_released_by_its_holder_only(self):
+        self.assertTrue(acquire("lease", "first", timeout=5))
+        self.assertFalse(acquire("lease", "second", timeout=5))
+
+        self.assertFalse(compare_and_delete("lease", "second"))
+        self.assertEqual(holder("lease"), "first")
+        self.assertTrue(compare_and_delete("lease", "first"))
+        self.assertIsNone(holder("lease"))
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
+    def test_shared_caches_need_the_lease_redis(self):
+        with self.assertRaises(ImproperlyConfigured):
+            acquire("lease", "first", timeout=5)
+
+
+@override_settings(SCRAPE_LOCK_REDIS_URL="redis://localhost:6379/1")
+class RedisLeaseTestCase(SimpleTestCase):
+    @patch("scraper.locks._client")
+    def test_leases_are_plain_strings(self, client):
+        acquire("lease", "token", timeout=1.5)
+        compare_and_delete("lease", "token")
+
+        client.return_value.set.assert_called_once_with("lease", "token", nx=True, px=1500)
+        self.assertEqual(client.return_value.eval.call_args.args[1:], (1, "lease", "token"))
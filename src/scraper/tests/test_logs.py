@@ -0,0 +1,84 @@
+import json
+import logging
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from scraper.logs import EventLogger, JSONFormatter
+
+
+@override_settings(SCRAPE_LOG_SAMPLE_RATES={}, SCRAPE_LOG_RATE_LIMITS={})
+class EventLoggerTestCase(SimpleTestCase):
+    def setUp(self):
+        self.log = EventLogger("scraper.tests.events")
+
+    def test_record_carries_the_event_and_fields(self):
+        with self.assertLogs("scraper.tests.events", "INFO") as logs:
+            self.log.info("page.scraped", "Scraped %(items)s items from %(url)s", items=3, url="/page/1/")
+
+        record = logs.records[0]
+        self.assertEqual(record.getMessage(), "Scraped 3 items from /page/1/")
+        self.assertEqual(record.event, "page.scraped")
+        self.assertEqual(record.fields, {"items": 3, "url": "/page/1/"})
+
+    def test_disabled_levels_are_not_formatted(self):
+        class Field:
+            formatted = False
+
+            def __str__(self):
+                Field.formatted = True
+                return "field"
+
+        with self.assertLogs("scraper.tests.events", "INFO"):
+            self.log.debug("quote.inserted", "Saving quote: %(text)s", text=Field())
+            self.log.info("marker", "Marker")
+
+        self.assertFalse(Field.formatted)
+
+    @override_settings(SCRAPE_LOG_SAMPLE_RATES={"page.scraped": 0.1})
+    def test_sampling(self):
+        with self.assertLogs("scraper.tests.events", "INFO") as logs:
+            for page in range(100):
+                self.log.info("page.scraped", "Scraped %(url)s", url=page)
+                self.log.info("run.saved", "Saved")
+
+        events = [record.event for record in logs.records]
+        self.assertEqual(events.count("page.scraped"), 10)
+        self.assertEqual(events.count("run.saved"), 100)
+
+    @override_settings(SCRAPE_LOG_RATE_LIMITS={"page.failed": 2})
+    def test_rate_limit_reports_the_dropped_records(self):
+        with patch("scraper.logs.time.monotonic", return_value=0.0) as monotonic:
+            with self.assertLogs("scraper.tests.events", "ERROR") as logs:
+                for _ in range(5):
+                    self.log.error("page.failed", "Failed")
+                monotonic.return_value = 1.0
+                self.log.error("page.failed", "Failed")
+
+        self.assertEqual(len(logs.records), 3)
+        self.assertEqual(logs.records[-1].fields, {"dropped": 3})
+
+    def test_summary(self):
+        summary = self.log.summary("crawl.finished", "Scraped %(items)s items", portal="quotes")
+        summary.add("failed_pages", example="/page/2/")
+        summary.add("failed_pages", example="/page/3/")
+
+        with self.assertLogs("scraper.tests.events", "INFO") as logs:
+            summary.emit(items=10)
+
+        fields = logs.records[0].fields
+        self.assertEqual(logs.records[0].getMessage(), "Scraped 10 items")
+        self.assertEqual(fields["failed_pages"], 2)
+        self.assertEqual(fields["examples"], {"failed_pages": ["/page/2/", "/page/3/"]})
+        self.assertEqual(fields["portal"], "quotes")
+
+    def test_json_formatter(self):
+        with self.assertLogs("scraper.tests.events", "INFO") as logs:
+            self.log.info("page.scraped", "Scraped %(items)s items", items=3)
+
+        payload = json.loads(JSONFormatter().format(logs.records[0]))
+
+        self.assertEqual(payload["event"], "page.scraped")
+        self.assertEqual(payload["message"], "Scraped 3 items")
+        self.assertEqual(payload["items"], 3)
+        self.assertEqual(payload["level"], logging.getLevelName(logging.INFO))
@@ -0,0 +1,147 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from data.models import Quote
+from scraper.items import QuoteItem
+from scraper.monitoring import StructureDriftError, YieldMonitor
+from scraper.tasks.scrape_quotes import scrape_quotes_task
+
+PORTAL = "https://quotes.toscrape.com"
+
+
+def make_items(count, author_url="https://quotes.toscrape.com/author/A", goodreads_url=None):
+    return [
+        QuoteItem(text=f"Quote {i}", author="Author", author_url=author_url, tags=(), goodreads_url=goodreads_url)
+        for i in range(count)
+    ]
+
+
+@override_settings(
+    SCRAPE_DRIFT_BASELINE_MIN_PAGES=3,
+    SCRAPE_DRIFT_MIN_YIELD_RATIO=0.5,
+    SCRAPE_DRIFT_TRIP_PAGES=2,
+    SCRAPE_HOST_FAILURE_THRESHOLD=3,
+)
+class YieldMonitorTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def warm_up(self, monitor, pages=3):
+        for page in range(pages):
+            monitor.record_page(f"{PORTAL}/page/{page}/", 10, make_items(10))
+
+    def test_healthy_pages_build_the_baseline(self):
+        monitor = YieldMonitor(PORTAL)
+        self.warm_up(monitor)
+
+        self.assertFalse(monitor.is_open)
+        baseline = YieldMonitor(PORTAL).baseline()
+        self.assertEqual(baseline["samples"], 3)
+        self.assertEqual(baseline["valid"], 10)
+        self.assertEqual(baseline["fill_rates"]["author_url"], 1.0)
+
+    def test_single_low_page_does_not_trip(self):
+        monitor = YieldMonitor(PORTAL)
+        self.warm_up(monitor)
+
+        monitor.record_page(f"{PORTAL}/page/4/", 10, make_items(2) + [None] * 8)
+        monitor.record_page(f"{PORTAL}/page/5/", 10, make_items(10))
+
+        self.assertFalse(monitor.is_open)
+
+    def test_collapsed_field_fill_rate_trips(self):
+        monitor = YieldMonitor(PORTAL)
+        self.warm_up(monitor)
+
+        for page in (4, 5):
+            monitor.record_page(f"{PORTAL}/page/{page}/", 10, make_items(10, author_url=""))
+
+        self.assertTrue(monitor.is_open)
+        self.assertIn("author_url", monitor.trip_reason)
+        # Collapsed pages don't feed the baseline.
+        self.assertEqual(monitor.baseline()["samples"], 3)
+
+    def test_sparse_optional_field_does_not_trip(self):
+        monitor = YieldMonitor(PORTAL)
+        for page in range(3):
+            monitor.record_page(f"{PORTAL}/page/{page}/", 10, make_items(10, goodreads_url="https://goodreads.com/a"))
+
+        for page in (4, 5):
+            monitor.record_page(f"{PORTAL}/page/{page}/", 10, make_items(10))
+
+        self.assertFalse(monitor.is_open)
+        self.assertLess(monitor.baseline()["fill_rates"]["goodreads_url"], 1.0)
+
+    @override_settings(SCRAPE_DRIFT_FIELD_MIN_RATIOS={"author_url": 0.1})
+    def test_field_ratio_overrides_the_default(self):
+        monitor = YieldMonitor(PORTAL)
+        self.warm_up(monitor)
+
+        for page in (4, 5):
+            monitor.record_page(f"{PORTAL}/page/{page}/", 10, make_items(8, author_url="") + make_items(2))
+
+        self.assertFalse(monitor.is_open)
+
+    def test_pages_without_valid_items_trip_without_baseline(self):
+        monitor = YieldMonitor(PORTAL)
+
+        monitor.record_page(f"{PORTAL}/page/1/", 10, [None] * 10)
+        monitor.record_page(f"{PORTAL}/page/2/", 0, [])
+
+        self.assertTrue(monitor.is_open)
+
+    def test_host_failures_are_shared_between_crawls(self):
+        first = YieldMonitor(PORTAL)
+        for _ in range(3):
+            first.record_fetch_failure(f"{PORTAL}/page/1/")
+        self.assertTrue(first.is_open)
+
+        second = YieldMonitor(PORTAL)
+        self.assertFalse(second.check_host(f"{PORTAL}/page/1/"))
+        self.assertTrue(second.is_open)
+
+    def test_host_failures_expiring_before_the_increment(self):
+        monitor = YieldMonitor(PORTAL)
+        incr = cache.incr
+
+        def expire_then_incr(key):
+            # The first increment finds the count gone, as if it just expired.
+            if incr_mock.call_count == 1:
+                cache.delete(key)
+            return incr(key)
+
+        with patch.object(cache, "incr", side_effect=expire_then_incr) as incr_mock:
+            monitor.record_fetch_failure(f"{PORTAL}/page/1/")
+
+        self.assertEqual(incr_mock.call_count, 2)
+        self.assertEqual(cache.get(YieldMonitor._host_key(f"{PORTAL}/page/1/")), 1)
+
+    def test_successful_fetch_resets_host_failures(self):
+        monitor = YieldMonitor(PORTAL)
+        for _ in range(2):
+            monitor.record_fetch_failure(f"{PORTAL}/page/1/")
+        monitor.record_page(f"{PORTAL}/page/1/", 10, make_items(10))
+        monitor.record_fetch_failure(f"{PORTAL}/page/2/")
+
+        self.assertTrue(monitor.check_host(f"{PORTAL}/page/3/"))
+
+
+class DriftTaskTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch("scraper.tasks.scrape_quotes.QuoteScraperJob")
+    def test_partial_results_are_saved(self, mock_scraper_job):
+        """
+        Quotes scraped before the breaker opened are persisted.
+        """
+        mock_scraper_job.return_value.scrape.side_effect = StructureDriftError(
+            "Structure drift", make_items(3)
+        )
+
+        result = scrape_quotes_task("username", "password")
+
+        self.assertEqual(result, "Scraping stopped early: Structure drift")
+        self.assertEqual(Quote.objects.count(), 3)
@@ -1,10 +1,15 @@
+import io
 import unittest
 from unittest.mock import MagicMock, patch
 
 from bs4 import BeautifulSoup
+from requests import Response
+from requests.exceptions import ChunkedEncodingError
 
 from scraper.auth.quote_scraper_auth import QuoteScraperAuth
+from scraper.parsers.lxml_quote_parser import LxmlQuoteParser
 from scraper.parsers.quote_parser import QuoteParser
+from scraper.parsers.streaming import PageTooLargeError, detect_charset
 
 
 class TestQuoteParser(unittest.TestCase):
@@ -55,6 +60,10 @@ class TestQuoteParser(unittest.TestCase):
         # Assertions for next page URL
         self.assertEqual(next_page_url, "https://quotes.toscrape.com/page/2/")
 
+        # The "life" tag is shared by both quotes
+        self.assertIs(quotes[0].tags[0], quotes[1].tags[1])
+        self.assertEqual(quotes[0].tags[0].url, "https://quotes.toscrape.com/tag/life/")
+
     @patch("scraper.parsers.quote_parser.QuoteParser.fetch_page")
     def test_parse_page_no_next(self, mock_fetch_page):
         # Mock the page content without a "Next" button
@@ -106,3 +115,126 @@ class TestQuoteParser(unittest.TestCase):
 
         # Assertions for next page URL
         self.assertEqual(next_page_url, "https://quotes.toscrape.com/page/2/")
+
+
+def make_response(body: bytes, content_type: str = "text/html") -> Response:
+    """
+    Build a streamed requests Response around an in-memory body.
+    """
+    response = Response()
+    response.status_code = 200
+    response.url = "https://quotes.toscrape.com/page/1/"
+    response.headers["Content-Type"] = content_type
+    response.raw = io.BytesIO(body)
+    return response
+
+
+class TestLxmlQuoteParser(unittest.TestCase):
+    HTML = '''
+    <html><head><meta charset="iso-8859-1"></head><body>
+    <div class="quote">
+        <span class="text">"Caf\xe9 life is what happens."</span>
+        <span>by <small class="author">John Lennon</small>
+            <a href="/author/John-Lennon">(about)</a>
+        </span>
+        <div class="tags">
+            <a class="tag" href="/tag/life/">life</a>
+            <a class="tag" href="/tag/plans/">plans</a>
+        </div>
+    </div>
+    <div class="quote">
+        <span class="text"></span>
+        <small class="author"></small>
+    </div>
+    <div class="quote">
+        <span class="text">The greatest glory in living lies in rising every time we fall.</span>
+        <span>by <small class="author">Nelson Mandela</small>
+            <a href="/author/Nelson-Mandela">(about)</a>
+        </span>
+        <div class="tags"><a class="tag" href="/tag/life/">life</a></div>
+    </div>
+    <ul class="pager"><li class="next"><a href="/page/2/">Next</a></li></ul>
+    </body></html>
+    '''.encode("iso-8859-1")
+
+    def setUp(self):
+        self.mock_auth = MagicMock(spec=QuoteScraperAuth)
+        self.mock_auth.base_url = "https://quotes.toscrape.com"
+        self.parser = LxmlQuoteParser(auth=self.mock_auth)
+        # Small chunks make sure quotes span several feeds.
+        self.parser.STREAM_CHUNK_SIZE = 64
+
+    def test_matches_beautifulsoup_parser(self):
+        pages = self.parser.iter_response(make_response(self.HTML))
+        quotes = []
+        try:
+            while True:
+                quotes.append(next(pages))
+        except StopIteration as stop:
+            next_page_url = stop.value
+
+        soup = BeautifulSoup(self.HTML, "html.parser", from_encoding="iso-8859-1")
+        expected = [
+            item
+            for item in map(QuoteParser(auth=self.mock_auth).parse_item, soup.find_all("div", class_="quote"))
+            if item
+        ]
+
+        self.assertEqual(quotes, expected)
+        self.assertEqual(quotes[0].text, '"Caf\xe9 life is what happens."')
+        self.assertIs(quotes[0].tags[0], quotes[1].tags[0])
+        self.assertEqual(next_page_url, "https://quotes.toscrape.com/page/2/")
+
+    @patch("scraper.parsers.lxml_quote_parser.time.sleep")
+    def test_broken_stream_is_fetched_again(self, mock_sleep):
+        broken = make_response(self.HTML)
+        chunks = [self.HTML[:700], ChunkedEncodingError("Connection broken")]
+
+        def iter_content(chunk_size):
+            for chunk in chunks:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+
+        broken.iter_content = iter_content
+        self.parser.open_page = MagicMock(side_effect=[broken, make_response(self.HTML)])
+
+        quotes, next_page_url = self.parser.parse_page("https://quotes.toscrape.com/page/1/")
+
+        self.assertEqual([quote.author for quote in quotes], ["John Lennon", "Nelson Mandela"])
+        self.assertEqual(next_page_url, "https://quotes.toscrape.com/page/2/")
+        self.assertEqual(self.parser.open_page.call_count, 2)
+
+    @patch("scraper.parsers.lxml_quote_parser.time.sleep")
+    def test_broken_stream_fails_the_page_once_retries_are_exhausted(self, mock_sleep):
+        def broken_response(url):
+            response = make_response(self.HTML)
+            response.iter_content = MagicMock(side_effect=ChunkedEncodingError("Connection broken"))
+            return response
+
+        self.parser.open_page = MagicMock(side_effect=broken_response)
+
+        with self.assertRaises(ChunkedEncodingError):
+            self.parser.parse_page("https://quotes.toscrape.com/page/1/")
+        self.assertEqual(self.parser.open_page.call_count, 4)
+
+    def test_page_too_large(self):
+        self.parser.MAX_PAGE_BYTES = 128
+
+        with self.assertRaises(PageTooLargeError):
+            list(self.parser.iter_response(make_response(self.HTML)))
+
+
+class TestDetectCharset(unittest.TestCase):
+    def test_header_charset_wins(self):
+        self.assertEqual(
+            detect_charset("text/html; charset=ISO-8859-1", b'<meta charset="utf-8">'),
+            "iso8859-1",
+        )
+
+    def test_meta_charset(self):
+        self.assertEqual(detect_charset("text/html", b'<meta charset="windows-1252">'), "cp1252")
+
+    def test_fallback_to_utf8(self):
+        self.assertEqual(detect_charset(None, b"<html>"), "utf-8")
+        self.assertEqual(detect_charset("text/html; charset=bogus", b"<html>"), "utf-8")
@@ -0,0 +1,114 @@
+import unittest
+from unittest.mock import patch
+
+from django.db import transaction
+from django.test import TestCase
+
+from data.models import Quote, Tag
+from scraper.identity_cache import IdentityCache, tag_ids
+from scraper.items import QuoteItem
+from scraper.persistence import save_quotes
+from scraper.validation import validate_quotes
+
+
+class TestIdentityCache(unittest.TestCase):
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = IdentityCache(maxsize=2)
+        cache.set_many({"a": 1, "b": 2})
+        cache.get_many(["a"])
+        cache.set_many({"c": 3})
+
+        found, missing = cache.get_many(["a", "b", "c"])
+
+        self.assertEqual(found, {"a": 1, "c": 3})
+        self.assertEqual(missing, ["b"])
+        self.assertEqual(cache.hit_rate(), 0.75)
+
+
+class SaveQuotesTestCase(TestCase):
+    def setUp(self):
+        tag_ids.clear()
+        self.quotes, _ = validate_quotes([
+            {
+                "text": f"Quote {i}",
+                "author": "John Lennon",
+                "author_url": "https://quotes.toscrape.com/author/John-Lennon",
+                "tags": [
+                    {"name": "life", "url": "https://quotes.toscrape.com/tag/life/"},
+                    {"name": "plans", "url": "https://quotes.toscrape.com/tag/plans/"},
+                ],
+            }
+            for i in range(3)
+        ])
+
+    def tearDown(self):
+        tag_ids.clear()
+
+    def test_tags_are_created_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            metrics = save_quotes(self.quotes)
+
+        self.assertEqual(metrics["quotes_saved"], 3)
+        self.assertEqual(Tag.objects.count(), 2)
+        self.assertEqual(Quote.objects.filter(tags__name="plans").count(), 3)
+        self.assertEqual(len(tag_ids), 2)
+
+    def test_database_error_fails_one_quote(self):
+        create = Quote.objects.create
+
+        def racing_create(**kwargs):
+            if kwargs["text"] == "Quote 1":
+                # Another writer inserted the quote since it was looked up.
+                create(**kwargs)
+            return create(**kwargs)
+
+        with transaction.atomic(), patch.object(Quote.objects, "create", side_effect=racing_create):
+            metrics = save_quotes(self.quotes)
+            # The surrounding transaction is still usable.
+            self.assertEqual(Quote.objects.count(), 2)
+
+        self.assertEqual((metrics["quotes_inserted"], metrics["quotes_failed"]), (2, 1))
+
+    def test_cached_tags_skip_the_lookup(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            save_quotes(self.quotes)
+
+        revised = [
+            QuoteItem(f"{quote.text} (revised)", quote.author, quote.author_url, quote.goodreads_url, quote.tags)
+            for quote in self.quotes
+        ]
+
+        # The existing quote lookup, one query per quote insert (in its own
+        # savepoint), one for all the tag associations and one upsert per
+        # statistics table (in a savepoint).
+        with self.assertNumQueries(16):
+            metrics = save_quotes(revised)
+
+        self.assertEqual(metrics["tag_cache_hit_rate"], 1.0)
+
+    def test_unchanged_quotes_are_not_written(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            save_quotes(self.quotes)
+
+        # The existing quote lookup and their tag associations.
+        with self.assertNumQueries(2):
+            metrics = save_quotes(self.quotes)
+
+        self.assertEqual(metrics["quotes_unchanged"], 3)
+        self.assertEqual(Quote.objects.count(), 3)
+
+    def test_existing_tags_are_reused(self):
+        Tag.objects.create(name="life", url="https://quotes.toscrape.com/tag/life/")
+
+        metrics = save_quotes(self.quotes)
+
+        self.assertEqual(Tag.objects.count(), 2)
+        self.assertEqual(metrics["tag_cache_misses"], 2)
+
+    def test_deleted_tags_are_forgotten(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            save_quotes(self.quotes)
+
+        Tag.objects.get(name="life").delete()
+
+        self.assertEqual(tag_ids.get_many(["life"])[1], ["life"])
@@ -0,0 +1,226 @@
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from scraper.jobs.crawl import CrawlJob
+from scraper.portals.quotes import QUOTES_PORTAL
+from scraper.portals.registry import PortalDefinition, PortalRegistry, portals
+from scraper.scheduler import PortalScheduler, RateLimiter
+from scraper.tasks.crawl import run_crawl
+
+
+def make_portal(name, max_concurrency=1, **kwargs):
+    parser_class = MagicMock()
+    defaults = dict(
+        name=name,
+        base_url=f"https://{name}.example.com",
+        auth_class=MagicMock(),
+        parser_classes={"default": parser_class},
+        start_urls=(f"https://{name}.example.com/a/", f"https://{name}.example.com/b/"),
+        validate=lambda items: (items, {}),
+        save=lambda items, progress=None: {"saved": len(items)},
+        max_concurrency=max_concurrency,
+    )
+    defaults.update(kwargs)
+    return PortalDefinition(**defaults)
+
+
+class PortalRegistryTestCase(TestCase):
+    def test_quotes_portal_is_registered_at_startup(self):
+        self.assertIs(portals.get("quotes"), QUOTES_PORTAL)
+
+    def test_duplicate_names_are_rejected(self):
+        registry = PortalRegistry()
+        registry.register(make_portal("books"))
+
+        with self.assertRaises(ValueError):
+            registry.register(make_portal("books"))
+
+    def test_unknown_portal(self):
+        with self.assertRaises(KeyError):
+            PortalRegistry().get("unknown")
+
+
+@override_settings(SCRAPE_WORKER_SLOTS=4)
+class PortalSchedulerTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.registry = PortalRegistry()
+        self.big = self.registry.register(make_portal("big", max_concurrency=10))
+        self.small = self.registry.register(make_portal("small", max_concurrency=2))
+        self.scheduler = PortalScheduler(self.registry)
+
+    def test_concurrency_cap(self):
+        self.assertTrue(self.scheduler.acquire(self.small, "task-1"))
+        self.assertTrue(self.scheduler.acquire(self.small, "task-2"))
+        self.assertFalse(self.scheduler.acquire(self.small, "task-3"))
+
+        self.scheduler.release(self.small, "task-1")
+
+        self.assertTrue(self.scheduler.acquire(self.small, "task-3"))
+
+    def test_portal_alone_uses_every_slot(self):
+        for i in range(6):
+            self.assertTrue(self.scheduler.acquire(self.big, f"big-{i}"))
+
+    def test_big_portal_yields_to_waiting_portals(self):
+        self.assertTrue(self.scheduler.acquire(self.small, "small-1"))
+        self.assertTrue(self.scheduler.acquire(self.small, "small-2"))
+        for i in range(3):
+            self.assertTrue(self.scheduler.acquire(self.big, f"big-{i}"))
+        # The small portal is at its cap and registers its demand.
+        self.assertFalse(self.scheduler.acquire(self.small, "small-3"))
+
+        # The big portal is over its share of the 4 slots (2 each).
+        self.assertFalse(self.scheduler.acquire(self.big, "big-3"))
+        self.assertEqual(self.scheduler.running("big"), 3)
+
+    def test_expired_leases_are_dropped(self):
+        with override_settings(SCRAPE_PORTAL_SLOT_LEASE=-1):
+            self.assertTrue(self.scheduler.acquire(self.small, "task-1"))
+            self.assertTrue(self.scheduler.acquire(self.small, "task-2"))
+
+        self.assertEqual(self.scheduler.running("small"), 0)
+
+    def test_renewed_lease_outlives_its_first_expiry(self):
+        with override_settings(SCRAPE_PORTAL_SLOT_LEASE=-1):
+            self.assertTrue(self.scheduler.acquire(self.small, "task-1"))
+        self.assertEqual(self.scheduler.running("small"), 0)
+
+        self.scheduler.renew(self.small, "task-1")
+
+        self.assertEqual(self.scheduler.running("small"), 1)
+
+    @override_settings(SCRAPE_PORTAL_SLOT_LEASE=30)
+    @patch("scraper.scheduler.time.monotonic")
+    def test_heartbeat_renews_once_a_third_of_the_lease_passed(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        beat = self.scheduler.heartbeat(self.small, "task-1")
+
+        with patch.object(self.scheduler, "renew") as renew:
+            mock_monotonic.return_value = 105.0
+            beat()
+            renew.assert_not_called()
+            mock_monotonic.return_value = 110.0
+            beat()
+            beat()
+            renew.assert_called_once_with(self.small, "task-1")
+
+    def test_unlock_keeps_a_lock_taken_by_another_holder(self):
+        token = self.scheduler._lock()
+        # The lock expired and another worker took it.
+        cache.set(PortalScheduler.LOCK_KEY, "other", timeout=5)
+
+        self.scheduler._unlock(token)
+
+        self.assertEqual(cache.get(PortalScheduler.LOCK_KEY), "other")
+
+
+class RateLimiterTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch("scraper.scheduler.time")
+    def test_waits_for_the_next_window(self, mock_time):
+        mock_time.time.side_effect = [100.0, 100.2, 100.4, 101.0]
+        limiter = RateLimiter("books", requests_per_second=2)
+
+        limiter.wait()
+        limiter.wait()
+        mock_time.sleep.assert_not_called()
+
+        limiter.wait()
+        mock_time.sleep.assert_called_once()
+        self.assertAlmostEqual(mock_time.sleep.call_args[0][0], 0.6)
+
+    def test_window_expiring_before_the_increment(self):
+        limiter = RateLimiter("books", requests_per_second=2)
+        incr = cache.incr
+
+        def expire_then_incr(key):
+            # The first increment finds the window gone, as if it just expired.
+            if incr_mock.call_count == 1:
+                cache.delete(key)
+            return incr(key)
+
+        with patch.object(cache, "incr", side_effect=expire_then_incr) as incr_mock:
+            limiter.wait()
+
+        self.assertEqual(incr_mock.call_count, 2)
+
+    def test_slow_rates_use_longer_windows(self):
+        limiter = RateLimiter("books", requests_per_second=0.2)
+
+        self.assertEqual(limiter.window, 5)
+        self.assertEqual(limiter.allowance, 1)
+
+
+class CrawlJobTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_crawls_every_start_url(self):
+        portal = make_portal("books")
+        parser = portal.parser_classes["default"].return_value
+        pages = {
+            "https://books.example.com/a/": (["a1"], "https://books.example.com/a/2/"),
+            "https://books.example.com/a/2/": (["a2"], None),
+            "https://books.example.com/b/": (["b1"], None),
+        }
+        parser.parse_page.side_effect = lambda url: pages[url]
+
+        job = CrawlJob(portal, "username", "password")
+
+        self.assertCountEqual(job.scrape(), ["a1", "a2", "b1"])
+        portal.auth_class.assert_called_once_with("https://books.example.com")
+        self.assertIs(parser.monitor, job.monitor)
+
+    def test_rate_limited_portal(self):
+        portal = make_portal("books", requests_per_second=3)
+
+        job = CrawlJob(portal, "username", "password")
+
+        self.assertEqual(job.parser.rate_limiter.allowance, 3)
+
+
+class RunCrawlTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def make_task(self, task_id):
+        task = MagicMock()
+        task.request.id = task_id
+        task.request.called_directly = False
+        task.retry.return_value = RuntimeError("retry")
+        return task
+
+    def test_deferred_when_portal_is_busy(self):
+        scheduler = PortalScheduler()
+        for i in range(QUOTES_PORTAL.max_concurrency):
+            scheduler.acquire(QUOTES_PORTAL, f"running-{i}")
+        make_job = MagicMock()
+
+        task = self.make_task("waiting")
+        with self.assertRaisesMessage(RuntimeError, "retry"):
+            run_crawl(task, QUOTES_PORTAL, make_job)
+
+        make_job.assert_not_called()
+
+    def test_slot_is_released_after_the_crawl(self):
+        make_job = MagicMock()
+        make_job.return_value.scrape.return_value = []
+
+        result = run_crawl(self.make_task("task-1"), QUOTES_PORTAL, make_job)
+
+        self.assertEqual(result, "No quotes found to scrape.")
+        self.assertEqual(PortalScheduler().running("quotes"), 0)
+
+    def test_crawl_renews_its_slot(self):
+        make_job = MagicMock()
+        make_job.return_value.scrape.return_value = []
+
+        run_crawl(self.make_task("task-1"), QUOTES_PORTAL, make_job)
+
+        # run_crawl installed the lease heartbeat in place of the mock attribute.
+        self.assertNotIsInstance(make_job.return_value.heartbeat, MagicMock)
@@ -0,0 +1,180 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from scraper.progress import ProgressReporter
+from scraper.tasks.scrape_quotes import scrape_quotes_task
+from scraper.views import ScrapeEventsView
+
+
+async def read_stream(events) -> str:
+    return "".join([part async for part in events])
+
+
+@override_settings(SCRAPE_PROGRESS_INTERVAL=60, SCRAPE_PROGRESS_POLL_INTERVAL=0.01)
+class ProgressReporterTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_publishing_is_throttled(self):
+        progress = ProgressReporter("task-1", total_pages=4)
+
+        progress.page_done(10)
+        progress.page_done(10)
+
+        snapshot = ProgressReporter.get("task-1")
+        self.assertEqual(snapshot["version"], 1)
+        self.assertEqual(snapshot["items_scraped"], 10)
+
+        progress.finish("SUCCESS")
+
+        snapshot = ProgressReporter.get("task-1")
+        self.assertEqual(snapshot["version"], 2)
+        self.assertEqual(snapshot["items_scraped"], 20)
+        self.assertEqual(snapshot["pages_done"], 2)
+        self.assertIsNotNone(snapshot["eta"])
+        self.assertTrue(snapshot["finished"])
+
+    def test_wait_returns_on_timeout(self):
+        self.assertIsNone(ProgressReporter.wait("unknown", since=0, timeout=0.05))
+
+    @override_settings(SCRAPE_PROGRESS_REDIS_URL="redis://localhost:6379/1")
+    @patch("scraper.progress._client")
+    def test_snapshots_are_pushed_to_subscribers(self, mock_client):
+        ProgressReporter("task-6").finish("SUCCESS", "Scraped 10 quotes successfully.")
+        channel, payload = mock_client.return_value.publish.call_args.args
+        pubsub = mock_client.return_value.pubsub.return_value
+        pubsub.get_message.return_value = {"data": payload}
+        cache.clear()
+
+        snapshot = ProgressReporter.wait("task-6", since=0, timeout=5)
+
+        self.assertEqual(channel, ProgressReporter.channel("task-6"))
+        pubsub.subscribe.assert_called_once_with(channel)
+        self.assertEqual(snapshot["result"], "Scraped 10 quotes successfully.")
+        pubsub.close.assert_called_once()
+
+    @override_settings(SCRAPE_PROGRESS_REDIS_URL="redis://localhost:6379/1")
+    @patch("redis.asyncio.Redis.from_url")
+    def test_updates_are_pushed_to_event_streams(self, mock_from_url):
+        progress = ProgressReporter("task-9")
+        progress.version = 1
+        client = mock_from_url.return_value
+        client.close = AsyncMock()
+        pubsub = client.pubsub.return_value
+        pubsub.subscribe = pubsub.reset = AsyncMock()
+        # The subscription is confirmed first, then the final snapshot arrives.
+        pubsub.get_message = AsyncMock(side_effect=[None, {"data": json.dumps(progress.snapshot("SUCCESS"))}])
+
+        async def collect():
+            return [snapshot async for snapshot in ProgressReporter.updates("task-9", 0, timeout=5, keepalive=5)]
+
+        snapshots = async_to_sync(collect)()
+
+        self.assertEqual([snapshot["state"] for snapshot in snapshots], ["SUCCESS"])
+        client.close.assert_awaited_once()
+
+    def test_blocking_stream_keeps_the_client_alive(self):
+        progress = ProgressReporter("task-10")
+        progress.version = 1
+
+        with patch.object(ProgressReporter, "wait", side_effect=[None, progress.snapshot("SUCCESS")]):
+            snapshots = list(ProgressReporter.stream("task-10", 0, timeout=5, keepalive=0.01))
+
+        self.assertEqual(snapshots[0], None)
+        self.assertEqual(snapshots[1]["state"], "SUCCESS")
+        self.assertEqual(len(snapshots), 2)
+
+    @patch("scraper.tasks.scrape_quotes.QuoteScraperJob")
+    def test_task_publishes_final_snapshot(self, mock_scraper_job):
+        mock_scraper_job.return_value.scrape.return_value = []
+
+        scrape_quotes_task.apply(args=("username", "password"), task_id="task-2")
+
+        self.assertEqual(ProgressReporter.get("task-2")["state"], "SUCCESS")
+        self.assertEqual(ProgressReporter.get("task-2")["result"], "No quotes found to scrape.")
+
+
+@override_settings(SCRAPE_PROGRESS_POLL_INTERVAL=0.01, SCRAPE_PROGRESS_MAX_WAIT=0.05)
+class ProgressEndpointsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="reader", password="password")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_status_long_poll_includes_progress(self):
+        progress = ProgressReporter("task-3")
+        progress.page_done(10)
+
+        response = self.client.get(
+            reverse("scrape-status", args=["task-3"]), {"wait": 1, "since": 0}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "PROGRESS")
+        self.assertEqual(response.json()["progress"]["items_scraped"], 10)
+
+    @patch("scraper.views.AsyncResult")
+    def test_status_of_a_finished_task_comes_from_its_progress(self, mock_async_result):
+        ProgressReporter("task-7").finish("SUCCESS", "Scraped 10 quotes successfully.")
+
+        response = self.client.get(reverse("scrape-status", args=["task-7"]))
+
+        self.assertEqual(response.json()["status"], "SUCCESS")
+        self.assertEqual(response.json()["result"], "Scraped 10 quotes successfully.")
+        mock_async_result.assert_not_called()
+
+    @patch("scraper.views.AsyncResult")
+    def test_status_without_progress_asks_the_result_backend(self, mock_async_result):
+        mock_async_result.return_value = MagicMock(state="FAILURE", info=ValueError("Login failed"))
+
+        response = self.client.get(reverse("scrape-status", args=["task-8"]))
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()["error"], "Login failed")
+
+    def test_event_stream(self):
+        progress = ProgressReporter("task-4")
+        progress.page_done(10)
+        progress.finish("SUCCESS")
+
+        response = self.client.get(
+            reverse("scrape-events", args=["task-4"]), HTTP_ACCEPT="text/event-stream"
+        )
+        # Served over WSGI: a blocking iterator, sent event by event.
+        self.assertFalse(response.is_async)
+        body = b"".join(response.streaming_content).decode()
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = [line for line in body.split("\n") if line.startswith("data: ")]
+        self.assertEqual(len(events), 1)
+        self.assertTrue(json.loads(events[0][len("data: "):])["finished"])
+
+    def test_event_stream_resumes_from_last_event_id(self):
+        progress = ProgressReporter("task-5")
+        progress.finish("SUCCESS")
+
+        response = self.client.get(
+            reverse("scrape-events", args=["task-5"]),
+            HTTP_ACCEPT="text/event-stream",
+            HTTP_LAST_EVENT_ID="1",
+        )
+        body = b"".join(response.streaming_content).decode()
+
+        self.assertNotIn("data: ", body)
+
+    def test_async_event_stream(self):
+        progress = ProgressReporter("task-6")
+        progress.finish("SUCCESS")
+
+        body = async_to_sync(read_stream)(ScrapeEventsView.stream_events("task-6", 0))
+
+        events = [line for line in body.split("\n") if line.startswith("data: ")]
+        self.assertEqual(len(events), 1)
@@ -0,0 +1,148 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase, override_settings
+from requests import Session
+
+from scraper.auth.session_pool import SessionPool
+from scraper.proxies import NoProxyAvailableError, ProxyPool
+
+
+class StandInProxy:
+    """
+    Local HTTP proxy answering every request itself.
+
+    `status` and `delay` set how it answers; the body names the proxy, so
+    tests can tell which one a request went through.
+    """
+
+    def __init__(self, name, status=200, delay=0.0):
+        self.name = name
+        self.status = status
+        self.delay = delay
+        self.requests = []
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                proxy.requests.append(self.path)
+                time.sleep(proxy.delay)
+                body = f"via {proxy.name}".encode()
+                self.send_response(proxy.status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StandInAuth:
+    """Auth whose login always succeeds, with a real requests session."""
+
+    def __init__(self):
+        self.session = Session()
+        # Only the proxies of the pool apply, whatever the environment says.
+        self.session.trust_env = False
+
+    def login(self, username, password):
+        return True
+
+    def is_authenticated(self):
+        return True
+
+    def is_logged_out(self, response):
+        return False
+
+
+@override_settings(
+    SCRAPE_PROXY_QUARANTINE_FAILURES=2,
+    SCRAPE_PROXY_QUARANTINE_SECONDS=60,
+    SCRAPE_PROXY_EWMA_ALPHA=0.5,
+)
+class ProxyPoolTestCase(SimpleTestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.pool = ProxyPool(["http://a", "http://b"], clock=lambda: self.now)
+
+    def test_prefers_fast_reliable_proxies(self):
+        self.pool.record("http://a", latency=2.0, ok=True)
+        self.pool.record("http://b", latency=0.2, ok=True)
+
+        self.assertEqual(self.pool.choose(), "http://b")
+
+        self.pool.record("http://b", latency=0.2, ok=False)
+        self.pool.record("http://b", latency=0.2, ok=True)
+        self.pool.record("http://b", latency=0.2, ok=False)
+        self.pool.record("http://b", latency=0.2, ok=True)
+        self.assertEqual(self.pool.metrics()[0]["proxy"], "http://b")
+
+    def test_failing_proxy_is_quarantined(self):
+        self.pool.record("http://a", latency=0.1, ok=False)
+        self.assertTrue(self.pool.is_available("http://a"))
+        self.pool.record("http://a", latency=0.1, ok=False)
+
+        self.assertFalse(self.pool.is_available("http://a"))
+        self.assertEqual(self.pool.choose(), "http://b")
+
+        self.now = 61
+        self.assertTrue(self.pool.is_available("http://a"))
+
+    def test_every_proxy_quarantined(self):
+        for proxy in ("http://a", "http://b"):
+            self.pool.record(proxy, latency=0.1, ok=False)
+            self.pool.record(proxy, latency=0.1, ok=False)
+
+        with self.assertRaises(NoProxyAvailableError):
+            self.pool.choose()
+
+    def test_sessions_spread_over_proxies(self):
+        first = self.pool.bind()
+        second = self.pool.bind()
+
+        self.assertNotEqual(first, second)
+
+        self.pool.unbind(first)
+        self.assertEqual(self.pool.bind(), first)
+
+
+@override_settings(
+    SCRAPE_PROXY_QUARANTINE_FAILURES=2,
+    SCRAPE_PROXY_QUARANTINE_SECONDS=60,
+    SCRAPE_SESSION_CHECK_INTERVAL=60,
+    SCRAPE_SESSION_MAX_REQUESTS=100,
+)
+class SessionPoolProxyTestCase(SimpleTestCase):
+    def setUp(self):
+        self.good = StandInProxy("good")
+        self.blocked = StandInProxy("blocked", status=429)
+        self.addCleanup(self.good.close)
+        self.addCleanup(self.blocked.close)
+
+    def test_sessions_stick_to_their_proxy_until_it_is_quarantined(self):
+        proxies = ProxyPool([self.blocked.url, self.good.url])
+        # Start on the blocked proxy.
+        proxies.record(self.good.url, latency=10.0, ok=True)
+        sessions = SessionPool(StandInAuth, [("user", "password")], proxies=proxies)
+        sessions.login()
+
+        bodies = [sessions.get("http://portal.test/page/").text for _ in range(4)]
+
+        self.assertEqual(bodies, ["via blocked", "via blocked", "via good", "via good"])
+        self.assertEqual(self.blocked.requests, ["http://portal.test/page/"] * 2)
+        self.assertFalse(proxies.is_available(self.blocked.url))
+        metrics = {entry["proxy"]: entry for entry in proxies.metrics()}
+        self.assertEqual(metrics[self.blocked.url]["failures"], 2)
+        self.assertEqual(metrics[self.good.url]["sessions"], 1)
+
+        sessions.close()
+        self.assertEqual(proxies.metrics()[0]["sessions"], 0)
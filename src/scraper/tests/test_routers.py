@@ -0,0 +1,157 @@
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.db.utils import OperationalError
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from data.models import Quote
+from scraper.middleware import ReplicaReadsMiddleware
+from scraper.progress import ProgressReporter
+from scraper.routers import (RUN_COOKIE, RUN_HEADER, ReadReplicaRouter,
+                             ReplicaHealth, replica_reads)
+
+
+@override_settings(DATABASE_REPLICA_ALIAS="replica")
+class ReadReplicaRouterTestCase(SimpleTestCase):
+    def setUp(self):
+        self.router = ReadReplicaRouter()
+
+    def test_reads_go_to_the_primary_by_default(self):
+        self.assertIsNone(self.router.db_for_read(Quote))
+
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Quote), "replica")
+            self.assertEqual(self.router.db_for_write(Quote), "default")
+
+        self.assertIsNone(self.router.db_for_read(Quote))
+
+    def test_migrations_skip_the_replica(self):
+        self.assertIsNone(self.router.allow_migrate("default", "data"))
+        self.assertFalse(self.router.allow_migrate("replica", "data"))
+
+
+@override_settings(DATABASE_REPLICA_ALIAS="replica", DATABASE_REPLICA_HEALTH_CHECK_INTERVAL=30)
+class ReplicaReadsMiddlewareTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = ReadReplicaRouter()
+        self.middleware = ReplicaReadsMiddleware(lambda request: self.router.db_for_read(Quote))
+        patcher = patch("scraper.middleware.replica_health")
+        self.health = patcher.start()
+        self.health.available.return_value = True
+        self.addCleanup(patcher.stop)
+
+    def test_safe_requests_read_from_the_replica(self):
+        self.assertEqual(self.middleware(self.factory.get("/api/quotes/")), "replica")
+        self.assertIsNone(self.middleware(self.factory.post("/api/scrape/")))
+
+    def test_only_api_requests_are_routed(self):
+        self.assertIsNone(self.middleware(self.factory.get("/admin/data/quote/")))
+
+    @patch("scraper.middleware.replicated")
+    def test_reads_stick_to_the_primary_until_the_run_is_replicated(self, replicated):
+        replicated.return_value = False
+        request = self.factory.get("/api/quotes/", headers={RUN_HEADER: "7"})
+
+        self.assertIsNone(self.middleware(request))
+        replicated.assert_called_once_with("replica", 7)
+
+        replicated.return_value = True
+        self.assertEqual(self.middleware(request), "replica")
+
+    @patch("scraper.middleware.replicated", return_value=False)
+    def test_run_cookie(self, replicated):
+        self.factory.cookies[RUN_COOKIE] = "7"
+
+        self.assertIsNone(self.middleware(self.factory.get("/api/quotes/")))
+        replicated.assert_called_once_with("replica", 7)
+
+    def test_unavailable_replica(self):
+        self.health.available.return_value = False
+
+        self.assertIsNone(self.middleware(self.factory.get("/api/quotes/")))
+
+    @override_settings(DATABASE_REPLICA_ALIAS=None)
+    def test_without_replica(self):
+        self.assertIsNone(self.middleware(self.factory.get("/api/quotes/")))
+        self.health.available.assert_not_called()
+
+
+@override_settings(DATABASE_REPLICA_HEALTH_CHECK_INTERVAL=30)
+class ReplicaHealthTestCase(SimpleTestCase):
+    @patch("scraper.routers.connections")
+    def test_checks_are_throttled(self, mock_connections):
+        cursor = mock_connections.__getitem__.return_value.cursor.return_value.__enter__.return_value
+        cursor.execute.side_effect = OperationalError("unable to open database file")
+        clock = MagicMock(return_value=0.0)
+        health = ReplicaHealth(clock)
+
+        with self.assertLogs("scraper.routers", "WARNING"):
+            self.assertFalse(health.available("replica"))
+        cursor.execute.side_effect = None
+        clock.return_value = 10.0
+        self.assertFalse(health.available("replica"))
+        clock.return_value = 31.0
+        self.assertTrue(health.available("replica"))
+        self.assertEqual(cursor.execute.call_count, 2)
+
+
+@override_settings(DATABASE_REPLICA_ALIAS="replica", DATABASE_REPLICA_STICKY_SECONDS=10)
+class PrimaryPinTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        # The status is read from the cache, whichever database serves the request.
+        patcher = patch("scraper.middleware.replica_health")
+        patcher.start().available.return_value = False
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username="reader", password="password"))
+        progress = ProgressReporter("task-1")
+        progress.metrics["run_id"] = 7
+        progress.finish("SUCCESS", "Scraped 1 quotes successfully.")
+
+    def test_finished_run_pins_the_client_to_the_primary(self):
+        response = self.client.get(reverse("scrape-status", args=["task-1"]))
+
+        self.assertEqual(response.cookies[RUN_COOKIE].value, "7")
+        self.assertEqual(response.cookies[RUN_COOKIE]["max-age"], 10)
+
+    @override_settings(DATABASE_REPLICA_ALIAS=None)
+    def test_no_pin_without_replica(self):
+        response = self.client.get(reverse("scrape-status", args=["task-1"]))
+
+        self.assertNotIn(RUN_COOKIE, response.cookies)
+
+
+@override_settings(DATABASE_REPLICA_ALIAS="replica")
+class ReplicaAliasTestCase(TransactionTestCase):
+    # The replica alias mirrors the test database, and only sees committed rows.
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username="reader", password="password"))
+        Quote.objects.create(text="Quote", author="Author", author_url="https://quotes.toscrape.com/author/Author")
+
+    def test_api_reads_use_the_replica(self):
+        with CaptureQueriesContext(connections["replica"]) as queries:
+            response = self.client.get(reverse("scraped-quotes"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any("data_quote" in query["sql"] for query in queries))
+
+    def test_api_reads_use_the_primary_until_the_run_is_replicated(self):
+        with CaptureQueriesContext(connections["replica"]) as queries:
+            self.client.get(reverse("scraped-quotes"), headers={RUN_HEADER: "999"})
+
+        # Only the lookup of the run, which the replica doesn't have.
+        self.assertTrue(any("data_scraperun" in query["sql"] for query in queries))
+        self.assertFalse(any("data_quote" in query["sql"] for query in queries))
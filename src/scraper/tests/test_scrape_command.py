@@ -0,0 +1,166 @@
+import dataclasses
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from data.models import Quote, ScrapeRun
+from scraper.identity_cache import tag_ids
+from scraper.jobs.parallel import ParallelCrawlJob
+from scraper.persistence import save_quotes
+from scraper.portals.quotes import QUOTES_PORTAL
+from scraper.portals.registry import portals
+from scraper.validation import validate_quotes
+
+BASE_URL = "https://local.example.com"
+
+
+def quote(number):
+    return {
+        "text": f"Quote {number}",
+        "author": "John Lennon",
+        "author_url": "https://quotes.toscrape.com/author/John-Lennon",
+        "tags": [{"name": "life", "url": "https://quotes.toscrape.com/tag/life/"}],
+    }
+
+
+# Three pages of two quotes, linked by their next page links.
+PAGES = {
+    f"{BASE_URL}/page/{number}/": (
+        [quote(2 * number - 1), quote(2 * number)],
+        f"{BASE_URL}/page/{number + 1}/" if number < 3 else None,
+    )
+    for number in range(1, 4)
+}
+
+
+class FakeParser:
+    fetched = []
+
+    def __init__(self, auth):
+        self.auth = auth
+
+    def parse_page(self, page_url):
+        self.fetched.append(page_url)
+        items, next_page_url = PAGES[page_url]
+        self.monitor.record_page(page_url, len(items), items)
+        return items, next_page_url
+
+
+LOCAL_PORTAL = dataclasses.replace(
+    QUOTES_PORTAL,
+    name="local",
+    base_url=BASE_URL,
+    auth_class=MagicMock(),
+    parser_classes={"fake": FakeParser},
+    start_urls=(f"{BASE_URL}/page/1/",),
+    page_url=lambda number: f"{BASE_URL}/page/{number}/",
+    requests_per_second=None,
+)
+
+
+class ScrapeCommandTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        tag_ids.clear()
+        FakeParser.fetched = []
+        portals.register(LOCAL_PORTAL)
+
+    def tearDown(self):
+        portals.unregister(LOCAL_PORTAL.name)
+        tag_ids.clear()
+
+    def scrape(self, *args):
+        out = StringIO()
+        call_command(
+            "scrape", "--portal", "local", "--username", "username", "--password", "password", *args, stdout=out
+        )
+        return out.getvalue()
+
+    @patch.dict(os.environ, {"SCRAPE_PASSWORD": "from-env"})
+    def test_password_from_the_environment(self):
+        with patch.object(ParallelCrawlJob, "__init__", return_value=None) as init, \
+                patch("scraper.management.commands.scrape._crawl_and_save", return_value="Done"):
+            call_command("scrape", "--portal", "local", "--username", "username", stdout=StringIO())
+
+        self.assertEqual(init.call_args.args[2], "from-env")
+
+    @patch.dict(os.environ, {"SCRAPE_PASSWORD": ""})
+    @patch("scraper.management.commands.scrape.getpass.getpass", return_value="prompted")
+    @patch("scraper.management.commands.scrape.sys.stdin")
+    def test_password_prompt(self, stdin, getpass):
+        stdin.isatty.return_value = True
+        with patch.object(ParallelCrawlJob, "__init__", return_value=None) as init, \
+                patch("scraper.management.commands.scrape._crawl_and_save", return_value="Done"):
+            call_command("scrape", "--portal", "local", "--username", "username", stdout=StringIO())
+
+        self.assertEqual(init.call_args.args[2], "prompted")
+
+        stdin.isatty.return_value = False
+        with self.assertRaisesMessage(CommandError, "SCRAPE_PASSWORD"):
+            call_command("scrape", "--portal", "local", "--username", "username", stdout=StringIO())
+
+    def test_full_crawl_to_the_database(self):
+        out = self.scrape("--concurrency", "2")
+
+        self.assertEqual(Quote.objects.count(), 6)
+        self.assertTrue(ScrapeRun.objects.get().full_crawl)
+        self.assertIn("Crawled 3 pages and 6 items", out)
+        self.assertIn("quotes_inserted: 6", out)
+
+    def test_page_range(self):
+        self.scrape("--start-page", "2", "--end-page", "2")
+
+        self.assertEqual(FakeParser.fetched, [f"{BASE_URL}/page/2/"])
+        self.assertEqual(Quote.objects.count(), 2)
+        self.assertFalse(ScrapeRun.objects.get().full_crawl)
+
+    def test_incremental_export_to_ndjson(self):
+        save_quotes(validate_quotes([quote(1), quote(2)])[0])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "quotes.ndjson")
+            out = self.scrape("--incremental", "--output", "ndjson", "--output-path", path)
+            with open(path) as file:
+                rows = [json.loads(line) for line in file]
+
+        self.assertEqual([row["text"] for row in rows], [f"Quote {number}" for number in range(3, 7)])
+        self.assertIn("2 items are already stored, 4 are new.", out)
+        self.assertFalse(ScrapeRun.objects.exists())
+
+    @patch("scraper.management.commands.scrape.exporters.pyarrow", None)
+    def test_parquet_requires_pyarrow(self):
+        with self.assertRaisesMessage(CommandError, "requires pyarrow"):
+            self.scrape("--output", "parquet", "--output-path", "quotes.parquet")
+
+    def test_unknown_parser(self):
+        with self.assertRaisesMessage(CommandError, "Unknown parser 'lxml'"):
+            self.scrape("--parser", "lxml")
+
+
+class ParallelCrawlJobTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        FakeParser.fetched = []
+
+    def test_jobs_split_the_pages(self):
+        job = ParallelCrawlJob(LOCAL_PORTAL, "username", "password", concurrency=3)
+
+        self.assertEqual(len(job.scrape()), 6)
+        self.assertCountEqual(FakeParser.fetched, PAGES)
+        self.assertEqual(job.pages_scraped, 3)
+        self.assertTrue(job.complete)
+
+    def test_page_range_is_not_complete(self):
+        job = ParallelCrawlJob(
+            LOCAL_PORTAL, "username", "password", concurrency=2,
+            start_urls=[f"{BASE_URL}/page/1/"], follow_links=False,
+        )
+
+        self.assertEqual(len(job.scrape()), 2)
+        self.assertFalse(job.complete)
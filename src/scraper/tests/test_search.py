@@ -0,0 +1,107 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from data.models import Quote, Tag
+from data.search import fts5_query, search_quotes
+
+
+class SearchQuotesTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        life = Tag.objects.create(name="life", url="https://quotes.toscrape.com/tag/life/")
+        love = Tag.objects.create(name="love", url="https://quotes.toscrape.com/tag/love/")
+        quotes = [
+            ("John Lennon", "Life is what happens while you are busy making other plans.", [life]),
+            ("John Lennon", "All you need is love.", [love]),
+            ("Albert Einstein", "Life is like riding a bicycle.", [life]),
+            ("Albert Einstein", "Love is a better teacher than duty.", [life, love]),
+        ]
+        for author, text, tags in quotes:
+            quote = Quote.objects.create(
+                text=text,
+                author=author,
+                author_url=f"https://quotes.toscrape.com/author/{author.replace(' ', '-')}",
+            )
+            quote.tags.set(tags)
+
+    def test_text_search_uses_the_index(self):
+        results = search_quotes("life")
+
+        self.assertEqual(results["count"], 2)
+        self.assertCountEqual(
+            [quote["author"] for quote in results["results"]], ["John Lennon", "Albert Einstein"]
+        )
+        # The FTS table only matches whole words, with stemming.
+        self.assertEqual(search_quotes("happening")["count"], 1)
+        self.assertEqual(search_quotes("lif")["count"], 0)
+
+    def test_facets_narrow_the_search(self):
+        results = search_quotes("love", author="Albert Einstein", tags=["life"])
+
+        self.assertEqual([quote["text"] for quote in results["results"]], ["Love is a better teacher than duty."])
+        self.assertEqual(results["facets"]["tags"], [{"name": "life", "count": 1}, {"name": "love", "count": 1}])
+
+    def test_facet_counts(self):
+        results = search_quotes(tags=["life"])
+
+        self.assertEqual(results["count"], 3)
+        self.assertEqual(
+            results["facets"]["authors"],
+            [{"author": "Albert Einstein", "count": 2}, {"author": "John Lennon", "count": 1}],
+        )
+        self.assertEqual(results["facets"]["tags"][0], {"name": "life", "count": 3})
+
+    def test_index_follows_updates_and_deletes(self):
+        Quote.objects.filter(text__startswith="All you need").update(text="All you need is a bicycle.")
+        Quote.objects.filter(text__startswith="Life is like").delete()
+
+        self.assertEqual(search_quotes("love")["count"], 1)
+        self.assertEqual(
+            [quote["text"] for quote in search_quotes("bicycle")["results"]], ["All you need is a bicycle."]
+        )
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(fts5_query('love NEAR "duty'), '"love" "NEAR" """duty"')
+        self.assertEqual(search_quotes('author: "love')["count"], 0)
+
+    def test_query_count_does_not_depend_on_the_page(self):
+        # Count, page of ids, three to serialize and two facets.
+        with self.assertNumQueries(7):
+            search_quotes("life", tags=["life"], limit=1)
+        with self.assertNumQueries(7):
+            search_quotes("life", tags=["life"], limit=10)
+
+    def test_tag_index_is_used(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "EXPLAIN QUERY PLAN SELECT quote_id FROM data_quote_tags WHERE tag_id = 1"
+            )
+            plan = " ".join(str(row) for row in cursor.fetchall())
+
+        self.assertIn("data_quote_tags_tag_quote_idx", plan)
+
+
+class QuoteSearchViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="reader", password="password"))
+        Quote.objects.create(
+            text="All you need is love.",
+            author="John Lennon",
+            author_url="https://quotes.toscrape.com/author/John-Lennon",
+        )
+
+    def test_search(self):
+        response = self.client.get(reverse("quote-search"), {"q": "love", "author": "John Lennon"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 1)
+        self.assertEqual(response.json()["facets"]["authors"], [{"author": "John Lennon", "count": 1}])
+
+    def test_invalid_page(self):
+        response = self.client.get(reverse("quote-search"), {"limit": 1000})
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,179 @@
+from unittest.mock import MagicMock
+
+from django.test import SimpleTestCase, override_settings
+
+from scraper.auth.session_cache import SessionCache
+from scraper.auth.session_pool import NoHealthySessionError, SessionPool
+
+
+def make_auth(login_result=True):
+    auth = MagicMock()
+    auth.login.return_value = login_result
+    auth.is_authenticated.return_value = True
+    auth.is_logged_out.return_value = False
+    return auth
+
+
+@override_settings(SCRAPE_SESSION_CHECK_INTERVAL=60, SCRAPE_SESSION_MAX_REQUESTS=100)
+class SessionPoolTestCase(SimpleTestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def make_pool(self, auths, credentials, **kwargs):
+        auths = iter(auths)
+        return SessionPool(
+            lambda: next(auths),
+            credentials,
+            clock=lambda: self.now,
+            sleep=self.sleeps.append,
+            **kwargs,
+        )
+
+    def test_requests_are_spread_over_accounts(self):
+        first, second = make_auth(), make_auth()
+        pool = self.make_pool([first, second], [("a", "1"), ("b", "2")], requests_per_second=1)
+
+        self.assertEqual(pool.login(), 2)
+        for _ in range(4):
+            pool.get("/page/")
+
+        self.assertEqual(first.session.get.call_count, 2)
+        self.assertEqual(second.session.get.call_count, 2)
+        # Each session is already due again when the other one has sent.
+        self.assertEqual(self.sleeps, [1.0, 1.0])
+
+    def test_sessions_that_cannot_log_in_are_skipped(self):
+        broken, working = make_auth(login_result=False), make_auth()
+        pool = self.make_pool([broken, working], [("a", "1"), ("b", "2")])
+
+        self.assertEqual(pool.login(), 1)
+        pool.get("/page/")
+
+        broken.session.get.assert_not_called()
+        working.session.get.assert_called_once_with("/page/")
+
+    def test_no_healthy_session(self):
+        pool = self.make_pool([make_auth(login_result=False)], [("a", "1")])
+        pool.login()
+
+        with self.assertRaises(NoHealthySessionError):
+            pool.get("/page/")
+
+    def test_logged_out_session_is_reauthenticated(self):
+        auth = make_auth()
+        auth.is_logged_out.side_effect = [True, False]
+        pool = self.make_pool([auth], [("a", "1")])
+        pool.login()
+
+        response = pool.get("/page/")
+
+        self.assertIs(response, auth.session.get.return_value)
+        self.assertEqual(auth.session.get.call_count, 2)
+        self.assertEqual(auth.login.call_count, 2)
+
+    def test_periodic_health_check(self):
+        auth = make_auth()
+        auth.is_authenticated.return_value = False
+        pool = self.make_pool([auth], [("a", "1")])
+        pool.login()
+
+        pool.get("/page/")
+        auth.is_authenticated.assert_not_called()
+
+        self.now = 61
+        pool.get("/page/")
+        auth.is_authenticated.assert_called_once()
+        self.assertEqual(auth.login.call_count, 2)
+
+    @override_settings(SCRAPE_SESSION_MAX_REQUESTS=2)
+    def test_sessions_are_rotated(self):
+        first, rotated = make_auth(), make_auth()
+        pool = self.make_pool([first, rotated], [("a", "1")])
+        pool.login()
+
+        for _ in range(3):
+            pool.get("/page/")
+
+        self.assertEqual(first.session.get.call_count, 2)
+        rotated.login.assert_called_once_with("a", "1")
+        self.assertEqual(rotated.session.get.call_count, 1)
+
+
+@override_settings(SCRAPE_SESSION_CHECK_INTERVAL=60, SCRAPE_SESSION_MAX_REQUESTS=100, SCRAPE_SESSION_CACHE_SIZE=2)
+class SessionCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.cache = SessionCache()
+
+    def make_pool(self, auths, credentials, **kwargs):
+        auths = iter(auths)
+        return SessionPool(
+            lambda: next(auths),
+            credentials,
+            clock=lambda: self.now,
+            session_cache=self.cache,
+            base_url="https://example.com",
+            **kwargs,
+        )
+
+    def test_next_crawl_reuses_the_logged_in_session(self):
+        auth = make_auth()
+        pool = self.make_pool([auth], [("a", "1")])
+        pool.login()
+        pool.get("/page/")
+        pool.close()
+
+        pool = self.make_pool([], [("a", "1")])
+
+        self.assertEqual(pool.login(), 1)
+        auth.login.assert_called_once()
+        pool.get("/page/")
+        self.assertEqual(auth.session.get.call_count, 2)
+        self.assertEqual(pool.sessions[0].requests, 2)
+
+    def test_cached_session_is_still_health_checked(self):
+        auth = make_auth()
+        pool = self.make_pool([auth], [("a", "1")])
+        pool.login()
+        pool.close()
+        auth.is_authenticated.return_value = False
+
+        self.now = 61
+        pool = self.make_pool([], [("a", "1")])
+        pool.login()
+        pool.get("/page/")
+
+        self.assertEqual(auth.login.call_count, 2)
+
+    def test_other_password_logs_in(self):
+        pool = self.make_pool([make_auth()], [("a", "1")])
+        pool.login()
+        pool.close()
+
+        other = make_auth()
+        pool = self.make_pool([other], [("a", "2")])
+        pool.login()
+
+        other.login.assert_called_once_with("a", "2")
+
+    def test_unhealthy_and_proxied_sessions_are_not_cached(self):
+        pool = self.make_pool([make_auth(login_result=False)], [("a", "1")])
+        pool.login()
+        pool.close()
+
+        proxies = MagicMock()
+        pool = self.make_pool([make_auth()], [("b", "1")], proxies=proxies)
+        pool.login()
+        pool.close()
+
+        self.assertEqual(len(self.cache), 0)
+
+    def test_oldest_sessions_are_evicted(self):
+        auths = [make_auth() for _ in range(3)]
+        pool = self.make_pool(auths, [("a", "1"), ("b", "1"), ("c", "1")])
+        pool.login()
+        pool.close()
+
+        self.assertEqual(len(self.cache), 2)
+        auths[0].session.close.assert_called_once()
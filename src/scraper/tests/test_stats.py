@@ -0,0 +1,142 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from data.models import AuthorStat, Quote, ScrapeRun, Tag, TagPairStat, TagStat
+from scraper.identity_cache import tag_ids
+from scraper.persistence import finish_run, save_quotes
+from scraper.stats import author_counts, co_occurrence, rebuild, tag_counts
+from scraper.validation import validate_quotes
+
+
+def scraped(*quotes):
+    items, _ = validate_quotes([
+        {
+            "text": text,
+            "author": author,
+            "author_url": f"https://quotes.toscrape.com/author/{author.replace(' ', '-')}",
+            "tags": [{"name": tag, "url": f"https://quotes.toscrape.com/tag/{tag}/"} for tag in tags],
+        }
+        for text, author, tags in quotes
+    ])
+    return items
+
+
+LENNON = ("All you need is love.", "John Lennon", ["love", "music"])
+EINSTEIN = ("Life is like riding a bicycle.", "Albert Einstein", ["life", "love"])
+TWAIN = ("The secret of getting ahead is getting started.", "Mark Twain", ["life", "love", "music"])
+
+
+class StatsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        tag_ids.clear()
+
+    def tearDown(self):
+        tag_ids.clear()
+
+    def crawl(self, *quotes, full_crawl=True):
+        run = ScrapeRun.objects.create(portal="quotes")
+        with self.captureOnCommitCallbacks(execute=True):
+            save_quotes(scraped(*quotes), run=run)
+            finish_run(run, full_crawl)
+
+    def snapshot(self):
+        names = dict(Tag.objects.values_list("id", "name"))
+        return (
+            dict(AuthorStat.objects.values_list("author", "quotes")),
+            {names[tag_id]: quotes for tag_id, quotes in TagStat.objects.values_list("tag_id", "quotes")},
+            {
+                (names[tag_id], names[other_tag_id]): quotes
+                for tag_id, other_tag_id, quotes in TagPairStat.objects.values_list("tag_id", "other_tag_id", "quotes")
+            },
+        )
+
+    def assertMatchesRebuild(self):
+        maintained = self.snapshot()
+        rebuild()
+        self.assertEqual(maintained, self.snapshot())
+
+    def test_runs_maintain_the_statistics(self):
+        self.crawl(LENNON, EINSTEIN, TWAIN)
+
+        authors, tags, pairs = self.snapshot()
+        self.assertEqual(authors, {"John Lennon": 1, "Albert Einstein": 1, "Mark Twain": 1})
+        self.assertEqual(tags, {"love": 3, "music": 2, "life": 2})
+        self.assertEqual(pairs[("love", "music")], 2)
+        self.assertMatchesRebuild()
+
+    def test_retagged_and_removed_quotes(self):
+        self.crawl(LENNON, EINSTEIN, TWAIN)
+        self.crawl(LENNON, (EINSTEIN[0], EINSTEIN[1], ["life", "physics"]))
+
+        authors, tags, pairs = self.snapshot()
+        self.assertNotIn("Mark Twain", authors)
+        self.assertEqual(tags, {"love": 1, "music": 1, "life": 1, "physics": 1})
+        self.assertEqual(set(pairs), {("love", "music"), ("life", "physics")})
+        self.assertMatchesRebuild()
+
+    def test_partial_crawls_only_add(self):
+        self.crawl(LENNON, EINSTEIN)
+        self.crawl(TWAIN, full_crawl=False)
+
+        self.assertEqual(self.snapshot()[1], {"love": 3, "music": 2, "life": 2})
+        self.assertMatchesRebuild()
+
+    def test_responses_are_cached_until_a_run_changes_them(self):
+        self.crawl(LENNON, EINSTEIN)
+        self.assertEqual(author_counts(10)[0], {"author": "Albert Einstein", "quotes": 1})
+
+        with self.assertNumQueries(0):
+            author_counts(10)
+
+        self.crawl(LENNON, EINSTEIN, TWAIN)
+        self.assertEqual(len(author_counts(10)), 3)
+        self.assertEqual(tag_counts(1), [{"name": "love", "quotes": 3}])
+
+    def test_co_occurrence(self):
+        self.crawl(LENNON, EINSTEIN, TWAIN)
+
+        self.assertEqual(
+            co_occurrence(Tag.objects.get(name="love"), 10),
+            [{"name": "life", "quotes": 2}, {"name": "music", "quotes": 2}],
+        )
+
+    def test_rebuild_command_repairs_the_statistics(self):
+        self.crawl(LENNON, EINSTEIN)
+        Quote.objects.filter(author="John Lennon").delete()
+        out = StringIO()
+
+        call_command("rebuild_stats", stdout=out)
+
+        self.assertEqual(self.snapshot()[0], {"Albert Einstein": 1})
+        self.assertIn("1 authors", out.getvalue())
+
+
+class StatsViewsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="reader", password="password"))
+        save_quotes(scraped(LENNON, TWAIN))
+
+    def test_tag_stats(self):
+        response = self.client.get(reverse("tag-stats"), {"limit": 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{"name": "love", "quotes": 2}, {"name": "music", "quotes": 2}])
+
+    def test_co_occurrence_of_unknown_tag(self):
+        response = self.client.get(reverse("tag-co-occurrence", args=["unknown"]))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_limit(self):
+        response = self.client.get(reverse("author-stats"), {"limit": 0})
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,152 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from requests.exceptions import ConnectionError
+from rest_framework.test import APIClient
+
+from scraper.tracing import (NOOP_SPAN, TRACEPARENT, SpanContext, current_span,
+                             end_task_span, get_exporter, inject,
+                             inject_task_context, otlp_payload, span,
+                             start_task_span)
+from scraper.utils import retry_with_backoff
+
+REMOTE_PARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+@override_settings(SCRAPE_TRACE_EXPORTER="memory", SCRAPE_TRACE_SAMPLE_RATE=1.0)
+class TracingTestCase(SimpleTestCase):
+    def setUp(self):
+        self.exporter = get_exporter()
+        self.exporter.clear()
+
+    def spans(self):
+        return {recorded.name: recorded for recorded in self.exporter.spans}
+
+    def test_children_are_exported_with_their_root(self):
+        with span("task", task_id="1") as root:
+            with span("page.fetch", url="/page/1/"):
+                self.assertEqual(self.exporter.spans, [])
+            with self.assertRaises(ValueError):
+                with span("page.parse"):
+                    raise ValueError("Bad markup")
+
+        spans = self.spans()
+        self.assertEqual(set(spans), {"task", "page.fetch", "page.parse"})
+        self.assertIsNone(root.parent_id)
+        self.assertEqual(spans["page.fetch"].parent_id, root.context.span_id)
+        self.assertEqual(spans["page.fetch"].context.trace_id, root.context.trace_id)
+        self.assertEqual(spans["page.fetch"].attributes, {"url": "/page/1/"})
+        self.assertEqual(spans["page.parse"].status, "ERROR")
+        self.assertEqual(spans["page.parse"].error, "ValueError: Bad markup")
+        self.assertIsNone(current_span())
+
+    @override_settings(SCRAPE_TRACE_SAMPLE_RATE=0.0)
+    def test_unsampled_traces_record_nothing_but_propagate(self):
+        with span("api.scrape"):
+            with span("page.fetch"):
+                headers = inject({})
+
+        self.assertEqual(self.exporter.spans, [])
+        self.assertFalse(SpanContext.parse(headers[TRACEPARENT]).sampled)
+
+    @override_settings(SCRAPE_TRACE_EXPORTER=None)
+    def test_disabled_tracing(self):
+        with span("task") as root:
+            self.assertIs(root, NOOP_SPAN)
+            self.assertIsNone(current_span())
+            self.assertEqual(inject({}), {})
+
+    @override_settings(SCRAPE_TRACE_SAMPLE_RATE=0.0)
+    def test_remote_parent_decides_sampling(self):
+        with span("task", parent=SpanContext.parse(REMOTE_PARENT)) as root:
+            pass
+
+        self.assertEqual(self.exporter.spans, [root])
+        self.assertEqual(root.context.trace_id, "0af7651916cd43dd8448eb211c80319c")
+        self.assertEqual(root.parent_id, "b7ad6b7169203331")
+
+    def test_malformed_traceparent(self):
+        for value in (None, "", "00-abc-def-01", "00-0af7651916cd43dd8448eb211c80319c-zzzzzzzzzzzzzzzz-01"):
+            self.assertIsNone(SpanContext.parse(value))
+
+    @patch("scraper.utils.time.sleep")
+    def test_retries_are_child_spans(self, mock_sleep):
+        attempts = iter([ConnectionError("Reset"), "page"])
+
+        def fetch():
+            result = next(attempts)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        with span("page.fetch") as fetch_span:
+            self.assertEqual(retry_with_backoff(fetch, max_retries=3, action_name="Fetch Page"), "page")
+
+        attempts = [recorded for recorded in self.exporter.spans if recorded.name == "retry.attempt"]
+        self.assertEqual([attempt.attributes["attempt"] for attempt in attempts], [1, 2])
+        self.assertEqual([attempt.status for attempt in attempts], ["ERROR", "OK"])
+        self.assertTrue(all(attempt.parent_id == fetch_span.context.span_id for attempt in attempts))
+
+    def test_task_continues_the_trace_of_its_message(self):
+        with span("api.scrape") as trigger:
+            headers = {}
+            inject_task_context(headers=headers)
+
+        task = SimpleNamespace(name="scraper.tasks.scrape", request=SimpleNamespace(traceparent=headers[TRACEPARENT]))
+        start_task_span(task_id="task-1", task=task)
+        with span("page.scrape"):
+            pass
+        end_task_span(task_id="task-1", state="SUCCESS")
+
+        spans = self.spans()
+        task_span = spans["task scraper.tasks.scrape"]
+        self.assertEqual(task_span.context.trace_id, trigger.context.trace_id)
+        self.assertEqual(task_span.parent_id, trigger.context.span_id)
+        self.assertEqual(task_span.attributes, {"task_id": "task-1", "state": "SUCCESS"})
+        self.assertEqual(spans["page.scrape"].parent_id, task_span.context.span_id)
+        self.assertIsNone(current_span())
+
+    def test_otlp_payload(self):
+        with span("page.fetch", url="/page/1/", attempt=2, sampled=True):
+            pass
+
+        payload = otlp_payload(self.exporter.spans)
+        encoded = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        self.assertEqual(encoded["name"], "page.fetch")
+        self.assertNotIn("parentSpanId", encoded)
+        self.assertEqual(encoded["status"], {"code": 1})
+        self.assertEqual(encoded["attributes"], [
+            {"key": "url", "value": {"stringValue": "/page/1/"}},
+            {"key": "attempt", "value": {"intValue": "2"}},
+            {"key": "sampled", "value": {"boolValue": True}},
+        ])
+
+
+@override_settings(SCRAPE_TRACE_EXPORTER="memory", SCRAPE_TRACE_SAMPLE_RATE=0.0)
+class ScrapeTriggerTracingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_exporter().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username="reader", password="password"))
+
+    @patch("scraper.views.celery_app.send_task")
+    def test_enqueued_task_carries_the_trigger_span(self, mock_send_task):
+        # What the publish signal adds to the message headers.
+        mock_send_task.side_effect = lambda *args, **kwargs: inject(published)
+        published = {}
+
+        response = self.client.post(
+            reverse("scrape-quotes"), {"username": "portal_user", "password": "portal_password"},
+            HTTP_TRACEPARENT=REMOTE_PARENT,
+        )
+
+        (trigger,) = get_exporter().spans
+        self.assertEqual(trigger.name, "api.scrape")
+        self.assertEqual(trigger.parent_id, "b7ad6b7169203331")
+        self.assertEqual(trigger.attributes["task_id"], response.json()["task_id"])
+        self.assertEqual(SpanContext.parse(published[TRACEPARENT]).span_id, trigger.context.span_id)
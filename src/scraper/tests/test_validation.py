@@ -0,0 +1,74 @@
+import unittest
+
+from scraper.items import QuoteItem, TagRef
+from scraper.validation import validate_quotes
+
+
+class TestValidateQuotes(unittest.TestCase):
+    def setUp(self):
+        self.quote = {
+            "text": "  Life is what happens\n   when you're busy making other plans. ",
+            "author": "John Lennon",
+            "author_url": "HTTPS://Quotes.toscrape.com/author/John-Lennon#bio",
+            "goodreads_link": None,
+            "tags": [{"name": " life ", "url": "https://quotes.toscrape.com/tag/life/"}],
+        }
+
+    def test_valid_batch_is_normalized(self):
+        valid_quotes, errors = validate_quotes([self.quote])
+
+        self.assertEqual(errors, {})
+        self.assertEqual(
+            valid_quotes[0].text, "Life is what happens when you're busy making other plans."
+        )
+        self.assertEqual(
+            valid_quotes[0].author_url, "https://quotes.toscrape.com/author/John-Lennon"
+        )
+        self.assertEqual(valid_quotes[0].tags[0].name, "life")
+
+    def test_goodreads_link_alias(self):
+        self.quote["goodreads_link"] = "https://www.goodreads.com/author/show/19968"
+
+        valid_quotes, _ = validate_quotes([self.quote])
+
+        self.assertEqual(valid_quotes[0].goodreads_url, "https://www.goodreads.com/author/show/19968")
+
+    def test_invalid_items_are_reported_per_item(self):
+        invalid = dict(self.quote, text="   ", author_url="/author/John-Lennon")
+
+        valid_quotes, errors = validate_quotes([self.quote, invalid, self.quote])
+
+        self.assertEqual(len(valid_quotes), 2)
+        self.assertEqual(list(errors), [1])
+        self.assertEqual(sorted(errors[1]), ["author_url", "text"])
+
+    def test_invalid_tag_is_reported_with_its_path(self):
+        invalid = dict(self.quote, tags=[{"name": "", "url": "https://quotes.toscrape.com/tag/x/"}])
+
+        _, errors = validate_quotes([invalid])
+
+        self.assertIn("tags.0.name", errors[0])
+
+    def test_items_are_normalized_in_place(self):
+        life = TagRef(" life ", "https://quotes.toscrape.com/tag/life/")
+        love = TagRef("love", "https://quotes.toscrape.com/tag/love/")
+        items = [
+            QuoteItem(" One ", "John Lennon", "https://quotes.toscrape.com/author/John-Lennon", tags=(life, love)),
+            QuoteItem("Two", "John Lennon", "https://quotes.toscrape.com/author/John-Lennon", tags=(life,)),
+        ]
+
+        valid_quotes, errors = validate_quotes(items)
+
+        self.assertEqual(errors, {})
+        self.assertIs(valid_quotes[0], items[0])
+        self.assertEqual(items[0].text, "One")
+        # Normalized tags stay shared, and already normalized ones are kept.
+        self.assertIs(items[0].tags[0], items[1].tags[0])
+        self.assertEqual(items[0].tags[0].name, "life")
+        self.assertIs(items[0].tags[1], love)
+
+    def test_missing_fields_are_reported(self):
+        _, errors = validate_quotes([{"text": "One", "tags": "life"}])
+
+        self.assertEqual(errors[0]["author"], ["Field required"])
+        self.assertEqual(sorted(errors[0]), ["author", "author_url", "tags"])
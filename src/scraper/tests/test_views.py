@@ -0,0 +1,195 @@
+import gzip
+import json
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django_celery_results.models import TaskResult
+from rest_framework.test import APIClient
+
+from data.models import Quote, Tag
+from data.serializers import QuoteSerializer, serialize_quotes
+from scraper.budget import is_cancelled
+from scraper.renderers import ORJSONRenderer
+from scraper.singleflight import SingleFlight
+
+
+class ScrapedQuotesListViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader", password="password")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        life = Tag.objects.create(name="life", url="https://quotes.toscrape.com/tag/life/")
+        plans = Tag.objects.create(name="plans", url="https://quotes.toscrape.com/tag/plans/")
+        lennon = Quote.objects.create(
+            text="Life is what happens when you're busy making other plans.",
+            author="John Lennon",
+            author_url="https://quotes.toscrape.com/author/John-Lennon",
+        )
+        lennon.tags.set([life, plans])
+        Quote.objects.create(
+            text="A quote without tags.",
+            author="Anonymous",
+            author_url="https://quotes.toscrape.com/author/Anonymous",
+        )
+
+    def test_fast_path_matches_model_serializer(self):
+        """
+        The fast path must produce the same payload as QuoteSerializer.
+        """
+        queryset = Quote.objects.all()
+        expected = QuoteSerializer(queryset, many=True).data
+
+        self.assertEqual(json.loads(json.dumps(expected)), serialize_quotes(queryset))
+
+    def test_fast_path_query_count(self):
+        """
+        The fast path runs a fixed number of queries regardless of the corpus size.
+        """
+        with self.assertNumQueries(3):
+            serialize_quotes(Quote.objects.all())
+
+    def test_list_view(self):
+        response = self.client.get(reverse("scraped-quotes"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(response.json()[0]["tags"][1]["name"], "plans")
+
+    def test_small_list_is_not_compressed(self):
+        response = self.client.get(reverse("scraped-quotes"), HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    @override_settings(GZIP_MIN_RESPONSE_SIZE=200)
+    def test_large_list_is_compressed(self):
+        response = self.client.get(reverse("scraped-quotes"), HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))), 2)
+
+
+class ORJSONRendererTestCase(TestCase):
+    def test_render(self):
+        renderer = ORJSONRenderer()
+
+        self.assertEqual(json.loads(renderer.render({"a": [1, "b"]})), {"a": [1, "b"]})
+        self.assertEqual(renderer.render(None), b"")
+
+
+@patch("scraper.views.celery_app.send_task")
+class ScrapeQuotesViewTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="reader", password="password")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.payload = {"username": "portal_user", "password": "portal_password"}
+
+    def test_missing_credentials(self, mock_apply_async):
+        response = self.client.post(reverse("scrape-quotes"), {"username": "portal_user"})
+
+        self.assertEqual(response.status_code, 400)
+        mock_apply_async.assert_not_called()
+
+    def test_duplicate_trigger_returns_inflight_task(self, mock_apply_async):
+        first = self.client.post(reverse("scrape-quotes"), self.payload)
+        second = self.client.post(reverse("scrape-quotes"), self.payload)
+
+        self.assertEqual(first.status_code, 202)
+        self.assertFalse(first.json()["deduplicated"])
+        self.assertTrue(second.json()["deduplicated"])
+        self.assertEqual(first.json()["task_id"], second.json()["task_id"])
+        mock_apply_async.assert_called_once()
+
+    def test_different_account_is_not_deduplicated(self, mock_apply_async):
+        self.client.post(reverse("scrape-quotes"), self.payload)
+        self.client.post(reverse("scrape-quotes"), dict(self.payload, username="other_user"))
+
+        self.assertEqual(mock_apply_async.call_count, 2)
+
+    def test_completed_crawl_is_reused_within_min_interval(self, mock_apply_async):
+        # The crawl was triggered without min_interval; later triggers decide.
+        first = self.client.post(reverse("scrape-quotes"), self.payload)
+        flight_key = mock_apply_async.call_args.kwargs["kwargs"]["flight_key"]
+        with patch("scraper.singleflight.time.time", return_value=1000.0):
+            SingleFlight.release(flight_key, first.json()["task_id"], completed=True)
+
+        with patch("scraper.singleflight.time.time", return_value=1030.0):
+            second = self.client.post(reverse("scrape-quotes"), dict(self.payload, min_interval=60))
+            third = self.client.post(reverse("scrape-quotes"), dict(self.payload, min_interval=10))
+
+        self.assertEqual(second.json()["task_id"], first.json()["task_id"])
+        self.assertTrue(second.json()["deduplicated"])
+        self.assertFalse(third.json()["deduplicated"])
+        self.assertEqual(mock_apply_async.call_count, 2)
+
+    def test_budget_is_passed_to_the_task(self, mock_apply_async):
+        self.client.post(reverse("scrape-quotes"), dict(self.payload, max_pages=5, max_seconds=60))
+
+        self.assertEqual(
+            mock_apply_async.call_args.kwargs["kwargs"]["budget"], {"max_pages": 5, "max_seconds": 60}
+        )
+
+    def test_invalid_budget(self, mock_apply_async):
+        response = self.client.post(reverse("scrape-quotes"), dict(self.payload, max_pages=0))
+
+        self.assertEqual(response.status_code, 400)
+        mock_apply_async.assert_not_called()
+
+
+class SingleFlightTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.flight = SingleFlight("https://quotes.toscrape.com", "username")
+
+    def test_failed_crawl_is_not_reused(self):
+        task_id, _ = self.flight.run(lambda task_id: None)
+        SingleFlight.release(self.flight.key, task_id, completed=False)
+
+        second_id, deduplicated = self.flight.run(lambda task_id: None, min_interval=60)
+
+        self.assertNotEqual(second_id, task_id)
+        self.assertFalse(deduplicated)
+
+    def test_expired_lease_is_taken_with_an_atomic_add(self):
+        # Another trigger holds the lease at the first add; it expires before the get.
+        with patch("scraper.singleflight.cache.add", side_effect=[False, False]), \
+                patch("scraper.singleflight.cache.get", side_effect=[None, "other-task"]):
+            task_id, deduplicated = self.flight.run(lambda task_id: self.fail("enqueued"))
+
+        # The other trigger won the race for the expired lease.
+        self.assertEqual(task_id, "other-task")
+        self.assertTrue(deduplicated)
+
+    def test_release_keeps_a_lease_taken_over(self):
+        cache.set(SingleFlight.inflight_key(self.flight.key), "new-task")
+
+        SingleFlight.release(self.flight.key, "old-task")
+
+        self.assertEqual(cache.get(SingleFlight.inflight_key(self.flight.key)), "new-task")
+
+
+class ScrapeCancelViewTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username="reader", password="password"))
+
+    def test_running_task_is_cancelled(self):
+        response = self.client.delete(reverse("scrape-status", args=["task-1"]))
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], "CANCELLING")
+        self.assertTrue(is_cancelled("task-1"))
+
+    def test_finished_task_is_not_cancelled(self):
+        TaskResult.objects.create(task_id="task-1", status="SUCCESS")
+
+        response = self.client.delete(reverse("scrape-status", args=["task-1"]))
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(is_cancelled("task-1"))
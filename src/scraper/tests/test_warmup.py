@@ -0,0 +1,28 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from scraper.auth.session_cache import session_cache
+from scraper.portals.quotes import QUOTES_PORTAL
+from scraper.warmup import warm_up
+
+
+class WarmUpTestCase(SimpleTestCase):
+    def tearDown(self):
+        session_cache.clear()
+
+    @patch("requests.Session.get")
+    def test_portals_are_connected(self, get):
+        timings = warm_up()
+
+        self.assertEqual(list(timings), ["imports", "parsers", "connections"])
+        get.assert_any_call(QUOTES_PORTAL.base_url, timeout=5)
+        auth = session_cache.take_connected(QUOTES_PORTAL.base_url)
+        self.assertIsInstance(auth, QUOTES_PORTAL.auth_class)
+
+    @patch("requests.Session.get", side_effect=OSError("unreachable"))
+    def test_unreachable_portal_is_skipped(self, get):
+        with self.assertLogs("scraper.warmup", "WARNING"):
+            warm_up()
+
+        self.assertIsNone(session_cache.take_connected(QUOTES_PORTAL.base_url))
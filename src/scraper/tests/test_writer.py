@@ -0,0 +1,210 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from data.models import Quote, ScrapeRun
+from data.sqlite import configure_sqlite
+from scraper.identity_cache import tag_ids
+from scraper.portals.quotes import QUOTES_PORTAL
+from scraper.progress import ProgressReporter
+from scraper.singleflight import SingleFlight
+from scraper.tasks.crawl import _crawl_and_save, run_crawl
+from scraper.tasks.persist import persist_run_task
+from scraper.validation import validate_quotes
+from scraper.writer import BatchWriter, persist_run
+
+
+def scraped(*texts):
+    items, _ = validate_quotes([
+        {
+            "text": text,
+            "author": "John Lennon",
+            "author_url": "https://quotes.toscrape.com/author/John-Lennon",
+            "tags": [{"name": "life", "url": "https://quotes.toscrape.com/tag/life/"}],
+        }
+        for text in texts
+    ])
+    return items
+
+
+class ConfigureSqliteTestCase(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_PRAGMAS={"busy_timeout": 1234, "cache_size": -2048})
+    def test_pragmas_are_applied(self):
+        configure_sqlite(sender=None, connection=connection)
+
+        self.assertEqual(self.pragma("busy_timeout"), 1234)
+        self.assertEqual(self.pragma("cache_size"), -2048)
+
+    @override_settings(SQLITE_PRAGMAS={})
+    def test_no_pragmas_by_default(self):
+        busy_timeout = self.pragma("busy_timeout")
+
+        configure_sqlite(sender=None, connection=connection)
+
+        self.assertEqual(self.pragma("busy_timeout"), busy_timeout)
+
+
+@override_settings(SCRAPE_WRITER_MAX_JOBS=10, SCRAPE_WRITER_MAX_WAIT=0)
+class BatchWriterTestCase(TestCase):
+    def setUp(self):
+        tag_ids.clear()
+        self.writer = BatchWriter(autostart=False)
+
+    def tearDown(self):
+        tag_ids.clear()
+
+    def test_queued_jobs_share_one_transaction(self):
+        futures = [
+            self.writer.submit(persist_run, QUOTES_PORTAL, scraped(f"Quote {i}"), f"task-{i}")
+            for i in range(3)
+        ]
+
+        self.assertEqual(self.writer.drain(), 3)
+
+        self.assertEqual(self.writer.transactions, 1)
+        self.assertEqual([future.result()["quotes_inserted"] for future in futures], [1, 1, 1])
+        self.assertEqual(Quote.objects.count(), 3)
+
+    @override_settings(SCRAPE_WRITER_MAX_JOBS=2)
+    def test_groups_are_bounded(self):
+        for i in range(3):
+            self.writer.submit(persist_run, QUOTES_PORTAL, scraped(f"Quote {i}"))
+
+        self.assertEqual(self.writer.drain(), 2)
+        self.assertEqual(self.writer.drain(), 1)
+        self.assertEqual(self.writer.drain(), 0)
+
+    def test_failing_job_is_rolled_back_alone(self):
+        def failing():
+            ScrapeRun.objects.create(portal="broken")
+            raise ValueError("broken")
+
+        saved = self.writer.submit(persist_run, QUOTES_PORTAL, scraped("Quote"))
+        failed = self.writer.submit(failing)
+        self.writer.drain()
+
+        self.assertIsInstance(failed.exception(), ValueError)
+        self.assertEqual(saved.result()["quotes_inserted"], 1)
+        self.assertFalse(ScrapeRun.objects.filter(portal="broken").exists())
+
+    @override_settings(SCRAPE_WRITE_MODE="single-writer")
+    def test_crawls_write_through_the_writer_task(self):
+        job = MagicMock()
+        job.scrape.return_value = [item.as_dict() for item in scraped("One", "Two")]
+        job.complete = True
+
+        with patch.object(persist_run_task, "apply_async", side_effect=persist_run_task.apply) as apply_async, \
+                patch("scraper.tasks.persist.writer.run", side_effect=lambda func, *args: func(*args)):
+            result = _crawl_and_save(job, QUOTES_PORTAL, task_id="crawl-1")
+
+        self.assertEqual(result, "Scraped 2 quotes successfully.")
+        self.assertEqual(apply_async.call_args.args[0][2:], ("crawl-1", True))
+        # The crawl hands the run over without waiting for a result.
+        self.assertTrue(apply_async.call_args.kwargs["ignore_result"])
+        self.assertTrue(ScrapeRun.objects.get(task_id="crawl-1").full_crawl)
+
+
+@override_settings(SCRAPE_WRITE_MODE="single-writer")
+class SingleWriterCrawlTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        tag_ids.clear()
+
+    def tearDown(self):
+        tag_ids.clear()
+
+    def crawl(self, task_id="crawl-1", flight_key="flight"):
+        task = MagicMock()
+        task.request.id = task_id
+        task.request.called_directly = True
+        make_job = MagicMock()
+        make_job.return_value.scrape.return_value = [item.as_dict() for item in scraped("One", "Two")]
+        make_job.return_value.complete = True
+        with patch.object(persist_run_task, "apply_async") as apply_async:
+            run_crawl(task, QUOTES_PORTAL, make_job, flight_key)
+        return apply_async.call_args
+
+    def test_writer_finishes_the_crawl(self):
+        handoff = self.crawl()
+
+        # Until the run is written, the crawl is neither finished nor reusable.
+        self.assertFalse(ProgressReporter.get("crawl-1")["finished"])
+        self.assertIsNone(cache.get(SingleFlight.recent_key("flight")))
+
+        with patch("scraper.tasks.persist.writer.run", side_effect=lambda func, *args: func(*args)):
+            persist_run_task.apply(*handoff.args)
+
+        snapshot = ProgressReporter.get("crawl-1")
+        self.assertEqual(snapshot["state"], "SUCCESS")
+        self.assertEqual(snapshot["items_persisted"], 2)
+        self.assertEqual(snapshot["metrics"]["quotes_inserted"], 2)
+        self.assertEqual(cache.get(SingleFlight.recent_key("flight"))[0], "crawl-1")
+
+    def test_writer_failure_fails_the_crawl(self):
+        handoff = self.crawl()
+
+        with patch("scraper.tasks.persist.writer.run", side_effect=ValueError("database is locked")):
+            persist_run_task.apply(*handoff.args)
+
+        snapshot = ProgressReporter.get("crawl-1")
+        self.assertEqual(snapshot["state"], "FAILURE")
+        self.assertEqual(snapshot["result"], "database is locked")
+        self.assertIsNone(cache.get(SingleFlight.recent_key("flight")))
+
+
+    def test_runs_with_failed_items_are_not_full(self):
+        definition = MagicMock()
+        definition.name = "quotes"
+        definition.save.return_value = {"quotes_failed": 1}
+
+        persist_run(definition, scraped("One"), full_crawl=True)
+
+        definition.finish_run.assert_called_once_with(ScrapeRun.objects.get(), False)
+
+    def test_runs_failing_to_save_are_finished(self):
+        definition = MagicMock(finish_run=None)
+        definition.name = "quotes"
+        definition.save.side_effect = ValueError("broken")
+
+        with patch("scraper.writer.transaction.get_connection") as get_connection:
+            # As in autocommit, outside the test case transaction.
+            get_connection.return_value.in_atomic_block = False
+            with self.assertRaises(ValueError):
+                persist_run(definition, scraped("One"))
+
+        self.assertIsNotNone(ScrapeRun.objects.get().finished_at)
+
+
+@override_settings(SCRAPE_WRITER_MAX_JOBS=50, SCRAPE_WRITER_MAX_WAIT=0.05)
+class WriterThreadTestCase(TransactionTestCase):
+    def setUp(self):
+        tag_ids.clear()
+
+    def tearDown(self):
+        tag_ids.clear()
+
+    def test_concurrent_producers_share_the_writer_thread(self):
+        writer = BatchWriter()
+        results = []
+
+        def produce(i):
+            results.append(writer.run(persist_run, QUOTES_PORTAL, scraped(f"Quote {i}")))
+
+        producers = [threading.Thread(target=produce, args=(i,)) for i in range(8)]
+        for producer in producers:
+            producer.start()
+        for producer in producers:
+            producer.join()
+
+        self.assertEqual(len(results), 8)
+        self.assertEqual(Quote.objects.count(), 8)
+        self.assertEqual(writer.jobs, 8)
+        self.assertLess(writer.transactions, 8)
@@ -0,0 +1,435 @@
+import json
+import logging
+import queue
+import random
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# The W3C Trace Context header, also used as the Celery message header.
+TRACEPARENT = "traceparent"
+
+# Exporters by `SCRAPE_TRACE_EXPORTER` alias; any other value is a dotted path.
+EXPORTERS = {
+    "memory": "scraper.tracing.InMemoryExporter",
+    "file": "scraper.tracing.FileExporter",
+    "otlp": "scraper.tracing.OTLPExporter",
+}
+
+
+class SpanContext:
+    """The identity of a span, as propagated to child spans and other processes."""
+
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @classmethod
+    def parse(cls, traceparent: Optional[str]) -> Optional["SpanContext"]:
+        """
+        Parse a `traceparent` header, returning None if it is missing or malformed.
+        """
+        try:
+            _, trace_id, span_id, flags = traceparent.split("-")
+            int(trace_id, 16), int(span_id, 16)
+            sampled = bool(int(flags, 16) & 1)
+        except (AttributeError, ValueError):
+            return None
+        if len(trace_id) != 32 or len(span_id) != 16:
+            return None
+        return cls(trace_id, span_id, sampled)
+
+
+class _Trace:
+    """
+    The finished spans of a trace in this process, exported in batches of
+    `SCRAPE_TRACE_EXPORT_BATCH` and when its local root span ends.
+    """
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+        self.spans: List["Span"] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span"):
+        with self._lock:
+            self.spans.append(span)
+            full = len(self.spans) >= settings.SCRAPE_TRACE_EXPORT_BATCH
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            spans, self.spans = self.spans, []
+        if not spans:
+            return
+        try:
+            self.exporter.export(spans)
+        except Exception as e:
+            # Tracing never fails the traced work.
+            logger.warning(f"Exporting {len(spans)} spans failed: {e}")
+
+
+class Span:
+    """
+    A timed operation of a trace, with its attributes and outcome.
+
+    Spans are started with `span` (or `start_span`) and become the current
+    span of their context until they end; spans started meanwhile are their
+    children.
+    """
+
+    recording = True
+
+    def __init__(
+        self,
+        name: str,
+        context: SpanContext,
+        parent_id: Optional[str],
+        trace: Optional[_Trace],
+        attributes: Dict[str, Any],
+    ):
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.status = "OK"
+        self.error: Optional[str] = None
+        self.start_time = time.time_ns()
+        self.end_time: Optional[int] = None
+        self._trace = trace
+        # Local roots flush their trace when they end.
+        self._is_local_root = False
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.status = "ERROR"
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self._token is not None:
+            _reset(self._token)
+            self._token = None
+        if self.end_time is not None:
+            return
+        self.end_time = time.time_ns()
+        self._trace.add(self)
+        if self._is_local_root:
+            self._trace.flush()
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_time is None:
+            return None
+        return round((self.end_time - self.start_time) / 1e6, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class NonRecordingSpan(Span):
+    """
+    A span of a trace that was not sampled: it records nothing but carries
+    the trace context, so its children and downstream tasks skip it too.
+    """
+
+    recording = False
+
+    def __init__(self, context: SpanContext):
+        self.context = context
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+    def end(self):
+        if self._token is not None:
+            _reset(self._token)
+            self._token = None
+
+
+# The span of tracing disabled (no exporter): no context at all.
+NOOP_SPAN = NonRecordingSpan(SpanContext("0" * 32, "0" * 16, False))
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("scraper_current_span", default=None)
+_exporters: Dict[str, Any] = {}
+
+
+def _reset(token):
+    try:
+        _current_span.reset(token)
+    except ValueError:
+        # Ended in another context than it started in (e.g. another thread).
+        pass
+
+
+def get_exporter():
+    """
+    Return the exporter of `SCRAPE_TRACE_EXPORTER`, or None if tracing is disabled.
+    """
+    path = settings.SCRAPE_TRACE_EXPORTER
+    if not path:
+        return None
+    exporter = _exporters.get(path)
+    if exporter is None:
+        exporter = _exporters[path] = import_string(EXPORTERS.get(path, path))()
+    return exporter
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, parent: Optional[SpanContext] = None, **attributes: Any) -> Span:
+    """
+    Start a span and make it the current span until it ends.
+
+    Without a `parent`, the span is a child of the current span, or the root
+    of a new trace, sampled at `SCRAPE_TRACE_SAMPLE_RATE`. Children of a
+    trace that was not sampled are not recorded either.
+
+    Args:
+        name: The name of the operation, e.g. "page.fetch".
+        parent: The context of a remote parent span, e.g. from a task header.
+        **attributes: The attributes of the span.
+    """
+    exporter = get_exporter()
+    if exporter is None:
+        return NOOP_SPAN
+
+    current = _current_span.get() if parent is None else None
+    if current is not None:
+        if current.recording:
+            new_span = Span(
+                name, SpanContext(current.context.trace_id, secrets.token_hex(8), True),
+                current.context.span_id, current._trace, attributes,
+            )
+        else:
+            new_span = NonRecordingSpan(current.context)
+    else:
+        if parent is not None:
+            trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+            sampled = random.random() < settings.SCRAPE_TRACE_SAMPLE_RATE
+        context = SpanContext(trace_id, secrets.token_hex(8), sampled)
+        if sampled:
+            new_span = Span(name, context, parent_id, _Trace(exporter), attributes)
+            new_span._is_local_root = True
+        else:
+            new_span = NonRecordingSpan(context)
+    new_span._token = _current_span.set(new_span)
+    return new_span
+
+
+@contextmanager
+def span(name: str, parent: Optional[SpanContext] = None, **attributes: Any) -> Iterator[Span]:
+    """
+    Trace the enclosed block as a span (see `start_span`).
+
+    An exception raised by the block marks the span as failed.
+    """
+    current = start_span(name, parent, **attributes)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_error(e)
+        raise
+    finally:
+        current.end()
+
+
+def inject(headers: Dict[str, str]) -> Dict[str, str]:
+    """
+    Add the `traceparent` of the current span to `headers`, if any.
+    """
+    current = _current_span.get()
+    if current is not None:
+        headers[TRACEPARENT] = current.context.traceparent()
+    return headers
+
+
+def extract(headers: Any) -> Optional[SpanContext]:
+    """
+    Return the span context of a `traceparent` in a header mapping, if any.
+    """
+    return SpanContext.parse(headers.get(TRACEPARENT)) if headers else None
+
+
+# Celery: the publishing span travels in the message headers, and every task
+# runs in a span, child of the span that sent it.
+_task_spans: Dict[str, Span] = {}
+
+
+@before_task_publish.connect(dispatch_uid="scraper.tracing.inject")
+def inject_task_context(headers: Optional[Dict[str, Any]] = None, **kwargs):
+    if headers is not None:
+        inject(headers)
+
+
+@task_prerun.connect(dispatch_uid="scraper.tracing.start_task_span")
+def start_task_span(task_id: str = None, task=None, **kwargs):
+    if get_exporter() is None:
+        return
+    # Custom message headers end up as attributes of the task request.
+    parent = SpanContext.parse(getattr(task.request, TRACEPARENT, None))
+    _task_spans[task_id] = start_span(f"task {task.name}", parent, task_id=task_id)
+
+
+@task_postrun.connect(dispatch_uid="scraper.tracing.end_task_span")
+def end_task_span(task_id: str = None, state: str = None, **kwargs):
+    task_span = _task_spans.pop(task_id, None)
+    if task_span is None:
+        return
+    task_span.set_attribute("state", state)
+    if state == "FAILURE":
+        task_span.status = "ERROR"
+    task_span.end()
+
+
+class InMemoryExporter:
+    """Keeps the exported spans in memory, for tests and local debugging."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        with self._lock:
+            self.spans.extend(spans)
+
+    def clear(self):
+        with self._lock:
+            self.spans = []
+
+
+class FileExporter:
+    """Appends the exported spans to `SCRAPE_TRACE_FILE` as JSON lines."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.SCRAPE_TRACE_FILE
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        with self._lock, open(self.path, "a") as trace_file:
+            trace_file.write(lines)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_payload(spans: List[Span]) -> Dict[str, Any]:
+    """
+    Encode spans as an OTLP/JSON `ExportTraceServiceRequest`.
+    """
+    encoded = []
+    for span in spans:
+        item = {
+            "traceId": span.context.trace_id,
+            "spanId": span.context.span_id,
+            "name": span.name,
+            # SPAN_KIND_INTERNAL
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_time),
+            "endTimeUnixNano": str(span.end_time),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+            # STATUS_CODE_OK or STATUS_CODE_ERROR
+            "status": {"code": 2, "message": span.error or ""} if span.status == "ERROR" else {"code": 1},
+        }
+        if span.parent_id:
+            item["parentSpanId"] = span.parent_id
+        encoded.append(item)
+    resource = [{"key": "service.name", "value": {"stringValue": settings.SCRAPE_TRACE_SERVICE_NAME}}]
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": resource},
+            "scopeSpans": [{"scope": {"name": "scraper"}, "spans": encoded}],
+        }]
+    }
+
+
+class OTLPExporter:
+    """
+    Sends the exported spans to an OpenTelemetry collector over OTLP/HTTP
+    (JSON encoding) at `SCRAPE_TRACE_OTLP_ENDPOINT`.
+
+    Spans are posted by a background thread, so traced requests and tasks
+    never wait for the collector; batches are dropped when
+    `SCRAPE_TRACE_OTLP_QUEUE_SIZE` of them are already waiting.
+    """
+
+    def __init__(self, endpoint: Optional[str] = None, timeout: float = 5.0):
+        import requests
+
+        self.endpoint = endpoint or settings.SCRAPE_TRACE_OTLP_ENDPOINT
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.dropped = 0
+        self._queue: "queue.Queue[List[Span]]" = queue.Queue(settings.SCRAPE_TRACE_OTLP_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += len(spans)
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="otlp-exporter", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            self.send(self._queue.get())
+
+    def send(self, spans: List[Span]):
+        """
+        Post a batch of spans to the collector, logging failures.
+        """
+        try:
+            response = self.session.post(self.endpoint, json=otlp_payload(spans), timeout=self.timeout)
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Sending {len(spans)} spans to {self.endpoint} failed: {e}")
@@ -1,10 +1,19 @@
 from django.urls import path
 
-from scraper.views import (ScrapedQuotesListView, ScrapeQuotesView,
-                           ScrapeStatusView)
+from scraper.views import (AuthorStatsView, ChangesView, QuoteHistoryView,
+                           QuoteSearchView, ScrapedQuotesListView,
+                           ScrapeEventsView, ScrapeQuotesView,
+                           ScrapeStatusView, TagCooccurrenceView, TagStatsView)
 
 urlpatterns = [
     path('scrape/', ScrapeQuotesView.as_view(), name='scrape-quotes'),
     path('scrape/<str:task_id>/', ScrapeStatusView.as_view(), name='scrape-status'),
+    path('scrape/<str:task_id>/events/', ScrapeEventsView.as_view(), name='scrape-events'),
     path('quotes/', ScrapedQuotesListView.as_view(), name='scraped-quotes'),
+    path('quotes/search/', QuoteSearchView.as_view(), name='quote-search'),
+    path('quotes/history/', QuoteHistoryView.as_view(), name='quote-history'),
+    path('changes/', ChangesView.as_view(), name='quote-changes'),
+    path('stats/tags/', TagStatsView.as_view(), name='tag-stats'),
+    path('stats/tags/<str:tag>/co-occurrence/', TagCooccurrenceView.as_view(), name='tag-co-occurrence'),
+    path('stats/authors/', AuthorStatsView.as_view(), name='author-stats'),
 ]
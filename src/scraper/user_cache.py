@@ -0,0 +1,31 @@
+from typing import Any, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+KEY_PREFIX = "auth:user"
+
+
+def user_key(user_id: Any) -> str:
+    return f"{KEY_PREFIX}:{user_id}"
+
+
+def invalidate_user(user_id: Optional[Any]):
+    """
+    Drop the cached row of a user.
+
+    The entry is dropped right away and again once the transaction commits,
+    as a request may cache the old row in between.
+    """
+    if user_id is None:
+        return
+    cache.delete(user_key(user_id))
+    transaction.on_commit(lambda: cache.delete(user_key(user_id)))
+
+
+def forget_user(sender, instance, **kwargs):
+    # Imported here: processes that never serve the API (workers, most
+    # management commands) don't load simplejwt and DRF at startup.
+    from rest_framework_simplejwt.settings import api_settings
+
+    invalidate_user(getattr(instance, api_settings.USER_ID_FIELD))
@@ -1,11 +1,13 @@
-import logging
 import random
 import time
 from typing import Optional
 
 from requests.exceptions import RequestException
 
-logger = logging.getLogger(__name__)
+from scraper.logs import EventLogger
+from scraper.tracing import span
+
+log = EventLogger(__name__)
 
 def exponential_backoff(
     max_retries: int = 3,
@@ -73,17 +75,27 @@ def retry_with_backoff(action, max_retries: int, action_name: str, *args, **kwar
 
     while retry_count <= max_retries:
         try:
-            # Attempt to execute the action
-            return action(*args, **kwargs)
+            # Attempt to execute the action, traced as a span of its own
+            with span("retry.attempt", action=action_name, attempt=retry_count + 1):
+                return action(*args, **kwargs)
         except Exception as e:
-            logger.error(f"{action_name} attempt {retry_count + 1} failed: {e}")
+            log.error(
+                "retry.failed", "%(action)s attempt %(attempt)s failed: %(error)s",
+                action=action_name, attempt=retry_count + 1, error=e,
+            )
             delay = handle_request_exception(e, retry_count, max_retries)
             if delay is None:
-                logger.error(f"Failed to complete {action_name} after {max_retries} retries.")
+                log.error(
+                    "retry.exhausted", "Failed to complete %(action)s after %(retries)s retries.",
+                    action=action_name, retries=max_retries,
+                )
                 raise Exception(
                     f"Failed to complete {action_name} after {max_retries} retries."
                 ) from e
 
             retry_count += 1
-            logger.info(f"Retrying {action_name} in {delay} seconds (attempt {retry_count + 1})...")
+            log.info(
+                "retry.scheduled", "Retrying %(action)s in %(delay).2f seconds (attempt %(attempt)s)...",
+                action=action_name, delay=delay, attempt=retry_count + 1,
+            )
             time.sleep(delay)
@@ -0,0 +1,269 @@
+import logging
+import re
+import sys
+from collections.abc import Hashable
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlsplit, urlunsplit
+
+from pydantic import (AfterValidator, ConfigDict, Field, TypeAdapter,
+                      ValidationError)
+from typing_extensions import Annotated
+
+from scraper.items import QuoteItem, TagRef
+
+logger = logging.getLogger(__name__)
+
+# Mirrors the max_length of Django's URLField/CharField columns in data.models.
+MAX_URL_LENGTH = 200
+MAX_NAME_LENGTH = 255
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_whitespace(value: str) -> str:
+    """
+    Strip a string and collapse inner whitespace runs into single spaces.
+
+    Args:
+        value: The string to normalize.
+
+    Returns:
+        The normalized string.
+    """
+    return _WHITESPACE_RE.sub(" ", value).strip()
+
+
+def normalize_url(value: str) -> str:
+    """
+    Normalize an absolute http(s) URL.
+
+    The scheme and host are lower-cased and surrounding whitespace and
+    fragments are dropped, so the same page always yields the same string.
+
+    Args:
+        value: The URL to normalize.
+
+    Returns:
+        The normalized URL.
+
+    Raises:
+        ValueError: If the value is not an absolute http(s) URL.
+    """
+    parts = urlsplit(value.strip())
+    if parts.scheme.lower() not in ("http", "https") or not parts.netloc:
+        raise ValueError("Enter a valid absolute http(s) URL.")
+    url = urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, "")
+    )
+    if len(url) > MAX_URL_LENGTH:
+        raise ValueError(f"Ensure this URL has at most {MAX_URL_LENGTH} characters.")
+    return url
+
+
+Text = Annotated[str, Field(min_length=1), AfterValidator(normalize_whitespace)]
+Name = Annotated[
+    str, Field(min_length=1, max_length=MAX_NAME_LENGTH), AfterValidator(normalize_whitespace)
+]
+Url = Annotated[str, AfterValidator(normalize_url)]
+
+ItemErrors = Dict[str, List[str]]
+
+# Mark a key missing from a dictionary item, and an unhashable tag value.
+_MISSING = object()
+_UNHASHABLE = object()
+
+
+class _Column:
+    """
+    Validator of one field of the items, compiled once at import time.
+
+    A whole column is checked with one compiled call; only when it fails are
+    the values re-validated one by one to tell the valid ones apart.
+    """
+
+    def __init__(self, field_type: Any):
+        config = ConfigDict(str_strip_whitespace=True)
+        self.batch = TypeAdapter(List[field_type], config=config)
+        self.value = TypeAdapter(field_type, config=config)
+
+    def _validate(self, values: List[Any]) -> Tuple[List[Any], Dict[int, List[str]]]:
+        try:
+            return self.batch.validate_python(values), {}
+        except ValidationError:
+            pass
+        normalized, errors = [], {}
+        for index, value in enumerate(values):
+            try:
+                normalized.append(self.value.validate_python(value))
+            except ValidationError as e:
+                normalized.append(None)
+                errors[index] = [detail["msg"] for detail in e.errors(include_url=False)]
+        return normalized, errors
+
+    def normalize(self, values: List[Any], intern: bool = False) -> Tuple[List[Any], Dict[int, List[str]]]:
+        """
+        Validate and normalize a column of values.
+
+        Repeated strings (authors, URLs, tags) are validated once and, with
+        `intern`, share one interned normalized string.
+
+        Returns:
+            The normalized values (None where invalid) and the messages of
+            the invalid ones, by index.
+        """
+        distinct = list(dict.fromkeys(
+            value for value in values if value is None or (value is not _MISSING and isinstance(value, str))
+        ))
+        normalized, failed = self._validate(distinct)
+        by_value = {}
+        for index, (raw, value) in enumerate(zip(distinct, normalized)):
+            if index in failed:
+                by_value[raw] = (None, failed[index])
+            else:
+                by_value[raw] = (sys.intern(value) if intern and isinstance(value, str) else value, None)
+
+        results, errors = [], {}
+        for index, value in enumerate(values):
+            if value is _MISSING:
+                result, messages = None, ["Field required"]
+            elif value is None or isinstance(value, str):
+                result, messages = by_value[value]
+            else:
+                (result,), item_errors = self._validate([value])
+                messages = item_errors.get(0)
+            results.append(result)
+            if messages:
+                errors[index] = messages
+        return results, errors
+
+
+_TEXT = _Column(Text)
+_NAME = _Column(Name)
+_URL = _Column(Url)
+_OPTIONAL_URL = _Column(Optional[Url])
+
+
+def _field(source: Any, name: str) -> Any:
+    if isinstance(source, dict):
+        return source.get(name, _MISSING)
+    return getattr(source, name, _MISSING)
+
+
+def _from_dict(data: Dict[str, Any]) -> QuoteItem:
+    """
+    Wrap a dictionary item in a QuoteItem holding its raw values.
+    """
+    item = QuoteItem.__new__(QuoteItem)
+    for name in ("text", "author", "author_url"):
+        setattr(item, name, data.get(name, _MISSING))
+    # Older items use `goodreads_link`, the models store `goodreads_url`.
+    item.goodreads_url = data.get("goodreads_url", data.get("goodreads_link"))
+    item.tags = data.get("tags", ())
+    return item
+
+
+def _tag_key(tag: Any) -> Tuple[Any, Any]:
+    # Unhashable values can't be strings: they are reported as invalid.
+    return tuple(
+        value if value is _MISSING or isinstance(value, Hashable) else _UNHASHABLE
+        for value in (_field(tag, "name"), _field(tag, "url"))
+    )
+
+
+def _normalize_tags(items: List[QuoteItem], errors: Dict[int, ItemErrors]) -> List[Tuple[TagRef, ...]]:
+    """
+    Validate the tags of the items, sharing one TagRef per distinct tag.
+
+    Returns:
+        The normalized tags of each item (empty for invalid items).
+    """
+    keys = {}
+    originals = {}
+    for item in items:
+        if isinstance(item.tags, (list, tuple)):
+            for tag in item.tags:
+                key = _tag_key(tag)
+                keys.setdefault(key, None)
+                if isinstance(tag, TagRef):
+                    originals.setdefault(key, tag)
+    keys = list(keys)
+    names, name_errors = _NAME.normalize([key[0] for key in keys], intern=True)
+    urls, url_errors = _URL.normalize([key[1] for key in keys], intern=True)
+
+    refs: Dict[Tuple[str, str], TagRef] = {}
+    tag_refs = {}
+    for index, key in enumerate(keys):
+        if index in name_errors or index in url_errors:
+            tag_refs[key] = {"name": name_errors.get(index), "url": url_errors.get(index)}
+            continue
+        normalized = (names[index], urls[index])
+        original = originals.get(key)
+        if original is not None and (original.name, original.url) == normalized:
+            # Already normalized: keep the instance the parser shares.
+            tag_refs[key] = refs.setdefault(normalized, original)
+        else:
+            tag_refs[key] = refs.setdefault(normalized, TagRef(*normalized))
+
+    tags = []
+    for index, item in enumerate(items):
+        if not isinstance(item.tags, (list, tuple)):
+            errors.setdefault(index, {})["tags"] = ["Input should be a valid list"]
+            tags.append(())
+            continue
+        item_tags = []
+        for position, tag in enumerate(item.tags):
+            ref = tag_refs[_tag_key(tag)]
+            if isinstance(ref, dict):
+                for name, messages in ref.items():
+                    if messages:
+                        errors.setdefault(index, {})[f"tags.{position}.{name}"] = messages
+            else:
+                item_tags.append(ref)
+        tags.append(tuple(item_tags))
+    return tags
+
+
+def validate_quotes(
+    items: Iterable[Union[QuoteItem, Dict[str, Any]]]
+) -> Tuple[List[QuoteItem], Dict[int, ItemErrors]]:
+    """
+    Validate and normalize a batch of scraped quotes at once.
+
+    Each field is checked for the whole batch with one compiled validator
+    call, and repeated values (authors, URLs, tags) are checked once. Valid
+    QuoteItems are normalized in place and returned as they are, so a crawl
+    holds no second copy of its items; their tags are shared TagRefs and
+    their repeated strings interned. Dictionaries are turned into QuoteItems.
+
+    Args:
+        items: Quote items as produced by the parsers (QuoteItem objects, or
+            dictionaries for items read back from JSON).
+
+    Returns:
+        A tuple containing the valid quotes and a mapping of the index of
+        each rejected item to its `{field: [messages]}` errors.
+    """
+    items = [item if isinstance(item, QuoteItem) else _from_dict(item) for item in items]
+    errors: Dict[int, ItemErrors] = {}
+    columns = {}
+    for field, column, intern in (
+        ("text", _TEXT, False),
+        ("author", _NAME, True),
+        ("author_url", _URL, True),
+        ("goodreads_url", _OPTIONAL_URL, True),
+    ):
+        values, field_errors = column.normalize([getattr(item, field) for item in items], intern=intern)
+        columns[field] = values
+        for index, messages in field_errors.items():
+            errors.setdefault(index, {})[field] = messages
+    tags = _normalize_tags(items, errors)
+
+    valid_quotes = []
+    for index, item in enumerate(items):
+        if index in errors:
+            continue
+        for field, values in columns.items():
+            setattr(item, field, values[index])
+        item.tags = tags[index]
+        valid_quotes.append(item)
+    return valid_quotes, errors
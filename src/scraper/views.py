@@ -1,13 +1,38 @@
+import json
+from typing import Any, Callable, Dict, Optional
+
 from celery.result import AsyncResult
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from data.models import Quote
-from data.serializers import QuoteSerializer
-from scraper.tasks.scrape_quotes import scrape_quotes_task
+from data.history import serialize_versions, versions_as_of
+from data.models import Quote, ScrapeRun, Tag
+from data.search import search_quotes
+from data.serializers import QuoteSerializer, serialize_quotes
+from scraper.auth.quote_scraper_auth import QuoteScraperAuth
+from scraper.budget import (BUDGET_STATE, CANCELLED_STATE, LIMITS,
+                            request_cancel)
+from scraper.changes import changes_since
+from scraper.monitoring import DRIFT_STATE
+from scraper.progress import ProgressReporter
+from scraper.renderers import EventStreamRenderer, ORJSONRenderer
+from scraper.routers import pin_primary
+from scraper.singleflight import SingleFlight
+from scraper.stats import author_counts, co_occurrence, tag_counts
+from scraper.tracing import extract, span
+from scraping_project import celery_app
+
+SCRAPE_QUOTES_TASK = "scraper.tasks.scrape_quotes.scrape_quotes_task"
+
+# Custom states of the tasks whose crawl stopped early, with partial results.
+STOPPED_STATES = (DRIFT_STATE, BUDGET_STATE, CANCELLED_STATE)
 
 
 class ScrapeQuotesView(APIView):
@@ -17,11 +42,25 @@ class ScrapeQuotesView(APIView):
     def post(self, request):
         """
         Trigger the scraping process by enqueuing a Celery task.
+
+        Identical triggers (same portal, username and parameters) share the
+        in-flight task instead of enqueuing another crawl. With `min_interval`
+        (seconds), a crawl that completed within that window is reused too.
+        `max_pages`, `max_seconds` and `max_bytes` lower the budget of the job.
+        The trigger is traced, continuing the trace of a `traceparent` header;
+        the enqueued task carries its context.
         Args:
             request (Request): The HTTP request object.
         Returns:
             Response: A response indicating a task id for the scraping process.
         """
+        with span("api.scrape", parent=extract(request.headers)) as trigger_span:
+            response = self._trigger(request)
+            trigger_span.set_attribute("status_code", response.status_code)
+            trigger_span.set_attribute("task_id", response.data.get("task_id"))
+            return response
+
+    def _trigger(self, request):
         # In a real-world application, we would use a more secure method to handle credentials.
         # For example, we might use OAuth or another secure authentication method.
         username = request.data.get('username')
@@ -33,9 +72,47 @@ class ScrapeQuotesView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Enqueue the scrape Celery task
-        task = scrape_quotes_task.delay(username, password)
-        return Response({"task_id": task.id}, status=status.HTTP_202_ACCEPTED)
+        try:
+            min_interval = int(request.data.get('min_interval', 0))
+            if min_interval < 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "min_interval must be a non-negative integer."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            budget = {name: int(request.data[name]) for name in LIMITS if name in request.data}
+            if any(limit <= 0 for limit in budget.values()):
+                raise ValueError
+        except (TypeError, ValueError):
+            return Response(
+                {"error": f"{', '.join(LIMITS)} must be positive integers."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        parameters = {
+            key: value for key, value in request.data.items()
+            if key not in ('username', 'password', 'min_interval')
+        }
+        flight = SingleFlight(QuoteScraperAuth.PORTAL_URL, username, parameters)
+
+        # Enqueue the scrape Celery task. It is sent by name, so the API
+        # processes never import the crawl stack.
+        def enqueue(task_id):
+            celery_app.send_task(
+                SCRAPE_QUOTES_TASK,
+                args=(username, password),
+                kwargs={"flight_key": flight.key, "budget": budget},
+                task_id=task_id,
+            )
+
+        task_id, deduplicated = flight.run(enqueue, min_interval=min_interval)
+        return Response(
+            {"task_id": task_id, "deduplicated": deduplicated},
+            status=status.HTTP_202_ACCEPTED
+        )
 
 
 class ScrapeStatusView(APIView):
@@ -45,28 +122,147 @@ class ScrapeStatusView(APIView):
     def get(self, request, task_id):
         """
         API endpoint to check the status of a scraping task.
+
+        With `?wait=<seconds>&since=<version>` the request is held open
+        (long-poll) until the task publishes a progress snapshot newer than
+        `since`, instead of clients polling in a tight loop. A running task
+        that published progress is reported in the PROGRESS state.
         Args:
             task_id (str): The ID of the Celery task.
         Returns:
             Response: A response indicating the status of the task.
         """
+        try:
+            wait = min(float(request.query_params.get('wait', 0)), settings.SCRAPE_PROGRESS_MAX_WAIT)
+            since = int(request.query_params.get('since', 0))
+        except ValueError:
+            return Response(
+                {"error": "wait and since must be numbers."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if wait > 0:
+            progress = ProgressReporter.wait(task_id, since, wait)
+        else:
+            progress = ProgressReporter.get(task_id)
+
+        # A task that published progress reports its own state and result,
+        # so the result backend is only asked about the others.
+        if progress:
+            response = self.status_response(progress["state"], progress["result"], progress)
+            run_id = progress["metrics"].get("run_id")
+            if progress["finished"] and run_id and settings.DATABASE_REPLICA_ALIAS:
+                # The client reads its results from the primary until replicated.
+                pin_primary(response, run_id)
+            return response
         task_result = AsyncResult(task_id)
-        if task_result.state == 'SUCCESS':
+        return self.status_response(task_result.state, task_result.info, progress)
+
+    @staticmethod
+    def status_response(state: str, result: Any, progress: Optional[Dict[str, Any]]) -> Response:
+        """
+        Build the status response of a task in `state`.
+        """
+        if state == 'FAILURE':
             return Response(
-                {"status": task_result.state, "result": task_result.result},
-                status=status.HTTP_200_OK
+                {"status": state, "error": str(result), "progress": progress},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        if task_result.state == 'PENDING':
+        if state == 'SUCCESS' or state in STOPPED_STATES:
             return Response(
-                {"status": task_result.state},
+                {"status": state, "result": result, "progress": progress},
                 status=status.HTTP_200_OK
             )
-        if task_result.state == 'FAILURE':
+        return Response({"status": state, "progress": progress}, status=status.HTTP_200_OK)
+
+    def delete(self, request, task_id):
+        """
+        Cancel a scraping task.
+
+        The crawl stops at its next page: the quotes scraped until then are
+        saved and reported, and the task ends in the CANCELLED state. A task
+        still queued ends without crawling.
+        Args:
+            task_id (str): The ID of the Celery task.
+        Returns:
+            Response: 202 once the cancellation is requested, 409 if the task already finished.
+        """
+        task_result = AsyncResult(task_id)
+        if task_result.ready() or task_result.state in STOPPED_STATES:
             return Response(
-                {"status": task_result.state, "error": str(task_result.info)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {"error": "The task already finished.", "status": task_result.state},
+                status=status.HTTP_409_CONFLICT
             )
-        return Response({"status": task_result.state}, status=status.HTTP_200_OK)
+        request_cancel(task_id)
+        return Response({"task_id": task_id, "status": "CANCELLING"}, status=status.HTTP_202_ACCEPTED)
+
+
+class ScrapeEventsView(APIView):
+    """API endpoint streaming the progress of a scraping task as server-sent events."""
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [EventStreamRenderer, ORJSONRenderer]
+
+    def get(self, request, task_id):
+        """
+        Stream progress snapshots of a scraping task as they are published.
+
+        One `progress` event is sent per new snapshot and the stream closes
+        once the task finishes. Reconnecting clients resume from the
+        `Last-Event-ID` header. The view only authenticates the request.
+        Under ASGI the stream is an async iterator, served on the event loop
+        without holding a worker thread; under WSGI, which would buffer an
+        async iterator until it ends, it is a blocking iterator holding a
+        worker thread while the stream is open.
+        Args:
+            task_id (str): The ID of the Celery task.
+        Returns:
+            StreamingHttpResponse: A `text/event-stream` response.
+        """
+        try:
+            since = int(request.headers.get('Last-Event-ID', 0))
+        except ValueError:
+            since = 0
+
+        if isinstance(request._request, ASGIRequest):
+            events = self.stream_events(task_id, since)
+        else:
+            events = self.iter_events(task_id, since)
+        response = StreamingHttpResponse(events, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Ask reverse proxies (e.g. nginx) not to buffer the stream.
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @staticmethod
+    def _event(progress: Optional[Dict[str, Any]]) -> str:
+        if progress is None:
+            # Comment lines keep idle connections from being closed.
+            return ": keep-alive\n\n"
+        return f"id: {progress['version']}\nevent: progress\ndata: {json.dumps(progress)}\n\n"
+
+    @classmethod
+    async def stream_events(cls, task_id, since):
+        """
+        Yield server-sent events until the task finishes or the stream times out.
+        """
+        yield f"retry: {int(settings.SCRAPE_PROGRESS_MAX_WAIT * 1000)}\n\n"
+        updates = ProgressReporter.updates(
+            task_id, since, settings.SCRAPE_EVENTS_MAX_DURATION, keepalive=settings.SCRAPE_PROGRESS_MAX_WAIT
+        )
+        async for progress in updates:
+            yield cls._event(progress)
+
+    @classmethod
+    def iter_events(cls, task_id, since):
+        """
+        Blocking counterpart of `stream_events`, for WSGI servers.
+        """
+        yield f"retry: {int(settings.SCRAPE_PROGRESS_MAX_WAIT * 1000)}\n\n"
+        updates = ProgressReporter.stream(
+            task_id, since, settings.SCRAPE_EVENTS_MAX_DURATION, keepalive=settings.SCRAPE_PROGRESS_MAX_WAIT
+        )
+        for progress in updates:
+            yield cls._event(progress)
 
 
 class ScrapedQuotesListView(ListAPIView):
@@ -76,3 +272,171 @@ class ScrapedQuotesListView(ListAPIView):
     permission_classes = [IsAuthenticated]
     queryset = Quote.objects.all()
     serializer_class = QuoteSerializer
+
+    def list(self, request, *args, **kwargs):
+        """
+        List the scraped quotes using the read-only serialization fast path.
+        Args:
+            request (Request): The HTTP request object.
+        Returns:
+            Response: A response containing the serialized quotes.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(serialize_quotes(queryset), status=status.HTTP_200_OK)
+
+
+class ChangesView(APIView):
+    """API endpoint serving the quotes changed since a scrape run."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Return the net changes of the runs finished after `?since=<run_id>`.
+
+        Consumers store the returned `until` run and pass it as `since` on
+        their next call instead of downloading the whole corpus again.
+        Args:
+            request (Request): The HTTP request object.
+        Returns:
+            Response: The inserted, updated and removed quotes.
+        """
+        try:
+            since = int(request.query_params.get('since', 0))
+            if since < 0:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"error": "since must be a non-negative integer."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(changes_since(since), status=status.HTTP_200_OK)
+
+
+class QuoteHistoryView(APIView):
+    """API endpoint serving the corpus as it was after a scrape run."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Return the quotes of the corpus as of `?run=<run_id>`, `?limit=` at
+        most from `?offset=`, in the order they were first scraped.
+
+        Each quote carries the run its state was recorded by (`since_run`).
+        Runs whose history was pruned answer 410.
+        Args:
+            request (Request): The HTTP request object.
+        Returns:
+            Response: The run, the number of quotes and a page of quotes.
+        """
+        try:
+            run_id = int(request.query_params['run'])
+            limit = int(request.query_params.get('limit', settings.HISTORY_PAGE_SIZE))
+            offset = int(request.query_params.get('offset', 0))
+            if run_id <= 0 or offset < 0 or not 0 < limit <= settings.HISTORY_MAX_PAGE_SIZE:
+                raise ValueError
+        except (KeyError, ValueError):
+            return Response(
+                {"error": f"run is required; limit must be between 1 and {settings.HISTORY_MAX_PAGE_SIZE}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        run = get_object_or_404(ScrapeRun, pk=run_id, finished_at__isnull=False)
+        if run.history_pruned:
+            return Response(
+                {"error": f"The history of run {run_id} was pruned."},
+                status=status.HTTP_410_GONE
+            )
+        versions = versions_as_of(run_id)
+        return Response(
+            {
+                "run": run_id,
+                "count": versions.count(),
+                "quotes": serialize_versions(versions[offset:offset + limit]),
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class QuoteSearchView(APIView):
+    """API endpoint to search the scraped quotes."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Search the quotes by text, author and tags, with facet counts.
+
+        Query parameters: `q` (words to match), `author`, `tag` (repeatable,
+        all must match), `limit` and `offset`.
+        Args:
+            request (Request): The HTTP request object.
+        Returns:
+            Response: The total count, one page of quotes and the author and tag facets.
+        """
+        try:
+            limit = int(request.query_params.get('limit', settings.SEARCH_PAGE_SIZE))
+            offset = int(request.query_params.get('offset', 0))
+            if not 0 < limit <= settings.SEARCH_MAX_PAGE_SIZE or offset < 0:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"error": f"limit must be between 1 and {settings.SEARCH_MAX_PAGE_SIZE} "
+                          "and offset a non-negative integer."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = search_quotes(
+            query=request.query_params.get('q', ''),
+            author=request.query_params.get('author'),
+            tags=request.query_params.getlist('tag'),
+            limit=limit,
+            offset=offset,
+        )
+        return Response(results, status=status.HTTP_200_OK)
+
+
+class StatsView(APIView):
+    """Base of the read-only endpoints serving the precomputed quote statistics."""
+    permission_classes = [IsAuthenticated]
+    # The statistic served, called with the limit and the URL parameters.
+    stats_function: Optional[Callable[..., Any]] = None
+
+    def get(self, request, **kwargs):
+        """
+        Return the top rows of a statistic, `?limit=` rows at most.
+        Args:
+            request (Request): The HTTP request object.
+        Returns:
+            Response: The statistic, served from the cache while no run changed it.
+        """
+        try:
+            limit = int(request.query_params.get('limit', settings.STATS_PAGE_SIZE))
+            if not 0 < limit <= settings.STATS_MAX_PAGE_SIZE:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"error": f"limit must be between 1 and {settings.STATS_MAX_PAGE_SIZE}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        assert self.stats_function is not None, (
+            f"'{self.__class__.__name__}' should set the `stats_function` attribute."
+        )
+        return Response(self.stats_function(limit, **kwargs), status=status.HTTP_200_OK)
+
+
+def _tag_co_occurrence(limit: int, tag: str):
+    return co_occurrence(get_object_or_404(Tag, name=tag), limit)
+
+
+class TagStatsView(StatsView):
+    """API endpoint serving the number of quotes per tag."""
+    stats_function = staticmethod(tag_counts)
+
+
+class AuthorStatsView(StatsView):
+    """API endpoint serving the number of quotes per author."""
+    stats_function = staticmethod(author_counts)
+
+
+class TagCooccurrenceView(StatsView):
+    """API endpoint serving the tags found on the same quotes as a tag."""
+    stats_function = staticmethod(_tag_co_occurrence)
@@ -0,0 +1,68 @@
+import logging
+import time
+from importlib import import_module
+from typing import Callable, Dict
+
+from django.conf import settings
+
+from scraper.auth.session_cache import session_cache
+from scraper.portals.registry import load_portals, portals
+
+logger = logging.getLogger(__name__)
+
+
+def _import_crawl_stack():
+    load_portals()
+    import_module("scraper.tasks")
+
+
+def _warm_up_parsers():
+    for name in portals.names():
+        for parser_class in portals.get(name).parser_classes.values():
+            parser_class.warm_up()
+
+
+def _connect_portals():
+    for name in portals.names():
+        portal = portals.get(name)
+        try:
+            auth = portal.auth_class(portal.base_url)
+            # The connection stays open in the session's pool.
+            auth.session.get(portal.base_url, timeout=settings.SCRAPE_WARMUP_TIMEOUT).close()
+        except Exception as e:
+            logger.warning(f"Could not connect to {name} during the warm-up: {e}")
+            continue
+        session_cache.put_connected(portal.base_url, auth)
+
+
+STEPS: Dict[str, Callable[[], None]] = {
+    "imports": _import_crawl_stack,
+    "parsers": _warm_up_parsers,
+    "connections": _connect_portals,
+}
+
+
+def warm_up() -> Dict[str, float]:
+    """
+    Prepare a worker process for its first crawl.
+
+    Imports the portals and the tasks, runs a first parse with every parser
+    backend, and opens a connection to every portal, kept in the session
+    cache for the first session of the next crawl. A failed step is logged
+    and skipped: a worker that could not warm up still runs its tasks.
+
+    Returns:
+        The seconds each step took, by step name.
+    """
+    timings = {}
+    for name, step in STEPS.items():
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e}")
+        timings[name] = time.perf_counter() - start
+    logger.info(
+        "Worker warmed up: " + ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in timings.items())
+    )
+    return timings
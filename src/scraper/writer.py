@@ -0,0 +1,213 @@
+import contextvars
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from data.models import ScrapeRun
+from scraper.portals.registry import PortalDefinition, get_portal
+from scraper.progress import ProgressReporter
+from scraper.tracing import span
+
+logger = logging.getLogger(__name__)
+
+Job = Tuple[Callable[..., Any], tuple, dict, Future, contextvars.Context]
+
+
+def persist_run(
+    definition: PortalDefinition,
+    items: List[Any],
+    task_id: Optional[str] = None,
+    full_crawl: bool = False,
+    progress: Optional[ProgressReporter] = None,
+) -> Dict[str, Any]:
+    """
+    Write the validated items of a crawl as a new run.
+
+    Args:
+        definition: The crawled portal.
+        items: The validated items.
+        task_id: The crawl task, if any.
+        full_crawl: Whether every page of the portal was crawled and every
+            scraped item was valid.
+        progress: Reporter notified of the persisted items, if any.
+
+    Returns:
+        The run metrics.
+    """
+    with span("db.persist_run", portal=definition.name, items=len(items)) as persist_span:
+        run = ScrapeRun.objects.create(task_id=task_id, portal=definition.name)
+        try:
+            metrics = definition.save(items, progress, run=run)
+        except Exception:
+            # Written in autocommit (not by the batch writer, which rolls the
+            # run back), what was saved stays: finish the run as a partial
+            # crawl, so it doesn't hold back the changes feed.
+            if not transaction.get_connection().in_atomic_block:
+                _finish(definition, run, False)
+            raise
+        # Only a full crawl that saved every item can tell which items
+        # disappeared.
+        _finish(definition, run, full_crawl and not metrics.get("quotes_failed"))
+        persist_span.set_attribute("run_id", run.pk)
+    metrics["run_id"] = run.pk
+    return metrics
+
+
+def close_abandoned_runs() -> List[int]:
+    """
+    Finish the abandoned runs (see `ScrapeRun.abandoned_before`) as partial crawls.
+
+    The quotes they saved before their writer died are committed, with
+    their changes: finishing the runs counts and publishes those changes,
+    without removing any quote.
+
+    Returns:
+        The ids of the closed runs.
+    """
+    closed = []
+    abandoned = ScrapeRun.objects.filter(finished_at__isnull=True, started_at__lt=ScrapeRun.abandoned_before())
+    for run_id in abandoned.order_by("pk").values_list("pk", flat=True):
+        with transaction.atomic():
+            run = ScrapeRun.objects.select_for_update().filter(pk=run_id, finished_at__isnull=True).first()
+            if run is None:
+                # Closed by a concurrent caller.
+                continue
+            try:
+                definition = get_portal(run.portal)
+            except KeyError:
+                definition = None
+            if definition:
+                _finish(definition, run, False)
+            else:
+                ScrapeRun.objects.filter(pk=run.pk).update(finished_at=timezone.now())
+        logger.warning(f"Closed abandoned run {run_id} of {run.portal} as a partial crawl.")
+        closed.append(run_id)
+    return closed
+
+
+def _finish(definition: PortalDefinition, run: ScrapeRun, full_crawl: bool):
+    if definition.finish_run:
+        definition.finish_run(run, full_crawl)
+    else:
+        # Runs of portals without changesets are complete once saved.
+        ScrapeRun.objects.filter(pk=run.pk).update(finished_at=timezone.now())
+
+
+class BatchWriter:
+    """
+    Runs database writes on a single thread, grouped into large transactions.
+
+    Jobs submitted while a transaction is being written queue up and are
+    written together by the next one, up to `SCRAPE_WRITER_MAX_JOBS` jobs or
+    `SCRAPE_WRITER_MAX_WAIT` seconds of waiting for more. Each job runs in
+    its own savepoint, so a failing job is rolled back alone. Jobs run in
+    the context they were submitted from, so their spans join the trace of
+    the submitting task.
+    """
+
+    def __init__(self, autostart: bool = True):
+        self.autostart = autostart
+        self.transactions = 0
+        self.jobs = 0
+        self._queue: "queue.Queue[Job]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Queue `func(*args, **kwargs)` for the writer thread.
+
+        Returns:
+            A future resolved with the result once its transaction commits.
+        """
+        future: Future = Future()
+        self._queue.put((func, args, kwargs, future, contextvars.copy_context()))
+        if self.autostart:
+            self._start()
+        return future
+
+    def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run `func` on the writer thread and wait for its result.
+        """
+        return self.submit(func, *args, **kwargs).result()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="batch-writer", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            # The thread holds its own connection for its whole life.
+            close_old_connections()
+            self.drain(block=True)
+
+    def drain(self, block: bool = False) -> int:
+        """
+        Write the next group of queued jobs in one transaction.
+
+        Args:
+            block: Wait for a first job (and up to `SCRAPE_WRITER_MAX_WAIT`
+                for more) instead of only taking the queued ones.
+
+        Returns:
+            The number of jobs written.
+        """
+        try:
+            jobs = [self._queue.get(block=block)]
+        except queue.Empty:
+            return 0
+        deadline = time.monotonic() + settings.SCRAPE_WRITER_MAX_WAIT
+        while len(jobs) < settings.SCRAPE_WRITER_MAX_JOBS:
+            try:
+                remaining = deadline - time.monotonic()
+                jobs.append(self._queue.get(timeout=remaining) if block and remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._write(jobs)
+        return len(jobs)
+
+    @staticmethod
+    def _run_job(func: Callable[..., Any], args: tuple, kwargs: dict, group: int) -> Any:
+        with span("db.write_job", job=func.__name__, group=group):
+            return func(*args, **kwargs)
+
+    def _write(self, jobs: List[Job]):
+        outcomes = []
+        try:
+            with transaction.atomic():
+                for func, args, kwargs, future, context in jobs:
+                    try:
+                        with transaction.atomic():
+                            result = context.run(self._run_job, func, args, kwargs, len(jobs))
+                            outcomes.append((future, result, None))
+                    except Exception as e:
+                        logger.error(f"Write job {func.__name__} failed: {e}")
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            logger.error(f"Writing a group of {len(jobs)} jobs failed: {e}")
+            for *_, future, _ in jobs:
+                future.set_exception(e)
+            return
+
+        self.transactions += 1
+        self.jobs += len(jobs)
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+# The single writer of a process. Only the worker consuming
+# `SCRAPE_WRITER_QUEUE` should write through it.
+writer = BatchWriter()
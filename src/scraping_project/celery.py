@@ -4,6 +4,7 @@ import logging
 import os
 
 from celery import Celery
+from celery.signals import worker_process_init
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +25,18 @@ app.conf.update(
     worker_log_level="INFO",  # Set log level to INFO
 )
 
+
+@worker_process_init.connect
+def warm_up_worker_process(**kwargs):
+    # Run in every pool process: connections can't be shared across a fork.
+    from django.conf import settings
+
+    if settings.SCRAPE_WORKER_WARMUP:
+        from scraper.warmup import warm_up
+
+        warm_up()
+
+
 @app.task(bind=True)
 def debug_task(self):
     logger.info(f'Request: {self.request!r}')
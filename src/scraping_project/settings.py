@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +48,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # Compress large API payloads (e.g. the quote list) before anything else
+    # reads the response body.
+    "scraper.middleware.LargeResponseGZipMiddleware",
+    # Safe API requests read from the replica, if any.
+    "scraper.middleware.ReplicaReadsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -77,12 +84,42 @@ WSGI_APPLICATION = "scraping_project.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Tests must not depend on a running Redis server, and only read from the
+# replica where they enable it.
+TESTING = 'test' in sys.argv[1:2]
+
+# Connections are kept for DATABASE_CONN_MAX_AGE seconds and checked before
+# being reused. With DATABASE_REPLICA_NAME set, the safe requests under
+# DATABASE_REPLICA_PATH_PREFIX (the API, not the admin) read from a replica
+# (see scraper.routers.ReadReplicaRouter). A client that waited for a run
+# reads from the primary until the replica has it: the status endpoint sets
+# a cookie with the run id for DATABASE_REPLICA_STICKY_SECONDS, and clients
+# without cookies send it in the X-Scrape-Run header. Reads also stay on the
+# primary while the replica fails the health check, repeated every
+# DATABASE_REPLICA_HEALTH_CHECK_INTERVAL seconds. Locally, the replica can be
+# a copy of db.sqlite3 or db.sqlite3 itself; tests get a replica alias
+# mirroring the test database.
+DATABASE_CONN_MAX_AGE = int(os.environ.get('DATABASE_CONN_MAX_AGE', '60'))
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
     }
 }
+DATABASE_REPLICA_NAME = os.environ.get('DATABASE_REPLICA_NAME')
+DATABASE_REPLICA_ALIAS = 'replica' if DATABASE_REPLICA_NAME and not TESTING else None
+if DATABASE_REPLICA_NAME or TESTING:
+    DATABASES['replica'] = {
+        **DATABASES["default"],
+        "NAME": DATABASE_REPLICA_NAME or DATABASES["default"]["NAME"],
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ['scraper.routers.ReadReplicaRouter']
+DATABASE_REPLICA_PATH_PREFIX = '/api/'
+DATABASE_REPLICA_STICKY_SECONDS = 10
+DATABASE_REPLICA_HEALTH_CHECK_INTERVAL = 30
 
 
 # Password validation
@@ -128,15 +165,268 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'scraper.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'scraper.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+}
+
+# API users are resolved from their token through the cache for
+# API_USER_CACHE_TIMEOUT seconds. Saving or deleting a user drops its entry.
+API_USER_CACHE_TIMEOUT = 60
+
+# Redis backs both the Celery broker and the shared cache used for locks.
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'{REDIS_URL}/1',
+    }
 }
+if TESTING:
+    CACHES['default'] = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+# Leases (single-flight triggers, the scheduler lock) are plain strings on
+# this Redis, set and released atomically (see scraper.locks). Without it
+# they live in the default cache, which must then be LocMemCache.
+SCRAPE_LOCK_REDIS_URL = None if TESTING else f'{REDIS_URL}/1'
+
+# How scrape results are written: "direct" (each crawl task writes its own
+# run) or "single-writer", for SQLite with several workers. In the latter,
+# every run is written by the worker consuming SCRAPE_WRITER_QUEUE (crawl
+# tasks hand it their items without waiting, and it reports the final state
+# of the crawl once the run committed), which must be started alone
+# and with threads, e.g.
+#   celery -A scraping_project worker -Q db-writes --pool threads --concurrency 16
+# Its writer thread groups up to SCRAPE_WRITER_MAX_JOBS runs (waiting at most
+# SCRAPE_WRITER_MAX_WAIT seconds for more) into one transaction.
+SCRAPE_WRITE_MODE = os.environ.get('SCRAPE_WRITE_MODE', 'direct')
+SCRAPE_WRITER_QUEUE = 'db-writes'
+SCRAPE_WRITER_MAX_JOBS = 50
+SCRAPE_WRITER_MAX_WAIT = 0.2
+
+# Pragmas applied to every SQLite connection. WAL lets API readers run
+# while a run is written.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+    'mmap_size': 256 * 1024 * 1024,
+} if SCRAPE_WRITE_MODE == 'single-writer' else {}
 
 # Celery settings
-CELERY_BROKER_URL = 'redis://localhost:6379/0'  # Redis URL
+CELERY_BROKER_URL = f'{REDIS_URL}/0'  # Redis URL
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
-CELERY_RESULT_BACKEND = 'django-db'
\ No newline at end of file
+CELERY_RESULT_BACKEND = 'django-db'
+# Pool processes are replaced after a task once their resident memory passed
+# this many KiB, so leaked parse trees never take the worker down.
+CELERY_WORKER_MAX_MEMORY_PER_CHILD = int(os.environ.get('CELERY_WORKER_MAX_MEMORY_PER_CHILD', 1024 * 1024))
+CELERY_TASK_ROUTES = {
+    'scraper.tasks.persist.persist_run_task': {'queue': SCRAPE_WRITER_QUEUE},
+}
+# Periodic tasks, run by `celery -A scraping_project beat`.
+CELERY_BEAT_SCHEDULE = {
+    'prune-quote-history': {'task': 'scraper.tasks.history.prune_history_task', 'schedule': 24 * 60 * 60},
+    'compact-quote-history': {'task': 'scraper.tasks.history.compact_history_task', 'schedule': 24 * 60 * 60},
+}
+
+# Scraper settings
+# How long (in seconds) a scrape trigger holds its single-flight lease. Duplicate
+# triggers are answered with the in-flight task id until the crawl finishes or
+# the lease expires.
+SCRAPE_SINGLEFLIGHT_LEASE = 30 * 60
+# How long (in seconds) a completed crawl is remembered, so triggers with a
+# `min_interval` can reuse it. Longer intervals are capped at this.
+SCRAPE_SINGLEFLIGHT_RECENT_TTL = 24 * 60 * 60
+
+# Minimum number of seconds between two progress snapshots published by a task,
+# and how long the last snapshot is kept once the task is gone.
+SCRAPE_PROGRESS_INTERVAL = 1.0
+SCRAPE_PROGRESS_TTL = 24 * 60 * 60
+# Snapshots are pushed to waiting readers over Redis pub/sub. Without it
+# (tests), long-poll and event-stream requests poll the cache every
+# SCRAPE_PROGRESS_POLL_INTERVAL seconds instead.
+SCRAPE_PROGRESS_REDIS_URL = None if TESTING else f'{REDIS_URL}/1'
+SCRAPE_PROGRESS_POLL_INTERVAL = 0.5
+# The longest a long-poll request is kept open (and the keep-alive interval of
+# event streams), and the longest an event stream is kept open.
+SCRAPE_PROGRESS_MAX_WAIT = 30
+SCRAPE_EVENTS_MAX_DURATION = 10 * 60
+
+# Maximum number of tag identities (name -> pk) each worker process keeps cached.
+SCRAPE_IDENTITY_CACHE_SIZE = 10_000
+
+# Parser used by the scrape jobs: "bs4" (BeautifulSoup, whole pages) or "lxml"
+# (incremental parsing while the page streams in).
+SCRAPE_PARSER_BACKEND = os.environ.get('SCRAPE_PARSER_BACKEND', 'bs4')
+
+# Structure drift circuit breaker. A page counts as collapsed when its valid
+# items or a field fill rate drop below SCRAPE_DRIFT_MIN_YIELD_RATIO of the
+# portal's rolling baseline (an EWMA with weight SCRAPE_DRIFT_BASELINE_ALPHA,
+# trusted after SCRAPE_DRIFT_BASELINE_MIN_PAGES pages). SCRAPE_DRIFT_TRIP_PAGES
+# collapsed pages in a row stop the crawl.
+SCRAPE_DRIFT_MIN_YIELD_RATIO = 0.5
+# Per-field override of that ratio for fill rates. None skips the check, for
+# optional fields that are legitimately sparse on some pages.
+SCRAPE_DRIFT_FIELD_MIN_RATIOS = {'tags': None, 'goodreads_url': None}
+SCRAPE_DRIFT_BASELINE_ALPHA = 0.2
+SCRAPE_DRIFT_BASELINE_MIN_PAGES = 5
+SCRAPE_DRIFT_TRIP_PAGES = 2
+# Consecutive fetch failures against one host that stop every crawl of that
+# host, and how long (in seconds) the failure count is remembered.
+SCRAPE_HOST_FAILURE_THRESHOLD = 5
+SCRAPE_HOST_FAILURE_COOLDOWN = 5 * 60
+
+# Modules registering portal definitions, imported at startup.
+SCRAPER_PORTAL_MODULES = ['scraper.portals.quotes']
+# Crawls running at the same time across all workers, shared fairly between
+# the portals that have work. A crawl that can't get a slot is retried after
+# SCRAPE_SCHEDULER_RETRY_DELAY seconds; slots held by crashed workers expire
+# after SCRAPE_PORTAL_SLOT_LEASE seconds (running crawls renew theirs).
+SCRAPE_WORKER_SLOTS = int(os.environ.get('SCRAPE_WORKER_SLOTS', 4))
+SCRAPE_SCHEDULER_RETRY_DELAY = 10
+SCRAPE_PORTAL_SLOT_LEASE = 30 * 60
+
+# URL frontier of a crawl: "memory" keeps it in the worker, "redis" shares it
+# between the workers of a crawl. Workers lease SCRAPE_FRONTIER_BATCH_SIZE URLs
+# at a time; a URL not acked within SCRAPE_FRONTIER_LEASE seconds is handed out
+# again. Redis frontiers expire SCRAPE_FRONTIER_TTL seconds after the last push.
+SCRAPE_FRONTIER_BACKEND = os.environ.get('SCRAPE_FRONTIER_BACKEND', 'memory')
+SCRAPE_FRONTIER_REDIS_URL = f'{REDIS_URL}/2'
+SCRAPE_FRONTIER_BATCH_SIZE = 10
+SCRAPE_FRONTIER_LEASE = 5 * 60
+SCRAPE_FRONTIER_TTL = 24 * 60 * 60
+# Seconds an idle worker waits for other workers to queue more URLs.
+SCRAPE_FRONTIER_POLL_INTERVAL = 1.0
+
+# Crawl sessions are health-checked every SCRAPE_SESSION_CHECK_INTERVAL
+# seconds and logged in again on a fresh connection after
+# SCRAPE_SESSION_MAX_REQUESTS requests.
+SCRAPE_SESSION_CHECK_INTERVAL = 60
+SCRAPE_SESSION_MAX_REQUESTS = 1000
+
+# Budgets of a crawl job, None for no limit: it stops at the next page once
+# it scraped SCRAPE_JOB_MAX_PAGES pages, ran SCRAPE_JOB_MAX_SECONDS seconds,
+# downloaded SCRAPE_JOB_MAX_BYTES bytes or grew the process by
+# SCRAPE_JOB_MAX_MEMORY bytes, keeping what it scraped. API clients may lower
+# the first three. All are opt-in: a crawl stopped by a budget is never a full
+# crawl, so it doesn't record the quotes that left the portal. Crawls poll
+# for a cancellation every SCRAPE_CANCEL_CHECK_INTERVAL seconds; tasks
+# retaining more than SCRAPE_TASK_RETAINED_MEMORY_WARNING bytes once finished
+# are logged.
+SCRAPE_JOB_MAX_PAGES = None
+SCRAPE_JOB_MAX_SECONDS = int(os.environ['SCRAPE_JOB_MAX_SECONDS']) if os.environ.get('SCRAPE_JOB_MAX_SECONDS') else None
+SCRAPE_JOB_MAX_BYTES = None
+SCRAPE_JOB_MAX_MEMORY = int(os.environ['SCRAPE_JOB_MAX_MEMORY']) if os.environ.get('SCRAPE_JOB_MAX_MEMORY') else None
+SCRAPE_CANCEL_CHECK_INTERVAL = 1.0
+SCRAPE_TASK_RETAINED_MEMORY_WARNING = 64 * 1024 * 1024
+
+# Logged-in crawl sessions a worker process keeps for the next crawls of
+# the same accounts (none by default), skipping their login.
+SCRAPE_SESSION_CACHE_SIZE = int(os.environ.get('SCRAPE_SESSION_CACHE_SIZE', 0))
+
+# With SCRAPE_WORKER_WARMUP=1, every worker process imports the crawl stack,
+# runs a first parse and connects to every portal (waiting at most
+# SCRAPE_WARMUP_TIMEOUT seconds) before taking its first task.
+SCRAPE_WORKER_WARMUP = os.environ.get('SCRAPE_WORKER_WARMUP') == '1'
+SCRAPE_WARMUP_TIMEOUT = 5
+
+# Proxies crawl sessions are routed through (comma-separated URLs), none by
+# default. A proxy is quarantined for SCRAPE_PROXY_QUARANTINE_SECONDS after
+# SCRAPE_PROXY_QUARANTINE_FAILURES failed requests in a row. Success rates and
+# latencies are averaged with weight SCRAPE_PROXY_EWMA_ALPHA; proxies without
+# a measured latency are assumed to answer in SCRAPE_PROXY_DEFAULT_LATENCY
+# seconds.
+SCRAPE_PROXIES = [proxy for proxy in os.environ.get('SCRAPE_PROXIES', '').split(',') if proxy]
+SCRAPE_PROXY_QUARANTINE_FAILURES = 3
+SCRAPE_PROXY_QUARANTINE_SECONDS = 5 * 60
+SCRAPE_PROXY_EWMA_ALPHA = 0.3
+SCRAPE_PROXY_DEFAULT_LATENCY = 1.0
+
+# Redis stream the changeset of every finished run is appended to (disabled
+# when unset), trimmed to about SCRAPE_CHANGES_STREAM_MAXLEN entries.
+SCRAPE_CHANGES_STREAM = os.environ.get('SCRAPE_CHANGES_STREAM')
+SCRAPE_CHANGES_STREAM_MAXLEN = 100_000
+SCRAPE_CHANGES_REDIS_URL = f'{REDIS_URL}/2'
+# The changes endpoint stops before the first run still being written, so a
+# run finishing after later ones is not skipped. A run unfinished
+# SCRAPE_RUN_ABANDONED_AFTER seconds after it started is abandoned (its
+# writer died): the changes endpoint finishes it as a partial crawl, serving
+# what it saved, and history compaction prunes the versions of those still
+# unfinished.
+SCRAPE_RUN_ABANDONED_AFTER = 6 * 60 * 60
+
+# Scraper log events (see scraper.logs.EventLogger): the share of the
+# records of an event that is kept, and the records of an event logged per
+# second at most (1 and no limit by default). With SCRAPE_LOG_FORMAT=json the
+# scraper logs JSON lines carrying the fields of every event.
+SCRAPE_LOG_SAMPLE_RATES = {
+    'page.scraped': 0.1,
+}
+SCRAPE_LOG_RATE_LIMITS = {
+    'item.parse_failed': 10,
+    'page.failed': 10,
+    'page.fetch_failed': 10,
+    'page.parse_failed': 10,
+    'quote.save_failed': 10,
+    'retry.failed': 10,
+}
+SCRAPE_LOG_FORMAT = os.environ.get('SCRAPE_LOG_FORMAT', 'text')
+
+if SCRAPE_LOG_FORMAT == 'json':
+    LOGGING = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {'json': {'()': 'scraper.logs.JSONFormatter'}},
+        'handlers': {'json': {'class': 'logging.StreamHandler', 'formatter': 'json'}},
+        'loggers': {'scraper': {'handlers': ['json'], 'level': 'INFO', 'propagate': False}},
+    }
+
+# Tracing of scrapes from the API trigger to the saved run (see
+# scraper.tracing): disabled unless SCRAPE_TRACE_EXPORTER is set, to "memory",
+# "file" (JSON lines in SCRAPE_TRACE_FILE), "otlp" (OTLP/HTTP to a collector
+# at SCRAPE_TRACE_OTLP_ENDPOINT) or the dotted path of an exporter class.
+# SCRAPE_TRACE_SAMPLE_RATE is the share of new traces recorded; tasks follow
+# the decision of the trace they were enqueued from. Spans are exported in
+# batches of SCRAPE_TRACE_EXPORT_BATCH, and at most
+# SCRAPE_TRACE_OTLP_QUEUE_SIZE batches wait for the collector.
+SCRAPE_TRACE_EXPORTER = os.environ.get('SCRAPE_TRACE_EXPORTER') or None
+SCRAPE_TRACE_SAMPLE_RATE = float(os.environ.get('SCRAPE_TRACE_SAMPLE_RATE', '0.01'))
+SCRAPE_TRACE_FILE = os.environ.get('SCRAPE_TRACE_FILE', str(BASE_DIR / 'traces.jsonl'))
+SCRAPE_TRACE_OTLP_ENDPOINT = os.environ.get('SCRAPE_TRACE_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+SCRAPE_TRACE_SERVICE_NAME = os.environ.get('SCRAPE_TRACE_SERVICE_NAME', 'scraper')
+SCRAPE_TRACE_EXPORT_BATCH = 512
+SCRAPE_TRACE_OTLP_QUEUE_SIZE = 64
+
+# Quote history (see data.history): the corpus as of a run can be queried
+# for SCRAPE_HISTORY_RETAIN_DAYS, and past SCRAPE_HISTORY_FULL_DAYS only as
+# of the last run of each day. The history endpoint returns HISTORY_PAGE_SIZE
+# quotes per page by default and HISTORY_MAX_PAGE_SIZE at most.
+SCRAPE_HISTORY_RETAIN_DAYS = 365
+SCRAPE_HISTORY_FULL_DAYS = 30
+HISTORY_PAGE_SIZE = 1000
+HISTORY_MAX_PAGE_SIZE = 10_000
+
+# Quote search: default and largest page size, and number of values
+# returned per facet.
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+SEARCH_FACET_LIMIT = 20
+
+# Seconds the tag and author statistics endpoints cache their responses
+# (they are invalidated as soon as a run changes the statistics), and the
+# default and largest number of rows they return.
+STATS_CACHE_TIMEOUT = 60 * 60
+STATS_PAGE_SIZE = 100
+STATS_MAX_PAGE_SIZE = 1000
+
+# Responses smaller than this many bytes are not compressed.
+GZIP_MIN_RESPONSE_SIZE = 1024